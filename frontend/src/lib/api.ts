@@ -511,6 +511,7 @@ export interface LifecycleEvent {
 
 export interface FollowedLegsEventsResponse {
   events: LifecycleEvent[];
+  total?: number | null;  // Events in the requested range (/dag/events only)
 }
 
 export async function fetchFollowedLegsEvents(
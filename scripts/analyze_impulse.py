@@ -26,7 +26,7 @@ from typing import Dict, List, Optional, Tuple
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from swing_analysis.dag import LegDetector
+from swing_analysis.dag import LegDetector, ohlc_arrays
 from swing_analysis.dag.leg import Leg
 from swing_analysis.dag.range_distribution import RollingBinDistribution
 from swing_analysis.detection_config import DetectionConfig
@@ -214,6 +214,7 @@ def main():
     print(f"\nLoading {data_file}...")
     df, gaps = load_ohlc(str(data_file))
     print(f"Loaded {len(df)} bars")
+    bar_arrays = ohlc_arrays(df)
 
     # Initialize detector and reference layer
     config = DetectionConfig.default()
@@ -248,18 +249,8 @@ def main():
     processed = 0
     last_percent = 0
 
-    for idx, row in df.iterrows():
-        bar = Bar(
-            index=processed,
-            timestamp=int(row.name.timestamp()),
-            open=float(row['open']),
-            high=float(row['high']),
-            low=float(row['low']),
-            close=float(row['close'])
-        )
-
-        # Process bar
-        events = detector.process_bar(bar)
+    def observe_bar(bar: Bar, events: list) -> None:
+        nonlocal processed, last_percent
 
         # Get current legs
         active_legs = detector.state.active_legs
@@ -349,6 +340,8 @@ def main():
             print(f"  {pct}% ({processed} bars)")
             last_percent = pct
 
+    detector.process_bars(*bar_arrays, on_bar=observe_bar)
+
     # Collect final stats from all legs that were ever formed
     print("\nCollecting statistics from formed legs...")
 
@@ -361,17 +354,10 @@ def main():
     warmup_bars = 5000  # Wait for bin distribution to stabilize
 
     processed = 0
-    for idx, row in df.iterrows():
-        bar = Bar(
-            index=processed,
-            timestamp=int(row.name.timestamp()),
-            open=float(row['open']),
-            high=float(row['high']),
-            low=float(row['low']),
-            close=float(row['close'])
-        )
-
-        events = detector2.process_bar(bar)
+
+    def collect_formed(bar: Bar, events: list) -> None:
+        nonlocal processed
+
         active_legs = detector2.state.active_legs
         ref_layer2.update(active_legs, bar, build_response=False)
 
@@ -411,6 +397,8 @@ def main():
 
         processed += 1
 
+    detector2.process_bars(*bar_arrays, on_bar=collect_formed)
+
     # Sort all_formed_impulses for percentile computation
     sorted_impulses = sorted(all_formed_impulses)
 
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark format_a datetime parsing: fixed-width fast path vs pd.to_datetime.
+
+Writes a synthetic format_a file (1m bars, weekdays only, a mix of HH:MM:SS
+and HH:MM times), reads its date/time columns the way load_ohlc() does, and
+times _parse_format_a_timestamps() against the previous
+pd.to_datetime(format='mixed', dayfirst=True) path, checking both agree.
+A full load_ohlc() (bar cache off) is timed as well.
+
+Usage:
+    python scripts/benchmark_format_a_parse.py
+    python scripts/benchmark_format_a_parse.py --rows 1000000 --keep /tmp/format_a_1m.csv
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from data.ohlc_loader import _parse_format_a_timestamps, load_ohlc
+
+
+def write_format_a(path: Path, rows: int, chunk: int = 1_000_000) -> None:
+    """Synthetic 1m format_a bars; every tenth row uses HH:MM."""
+    minutes = pd.date_range("2010-01-04", periods=int(rows * 1.5) + 1440, freq="1min")
+    minutes = minutes[minutes.weekday < 5][:rows]
+    rng = np.random.default_rng(0)
+    close = np.round(1000 + np.cumsum(rng.normal(0, 0.25, rows)) * 4) / 4
+    with open(path, "w") as f:
+        for start in range(0, rows, chunk):
+            stamps = minutes[start:start + chunk]
+            dates = stamps.strftime("%d/%m/%Y")
+            times = stamps.strftime("%H:%M:%S").to_numpy(dtype=object)
+            short = np.arange(start, start + len(stamps)) % 10 == 0
+            times[short] = [t[:5] for t in times[short]]
+            prices = close[start:start + chunk]
+            f.writelines(
+                f"{d};{t};{p};{p + 0.5};{p - 0.5};{p};100\n"
+                for d, t, p in zip(dates, times, prices.tolist())
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark format_a datetime parsing")
+    parser.add_argument("--rows", type=int, default=5_000_000,
+                        help="Rows in the synthetic file (default: 5000000)")
+    parser.add_argument("--keep", type=str, default=None,
+                        help="Write the synthetic file here and keep it")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(args.keep) if args.keep else Path(tmp) / "format_a.csv"
+        start = time.perf_counter()
+        write_format_a(path, args.rows)
+        print(f"wrote {args.rows:,} rows ({path.stat().st_size / 1e6:.0f} MB) "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        columns = pd.read_csv(
+            path, sep=";", header=None, usecols=[0, 1], names=["date", "time"],
+            dtype={"date": str, "time": str}, engine="c",
+        )
+
+        start = time.perf_counter()
+        fast = _parse_format_a_timestamps(columns["date"], columns["time"])
+        fast_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        mixed = pd.to_datetime(
+            columns["date"] + " " + columns["time"], format="mixed", dayfirst=True, utc=True
+        )
+        mixed_seconds = time.perf_counter() - start
+
+        assert (pd.DatetimeIndex(mixed) == fast).all(), "parsers disagree"
+        print(f"{'parser':<28} {'seconds':>9} {'rows/s':>14}")
+        for name, seconds in (("fixed-width fast path", fast_seconds),
+                              ("pd.to_datetime(mixed)", mixed_seconds)):
+            print(f"{name:<28} {seconds:>9.2f} {args.rows / seconds:>14,.0f}")
+        print(f"speedup: {mixed_seconds / fast_seconds:.0f}x")
+
+        start = time.perf_counter()
+        load_ohlc(str(path), use_cache=False)
+        print(f"load_ohlc (no bar cache): {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
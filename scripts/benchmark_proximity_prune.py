@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for origin-proximity pruning (#306, #319).
+
+Times LegPruner.apply_origin_proximity_prune() on a single pivot group of
+100, 1k and 10k legs for both the 'oldest' and 'counter_trend' strategies.
+Legs share one pivot and have evenly spaced origins, the worst case for
+cluster building (everything chains into a few large clusters).
+
+Usage:
+    python scripts/benchmark_proximity_prune.py
+    python scripts/benchmark_proximity_prune.py --sizes 100 1000 10000 --repeat 3
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from swing_analysis.detection_config import DetectionConfig
+from swing_analysis.dag.leg import Leg
+from swing_analysis.dag.leg_pruner import LegPruner
+from swing_analysis.dag.state import DetectorState
+from swing_analysis.types import Bar
+
+
+def make_pivot_group(count: int) -> List[Leg]:
+    """Bull legs with origins at bars 0..count-1 sharing one pivot."""
+    pivot_index = count + 100
+    return [
+        Leg(
+            direction='bull',
+            origin_price=Decimal(str(90 + i * 0.001)),
+            origin_index=i,
+            pivot_price=Decimal("100.0"),
+            pivot_index=pivot_index,
+        )
+        for i in range(count)
+    ]
+
+
+def time_prune(strategy: str, count: int, threshold: float) -> float:
+    """Seconds for one proximity prune pass over a fresh pivot group."""
+    config = DetectionConfig.default().with_origin_prune(threshold, threshold, strategy)
+    pruner = LegPruner(config)
+    state = DetectorState()
+    state.active_legs = make_pivot_group(count)
+    bar = Bar(index=count + 200, timestamp=0, open=95.0, high=100.0, low=90.0, close=95.0)
+
+    start = time.perf_counter()
+    pruner.apply_origin_proximity_prune(state, 'bull', bar, datetime.now())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark origin-proximity pruning scaling")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='Legs per pivot group (default: 100 1000 10000)')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Range and time threshold (default: 0.10)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per size; best time is reported (default: 3)')
+    args = parser.parse_args()
+
+    print(f"{'strategy':<15} {'legs':>7} {'best (s)':>10} {'vs previous':>12}")
+    for strategy in ('oldest', 'counter_trend'):
+        previous = None
+        for count in args.sizes:
+            best = min(time_prune(strategy, count, args.threshold) for _ in range(args.repeat))
+            growth = f"{best / previous:.1f}x" if previous else ""
+            print(f"{strategy:<15} {count:>7} {best:>10.4f} {growth:>12}")
+            previous = best
+
+
+if __name__ == "__main__":
+    main()
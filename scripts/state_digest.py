@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Detector state digests: golden-file check and two-config comparison.
+
+--check runs config A over an OHLC file and compares its digests with a
+stored golden file (--write regenerates it). Every optimization of
+LegDetector, LegPruner or ReferenceLayer should leave this check clean.
+
+Without --check/--write, configs A and B run side by side and the first
+bar (and leg) where their detector or reference layer state differs is
+reported, e.g. to see where a threshold change starts to matter.
+
+Configs are comma-separated DetectionConfig overrides on the default
+config (e.g. "max_turns=5,stale_extension_threshold=2.5").
+
+Usage:
+    python scripts/state_digest.py test_data/es-30m-demo.csv --b max_turns=5
+    python scripts/state_digest.py test_data/es-30m-demo.csv --check test_data/es-30m-demo.digests.json
+    python scripts/state_digest.py test_data/es-30m-demo.csv --write test_data/es-30m-demo.digests.json
+"""
+
+import argparse
+import dataclasses
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from data.ohlc_loader import load_ohlc
+from swing_analysis.dag.batch import bars_from_arrays, ohlc_arrays
+from swing_analysis.detection_config import DetectionConfig
+from swing_analysis.state_digest import (
+    DEFAULT_EVERY,
+    DIGEST_VERSION,
+    find_divergence,
+    run_digests,
+)
+
+
+def parse_config(spec: str) -> DetectionConfig:
+    """DetectionConfig from "name=value,..." overrides of the default."""
+    config = DetectionConfig.default()
+    if not spec:
+        return config
+    types = {f.name: f.type for f in dataclasses.fields(DetectionConfig)}
+    overrides = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        if name not in types:
+            raise SystemExit(f"Unknown DetectionConfig field: {name}")
+        current = getattr(config, name)
+        if value.strip().lower() == "none":
+            overrides[name] = None
+        elif isinstance(current, str):
+            overrides[name] = value.strip()
+        elif isinstance(current, int):
+            overrides[name] = int(value)
+        else:
+            overrides[name] = float(value)
+    return dataclasses.replace(config, **overrides)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check detector state digests against a golden file, or compare two configs"
+    )
+    parser.add_argument('file', help='OHLC data file')
+    parser.add_argument('--a', default='', help='Config A overrides (default: default config)')
+    parser.add_argument('--b', default='', help='Config B overrides, compared with A (default: default config)')
+    parser.add_argument('--bars', type=int, default=None, help='Only the first N bars (default: all)')
+    parser.add_argument('--every', type=int, default=DEFAULT_EVERY,
+                        help=f'Bars between digests (default: {DEFAULT_EVERY})')
+    parser.add_argument('--check', metavar='GOLDEN', help='Check config A against a golden file')
+    parser.add_argument('--write', metavar='GOLDEN', help='Write config A digests to a golden file')
+    args = parser.parse_args()
+
+    df, _ = load_ohlc(args.file)
+    if args.bars is not None:
+        df = df.head(args.bars)
+    bars = bars_from_arrays(*ohlc_arrays(df))
+    config_a = parse_config(args.a)
+    start = time.perf_counter()
+
+    if args.write or args.check:
+        digests = run_digests(bars, config_a, every=args.every)
+        if args.write:
+            golden = {
+                "version": DIGEST_VERSION,
+                "file": Path(args.file).name,
+                "bars": len(bars),
+                "every": args.every,
+                "config": config_a.fingerprint(),
+                "digests": {str(bar): digest for bar, digest in digests.items()},
+            }
+            Path(args.write).write_text(json.dumps(golden, indent=1) + "\n")
+            print(f"Wrote {len(digests)} digests to {args.write} "
+                  f"({time.perf_counter() - start:.1f}s)")
+            return 0
+
+        golden = json.loads(Path(args.check).read_text())
+        if golden["version"] != DIGEST_VERSION or golden["config"] != config_a.fingerprint():
+            print("Golden file was written with another digest version or config")
+            return 2
+        for bar, expected in golden["digests"].items():
+            actual = digests.get(int(bar))
+            if actual is not None and actual != expected:
+                print(f"Digest mismatch after bar {bar}")
+                return 1
+        print(f"{len(digests)} digests match {args.check} ({time.perf_counter() - start:.1f}s)")
+        return 0
+
+    divergence = find_divergence(bars, config_a, parse_config(args.b), every=args.every)
+    if divergence is None:
+        print(f"Identical over {len(bars)} bars ({time.perf_counter() - start:.1f}s)")
+        return 0
+    print(divergence.describe())
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
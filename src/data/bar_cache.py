@@ -0,0 +1,313 @@
+"""
+On-disk cache of parsed OHLC bars behind load_ohlc() and load_ohlc_window().
+
+Parsing a multi-million-row CSV with pandas (format_a datetimes in
+particular) takes seconds, and the replay server loads the same file several
+times per session. The first full load_ohlc() of a file writes the parsed
+bars next to a small index; later loads memory-map them instead.
+
+One entry per data file (<root>/<hash of the resolved path>/):
+
+    meta.json       file path, size, mtime_ns, ctime_ns, SHA-256 of its
+                    bytes, counts
+    timestamp.npy   int64 UTC nanoseconds  \\
+    open.npy ...    float64 open/high/low/close, int64 volume
+                    (every data row, in file order, before cleaning)
+    order.npy       rows load_ohlc() keeps, in output order (absent when it
+                    keeps every row in file order)
+    gaps.npy        GAP_DTYPE records (start, end, duration_minutes)
+
+Raw rows are kept in file order so load_ohlc_window() can slice the same
+rows it would read from the CSV and clean them exactly as before.
+
+An entry is valid while the file's size, mtime and ctime match. If only
+the timestamps changed (file touched or copied), the content hash decides
+and the entry is kept if the bytes are unchanged. A size change rebuilds it
+on the next full load. Hashing on every load would cost a full read of the
+file, which is what the cache avoids, so the stat check is trusted: an
+edit that keeps the size and lands within the filesystem's timestamp
+granularity of the cached write goes unnoticed (invalidate() drops the
+entry by hand). ctime cannot be set back by tools that preserve mtime
+(cp -p, rsync -t), so those rewrites still fall back to the hash.
+
+Files smaller than MIN_CACHED_FILE_BYTES are not cached: they parse faster
+than the cache round trip is worth. Entries are evicted least recently
+used first once the cache exceeds its disk budget.
+
+The cache is off until configured: enable it with configure_bar_cache()
+(the replay server does, at user_cache_dir("bar_cache")). Bypass it per
+call with load_ohlc(..., use_cache=False).
+
+Example:
+    >>> configure_bar_cache(user_cache_dir("bar_cache"))
+    >>> df, gaps = load_ohlc("test_data/es-30m-demo.csv")   # parses, fills cache
+    >>> df, gaps = load_ohlc("test_data/es-30m-demo.csv")   # memory-mapped
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the entry layout or the cleaning rules change
+CACHE_FORMAT_VERSION = 2
+DEFAULT_DISK_BUDGET_BYTES = 2 * 1024 * 1024 * 1024
+MIN_CACHED_FILE_BYTES = 1024 * 1024
+
+COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+GAP_DTYPE = np.dtype([('start', '<i8'), ('end', '<i8'), ('duration', '<f8')])
+
+
+class CachedBars(NamedTuple):
+    """A valid cache entry, columns memory-mapped."""
+    raw: Dict[str, np.ndarray]
+    order: Optional[np.ndarray]
+    gaps: np.ndarray
+    duplicates_removed: int
+    invalid_dropped: int
+
+    def __len__(self) -> int:
+        return len(self.raw['timestamp'])
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 hex digest of a file's bytes."""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _touch(entry: Path) -> None:
+    """Mark an entry as used now: meta.json's mtime is its last use (for LRU eviction)."""
+    # An explicit time: file timestamps come from a coarse clock and would tie
+    now = time.time_ns()
+    try:
+        os.utime(entry / 'meta.json', ns=(now, now))
+    except OSError:
+        pass
+
+
+def gaps_to_table(gaps: List[Tuple[pd.Timestamp, pd.Timestamp, float]]) -> np.ndarray:
+    """Pack load_ohlc() gaps into GAP_DTYPE records."""
+    table = np.zeros(len(gaps), dtype=GAP_DTYPE)
+    if gaps:
+        starts, ends, durations = zip(*gaps)
+        table['start'] = [start.value for start in starts]
+        table['end'] = [end.value for end in ends]
+        table['duration'] = durations
+    return table
+
+
+def utc_index(nanoseconds: np.ndarray) -> pd.DatetimeIndex:
+    """UTC DatetimeIndex of int64 epoch nanoseconds."""
+    # A datetime64 view skips pd.to_datetime's per-element conversion of ints
+    values = np.ascontiguousarray(nanoseconds, dtype=np.int64).view('datetime64[ns]')
+    return pd.DatetimeIndex(values).tz_localize('UTC')
+
+
+def gaps_from_table(table: np.ndarray) -> List[Tuple[pd.Timestamp, pd.Timestamp, float]]:
+    """Unpack GAP_DTYPE records into load_ohlc() gap tuples."""
+    starts = utc_index(table['start']).to_list()
+    ends = utc_index(table['end']).to_list()
+    return list(zip(starts, ends, table['duration'].tolist()))
+
+
+class BarCache:
+    """
+    Directory of cached bar files, one entry per data file path.
+
+    Args:
+        directory: Cache root (created on first write).
+        disk_budget_bytes: Total size of cached entries; least recently used
+            entries are deleted to stay under it (the newest is always kept).
+    """
+
+    def __init__(self, directory: Path, disk_budget_bytes: int = DEFAULT_DISK_BUDGET_BYTES):
+        if disk_budget_bytes < 0:
+            raise ValueError(f"Bar cache disk budget must be >= 0, got {disk_budget_bytes}")
+        self.directory = Path(directory)
+        self.disk_budget_bytes = disk_budget_bytes
+
+    def entry_dir(self, filepath: str) -> Path:
+        """Entry directory for a data file."""
+        resolved = str(Path(filepath).resolve())
+        return self.directory / hashlib.sha256(resolved.encode()).hexdigest()[:24]
+
+    def _read_meta(self, entry: Path) -> Optional[Dict]:
+        try:
+            meta = json.loads((entry / 'meta.json').read_text())
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != CACHE_FORMAT_VERSION:
+            return None
+        return meta
+
+    def get(self, filepath: str) -> Optional[CachedBars]:
+        """
+        The cached bars for a file, or None if missing or stale.
+
+        Raises:
+            FileNotFoundError: If the data file does not exist.
+        """
+        stat = os.stat(filepath)
+        entry = self.entry_dir(filepath)
+        meta = self._read_meta(entry)
+        if meta is None or meta['size'] != stat.st_size:
+            return None
+        if (meta['mtime_ns'], meta['ctime_ns']) != (stat.st_mtime_ns, stat.st_ctime_ns):
+            # Touched or copied: still valid if the bytes are the same
+            if file_sha256(filepath) != meta['sha256']:
+                return None
+            meta['mtime_ns'] = stat.st_mtime_ns
+            meta['ctime_ns'] = stat.st_ctime_ns
+            try:
+                _write_atomic(entry / 'meta.json', json.dumps(meta).encode())
+            except OSError:
+                pass
+
+        try:
+            raw = {name: np.load(entry / f'{name}.npy', mmap_mode='r') for name in COLUMNS}
+            order = np.load(entry / 'order.npy', mmap_mode='r') if meta['reordered'] else None
+            gaps = np.load(entry / 'gaps.npy')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable bar cache entry {entry}: {e}")
+            return None
+        if len(raw['timestamp']) != meta['rows']:
+            return None
+        _touch(entry)
+        return CachedBars(
+            raw=raw,
+            order=order,
+            gaps=gaps,
+            duplicates_removed=meta['duplicates_removed'],
+            invalid_dropped=meta['invalid_dropped'],
+        )
+
+    def put(
+        self,
+        filepath: str,
+        raw: Dict[str, np.ndarray],
+        order: np.ndarray,
+        gaps: np.ndarray,
+        duplicates_removed: int,
+        invalid_dropped: int,
+    ) -> None:
+        """
+        Store a file's parsed bars.
+
+        Args:
+            filepath: Data file the bars were parsed from.
+            raw: COLUMNS arrays of every data row, in file order.
+            order: Rows load_ohlc() keeps, in output order.
+            gaps: GAP_DTYPE gap table.
+            duplicates_removed: Duplicate timestamps load_ohlc() dropped.
+            invalid_dropped: Invalid OHLC rows load_ohlc() dropped.
+        """
+        stat = os.stat(filepath)
+        entry = self.entry_dir(filepath)
+        entry.mkdir(parents=True, exist_ok=True)
+        # Readers only trust the columns once meta.json is back
+        (entry / 'meta.json').unlink(missing_ok=True)
+
+        reordered = not np.array_equal(order, np.arange(len(raw['timestamp'])))
+        for name in COLUMNS:
+            np.save(entry / f'{name}.npy', np.ascontiguousarray(raw[name]))
+        if reordered:
+            np.save(entry / 'order.npy', order.astype(np.int64))
+        else:
+            (entry / 'order.npy').unlink(missing_ok=True)
+        np.save(entry / 'gaps.npy', gaps)
+
+        meta = {
+            'version': CACHE_FORMAT_VERSION,
+            'path': str(Path(filepath).resolve()),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'ctime_ns': stat.st_ctime_ns,
+            'sha256': file_sha256(filepath),
+            'rows': len(raw['timestamp']),
+            'reordered': reordered,
+            'duplicates_removed': duplicates_removed,
+            'invalid_dropped': invalid_dropped,
+        }
+        _write_atomic(entry / 'meta.json', json.dumps(meta).encode())
+        _touch(entry)
+        self._evict(keep=entry)
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the cached entries."""
+        return sum(size for _, _, size in self._scan())
+
+    def _scan(self) -> List[Tuple[Path, int, int]]:
+        """(entry, last use, bytes) of every entry directory."""
+        if not self.directory.exists():
+            return []
+        entries = []
+        for entry in self.directory.iterdir():
+            if not entry.is_dir():
+                continue
+            files = []
+            try:
+                files = [path.stat() for path in entry.iterdir()]
+                last_used = (entry / 'meta.json').stat().st_mtime_ns
+            except OSError:
+                # Interrupted write: first to go
+                last_used = 0
+            entries.append((entry, last_used, sum(f.st_size for f in files)))
+        return entries
+
+    def _evict(self, keep: Optional[Path] = None) -> None:
+        """Delete least recently used entries (never keep) until under the disk budget."""
+        entries = self._scan()
+        total = sum(size for _, _, size in entries)
+        for entry, _, size in sorted(entries, key=lambda item: item[1]):
+            if total <= self.disk_budget_bytes:
+                break
+            if entry == keep:
+                continue
+            logger.info(f"Evicting bar cache entry {entry.name}")
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def invalidate(self, filepath: str) -> None:
+        """Drop a file's entry."""
+        (self.entry_dir(filepath) / 'meta.json').unlink(missing_ok=True)
+
+
+# Process-wide bar cache (None = disabled)
+_bar_cache: Optional[BarCache] = None
+
+
+def configure_bar_cache(
+    directory: Optional[Path],
+    disk_budget_bytes: int = DEFAULT_DISK_BUDGET_BYTES,
+) -> None:
+    """Use a cache directory for load_ohlc(); None or a zero budget disables the cache."""
+    global _bar_cache
+    if directory is None or disk_budget_bytes == 0:
+        _bar_cache = None
+    else:
+        _bar_cache = BarCache(directory, disk_budget_bytes)
+
+
+def get_bar_cache() -> Optional[BarCache]:
+    """The configured bar cache, or None when disabled."""
+    return _bar_cache
@@ -0,0 +1,228 @@
+"""
+Array-backed table of a data file's bars, parsed once per session load.
+
+/api/session/restart used to read the same file four times: load_ohlc() to
+diff the first two timestamps for the resolution, get_file_metrics() for the
+bar count, load_ohlc() again to find the start_date offset, and init_app()
+to build the session. load_bar_table() parses the file once (or memory-maps
+it from the bar cache, see bar_cache.py) and the table answers all of those:
+
+    resolution_minutes()   median spacing of the bars
+    metrics()              FileMetrics of the loaded bars
+    row_at_or_after()      start offset, by binary search on the timestamps
+    arrays()               OHLC arrays of a window, for init_app()
+
+Rows are load_ohlc() rows: sorted, without duplicate or invalid bars.
+
+When the bar cache does not hold the file, load_bar_window() skips the full
+parse: it seeks to the start timestamp through the row index (see
+row_index.py) and parses only the session window. The table then holds
+rows [first_row, first_row + len(table)) of the file and total_bars is
+the file's row count. That path is only taken for files the row index
+found clean, whose file rows are exactly the load_ohlc() rows, so offsets
+and bar counts agree with a full load.
+
+Example:
+    >>> table = load_bar_table("test_data/es-30m-demo.csv")
+    >>> offset = table.row_at_or_after(pd.Timestamp("2020-03-02", tz="UTC"))
+    >>> init_app(table.filepath, table.resolution_minutes(), window_offset=offset, bar_table=table)
+"""
+
+import os
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .bar_cache import get_bar_cache
+from .ohlc_loader import (
+    FileMetrics,
+    detect_format,
+    find_row_at_or_after,
+    get_file_metrics,
+    load_ohlc,
+    load_ohlc_window,
+    seekable_rows,
+)
+
+# Resolutions the replay view supports, in minutes (1m to 1d)
+VALID_RESOLUTIONS = (1, 5, 15, 30, 60, 240, 1440)
+DEFAULT_RESOLUTION = 5
+
+
+class BarTable(NamedTuple):
+    """Bars of a data file as contiguous arrays."""
+    filepath: str
+    timestamps: np.ndarray  # int64 UTC nanoseconds, ascending
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    gaps: List[Tuple[pd.Timestamp, pd.Timestamp, float]]
+    # File row of timestamps[0], and the file's row count when the table
+    # only holds a window of it (None: the table holds every bar)
+    first_row: int = 0
+    file_rows: Optional[int] = None
+
+    @classmethod
+    def from_frame(
+        cls,
+        filepath: str,
+        df: pd.DataFrame,
+        gaps: Optional[List[Tuple[pd.Timestamp, pd.Timestamp, float]]] = None,
+        first_row: int = 0,
+        file_rows: Optional[int] = None,
+    ) -> 'BarTable':
+        """Table of a load_ohlc() or load_ohlc_window() DataFrame (naive timestamps are taken as UTC)."""
+        return cls(
+            filepath=filepath,
+            timestamps=pd.DatetimeIndex(df.index).as_unit('ns').asi8,
+            open=df['open'].to_numpy(dtype=np.float64),
+            high=df['high'].to_numpy(dtype=np.float64),
+            low=df['low'].to_numpy(dtype=np.float64),
+            close=df['close'].to_numpy(dtype=np.float64),
+            volume=df['volume'].to_numpy(dtype=np.int64),
+            gaps=gaps if gaps is not None else [],
+            first_row=first_row,
+            file_rows=file_rows,
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def total_bars(self) -> int:
+        """Bars in the file (rows, for a window table)."""
+        return self.file_rows if self.file_rows is not None else len(self)
+
+    def resolution_minutes(self) -> int:
+        """
+        Resolution from the median spacing of the bars.
+
+        The median ignores session and weekend gaps as well as a missing bar
+        at the start of the file. Snaps to the closest of VALID_RESOLUTIONS;
+        DEFAULT_RESOLUTION if the table has fewer than two distinct
+        timestamps.
+        """
+        spacing = np.diff(self.timestamps)
+        spacing = spacing[spacing > 0]
+        if not len(spacing):
+            return DEFAULT_RESOLUTION
+        minutes = float(np.median(spacing)) / (60 * 10**9)
+        return min(VALID_RESOLUTIONS, key=lambda x: abs(x - minutes))
+
+    def metrics(self) -> FileMetrics:
+        """
+        FileMetrics of the loaded bars (naive UTC datetimes, as get_file_metrics()).
+
+        For a window table, the file's metrics from get_file_metrics().
+        """
+        if self.file_rows is not None:
+            return get_file_metrics(self.filepath)
+        first = last = None
+        if len(self):
+            first = pd.Timestamp(int(self.timestamps[0])).to_pydatetime()
+            last = pd.Timestamp(int(self.timestamps[-1])).to_pydatetime()
+        return FileMetrics(
+            total_bars=len(self),
+            file_size_bytes=os.path.getsize(self.filepath),
+            format=detect_format(self.filepath),
+            first_timestamp=first,
+            last_timestamp=last,
+        )
+
+    def row_at_or_after(self, timestamp: pd.Timestamp) -> Optional[int]:
+        """
+        File row of the first bar at or after a timestamp (naive timestamps
+        are taken as UTC).
+
+        Returns None if every bar of the table is earlier.
+        """
+        timestamp = pd.Timestamp(timestamp)
+        timestamp = timestamp.tz_localize('UTC') if timestamp.tz is None else timestamp.tz_convert('UTC')
+        row = int(np.searchsorted(self.timestamps, timestamp.as_unit('ns').value, side='left'))
+        return self.first_row + row if row < len(self) else None
+
+    def arrays(self, start: int = 0, stop: Optional[int] = None) -> Tuple[np.ndarray, ...]:
+        """
+        (timestamps, open, high, low, close) of file rows [start, stop), with
+        int64 Unix-second timestamps, as ohlc_arrays() builds them.
+
+        Raises:
+            ValueError: If start is before the table's first row.
+        """
+        if start < self.first_row:
+            raise ValueError(f"Row {start} is before the table's first row {self.first_row}")
+        window = slice(start - self.first_row, None if stop is None else stop - self.first_row)
+        return (
+            self.timestamps[window] // 10**9,
+            self.open[window],
+            self.high[window],
+            self.low[window],
+            self.close[window],
+        )
+
+
+def load_bar_table(filepath: str, use_cache: bool = True) -> BarTable:
+    """
+    Parse a data file into a BarTable.
+
+    Args:
+        filepath: Path to the CSV file.
+        use_cache: Whether to read and fill the bar cache.
+
+    Raises:
+        FileNotFoundError, PermissionError, ValueError.
+    """
+    df, gaps = load_ohlc(filepath, use_cache=use_cache)
+    return BarTable.from_frame(filepath, df, gaps)
+
+
+def load_bar_window(
+    filepath: str,
+    start: Optional[pd.Timestamp],
+    num_rows: int,
+    use_cache: bool = True,
+) -> Optional[BarTable]:
+    """
+    Bars from a start timestamp on, without parsing the whole file.
+
+    Seeks to the first bar at or after start through the row index and
+    parses num_rows rows from there. The table is empty (first_row is the
+    row count) when every bar is earlier than start.
+
+    Args:
+        filepath: Path to the CSV file.
+        start: First timestamp to load (None: the start of the file; naive
+            timestamps are taken as UTC).
+        num_rows: Rows to load.
+        use_cache: Whether to use the bar cache and row index.
+
+    Returns:
+        The window table, or None when load_bar_table() is the better path:
+        the bar cache holds the file (memory-mapped, no parse), or the row
+        index is disabled or the file needs load_ohlc()'s cleanup (see
+        seekable_rows()).
+
+    Raises:
+        FileNotFoundError, PermissionError, ValueError.
+    """
+    if not use_cache:
+        return None
+    cache = get_bar_cache()
+    if cache is not None and cache.get(filepath) is not None:
+        return None
+    rows = seekable_rows(filepath)
+    if rows is None:
+        return None
+
+    first_row = 0 if start is None else find_row_at_or_after(filepath, start)
+    if first_row is None:
+        prices = np.empty(0, dtype=np.float64)
+        return BarTable(
+            filepath, np.empty(0, dtype=np.int64), prices, prices, prices, prices,
+            np.empty(0, dtype=np.int64), [], first_row=rows, file_rows=rows,
+        )
+    df, gaps = load_ohlc_window(filepath, first_row, num_rows)
+    return BarTable.from_frame(filepath, df, gaps, first_row=first_row, file_rows=rows)
@@ -0,0 +1,27 @@
+"""
+Default location of the on-disk caches (bar cache, row index, file index,
+run cache).
+
+Caches live outside the repository, in the user's cache directory:
+
+    $FRACTAL_CACHE_DIR                          if set
+    $XDG_CACHE_HOME/fractal-market-simulator    else, if set
+    ~/.cache/fractal-market-simulator           otherwise
+
+The library never writes there on its own: each cache is disabled until
+configured, and the replay server (main.py) enables them at this location.
+"""
+
+import os
+from pathlib import Path
+
+
+def user_cache_dir(name: str = "") -> Path:
+    """Directory for one cache (or the cache root when name is empty)."""
+    root = os.environ.get("FRACTAL_CACHE_DIR")
+    if root:
+        base = Path(root)
+    else:
+        xdg = os.environ.get("XDG_CACHE_HOME")
+        base = (Path(xdg) if xdg else Path.home() / ".cache") / "fractal-market-simulator"
+    return base / name if name else base
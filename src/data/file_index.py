@@ -0,0 +1,288 @@
+"""
+Cached metadata of the data files listed by /api/files.
+
+/api/files ran get_file_metrics() on every CSV in the data directory on
+every request: format detection, a full byte scan to count lines and two
+timestamp samples per file. With a directory of large archives the file
+picker was slow and, in multi-tenant mode, burned CPU for every user.
+
+FileIndex keeps one FileMetadata per file (bar count, date range,
+resolution, format) in memory, keyed by resolved path and validated by
+size and mtime. Requests are answered from memory; each one starts a
+background refresh (at most one at a time, and no more often than every
+refresh_interval seconds) that stats the directory and only re-reads files
+that were added or changed. Only the first listing of a directory waits
+for a refresh. With background=False due refreshes run in the request
+instead; close() waits for a running refresh and stops starting new ones.
+
+Entries can also be persisted to a JSON file, so a restart only pays the
+stat calls. The process-wide index is in memory only until configured
+with a path (the replay server uses user_cache_dir("file_index.json")).
+
+Files get_file_metrics() rejects are remembered by size and mtime too, so
+they are not retried until they change.
+
+Example:
+    >>> index = FileIndex(user_cache_dir("file_index.json"))
+    >>> files = index.files(Path("data"), infer_resolution_from_filename)
+    >>> index.close()
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .ohlc_loader import get_file_metrics
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the entry fields change
+INDEX_FORMAT_VERSION = 1
+DEFAULT_REFRESH_INTERVAL = 2.0
+
+
+class FileMetadata(NamedTuple):
+    """Listing metadata of one data file."""
+    path: str
+    name: str
+    size: int
+    mtime_ns: int
+    total_bars: int
+    format: str
+    resolution: str
+    first_timestamp: Optional[datetime]
+    last_timestamp: Optional[datetime]
+
+    def to_dict(self) -> Dict:
+        data = self._asdict()
+        for key in ('first_timestamp', 'last_timestamp'):
+            data[key] = data[key].isoformat() if data[key] else None
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'FileMetadata':
+        data = dict(data)
+        for key in ('first_timestamp', 'last_timestamp'):
+            data[key] = datetime.fromisoformat(data[key]) if data[key] else None
+        return cls(**data)
+
+
+def _listed_files(directory: Path) -> List[Path]:
+    """CSV files of a directory in listing order, skipping hidden files."""
+    return [
+        csv_file for csv_file in sorted(directory.glob("*.csv"))
+        if csv_file.is_file() and not csv_file.name.startswith('.')
+    ]
+
+
+class FileIndex:
+    """
+    Metadata of the CSV files of a data directory, served from memory.
+
+    Args:
+        index_path: JSON file persisting the entries, or None to keep them
+            in memory only.
+        refresh_interval: Minimum seconds between refreshes.
+        background: Whether due refreshes run in a background thread (the
+            listing is answered from memory meanwhile) or in the request.
+    """
+
+    def __init__(
+        self,
+        index_path: Optional[Path],
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        background: bool = True,
+    ):
+        self.index_path = Path(index_path) if index_path is not None else None
+        self.refresh_interval = refresh_interval
+        self.background = background
+        self._closed = False
+        self._entries: Dict[str, FileMetadata] = {}
+        self._failures: Dict[str, Tuple[int, int]] = {}
+        self._loaded = False
+        # Listing of the last refreshed directory
+        self._directory: Optional[Path] = None
+        self._listing: List[FileMetadata] = []
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def files(self, directory: Path, resolution_for: Callable[[str], str]) -> List[FileMetadata]:
+        """
+        Metadata of the directory's CSV files, sorted by name.
+
+        Args:
+            directory: Data directory.
+            resolution_for: Resolution string of a file name, stored with
+                entries built by this call's refresh.
+        """
+        directory = Path(directory)
+        with self._lock:
+            current = self._directory == directory
+            listing = self._listing
+            due = time.monotonic() - self._last_refresh >= self.refresh_interval
+        if not current or (due and not self.background):
+            self.refresh(directory, resolution_for)
+            with self._lock:
+                return list(self._listing)
+        if due:
+            self._refresh_in_background(directory, resolution_for)
+        return list(listing)
+
+    def refresh(self, directory: Path, resolution_for: Callable[[str], str]) -> bool:
+        """
+        Bring the entries of a directory up to date.
+
+        Returns:
+            Whether any file was added, changed or removed.
+        """
+        directory = Path(directory)
+        with self._refresh_lock:
+            if not self._loaded:
+                self._load()
+            changed = False
+            listing = []
+            seen = set()
+            for csv_file in _listed_files(directory):
+                path = str(csv_file.resolve())
+                seen.add(path)
+                try:
+                    stat = csv_file.stat()
+                except OSError:
+                    continue
+                entry = self._entries.get(path)
+                if entry is not None and (entry.size, entry.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                    listing.append(entry)
+                    continue
+                if self._failures.get(path) == (stat.st_size, stat.st_mtime_ns):
+                    continue
+
+                changed = True
+                try:
+                    metrics = get_file_metrics(str(csv_file))
+                except (FileNotFoundError, ValueError, OSError) as e:
+                    # Skip files that fail to parse
+                    logger.debug(f"Skipping {csv_file.name}: {e}")
+                    self._entries.pop(path, None)
+                    self._failures[path] = (stat.st_size, stat.st_mtime_ns)
+                    continue
+                self._failures.pop(path, None)
+                entry = FileMetadata(
+                    path=str(csv_file),
+                    name=csv_file.name,
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                    total_bars=metrics.total_bars,
+                    format=metrics.format,
+                    resolution=resolution_for(csv_file.name),
+                    first_timestamp=metrics.first_timestamp,
+                    last_timestamp=metrics.last_timestamp,
+                )
+                self._entries[path] = entry
+                listing.append(entry)
+
+            # Forget files removed from this directory
+            resolved_dir = directory.resolve()
+            for entries in (self._entries, self._failures):
+                for path in [p for p in entries if Path(p).parent == resolved_dir and p not in seen]:
+                    del entries[path]
+                    changed = True
+
+            with self._lock:
+                self._directory = directory
+                self._listing = listing
+                self._last_refresh = time.monotonic()
+            if changed:
+                self._save()
+            return changed
+
+    def _refresh_in_background(self, directory: Path, resolution_for: Callable[[str], str]) -> None:
+        if self._refresh_lock.locked():
+            return
+
+        def run():
+            try:
+                self.refresh(directory, resolution_for)
+            except Exception:
+                logger.exception(f"Refreshing the file index of {directory} failed")
+
+        with self._lock:
+            if self._closed:
+                return
+            # Claimed now so concurrent requests don't start another thread;
+            # started under the lock so close() always sees it
+            self._last_refresh = time.monotonic()
+            self._thread = threading.Thread(target=run, name="file-index-refresh", daemon=True)
+            self._thread.start()
+
+    def wait(self) -> None:
+        """Wait for a running background refresh (and its write of the index file)."""
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def close(self) -> None:
+        """Wait for a running background refresh and start no more (listings still work)."""
+        with self._lock:
+            self._closed = True
+        self.wait()
+
+    def _load(self) -> None:
+        self._loaded = True
+        if self.index_path is None:
+            return
+        try:
+            data = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get('version') != INDEX_FORMAT_VERSION:
+            return
+        try:
+            self._entries = {path: FileMetadata.from_dict(entry) for path, entry in data['files'].items()}
+            self._failures = {path: tuple(key) for path, key in data['failures'].items()}
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable file index {self.index_path}: {e}")
+            self._entries, self._failures = {}, {}
+
+    def _save(self) -> None:
+        if self.index_path is None:
+            return
+        data = {
+            'version': INDEX_FORMAT_VERSION,
+            'files': {path: entry.to_dict() for path, entry in self._entries.items()},
+            'failures': {path: list(key) for path, key in self._failures.items()},
+        }
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.index_path.with_name(self.index_path.name + '.tmp')
+            tmp.write_text(json.dumps(data))
+            os.replace(tmp, self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not write file index {self.index_path}: {e}")
+
+
+# Process-wide file index (in memory only until configured)
+_file_index = FileIndex(None)
+
+
+def configure_file_index(index_path: Optional[Path], background: bool = True) -> None:
+    """
+    Persist the file index at index_path; None keeps it in memory only.
+
+    The previous index is closed first. background=False refreshes in the
+    request (no threads), for tests and scripts.
+    """
+    global _file_index
+    _file_index.close()
+    _file_index = FileIndex(index_path, background=background)
+
+
+def get_file_index() -> FileIndex:
+    """The configured file index."""
+    return _file_index
@@ -5,6 +5,24 @@ import os
 import logging
 from datetime import datetime
 
+from .bar_cache import (
+    COLUMNS,
+    MIN_CACHED_FILE_BYTES,
+    BarCache,
+    CachedBars,
+    gaps_from_table,
+    gaps_to_table,
+    get_bar_cache,
+    utc_index,
+)
+from .row_index import (
+    BLOCK_DTYPE,
+    BLOCK_ROWS,
+    RowIndex,
+    get_row_index,
+    scan_row_starts,
+)
+
 
 def _parse_format_a_datetime(datetime_str: str) -> datetime:
     """Parse datetime string from format_a, handling HH:MM or HH:MM:SS."""
@@ -17,6 +35,87 @@ def _parse_format_a_datetime(datetime_str: str) -> datetime:
     raise ValueError(f"Invalid date format: {datetime_str}")
 
 
+# Days per month (non-leap), for format_a date validation
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+
+
+def _digits(chars: np.ndarray, columns: List[int]) -> Optional[np.ndarray]:
+    """Integer value of fixed-width ASCII digit columns, or None if any is not a digit."""
+    value = np.zeros(len(chars), dtype=np.int64)
+    for column in columns:
+        digit = chars[:, column] - ord('0')
+        if (digit > 9).any():  # uint8: anything below '0' wraps around
+            return None
+        value = value * 10 + digit
+    return value
+
+
+def _fast_format_a_epoch(date: pd.Series, time: pd.Series) -> Optional[np.ndarray]:
+    """
+    Epoch seconds of format_a date/time columns, or None to use the general parser.
+
+    Handles DD/MM/YYYY with HH:MM:SS or HH:MM (per row) on the fixed-width
+    fields with integer arithmetic. Any other shape, or an out-of-range
+    field, returns None so pd.to_datetime() reports it as before.
+    """
+    n = len(date)
+    date_len = date.str.len().to_numpy()
+    time_len = time.str.len().to_numpy()
+    if not ((date_len == 10).all() and np.isin(time_len, (5, 8)).all()):
+        return None
+    try:
+        dates = date.to_numpy(dtype='S10').view(np.uint8).reshape(n, 10)
+        times = time.to_numpy(dtype='S8').view(np.uint8).reshape(n, 8)
+    except UnicodeEncodeError:
+        return None
+
+    with_seconds = time_len == 8
+    if not (
+        (dates[:, 2] == ord('/')).all() and (dates[:, 5] == ord('/')).all()
+        and (times[:, 2] == ord(':')).all()
+        and (times[with_seconds, 5] == ord(':')).all()
+    ):
+        return None
+    # HH:MM rows are zero-padded by the S8 conversion
+    times[~with_seconds, 5:] = ord('0')
+
+    fields = [
+        _digits(dates, [0, 1]), _digits(dates, [3, 4]), _digits(dates, [6, 7, 8, 9]),
+        _digits(times, [0, 1]), _digits(times, [3, 4]), _digits(times, [6, 7]),
+    ]
+    if any(field is None for field in fields):
+        return None
+    day, month, year, hour, minute, second = fields
+
+    if not ((month >= 1) & (month <= 12)).all():
+        return None
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = _DAYS_IN_MONTH[month - 1] + (leap & (month == 2))
+    if not (
+        ((day >= 1) & (day <= month_days)).all()
+        and (hour <= 23).all() and (minute <= 59).all() and (second <= 59).all()
+    ):
+        return None
+
+    # Days since 1970-01-01 (proleptic Gregorian, March-based year)
+    y = year - (month <= 2)
+    era = y // 400
+    year_of_era = y - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+
+def _parse_format_a_timestamps(date: pd.Series, time: pd.Series):
+    """UTC timestamps of format_a date and time columns (DD/MM/YYYY, HH:MM[:SS])."""
+    epoch = _fast_format_a_epoch(date, time) if len(date) else None
+    if epoch is not None:
+        return utc_index(epoch * 1_000_000_000)
+    # Mixed or malformed rows: general (slow) parsing and its errors
+    return pd.to_datetime(date + ' ' + time, format='mixed', dayfirst=True, utc=True)
+
+
 class FileMetrics(NamedTuple):
     """Quick metrics about a data file without loading all data."""
     total_bars: int
@@ -114,20 +213,243 @@ def get_file_metrics(filepath: str) -> FileMetrics:
     )
 
 
+def _cache_for(filepath: str, use_cache: bool) -> Optional[BarCache]:
+    """The bar cache to use for a file, or None (disabled or file too small)."""
+    cache = get_bar_cache() if use_cache else None
+    if cache is None or os.path.getsize(filepath) < MIN_CACHED_FILE_BYTES:
+        return None
+    return cache
+
+
+def _valid_rows(df: pd.DataFrame) -> pd.Series:
+    """Rows load_ohlc() keeps: low <= open, close <= high and volume >= 0."""
+    valid_ohlc = (
+        (df['low'] <= df['open']) & (df['open'] <= df['high']) &
+        (df['low'] <= df['close']) & (df['close'] <= df['high'])
+    )
+    return valid_ohlc & (df['volume'] >= 0)
+
+
+def _cached_frame(cached: CachedBars, rows) -> pd.DataFrame:
+    """DataFrame (timestamp column + OHLCV) of cached raw rows."""
+    raw = cached.raw
+    data = {'timestamp': utc_index(raw['timestamp'][rows])}
+    for name in COLUMNS[1:]:
+        data[name] = np.asarray(raw[name][rows])
+    return pd.DataFrame(data)
+
+
+# Blocks parsed per read when checking that an indexed file is clean
+_CLEAN_CHECK_BLOCKS = 64
+
+
+def _is_clean(filepath: str, fmt: str, index: RowIndex) -> bool:
+    """
+    Whether load_ohlc() keeps every row of a file in file order.
+
+    Parses the file in runs of blocks through its index and stops at the
+    first row that does not parse, is invalid, or does not come strictly
+    after the previous row (out of order or a duplicate timestamp).
+    """
+    previous = None
+    step = index.block_rows * _CLEAN_CHECK_BLOCKS
+    for start in range(0, index.rows, step):
+        try:
+            df = _read_rows(filepath, fmt, start, step, index)
+        except ValueError:
+            return False
+        timestamps = pd.DatetimeIndex(df['timestamp']).as_unit('ns').asi8
+        if previous is not None:
+            timestamps = np.concatenate([[previous], timestamps])
+        if (np.diff(timestamps) <= 0).any() or not _valid_rows(df).all():
+            return False
+        previous = timestamps[-1]
+    return True
+
+
+def _build_row_index(filepath: str, fmt: str) -> Optional[Tuple[os.stat_result, RowIndex]]:
+    """
+    Scan a file into a RowIndex (see row_index.py), and check whether it is clean.
+
+    Returns:
+        (stat of the file before the scan, index), or None if a block
+        boundary row has no parseable timestamp.
+    """
+    stat = os.stat(filepath)
+    header = None
+    data_offset = 0
+    if fmt == "format_b":
+        with open(filepath, 'rb') as f:
+            header_line = f.readline()
+        data_offset = len(header_line)
+        header = [name.strip() for name in header_line.decode().strip().split(',')]
+
+    rows, first_offsets, last_offsets = scan_row_starts(filepath, data_offset, BLOCK_ROWS)
+    with open(filepath, 'rb') as f:
+        lines = []
+        for offset in np.concatenate([first_offsets, last_offsets]).tolist():
+            f.seek(offset)
+            lines.append(f.readline())
+
+    try:
+        lines = [line.decode().strip() for line in lines]
+        if fmt == "format_a":
+            fields = [line.split(';') for line in lines]
+            parsed = _parse_format_a_timestamps(
+                pd.Series([field[0] for field in fields], dtype=object),
+                pd.Series([field[1] for field in fields], dtype=object),
+            )
+        else:
+            time_column = [name.lower() for name in header].index('time')
+            seconds = [float(line.split(',')[time_column]) for line in lines]
+            parsed = pd.to_datetime(seconds, unit='s', utc=True)
+    except (ValueError, IndexError) as e:
+        logging.getLogger(__name__).debug(f"Not indexing {filepath}: {e}")
+        return None
+    timestamps = pd.DatetimeIndex(parsed).as_unit('ns').asi8
+
+    blocks = np.zeros(len(first_offsets), dtype=BLOCK_DTYPE)
+    blocks['offset'] = first_offsets
+    blocks['first'] = timestamps[:len(first_offsets)]
+    blocks['last'] = timestamps[len(first_offsets):]
+    index = RowIndex(rows=rows, block_rows=BLOCK_ROWS, format=fmt, header=header, blocks=blocks)
+    return stat, index._replace(clean=_is_clean(filepath, fmt, index))
+
+
+def _row_index_for(filepath: str, fmt: str) -> Optional[RowIndex]:
+    """The row index of a file, built and stored on first use; None when disabled."""
+    store = get_row_index()
+    if store is None:
+        return None
+    index = store.get(filepath)
+    if index is not None and index.format == fmt:
+        return index
+
+    built = _build_row_index(filepath, fmt)
+    if built is None or built[1].rows == 0:
+        return None
+    stat, index = built
+    try:
+        store.put(filepath, stat, index)
+    except OSError as e:
+        logging.getLogger(__name__).warning(f"Could not write row index for {filepath}: {e}")
+    return index
+
+
+def _read_rows(
+    filepath: str,
+    fmt: str,
+    start_row: int,
+    num_rows: int,
+    index: Optional[RowIndex] = None,
+) -> pd.DataFrame:
+    """
+    Parse data rows [start_row, start_row + num_rows) of a CSV file, in file order.
+
+    With a row index the read starts at the byte offset of start_row's
+    block instead of tokenizing every earlier line.
+
+    Returns:
+        DataFrame with columns timestamp, open, high, low, close, volume.
+
+    Raises:
+        ValueError: If the rows cannot be parsed.
+    """
+    with open(filepath, 'rb') as source:
+        try:
+            if index is not None:
+                offset, skip = index.seek_row(start_row)
+                source.seek(offset)
+            else:
+                skip = start_row
+
+            if fmt == "format_a":
+                # No header, so skiprows is just the rows before the window
+                df = pd.read_csv(
+                    source,
+                    sep=';',
+                    header=None,
+                    skiprows=skip,
+                    nrows=num_rows,
+                    names=['date', 'time', 'open', 'high', 'low', 'close', 'volume'],
+                    dtype={
+                        'date': str, 'time': str,
+                        'open': 'float64', 'high': 'float64', 'low': 'float64', 'close': 'float64',
+                        'volume': 'int64'
+                    },
+                    engine='c'
+                )
+
+                # Parse datetime - handle mixed HH:MM and HH:MM:SS formats
+                df['timestamp'] = _parse_format_a_timestamps(df['date'], df['time'])
+                df.drop(columns=['date', 'time'], inplace=True)
+
+            else:  # format_b
+                if index is not None:
+                    # Seeking past the header: column names come from the index
+                    df = pd.read_csv(
+                        source,
+                        sep=',',
+                        header=None,
+                        names=index.header,
+                        skiprows=skip,
+                        nrows=num_rows,
+                        engine='c'
+                    )
+                else:
+                    # Has header, so skiprows includes header (row 0) + start_row data rows
+                    df = pd.read_csv(
+                        source,
+                        sep=',',
+                        skiprows=range(1, start_row + 1) if start_row > 0 else None,
+                        nrows=num_rows,
+                        engine='c'
+                    )
+
+                # Normalize column names
+                df.columns = df.columns.str.lower()
+
+                required = {'time', 'open', 'high', 'low', 'close'}
+                if not required.issubset(df.columns):
+                    raise ValueError(f"Missing required columns. Found: {df.columns.tolist()}")
+
+                if 'volume' not in df.columns:
+                    df['volume'] = 0
+                else:
+                    df['volume'] = df['volume'].fillna(0).astype('int64')
+
+                df['timestamp'] = pd.to_datetime(df['time'], unit='s', utc=True)
+                df.drop(columns=['time'], inplace=True)
+
+                cols = ['open', 'high', 'low', 'close']
+                for c in cols:
+                    df[c] = df[c].astype('float64')
+
+        except (KeyError, ValueError, TypeError, pd.errors.ParserError) as e:
+            raise ValueError(f"Error parsing file: {e}")
+
+    return df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+
+
 def load_ohlc_window(
     filepath: str,
     start_row: int,
-    num_rows: int
+    num_rows: int,
+    use_cache: bool = True,
 ) -> Tuple[pd.DataFrame, List[Tuple[pd.Timestamp, pd.Timestamp, float]]]:
     """
     Load a window of OHLC data from a CSV file.
 
     Efficiently loads a specific range of rows for progressive loading.
+    Rows come from the bar cache (see bar_cache.py) when the file has a
+    valid entry. Otherwise windows past the first block seek through the
+    file's row index (see row_index.py) instead of skipping lines.
 
     Args:
         filepath: Path to the CSV file.
         start_row: Starting row index (0-based, excluding header).
         num_rows: Number of rows to load.
+        use_cache: Whether to read from the bar cache and row index.
 
     Returns:
         Tuple containing:
@@ -140,66 +462,16 @@ def load_ohlc_window(
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"File not found: {filepath}")
 
-    fmt = detect_format(filepath)
+    cache = _cache_for(filepath, use_cache)
+    cached = cache.get(filepath) if cache is not None else None
+    if cached is not None:
+        df = _cached_frame(cached, slice(start_row, start_row + num_rows))
+    else:
+        fmt = detect_format(filepath)
+        index = _row_index_for(filepath, fmt) if use_cache and start_row >= BLOCK_ROWS else None
+        df = _read_rows(filepath, fmt, start_row, num_rows, index)
 
-    try:
-        if fmt == "format_a":
-            # No header, so skiprows is just start_row
-            df = pd.read_csv(
-                filepath,
-                sep=';',
-                header=None,
-                skiprows=start_row,
-                nrows=num_rows,
-                names=['date', 'time', 'open', 'high', 'low', 'close', 'volume'],
-                dtype={
-                    'date': str, 'time': str,
-                    'open': 'float64', 'high': 'float64', 'low': 'float64', 'close': 'float64',
-                    'volume': 'int64'
-                },
-                engine='c'
-            )
-
-            # Parse datetime - handle mixed HH:MM and HH:MM:SS formats
-            datetime_str = df['date'] + ' ' + df['time']
-            df['timestamp'] = pd.to_datetime(datetime_str, format='mixed', dayfirst=True, utc=True)
-            df.drop(columns=['date', 'time'], inplace=True)
-
-        else:  # format_b
-            # Has header, so skiprows includes header (row 0) + start_row data rows
-            # But we need the header for column names, so read header separately
-            df = pd.read_csv(
-                filepath,
-                sep=',',
-                skiprows=range(1, start_row + 1) if start_row > 0 else None,
-                nrows=num_rows,
-                engine='c'
-            )
-
-            # Normalize column names
-            df.columns = df.columns.str.lower()
-
-            required = {'time', 'open', 'high', 'low', 'close'}
-            if not required.issubset(df.columns):
-                raise ValueError(f"Missing required columns. Found: {df.columns.tolist()}")
-
-            if 'volume' not in df.columns:
-                df['volume'] = 0
-            else:
-                df['volume'] = df['volume'].fillna(0).astype('int64')
-
-            df['timestamp'] = pd.to_datetime(df['time'], unit='s', utc=True)
-            df.drop(columns=['time'], inplace=True)
-
-            cols = ['open', 'high', 'low', 'close']
-            for c in cols:
-                df[c] = df[c].astype('float64')
-
-    except (KeyError, ValueError, TypeError, pd.errors.ParserError) as e:
-        raise ValueError(f"Error parsing file: {e}")
-
-    # Reorder and set index
-    df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+    # Set index
     df.set_index('timestamp', inplace=True)
     df.sort_index(inplace=True)
 
@@ -209,12 +481,7 @@ def load_ohlc_window(
         df = df[~duplicate_timestamps]
 
     # Validation
-    valid_ohlc = (
-        (df['low'] <= df['open']) & (df['open'] <= df['high']) &
-        (df['low'] <= df['close']) & (df['close'] <= df['high'])
-    )
-    valid_vol = df['volume'] >= 0
-    valid_mask = valid_ohlc & valid_vol
+    valid_mask = _valid_rows(df)
 
     if not valid_mask.all():
         invalid_count = (~valid_mask).sum()
@@ -290,13 +557,37 @@ def detect_format(filepath: str) -> str:
     except PermissionError:
         raise PermissionError(f"Permission denied: {filepath}")
 
-def load_ohlc(filepath: str) -> Tuple[pd.DataFrame, List[Tuple[pd.Timestamp, pd.Timestamp, float]]]:
+def _load_cached(cached: CachedBars, filepath: str) -> Tuple[pd.DataFrame, List[Tuple[pd.Timestamp, pd.Timestamp, float]]]:
+    """load_ohlc() result from a bar cache entry."""
+    rows = cached.order if cached.order is not None else slice(None)
+    df = _cached_frame(cached, rows)
+    df.set_index('timestamp', inplace=True)
+
+    logger = logging.getLogger(__name__)
+    if cached.duplicates_removed:
+        logger.debug(
+            f"Duplicate timestamps in {os.path.basename(filepath)}: "
+            f"{cached.duplicates_removed} removed (kept last occurrence), "
+            f"{len(df)} unique bars remaining"
+        )
+    if cached.invalid_dropped:
+        logger.warning(f"Dropping {cached.invalid_dropped} invalid OHLC row(s) from {filepath}")
+    return df, gaps_from_table(cached.gaps)
+
+
+def load_ohlc(
+    filepath: str, use_cache: bool = True
+) -> Tuple[pd.DataFrame, List[Tuple[pd.Timestamp, pd.Timestamp, float]]]:
     """
     Loads OHLC data from a CSV file into a standardized DataFrame.
-    
+
+    Parsed bars are kept in the bar cache (see bar_cache.py): later loads of
+    an unchanged file memory-map them instead of parsing the CSV.
+
     Args:
         filepath: Path to the CSV file.
-        
+        use_cache: Whether to read and fill the bar cache.
+
     Returns:
         Tuple containing:
             - DataFrame with columns: timestamp, open, high, low, close, volume.
@@ -308,9 +599,16 @@ def load_ohlc(filepath: str) -> Tuple[pd.DataFrame, List[Tuple[pd.Timestamp, pd.
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"File not found: {filepath}")
         
+
     if os.path.getsize(filepath) == 0:
         raise ValueError("File is empty")
 
+    cache = _cache_for(filepath, use_cache)
+    if cache is not None:
+        cached = cache.get(filepath)
+        if cached is not None:
+            return _load_cached(cached, filepath)
+
     fmt = detect_format(filepath)
     
     try:
@@ -331,9 +629,9 @@ def load_ohlc(filepath: str) -> Tuple[pd.DataFrame, List[Tuple[pd.Timestamp, pd.
             )
             
             # Parse datetime - handle mixed HH:MM and HH:MM:SS formats
-            # Vectorized string concatenation and parsing is faster than parse_dates for custom format
-            datetime_str = df['date'] + ' ' + df['time']
-            df['timestamp'] = pd.to_datetime(datetime_str, format='mixed', dayfirst=True, utc=True)
+            # Fixed-width fields are converted with integer arithmetic; anything
+            # else falls back to pd.to_datetime(format='mixed')
+            df['timestamp'] = _parse_format_a_timestamps(df['date'], df['time'])
 
             # Drop temp columns
             df.drop(columns=['date', 'time'], inplace=True)
@@ -378,6 +676,13 @@ def load_ohlc(filepath: str) -> Tuple[pd.DataFrame, List[Tuple[pd.Timestamp, pd.
 
     # Reorder columns
     df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+
+    if cache is not None:
+        # Every row in file order, and a row number to see which ones survive
+        raw = {name: df[name].to_numpy() for name in COLUMNS[1:]}
+        raw['timestamp'] = pd.DatetimeIndex(df['timestamp']).as_unit('ns').asi8
+        df['_row'] = np.arange(len(df))
+        duplicate_count = invalid_count = 0
     
     # Set index
     df.set_index('timestamp', inplace=True)
@@ -403,14 +708,7 @@ def load_ohlc(filepath: str) -> Tuple[pd.DataFrame, List[Tuple[pd.Timestamp, pd.
     # Validation
     # low <= open <= high and low <= close <= high
     # volume >= 0
-    
-    valid_ohlc = (
-        (df['low'] <= df['open']) & (df['open'] <= df['high']) &
-        (df['low'] <= df['close']) & (df['close'] <= df['high'])
-    )
-    valid_vol = df['volume'] >= 0
-    
-    valid_mask = valid_ohlc & valid_vol
+    valid_mask = _valid_rows(df)
     
     if not valid_mask.all():
         invalid_count = (~valid_mask).sum()
@@ -460,4 +758,80 @@ def load_ohlc(filepath: str) -> Tuple[pd.DataFrame, List[Tuple[pd.Timestamp, pd.
                 # Spec: "gap_duration_minutes".
                 gaps.append((start_time, end_time, duration))
 
+    if cache is not None:
+        order = df['_row'].to_numpy()
+        df = df.drop(columns='_row')
+        try:
+            cache.put(filepath, raw, order, gaps_to_table(gaps), int(duplicate_count), int(invalid_count))
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Could not write bar cache for {filepath}: {e}")
+
     return df, gaps
+
+
+def seekable_rows(filepath: str) -> Optional[int]:
+    """
+    Data rows of a file whose row index can seek by timestamp.
+
+    Builds and stores the row index on first use.
+
+    Returns:
+        Rows of the file, or None when the row index is disabled or the
+        file is not clean: it has out-of-order, duplicate or invalid rows,
+        so its file rows are not load_ohlc() rows.
+    """
+    index = _row_index_for(filepath, detect_format(filepath))
+    return index.rows if index is not None and index.clean else None
+
+
+def find_row_at_or_after(
+    filepath: str, timestamp: pd.Timestamp, use_cache: bool = True
+) -> Optional[int]:
+    """
+    Row of the first bar at or after a timestamp, without loading the file.
+
+    Uses the bar cache's sorted timestamps when the file has a valid entry
+    (rows of load_ohlc()'s result), else a binary search over the row index
+    blocks and a one-block read when the file is clean (file rows are then
+    load_ohlc() rows). Falls back to load_ohlc() when neither applies.
+
+    Args:
+        filepath: Path to the CSV file.
+        timestamp: Timestamp to seek to (naive timestamps are taken as UTC).
+        use_cache: Whether to use the bar cache and row index.
+
+    Returns:
+        Row number, or None if every bar is earlier.
+
+    Raises:
+        FileNotFoundError, ValueError.
+    """
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"File not found: {filepath}")
+
+    timestamp = pd.Timestamp(timestamp)
+    timestamp = timestamp.tz_localize('UTC') if timestamp.tz is None else timestamp.tz_convert('UTC')
+    target = timestamp.as_unit('ns').value
+
+    cache = _cache_for(filepath, use_cache)
+    cached = cache.get(filepath) if cache is not None else None
+    if cached is not None:
+        timestamps = cached.raw['timestamp']
+        if cached.order is not None:
+            timestamps = timestamps[cached.order]
+        row = int(np.searchsorted(timestamps, target, side='left'))
+        return row if row < len(timestamps) else None
+
+    fmt = detect_format(filepath)
+    index = _row_index_for(filepath, fmt) if use_cache else None
+    if index is not None and index.clean:
+        start = index.seek_timestamp(target)
+        if start is None:
+            return None
+        block = _read_rows(filepath, fmt, start, index.block_rows, index)
+        later = np.flatnonzero(pd.DatetimeIndex(block['timestamp']).as_unit('ns').asi8 >= target)
+        return start + int(later[0]) if len(later) else None
+
+    df, _ = load_ohlc(filepath, use_cache=use_cache)
+    row = int(df.index.searchsorted(timestamp, side='left'))
+    return row if row < len(df) else None
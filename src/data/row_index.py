@@ -0,0 +1,250 @@
+"""
+Persisted byte-offset index of the rows of an OHLC CSV file.
+
+load_ohlc_window() used to reach row N with read_csv(skiprows=N), which
+still tokenizes every skipped line: a window ten years into a 1m file cost
+as much as reading the whole prefix. The row index records where every
+BLOCK_ROWS-th data row starts, with the first and last timestamps of each
+block, so a window read seeks to the block holding its first row and skips
+at most BLOCK_ROWS - 1 lines. For a clean file the block timestamps also
+answer "first row at or after T" with a binary search and a one-block read.
+
+One entry per data file (<root>/<hash of the resolved path>/):
+
+    meta.json     file path, size, mtime_ns, row count, format, header,
+                  clean flag
+    blocks.npy    BLOCK_DTYPE records (offset, first, last), one per block:
+                  byte offset of the block's first row and the int64 UTC
+                  nanosecond timestamps of its first and last rows
+
+Row numbers are data rows in file order (header excluded), the same rows
+load_ohlc_window() counts. They are load_ohlc() rows only when the file is
+clean: every row parses and is valid, and timestamps strictly increase row
+by row, so load_ohlc() has nothing to sort, dedupe or drop. Timestamp
+seeks are only used for clean files.
+
+An entry is valid while the file's size and mtime match; anything else
+rebuilds it, which costs one byte scan of the file plus one parse to check
+that it is clean. Building is done by ohlc_loader.py; this module only
+stores and searches entries.
+
+The index is off until configured: enable it with configure_row_index()
+(the replay server does, at user_cache_dir("row_index")).
+
+Example:
+    >>> configure_row_index(user_cache_dir("row_index"))
+    >>> df, gaps = load_ohlc_window("es-1m.csv", 4_000_000, 50_000)  # builds, then seeks
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the entry layout changes
+INDEX_FORMAT_VERSION = 2
+BLOCK_ROWS = 4096
+
+BLOCK_DTYPE = np.dtype([('offset', '<i8'), ('first', '<i8'), ('last', '<i8')])
+
+
+class RowIndex(NamedTuple):
+    """A valid index entry."""
+    rows: int
+    block_rows: int
+    format: str
+    header: Optional[List[str]]
+    blocks: np.ndarray
+    # File rows are load_ohlc() rows (seek_timestamp() is usable)
+    clean: bool = False
+
+    def seek_row(self, row: int) -> Tuple[int, int]:
+        """
+        Where a data row starts.
+
+        Returns:
+            (byte offset of the row's block, rows to skip from there).
+        """
+        block = min(row // self.block_rows, len(self.blocks) - 1)
+        return int(self.blocks['offset'][block]), row - block * self.block_rows
+
+    def seek_timestamp(self, timestamp_ns: int) -> Optional[int]:
+        """
+        First row of the block that holds the first row at or after a timestamp.
+
+        Only meaningful when clean. Returns None if every row is earlier.
+        """
+        block = int(np.searchsorted(self.blocks['last'], timestamp_ns, side='left'))
+        if block >= len(self.blocks):
+            return None
+        return block * self.block_rows
+
+
+class RowIndexStore:
+    """
+    Directory of row indexes, one entry per data file path.
+
+    Args:
+        directory: Index root (created on first write).
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def entry_dir(self, filepath: str) -> Path:
+        """Entry directory for a data file."""
+        resolved = str(Path(filepath).resolve())
+        return self.directory / hashlib.sha256(resolved.encode()).hexdigest()[:24]
+
+    def get(self, filepath: str) -> Optional[RowIndex]:
+        """
+        The index of a file, or None if missing or stale.
+
+        Raises:
+            FileNotFoundError: If the data file does not exist.
+        """
+        stat = os.stat(filepath)
+        entry = self.entry_dir(filepath)
+        try:
+            meta = json.loads((entry / 'meta.json').read_text())
+        except (OSError, ValueError):
+            return None
+        if (
+            meta.get('version') != INDEX_FORMAT_VERSION
+            or meta['size'] != stat.st_size
+            or meta['mtime_ns'] != stat.st_mtime_ns
+        ):
+            return None
+        try:
+            blocks = np.load(entry / 'blocks.npy')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable row index entry {entry}: {e}")
+            return None
+        if len(blocks) != -(-meta['rows'] // meta['block_rows']):
+            return None
+        return RowIndex(
+            rows=meta['rows'],
+            block_rows=meta['block_rows'],
+            format=meta['format'],
+            header=meta['header'],
+            blocks=blocks,
+            clean=meta['clean'],
+        )
+
+    def put(self, filepath: str, stat: os.stat_result, index: RowIndex) -> None:
+        """
+        Store a file's index.
+
+        Args:
+            filepath: Data file the index was built from.
+            stat: os.stat() of the file taken before it was scanned, so a
+                write during the scan leaves the entry stale.
+            index: The index.
+        """
+        entry = self.entry_dir(filepath)
+        entry.mkdir(parents=True, exist_ok=True)
+        # Readers only trust blocks.npy once meta.json is back
+        (entry / 'meta.json').unlink(missing_ok=True)
+        np.save(entry / 'blocks.npy', index.blocks)
+
+        meta = {
+            'version': INDEX_FORMAT_VERSION,
+            'path': str(Path(filepath).resolve()),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'rows': index.rows,
+            'block_rows': index.block_rows,
+            'format': index.format,
+            'header': index.header,
+            'clean': index.clean,
+        }
+        tmp = entry / 'meta.json.tmp'
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, entry / 'meta.json')
+
+    def invalidate(self, filepath: str) -> None:
+        """Drop a file's entry."""
+        (self.entry_dir(filepath) / 'meta.json').unlink(missing_ok=True)
+
+
+def scan_row_starts(filepath: str, data_offset: int, block_rows: int) -> Tuple[int, np.ndarray, np.ndarray]:
+    """
+    Byte scan of a file's data rows.
+
+    Args:
+        filepath: Data file.
+        data_offset: Byte offset of the first data row (after any header).
+        block_rows: Rows per block.
+
+    Returns:
+        (row count, byte offset of each block's first row,
+        byte offset of each block's last row).
+    """
+    firsts, lasts = [], []
+    rows = 0
+    size = os.path.getsize(filepath)
+    with open(filepath, 'rb') as f:
+        f.seek(data_offset)
+        position = data_offset
+        pending = [data_offset] if data_offset < size else []
+        while True:
+            buf = f.read(1 << 24)
+            if not buf:
+                break
+            newlines = np.flatnonzero(np.frombuffer(buf, dtype=np.uint8) == ord('\n'))
+            # A row starts after every newline that is not the end of the file
+            starts = newlines + (position + 1)
+            starts = np.concatenate([np.asarray(pending, dtype=np.int64), starts[starts < size]])
+            pending = []
+            numbers = np.arange(rows, rows + len(starts))
+            firsts.append(starts[numbers % block_rows == 0])
+            lasts.append(starts[numbers % block_rows == block_rows - 1])
+            rows += len(starts)
+            position += len(buf)
+
+    first = np.concatenate(firsts) if firsts else np.zeros(0, dtype=np.int64)
+    last = np.concatenate(lasts) if lasts else np.zeros(0, dtype=np.int64)
+    if rows % block_rows:
+        # The final, partial block ends at the last row
+        last = np.append(last, _last_row_start(filepath, size))
+    return rows, first, last
+
+
+def _last_row_start(filepath: str, size: int) -> int:
+    """Byte offset of the final row of a non-empty file."""
+    with open(filepath, 'rb') as f:
+        end = size
+        f.seek(end - 1)
+        if f.read(1) == b'\n':
+            end -= 1
+        start = end
+        while start > 0:
+            step = min(start, 1 << 16)
+            f.seek(start - step)
+            chunk = f.read(step)
+            newline = chunk.rfind(b'\n', 0, end - (start - step))
+            if newline >= 0:
+                return start - step + newline + 1
+            start -= step
+        return 0
+
+
+# Process-wide row index (None = disabled)
+_row_index: Optional[RowIndexStore] = None
+
+
+def configure_row_index(directory: Optional[Path]) -> None:
+    """Use an index directory for load_ohlc_window(); None disables the index."""
+    global _row_index
+    _row_index = RowIndexStore(directory) if directory is not None else None
+
+
+def get_row_index() -> Optional[RowIndexStore]:
+    """The configured row index store, or None when disabled."""
+    return _row_index
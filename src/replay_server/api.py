@@ -30,11 +30,14 @@ async def lifespan(app: FastAPI):
     # Startup
     init_db()
     yield
-    # Shutdown (nothing to clean up)
-from ..data.ohlc_loader import load_ohlc
+    # Shutdown: let a running file index refresh finish writing
+    get_file_index().close()
+from ..data.bar_table import BarTable, load_bar_table
+from ..data.file_index import get_file_index
 from ..swing_analysis.bar_aggregator import BarAggregator
 from ..swing_analysis.types import Bar
 from ..swing_analysis.dag import LegDetector, HierarchicalDetector
+from ..swing_analysis.dag.batch import OHLCArrays, bars_from_arrays
 
 logger = logging.getLogger(__name__)
 
@@ -75,8 +78,12 @@ class AppState:
     resolution_minutes: int = 1
     total_source_bars: int = 0
     window_offset: int = 0
-    # Cached DataFrame
+    # Cached DataFrame (when the session was started from one)
     cached_dataframe: Optional[pd.DataFrame] = None
+    # Bars of data_file (all of them, or the session window), shared with /api/session/restart
+    bar_table: Optional[BarTable] = None
+    # Source bars as contiguous arrays for LegDetector.process_bars()
+    source_arrays: Optional[OHLCArrays] = None
     # Replay state
     playback_index: Optional[int] = None
     # Leg detector for incremental processing
@@ -397,9 +404,11 @@ async def health():
 
 def infer_resolution_from_data(file_path: str) -> int:
     """
-    Infer resolution by reading the first few rows and calculating time difference.
+    Infer resolution from the time difference between the first two bars.
 
     This is more reliable than filename parsing since it uses actual data.
+    Callers that go on to use the bars should load a BarTable and call
+    its resolution_minutes() instead of parsing the file twice.
 
     Args:
         file_path: Path to the OHLC CSV file.
@@ -407,26 +416,10 @@ def infer_resolution_from_data(file_path: str) -> int:
     Returns:
         Resolution in minutes (e.g., 5, 30, 60). Defaults to 5 if detection fails.
     """
-    from ..data.ohlc_loader import load_ohlc
+    from ..data.bar_table import load_bar_table
 
     try:
-        df, _ = load_ohlc(file_path)
-        if len(df) < 2:
-            return 5  # Default
-
-        # Calculate time difference between first two rows
-        time_diff = df.index[1] - df.index[0]
-        minutes = int(time_diff.total_seconds() / 60)
-
-        # Validate it's a reasonable resolution
-        valid_resolutions = [1, 5, 15, 30, 60, 240, 1440]  # 1m to 1d
-        if minutes in valid_resolutions:
-            return minutes
-
-        # Find closest valid resolution
-        closest = min(valid_resolutions, key=lambda x: abs(x - minutes))
-        return closest
-
+        return load_bar_table(file_path).resolution_minutes()
     except Exception as e:
         logger.debug(f"Failed to infer resolution from data: {e}")
         return 5  # Default
@@ -463,47 +456,31 @@ async def list_data_files():
     """
     List available CSV data files for selection.
 
-    Scans the configured data directory for CSV files and returns metadata
-    including bar count and date range. Files that fail to parse are
-    silently skipped.
+    Lists the CSV files of the configured data directory with metadata
+    including bar count and date range, served from the file index (see
+    data/file_index.py) and refreshed in the background. Files that fail to
+    parse are silently skipped.
 
     Returns:
         List of file info objects with path, name, total_bars, resolution,
         start_date, and end_date.
     """
-    from ..data.ohlc_loader import get_file_metrics
-
     data_dir = get_data_dir()
 
-    files = []
-
     if not data_dir.exists():
-        return files
-
-    for csv_file in sorted(data_dir.glob("*.csv")):
-        # Skip subdirectories and hidden files
-        if not csv_file.is_file() or csv_file.name.startswith('.'):
-            continue
+        return []
 
-        try:
-            metrics = get_file_metrics(str(csv_file))
-            resolution = infer_resolution_from_filename(csv_file.name)
-
-            file_info = {
-                "path": str(csv_file),
-                "name": csv_file.name,
-                "total_bars": metrics.total_bars,
-                "resolution": resolution,
-                "start_date": metrics.first_timestamp.isoformat() if metrics.first_timestamp else None,
-                "end_date": metrics.last_timestamp.isoformat() if metrics.last_timestamp else None,
-            }
-            files.append(file_info)
-        except (FileNotFoundError, ValueError, OSError) as e:
-            # Skip files that fail to parse
-            logger.debug(f"Skipping {csv_file.name}: {e}")
-            continue
-
-    return files
+    return [
+        {
+            "path": metadata.path,
+            "name": metadata.name,
+            "total_bars": metadata.total_bars,
+            "resolution": metadata.resolution,
+            "start_date": metadata.first_timestamp.isoformat() if metadata.first_timestamp else None,
+            "end_date": metadata.last_timestamp.isoformat() if metadata.last_timestamp else None,
+        }
+        for metadata in get_file_index().files(data_dir, infer_resolution_from_filename)
+    ]
 
 
 @app.get("/api/mode")
@@ -601,58 +578,58 @@ async def restart_session(request: SessionRestartRequest):
         New session info after restart.
     """
     from datetime import datetime
-    from ..data.ohlc_loader import load_ohlc, get_file_metrics
+    from ..data.bar_table import load_bar_table, load_bar_window
 
     global state
 
     data_file = request.data_file
     start_date_str = request.start_date
+    window_size = 50000
 
     # Validate file exists
     if not Path(data_file).exists():
         raise HTTPException(status_code=400, detail=f"Data file not found: {data_file}")
 
+    start_date = None
+    if start_date_str:
+        try:
+            start_date = pd.Timestamp(datetime.fromisoformat(start_date_str))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid date format: {e}")
+
     try:
+        # Seek to the start date through the row index and parse only the
+        # session window; when the bar cache holds the file, memory-map all
+        # of it instead. Everything below reads the table.
+        table = load_bar_window(data_file, start_date, 2 * window_size)
+        if table is None:
+            table = load_bar_table(data_file)
+
         # Infer resolution from actual data (more reliable than filename)
-        resolution_minutes = infer_resolution_from_data(data_file)
+        resolution_minutes = table.resolution_minutes()
         logger.info(f"Detected resolution: {resolution_minutes}m from data")
 
-        # Get file metrics
-        metrics = get_file_metrics(data_file)
-
         # Calculate offset from start date if provided
-        offset = 0
-        if start_date_str:
-            try:
-                start_date = datetime.fromisoformat(start_date_str)
-                # Load data to find offset
-                df, _ = load_ohlc(data_file)
-
-                if df.index.tz is not None:
-                    start_dt = pd.Timestamp(start_date, tz='UTC')
-                else:
-                    start_dt = pd.Timestamp(start_date)
-
-                mask = df.index >= start_dt
-                if mask.any():
-                    first_match_idx = df.index.get_indexer([df.index[mask][0]])[0]
-                    offset = int(first_match_idx)
-                else:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"No data found at or after {start_date_str}. "
-                               f"Data range: {df.index.min()} to {df.index.max()}"
-                    )
-            except ValueError as e:
-                raise HTTPException(status_code=400, detail=f"Invalid date format: {e}")
+        offset = table.first_row
+        if start_date is not None:
+            first_match_idx = table.row_at_or_after(start_date)
+            if first_match_idx is None:
+                metrics = table.metrics()
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"No data found at or after {start_date_str}. "
+                           f"Data range: {metrics.first_timestamp} to {metrics.last_timestamp}"
+                )
+            offset = first_match_idx
 
         # Initialize the application with new settings
         init_app(
             data_file=data_file,
             resolution_minutes=resolution_minutes,
-            window_size=50000,
+            window_size=window_size,
             target_bars=200,
             window_offset=offset,
+            bar_table=table,
             mode="dag"  # Always DAG mode
         )
 
@@ -666,7 +643,7 @@ async def restart_session(request: SessionRestartRequest):
             "resolution": minutes_to_resolution_string(resolution_minutes),
             "window_size": len(state.source_bars),
             "window_offset": offset,
-            "total_source_bars": metrics.total_bars,
+            "total_source_bars": table.total_bars,
             "start_date": start_date_str,
         }
 
@@ -806,7 +783,8 @@ def init_app(
     target_bars: int = 200,
     window_offset: int = 0,
     cached_df: Optional[pd.DataFrame] = None,
-    mode: str = "dag"
+    mode: str = "dag",
+    bar_table: Optional[BarTable] = None,
 ):
     """
     Initialize the application with data file.
@@ -819,44 +797,39 @@ def init_app(
         window_offset: Offset into source data
         cached_df: Optional cached DataFrame
         mode: Visualization mode ('dag')
+        bar_table: Optional BarTable of data_file, already loaded by the
+            caller (takes precedence over cached_df). A window table must
+            start at window_offset and hold the bars to load.
     """
     global state
 
     # Load source data
-    if cached_df is not None:
+    full_df = None
+    if bar_table is not None:
+        logger.info(f"Using loaded bar table ({len(bar_table)} bars)")
+    elif cached_df is not None:
         logger.info(f"Using cached DataFrame ({len(cached_df)} bars)")
-        df = cached_df
+        full_df = cached_df
+        bar_table = BarTable.from_frame(data_file, cached_df)
     else:
         logger.info(f"Loading data from {data_file}...")
-        df, gaps = load_ohlc(data_file)
+        bar_table = load_bar_table(data_file)
 
-    total_source_bars = len(df)
-    full_df = df
+    total_source_bars = bar_table.total_bars
 
     # Load extra bars beyond calibration window for playback
     playback_buffer = window_size
     total_bars_to_load = window_size + playback_buffer
 
     if window_offset > 0:
-        df = df.iloc[window_offset:]
         logger.info(f"Applied offset of {window_offset} bars")
 
-    if len(df) > total_bars_to_load:
-        df = df.head(total_bars_to_load)
+    if total_source_bars - window_offset > total_bars_to_load:
         logger.info(f"Limited to {total_bars_to_load} bars")
 
-    # Convert to Bar objects
-    source_bars = []
-    for idx, (timestamp, row) in enumerate(df.iterrows()):
-        bar = Bar(
-            index=idx,
-            timestamp=int(timestamp.timestamp()),
-            open=float(row['open']),
-            high=float(row['high']),
-            low=float(row['low']),
-            close=float(row['close'])
-        )
-        source_bars.append(bar)
+    # Convert to Bar objects (array-based, no per-row pandas access)
+    source_arrays = bar_table.arrays(window_offset, window_offset + total_bars_to_load)
+    source_bars = bars_from_arrays(*source_arrays)
 
     logger.info(f"Loaded {len(source_bars)} source bars")
 
@@ -887,6 +860,8 @@ def init_app(
         total_source_bars=total_source_bars,
         window_offset=window_offset,
         cached_dataframe=full_df,
+        bar_table=bar_table,
+        source_arrays=source_arrays,
         mode=mode,
     )
 
@@ -4,6 +4,9 @@ Main entry point for the Market Structure Analyzer Server.
 Usage:
     python -m src.replay_server.main --data-dir ./test_data
     python -m src.replay_server.main --data-dir ./test_data --port 8080
+    python -m src.replay_server.main --data-dir ./test_data --checkpoint-interval 1000
+    python -m src.replay_server.main --data-dir ./test_data --run-cache-budget-mb 0
+    python -m src.replay_server.main --data-dir ./test_data --no-bar-cache
 """
 
 import argparse
@@ -13,7 +16,20 @@ from pathlib import Path
 
 import uvicorn
 
+from ..data.bar_cache import DEFAULT_DISK_BUDGET_BYTES as DEFAULT_BAR_CACHE_BUDGET_BYTES
+from ..data.bar_cache import configure_bar_cache
+from ..data.cache_dir import user_cache_dir
+from ..data.file_index import configure_file_index
+from ..data.row_index import configure_row_index
 from .api import app, set_data_dir
+from .services.checkpoints import (
+    DEFAULT_INTERVAL,
+    DEFAULT_MEMORY_BUDGET_BYTES,
+    DEFAULT_UNDO_DEPTH,
+    configure_checkpoints,
+)
+from .routers.dag import configure_long_horizon
+from .services.run_cache import DEFAULT_DISK_BUDGET_BYTES, configure_run_cache
 
 logging.basicConfig(
     level=logging.INFO,
@@ -44,6 +60,88 @@ def main():
         help="Directory containing data files (required)"
     )
 
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=int,
+        default=DEFAULT_INTERVAL,
+        help=f"Bars between replay checkpoints for reverse/seek (default: {DEFAULT_INTERVAL})"
+    )
+    parser.add_argument(
+        "--checkpoint-budget-mb",
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET_BYTES // (1024 * 1024),
+        help="Memory budget for replay checkpoints in MB "
+             f"(default: {DEFAULT_MEMORY_BUDGET_BYTES // (1024 * 1024)})"
+    )
+    parser.add_argument(
+        "--undo-depth",
+        type=int,
+        default=DEFAULT_UNDO_DEPTH,
+        help="Bars reverse can undo without a checkpoint replay, 0 to disable "
+             f"(default: {DEFAULT_UNDO_DEPTH})"
+    )
+    parser.add_argument(
+        "--run-cache-dir",
+        type=str,
+        default=str(user_cache_dir("run_cache")),
+        help="Directory caching replay checkpoints and events across sessions "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        "--run-cache-budget-mb",
+        type=int,
+        default=DEFAULT_DISK_BUDGET_BYTES // (1024 * 1024),
+        help="Disk budget for the run cache in MB, 0 to disable "
+             f"(default: {DEFAULT_DISK_BUDGET_BYTES // (1024 * 1024)})"
+    )
+    parser.add_argument(
+        "--bar-cache-dir",
+        type=str,
+        default=str(user_cache_dir("bar_cache")),
+        help="Directory caching parsed bars of the data files "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        "--bar-cache-budget-mb",
+        type=int,
+        default=DEFAULT_BAR_CACHE_BUDGET_BYTES // (1024 * 1024),
+        help="Disk budget for the bar cache in MB, 0 to disable "
+             f"(default: {DEFAULT_BAR_CACHE_BUDGET_BYTES // (1024 * 1024)})"
+    )
+    parser.add_argument(
+        "--no-bar-cache",
+        action="store_true",
+        help="Parse data files on every load instead of using the bar cache"
+    )
+    parser.add_argument(
+        "--row-index-dir",
+        type=str,
+        default=str(user_cache_dir("row_index")),
+        help="Directory of byte-offset row indexes used for windowed and "
+             "start-date reads (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--file-index",
+        type=str,
+        default=str(user_cache_dir("file_index.json")),
+        help="File persisting the data file metadata listed by /api/files "
+             "(default: %(default)s)"
+    )
+
+    parser.add_argument(
+        "--long-horizon",
+        action="store_true",
+        help="Move cold origin-breached legs to a compact archive so per-bar "
+             "cost stays flat over multi-year replays"
+    )
+    parser.add_argument(
+        "--archive-budget-mb",
+        type=int,
+        default=0,
+        help="Memory budget for the cold leg archive in MB; the oldest "
+             "archived legs are pruned beyond it, 0 for unbounded (default: 0)"
+    )
+
     args = parser.parse_args()
 
     # Validate data directory
@@ -58,6 +156,23 @@ def main():
     # Set data directory for the API
     set_data_dir(str(data_dir.resolve()))
 
+    configure_checkpoints(
+        interval=args.checkpoint_interval,
+        memory_budget_bytes=args.checkpoint_budget_mb * 1024 * 1024,
+        undo_depth=args.undo_depth,
+    )
+    configure_run_cache(args.run_cache_dir, args.run_cache_budget_mb * 1024 * 1024)
+    configure_bar_cache(
+        None if args.no_bar_cache else Path(args.bar_cache_dir),
+        args.bar_cache_budget_mb * 1024 * 1024,
+    )
+    configure_row_index(Path(args.row_index_dir))
+    configure_file_index(Path(args.file_index))
+    if args.long_horizon:
+        configure_long_horizon(
+            archive_budget_bytes=args.archive_budget_mb * 1024 * 1024 or None,
+        )
+
     # Check if running in multi-tenant mode
     multi_tenant = os.environ.get("MULTI_TENANT", "").lower() in ("true", "1", "yes")
 
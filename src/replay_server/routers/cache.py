@@ -10,22 +10,30 @@ to access and modify shared state.
 
 from typing import Any, Dict
 
+from ..services.branches import BranchSet
+from ..services.checkpoints import CheckpointStore, new_checkpoint_store
+from ..services.event_store import LifecycleEventStore
+
 
 # Single source of truth for replay/DAG state
 # Keys:
 #   - detector: LegDetector instance
 #   - reference_layer: ReferenceLayer instance
 #   - last_bar_index: int (-1 = not started)
-#   - lifecycle_events: List[Dict] - events for Follow Leg feature
+#   - lifecycle_events: LifecycleEventStore - events for Follow Leg feature
 #   - source_resolution: int (bar resolution in minutes)
 #   - aggregator: BarAggregator instance (optional)
+#   - checkpoints: CheckpointStore for reverse/resync/seek
+#   - branches: BranchSet of config-fork branches
 _replay_cache: Dict[str, Any] = {
     "last_bar_index": -1,
     "detector": None,
     "reference_layer": None,
     "aggregator": None,
     "source_resolution": 5,
-    "lifecycle_events": [],
+    "lifecycle_events": LifecycleEventStore(),
+    "checkpoints": new_checkpoint_store(),
+    "branches": BranchSet(),
 }
 
 
@@ -34,6 +42,22 @@ def get_replay_cache() -> Dict[str, Any]:
     return _replay_cache
 
 
+def get_checkpoint_store() -> CheckpointStore:
+    """Get the session's replay checkpoint store, creating it if missing."""
+    store = _replay_cache.get("checkpoints")
+    if store is None:
+        store = _replay_cache["checkpoints"] = new_checkpoint_store()
+    return store
+
+
+def get_branches() -> BranchSet:
+    """Get the session's config-fork branches, creating the set if missing."""
+    branches = _replay_cache.get("branches")
+    if branches is None:
+        branches = _replay_cache["branches"] = BranchSet()
+    return branches
+
+
 def reset_replay_cache() -> None:
     """Reset the shared cache to initial state."""
     global _replay_cache
@@ -42,7 +66,9 @@ def reset_replay_cache() -> None:
     _replay_cache["reference_layer"] = None
     _replay_cache["aggregator"] = None
     _replay_cache["source_resolution"] = 5
-    _replay_cache["lifecycle_events"] = []
+    _replay_cache["lifecycle_events"] = LifecycleEventStore()
+    _replay_cache["checkpoints"] = new_checkpoint_store()
+    get_branches().clear()
 
 
 def is_initialized() -> bool:
@@ -5,6 +5,7 @@ Provides all DAG-related endpoints:
 - POST /api/dag/init - Initialize detector (replaces /api/replay/calibrate)
 - POST /api/dag/advance - Advance playback
 - POST /api/dag/reverse - Reverse playback
+- POST /api/dag/seek - Jump playback to a bar
 - GET /api/dag/state - Get current DAG state
 - GET /api/dag/lineage/{leg_id} - Get leg lineage
 - GET /api/dag/events - Get all lifecycle events
@@ -15,11 +16,14 @@ Provides all DAG-related endpoints:
 
 import logging
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from typing import Dict, List, Optional
 
+import numpy as np
 from fastapi import APIRouter, HTTPException, Query
 
 from ...swing_analysis.dag import LegDetector
+from ...swing_analysis.dag.batch import OHLCArrays
 from ...swing_analysis.detection_config import DetectionConfig
 from ...swing_analysis.reference_layer import ReferenceLayer
 from ..schemas import (
@@ -41,20 +45,58 @@ from ..schemas import (
     FollowedLegsEventsResponse,
     SwingConfigUpdateRequest,
     SwingConfigResponse,
+    BranchForkRequest,
+    BranchResponse,
+    BranchListResponse,
+    BranchDiffResponse,
 )
 from .helpers import (
     event_to_response,
     event_to_lifecycle_event,
     build_swing_state,
     build_aggregated_bars,
+    build_dag_leg,
     build_dag_state,
     build_ref_state_snapshot,
 )
-from .cache import get_replay_cache, is_initialized
+from ..services.branches import Branch, diff_legs
+from .cache import get_branches, get_checkpoint_store, get_replay_cache, is_initialized
+from ..services.checkpoints import attach_undo_journal
+from ..services.event_store import LifecycleEventStore
+from ..services.run_cache import RunKey, RunLog, code_version, file_digest, get_run_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["dag"])
 
+# Long-horizon mode for new sessions (see configure_long_horizon)
+_long_horizon: Dict[str, Optional[float]] = {
+    "archive_breach_multiple": None,
+    "archive_budget_bytes": None,
+}
+
+
+def configure_long_horizon(
+    archive_breach_multiple: Optional[float] = 1.0,
+    archive_budget_bytes: Optional[int] = None,
+) -> None:
+    """
+    Run detectors created afterwards in long-horizon mode (cold leg archive).
+
+    archive_breach_multiple=None turns the mode off again.
+    """
+    _long_horizon["archive_breach_multiple"] = archive_breach_multiple
+    _long_horizon["archive_budget_bytes"] = archive_budget_bytes
+
+
+def _session_config() -> DetectionConfig:
+    """Detection config for a new session: defaults plus long-horizon settings."""
+    config = DetectionConfig.default()
+    if _long_horizon["archive_breach_multiple"] is None:
+        return config
+    return config.with_long_horizon(
+        _long_horizon["archive_breach_multiple"], _long_horizon["archive_budget_bytes"]
+    )
+
 
 # ============================================================================
 # Lazy Initialization Helper (#412)
@@ -82,16 +124,19 @@ def _ensure_initialized() -> None:
     # Preserve ReferenceConfig if it exists (#459)
     old_ref_config = cache.get("reference_layer").reference_config if cache.get("reference_layer") else None
 
-    config = DetectionConfig.default()
+    config = _session_config()
     ref_layer = ReferenceLayer(config, reference_config=old_ref_config)
     detector = LegDetector(config)
+    attach_undo_journal(detector, ref_layer)
 
     # Initialize cache for incremental advance
     cache["detector"] = detector
     cache["last_bar_index"] = -1
     cache["reference_layer"] = ref_layer
     cache["source_resolution"] = s.resolution_minutes
-    cache["lifecycle_events"] = []
+    cache["lifecycle_events"] = LifecycleEventStore()
+    get_checkpoint_store().reset(_source_key(s), run=_open_run(s, detector, ref_layer))
+    get_branches().clear()
 
     # Update app state
     s.playback_index = -1
@@ -100,6 +145,234 @@ def _ensure_initialized() -> None:
     logger.info("Lazy init complete: detector ready for incremental advance")
 
 
+# ============================================================================
+# Batch Replay Helpers
+# ============================================================================
+
+
+def _source_arrays(s, start: int, end: int) -> OHLCArrays:
+    """
+    OHLC arrays for source bars [start, end) for LegDetector.process_bars().
+
+    Uses the arrays built by init_app(); falls back to the Bar list when the
+    app state was constructed without them.
+    """
+    if s.source_arrays is not None:
+        return tuple(column[start:end] for column in s.source_arrays)
+    bars = s.source_bars[start:end]
+    return (
+        np.array([bar.timestamp for bar in bars], dtype=np.int64),
+        np.array([bar.open for bar in bars], dtype=np.float64),
+        np.array([bar.high for bar in bars], dtype=np.float64),
+        np.array([bar.low for bar in bars], dtype=np.float64),
+        np.array([bar.close for bar in bars], dtype=np.float64),
+    )
+
+
+def _source_key(s) -> tuple:
+    """Identity of the loaded source bars, for binding checkpoints."""
+    return (s.data_file, s.window_offset, s.resolution_minutes, len(s.source_bars))
+
+
+def _open_run(s, detector: LegDetector, ref_layer: ReferenceLayer) -> Optional[RunLog]:
+    """Cached run for the session's file, offset and configs (None if disabled)."""
+    run_cache = get_run_cache()
+    if run_cache is None or not s.data_file or not Path(s.data_file).exists():
+        return None
+    return run_cache.open(RunKey(
+        file_digest=file_digest(s.data_file),
+        window_offset=s.window_offset,
+        detection_config=detector.config.fingerprint(),
+        reference_config=ref_layer.reference_config.fingerprint(),
+        code_version=code_version(),
+    ))
+
+
+def _record_lifecycle_events(s, bar, events, lifecycle_events: LifecycleEventStore) -> None:
+    """Append lifecycle events for one bar (Follow Leg feature, #267)."""
+    csv_index = s.window_offset + bar.index
+    timestamp = datetime.fromtimestamp(bar.timestamp).isoformat()
+    for event in events:
+        lifecycle_event = event_to_lifecycle_event(event, bar.index, csv_index, timestamp)
+        if lifecycle_event:
+            lifecycle_events.append(lifecycle_event)
+
+
+def _replay(s, detector: LegDetector, ref_layer: ReferenceLayer, start_idx: int, end_idx: int) -> None:
+    """
+    Silently replay source bars [start_idx, end_idx) into detector.
+
+    Updates the reference layer, lifecycle events (#299) and checkpoints
+    per bar via the process_bars() callback; no responses are built.
+    """
+    cache = get_replay_cache()
+    store = get_checkpoint_store()
+    lifecycle_events = cache["lifecycle_events"]
+
+    def on_bar(bar, events):
+        # Side effects only during bulk advance - skip response building (#437)
+        ref_layer.update(detector.state.active_legs, bar, build_response=False)
+        _record_lifecycle_events(s, bar, events, lifecycle_events)
+        if store.due(bar.index):
+            store.save(bar.index, detector, ref_layer, len(lifecycle_events), lifecycle_events)
+
+    if end_idx > start_idx:
+        detector.process_bars(
+            *_source_arrays(s, start_idx, end_idx),
+            start_index=start_idx,
+            on_bar=on_bar,
+        )
+
+
+def _move_branches(s, bar_index: int) -> None:
+    """Queue the bars that bring config-fork branches to bar_index."""
+    branches = get_branches()
+    if len(branches):
+        dropped = branches.move_to(bar_index, lambda start, end: _source_arrays(s, start, end))
+        if dropped:
+            logger.info(f"Dropped branches forked after bar {bar_index}: {', '.join(dropped)}")
+
+
+def _rewind_to(s, target_idx: int) -> LegDetector:
+    """
+    Move the session to target_idx (reverse, resync, seek).
+
+    Going back within the undo journal's depth undoes the recorded bars.
+    Otherwise it restores the nearest checkpoint at or before target_idx and
+    replays at most one checkpoint interval; without one, a fresh detector
+    (same config) replays from bar 0. Going forward continues the current
+    detector, or restores a checkpoint past it (e.g. one recorded in the run
+    cache by an earlier session, with the run's events). Lifecycle events
+    are truncated to the restored position and rebuilt along the way.
+
+    Returns:
+        The detector now positioned at target_idx.
+    """
+    cache = get_replay_cache()
+    store = get_checkpoint_store()
+    current_idx = cache["last_bar_index"]
+    detector = cache["detector"]
+    ref_layer = cache.get("reference_layer")
+
+    # Neither checkpoints nor the live detector carry over to another source
+    # (e.g. session restart without init)
+    source_key = _source_key(s)
+    if store.source_key != source_key:
+        store.reset(source_key, recording=False)
+
+    journal = detector.undo_journal
+    undo_steps = current_idx - target_idx
+    if (
+        journal is not None
+        and 0 < undo_steps <= len(journal)
+        and ref_layer is not None
+        and ref_layer.undo_journal is journal
+    ):
+        for _ in range(undo_steps):
+            journal.undo(detector.state, ref_layer)
+        cache["lifecycle_events"].truncate_to_bar(target_idx)
+    else:
+        lifecycle_events = cache["lifecycle_events"]
+        checkpoint = store.nearest(target_idx)
+        logged_events = None
+        if checkpoint is not None and checkpoint.event_cursor > len(lifecycle_events):
+            # Past this session's events: only usable with the run's event log
+            logged_events = store.logged_events(checkpoint.event_cursor)
+            if logged_events is None:
+                checkpoint = None
+
+        # While recording, the live detector equals a replay from bar 0 and can
+        # simply continue forward, unless a checkpoint is further ahead
+        if (
+            target_idx > current_idx and store.recording and ref_layer is not None
+            and (checkpoint is None or checkpoint.bar_index <= current_idx)
+        ):
+            _replay(s, detector, ref_layer, current_idx + 1, target_idx + 1)
+        elif target_idx != current_idx or not store.recording or ref_layer is None:
+            # Get preserved config from current detector
+            config = detector.config
+
+            # Preserve ReferenceConfig (#459)
+            old_ref_config = ref_layer.reference_config if ref_layer else None
+
+            detector = LegDetector(config)
+            ref_layer = ReferenceLayer(config, reference_config=old_ref_config)
+            attach_undo_journal(detector, ref_layer)
+
+            if checkpoint is not None:
+                store.restore(checkpoint, detector, ref_layer)
+                if logged_events is not None:
+                    lifecycle_events.clear()
+                    lifecycle_events.extend(logged_events)
+                else:
+                    lifecycle_events.truncate(checkpoint.event_cursor)
+                start_idx = checkpoint.bar_index + 1
+            else:
+                # A replay from bar 0 matches the detector again; (re)start recording
+                if not store.recording:
+                    store.reset(source_key, run=_open_run(s, detector, ref_layer))
+                lifecycle_events.clear()
+                start_idx = 0
+
+            logger.info(f"Replaying bars {start_idx} to {target_idx}")
+            _replay(s, detector, ref_layer, start_idx, target_idx + 1)
+
+    # Update cache
+    cache["detector"] = detector
+    cache["last_bar_index"] = target_idx
+    cache["reference_layer"] = ref_layer
+    _move_branches(s, target_idx)
+
+    # Update app state
+    s.playback_index = target_idx
+    s.hierarchical_detector = detector
+
+    return detector
+
+
+def _position_response(
+    s,
+    detector: LegDetector,
+    bar_idx: int,
+    include_aggregated_bars: Optional[List[str]] = None,
+    include_dag_state: bool = False,
+) -> ReplayAdvanceResponse:
+    """Response for a repositioned session (reverse / seek): no new bars or events."""
+    cache = get_replay_cache()
+
+    current_bar = s.source_bars[bar_idx]
+    active_legs = [leg for leg in detector.state.active_legs if leg.status == "active"]
+    # scale_thresholds removed (#412) - Reference Layer owns scale
+    scale_thresholds: Dict[str, float] = {}
+    swing_state = build_swing_state(active_legs, scale_thresholds)
+
+    # Build optional aggregated bars
+    aggregated_bars = None
+    if include_aggregated_bars:
+        source_resolution = cache.get("source_resolution", s.resolution_minutes)
+        aggregated_bars = build_aggregated_bars(
+            s.source_bars,
+            include_aggregated_bars,
+            source_resolution,
+            limit=bar_idx + 1,
+        )
+
+    dag_state = build_dag_state(detector, s.window_offset) if include_dag_state else None
+
+    return ReplayAdvanceResponse(
+        new_bars=[],
+        events=[],
+        swing_state=swing_state,
+        current_bar_index=bar_idx,
+        current_price=current_bar.close,
+        end_of_data=bar_idx >= len(s.source_bars) - 1,
+        csv_index=s.window_offset + bar_idx,
+        aggregated_bars=aggregated_bars,
+        dag_state=dag_state,
+        dag_states=None,
+    )
+
+
 # ============================================================================
 # Init Endpoint (formerly /api/replay/calibrate)
 # ============================================================================
@@ -126,16 +399,19 @@ async def init_dag():
     # Preserve ReferenceConfig if it exists (#459)
     old_ref_config = cache.get("reference_layer").reference_config if cache.get("reference_layer") else None
 
-    config = DetectionConfig.default()
+    config = _session_config()
     ref_layer = ReferenceLayer(config, reference_config=old_ref_config)
     detector = LegDetector(config)
+    attach_undo_journal(detector, ref_layer)
 
     # Initialize cache for incremental advance
     cache["detector"] = detector
     cache["last_bar_index"] = -1
     cache["reference_layer"] = ref_layer
     cache["source_resolution"] = s.resolution_minutes
-    cache["lifecycle_events"] = []
+    cache["lifecycle_events"] = LifecycleEventStore()
+    get_checkpoint_store().reset(_source_key(s), run=_open_run(s, detector, ref_layer))
+    get_branches().clear()
 
     # Update app state
     s.playback_index = -1
@@ -184,16 +460,19 @@ async def reset_dag():
     # Preserve ReferenceConfig if it exists (#459)
     old_ref_config = cache.get("reference_layer").reference_config if cache.get("reference_layer") else None
 
-    config = DetectionConfig.default()
+    config = _session_config()
     ref_layer = ReferenceLayer(config, reference_config=old_ref_config)
     detector = LegDetector(config)
+    attach_undo_journal(detector, ref_layer)
 
     # Reset cache to initial state
     cache["detector"] = detector
     cache["last_bar_index"] = -1
     cache["reference_layer"] = ref_layer
     cache["source_resolution"] = s.resolution_minutes
-    cache["lifecycle_events"] = []
+    cache["lifecycle_events"] = LifecycleEventStore()
+    get_checkpoint_store().reset(_source_key(s), run=_open_run(s, detector, ref_layer))
+    get_branches().clear()
 
     # Update app state
     s.playback_index = -1
@@ -229,7 +508,8 @@ async def advance_dag(request: ReplayAdvanceRequest):
     """
     Advance playback by processing additional bars.
 
-    Uses detector.process_bar() for incremental detection.
+    Uses detector.process_bars() for incremental detection; per-bar side
+    effects (reference layer, snapshots, responses) run in its callback.
     """
     from ..api import get_state
 
@@ -248,47 +528,8 @@ async def advance_dag(request: ReplayAdvanceRequest):
             f"FE at {from_index}. Replaying to sync."
         )
 
-        # Get preserved config from current detector
-        old_detector = cache["detector"]
-        config = old_detector.config
-
-        # Preserve ReferenceConfig (#459)
-        old_ref_config = cache.get("reference_layer").reference_config if cache.get("reference_layer") else None
-
-        # Create fresh detector with same config
-        detector = LegDetector(config)
-        ref_layer = ReferenceLayer(config, reference_config=old_ref_config)
-
-        # Clear lifecycle events - we'll rebuild them during replay
-        cache["lifecycle_events"] = []
-
-        # Replay all bars up to from_index
-        bars_to_process = s.source_bars[:from_index + 1] if from_index >= 0 else []
-        for bar in bars_to_process:
-            timestamp = datetime.fromtimestamp(bar.timestamp) if bar.timestamp else datetime.now()
-
-            # Process bar
-            events = detector.process_bar(bar)
-
-            # Side effects only during bulk advance - skip response building (#437)
-            ref_layer.update(detector.state.active_legs, bar, build_response=False)
-
-            # Capture lifecycle events during replay
-            csv_index = s.window_offset + bar.index
-            ts_iso = timestamp.isoformat() if hasattr(timestamp, 'isoformat') else str(timestamp)
-            for event in events:
-                lifecycle_event = event_to_lifecycle_event(event, bar.index, csv_index, ts_iso)
-                if lifecycle_event:
-                    cache["lifecycle_events"].append(lifecycle_event)
-
-        # Update cache with fresh detector
-        cache["detector"] = detector
-        cache["last_bar_index"] = from_index
-        cache["reference_layer"] = ref_layer
-
-        # Update app state
-        s.playback_index = from_index
-        s.hierarchical_detector = detector
+        # Restore the nearest checkpoint and replay up to from_index
+        detector = _rewind_to(s, from_index)
 
         logger.info(f"Resync complete: BE now at {from_index}")
 
@@ -345,13 +586,9 @@ async def advance_dag(request: ReplayAdvanceRequest):
 
     # Get Reference layer from cache for tolerance-based checks (#175)
     ref_layer = cache.get("reference_layer")
+    store = get_checkpoint_store()
 
-    for idx in range(start_idx, end_idx):
-        bar = s.source_bars[idx]
-
-        # Process bar with detector (DAG events)
-        events = detector.process_bar(bar)
-
+    def on_bar(bar, events):
         # Update reference layer - build full response only when per-bar states requested (#456)
         ref_state = None
         if ref_layer is not None:
@@ -379,21 +616,13 @@ async def advance_dag(request: ReplayAdvanceRequest):
             leg = None
             leg_id = getattr(event, 'leg_id', None)
             if leg_id:
-                for l in detector.state.active_legs:
-                    if l.leg_id == leg_id:
-                        leg = l
-                        break
+                leg = detector.state.lookup_leg(leg_id)
 
             event_response = event_to_response(event, leg, scale_thresholds)
             all_events.append(event_response)
 
         # Capture lifecycle events for Follow Leg feature (#267)
-        csv_index = s.window_offset + bar.index
-        timestamp = datetime.fromtimestamp(bar.timestamp).isoformat()
-        for event in events:
-            lifecycle_event = event_to_lifecycle_event(event, bar.index, csv_index, timestamp)
-            if lifecycle_event:
-                cache["lifecycle_events"].append(lifecycle_event)
+        _record_lifecycle_events(s, bar, events, cache["lifecycle_events"])
 
         # Snapshot DAG state after each bar for high-speed playback (#283)
         if request.include_per_bar_dag_states:
@@ -409,9 +638,24 @@ async def advance_dag(request: ReplayAdvanceRequest):
                 detector.state.active_legs,  # #458: for crossing detection
             ))
 
+        # Periodic checkpoint for reverse / resync / seek
+        if ref_layer is not None and store.due(bar.index):
+            store.save(
+                bar.index, detector, ref_layer,
+                len(cache["lifecycle_events"]), cache["lifecycle_events"],
+            )
+
+    # Process new bars incrementally (DAG events via batch ingestion)
+    detector.process_bars(
+        *_source_arrays(s, start_idx, end_idx),
+        start_index=start_idx,
+        on_bar=on_bar,
+    )
+
     # Update cache state
     cache["last_bar_index"] = end_idx - 1
     s.playback_index = end_idx - 1
+    _move_branches(s, end_idx - 1)
 
     # Build current swing state from active legs
     active_legs = [leg for leg in detector.state.active_legs if leg.status == "active"]
@@ -467,7 +711,9 @@ async def reverse_dag(request: ReplayReverseRequest):
     """
     Reverse playback by one bar.
 
-    Implementation: resets detector and replays from bar 0 to current_bar_index - 1.
+    Undoes the last bar from the undo journal; if it is not there, restores
+    the nearest checkpoint at or before current_bar_index - 1 and replays the
+    remaining bars (from bar 0 if there is none).
     """
     from ..api import get_state
 
@@ -513,83 +759,51 @@ async def reverse_dag(request: ReplayReverseRequest):
             dag_states=None,
         )
 
-    # Reset detector and replay from 0 to target_idx
-    logger.info(f"Reversing: replaying bars 0 to {target_idx}")
-
-    # Get preserved config from current detector
-    old_detector = cache["detector"]
-    config = old_detector.config
-
-    # Preserve ReferenceConfig (#459)
-    old_ref_config = cache.get("reference_layer").reference_config if cache.get("reference_layer") else None
-
-    # Create fresh detector with same config
-    detector = LegDetector(config)
-    ref_layer = ReferenceLayer(config, reference_config=old_ref_config)
+    # Restore the nearest checkpoint and replay up to target_idx
+    logger.info(f"Reversing to bar {target_idx}")
+    detector = _rewind_to(s, target_idx)
 
-    # Clear lifecycle events - we'll rebuild them during replay (#299)
-    cache["lifecycle_events"] = []
+    return _position_response(
+        s,
+        detector,
+        target_idx,
+        include_aggregated_bars=request.include_aggregated_bars,
+        include_dag_state=request.include_dag_state,
+    )
 
-    # Replay all bars up to target
-    bars_to_process = s.source_bars[:target_idx + 1]
-    for bar in bars_to_process:
-        timestamp = datetime.fromtimestamp(bar.timestamp) if bar.timestamp else datetime.now()
 
-        # Process bar
-        events = detector.process_bar(bar)
+# ============================================================================
+# Seek Endpoint
+# ============================================================================
 
-        # Side effects only during bulk advance - skip response building (#437)
-        ref_layer.update(detector.state.active_legs, bar, build_response=False)
 
-        # Capture lifecycle events during replay (#299)
-        csv_index = s.window_offset + bar.index
-        ts_iso = timestamp.isoformat() if hasattr(timestamp, 'isoformat') else str(timestamp)
-        for event in events:
-            lifecycle_event = event_to_lifecycle_event(event, bar.index, csv_index, ts_iso)
-            if lifecycle_event:
-                cache["lifecycle_events"].append(lifecycle_event)
+@router.post("/api/dag/seek", response_model=ReplayAdvanceResponse)
+async def seek_dag(
+    bar_index: int = Query(..., ge=0, description="Bar to position the detector at"),
+    include_dag_state: bool = Query(False, description="Include DAG state at bar_index"),
+):
+    """
+    Jump playback to bar_index.
 
-    # Update cache
-    cache["detector"] = detector
-    cache["last_bar_index"] = target_idx
-    cache["reference_layer"] = ref_layer
+    Backward seeks restore the nearest checkpoint and replay at most one
+    checkpoint interval; forward seeks process the bars in between without
+    building per-bar responses.
+    """
+    from ..api import get_state
 
-    # Update app state
-    s.playback_index = target_idx
-    s.hierarchical_detector = detector
+    s = get_state()
 
-    # Build response
-    current_bar = s.source_bars[target_idx]
-    active_legs = [leg for leg in detector.state.active_legs if leg.status == "active"]
-    # scale_thresholds removed (#412) - Reference Layer owns scale
-    scale_thresholds: Dict[str, float] = {}
-    swing_state = build_swing_state(active_legs, scale_thresholds)
+    # Lazy init: auto-initialize detector if not present (#412)
+    _ensure_initialized()
 
-    # Build optional aggregated bars
-    aggregated_bars = None
-    if request.include_aggregated_bars:
-        source_resolution = cache.get("source_resolution", s.resolution_minutes)
-        aggregated_bars = build_aggregated_bars(
-            s.source_bars,
-            request.include_aggregated_bars,
-            source_resolution,
-            limit=target_idx + 1,
+    if bar_index >= len(s.source_bars):
+        raise HTTPException(
+            status_code=400,
+            detail=f"bar_index {bar_index} out of range (0-{len(s.source_bars) - 1})",
         )
 
-    dag_state = build_dag_state(detector, s.window_offset) if request.include_dag_state else None
-
-    return ReplayAdvanceResponse(
-        new_bars=[],
-        events=[],
-        swing_state=swing_state,
-        current_bar_index=target_idx,
-        current_price=current_bar.close,
-        end_of_data=False,
-        csv_index=s.window_offset + target_idx,
-        aggregated_bars=aggregated_bars,
-        dag_state=dag_state,
-        dag_states=None,
-    )
+    detector = _rewind_to(s, bar_index)
+    return _position_response(s, detector, bar_index, include_dag_state=include_dag_state)
 
 
 # ============================================================================
@@ -691,8 +905,10 @@ async def get_leg_lineage(leg_id: str):
     detector = cache["detector"]
     state = detector.state
 
-    # Build a lookup dict for efficient access
-    legs_by_id = {leg.leg_id: leg for leg in state.active_legs}
+    # Build a lookup dict for efficient access (archived legs included:
+    # long-horizon mode keeps cold ancestors in state.archived_legs)
+    legs_by_id = {leg.leg_id: leg for leg in state.archived_legs}
+    legs_by_id.update((leg.leg_id, leg) for leg in state.active_legs)
 
     # Check if leg exists
     if leg_id not in legs_by_id:
@@ -751,20 +967,30 @@ async def get_leg_lineage(leg_id: str):
 
 
 @router.get("/api/dag/events", response_model=FollowedLegsEventsResponse)
-async def get_all_lifecycle_events():
+async def get_all_lifecycle_events(
+    start_bar: Optional[int] = Query(None, description="First bar index (inclusive)"),
+    end_bar: Optional[int] = Query(None, description="Last bar index (inclusive)"),
+    offset: int = Query(0, ge=0, description="Events of the range to skip"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum events to return"),
+):
     """
-    Get all lifecycle events from the current session.
+    Get lifecycle events from the current session.
 
-    Returns all cached lifecycle events. Used to restore frontend state
-    when switching views (DAG View -> Reference View -> DAG View).
+    Returns all cached lifecycle events by default. Used to restore frontend
+    state when switching views (DAG View -> Reference View -> DAG View).
+    start_bar/end_bar restrict the bar range and offset/limit page through
+    it; total is the number of events in the range.
     """
     cache = get_replay_cache()
 
     if cache.get("detector") is None:
-        return FollowedLegsEventsResponse(events=[])
+        return FollowedLegsEventsResponse(events=[], total=0)
 
-    lifecycle_events = cache.get("lifecycle_events", [])
-    return FollowedLegsEventsResponse(events=lifecycle_events)
+    lifecycle_events = cache["lifecycle_events"]
+    return FollowedLegsEventsResponse(
+        events=lifecycle_events.range(start_bar, end_bar, offset, limit),
+        total=lifecycle_events.count(start_bar, end_bar),
+    )
 
 
 @router.get("/api/dag/followed-legs", response_model=FollowedLegsEventsResponse)
@@ -786,14 +1012,10 @@ async def get_followed_legs_events(
     if not leg_id_set:
         return FollowedLegsEventsResponse(events=[])
 
-    # Filter lifecycle events
-    lifecycle_events = cache.get("lifecycle_events", [])
-    filtered_events = [
-        event for event in lifecycle_events
-        if event.leg_id in leg_id_set and event.bar_index >= since_bar
-    ]
-
-    return FollowedLegsEventsResponse(events=filtered_events)
+    # Only the followed legs' events are visited (per-leg index)
+    return FollowedLegsEventsResponse(
+        events=cache["lifecycle_events"].for_legs(leg_id_set, since_bar),
+    )
 
 
 # ============================================================================
@@ -801,6 +1023,34 @@ async def get_followed_legs_events(
 # ============================================================================
 
 
+def _config_response(config: DetectionConfig) -> SwingConfigResponse:
+    """SwingConfigResponse for a detection config."""
+    return SwingConfigResponse(
+        stale_extension_threshold=config.stale_extension_threshold,
+        origin_range_threshold=config.origin_range_prune_threshold,
+        origin_time_threshold=config.origin_time_prune_threshold,
+        max_turns=config.max_turns,
+        engulfed_breach_threshold=config.engulfed_breach_threshold,
+    )
+
+
+def _apply_config_request(config: DetectionConfig, request: SwingConfigUpdateRequest) -> DetectionConfig:
+    """config with the request's provided thresholds applied."""
+    # Apply global threshold updates (#404: all symmetric)
+    if request.stale_extension_threshold is not None:
+        config = config.with_stale_extension(request.stale_extension_threshold)
+    if request.origin_range_threshold is not None or request.origin_time_threshold is not None:
+        config = config.with_origin_prune(
+            origin_range_prune_threshold=request.origin_range_threshold,
+            origin_time_prune_threshold=request.origin_time_threshold,
+        )
+    if request.max_turns is not None:
+        config = config.with_max_turns(request.max_turns)
+    if request.engulfed_breach_threshold is not None:
+        config = config.with_engulfed(request.engulfed_breach_threshold)
+    return config
+
+
 @router.get("/api/dag/config", response_model=SwingConfigResponse)
 async def get_detection_config():
     """
@@ -815,15 +1065,9 @@ async def get_detection_config():
     if is_initialized():
         config = cache["detector"].config
     else:
-        config = DetectionConfig.default()
+        config = _session_config()
 
-    return SwingConfigResponse(
-        stale_extension_threshold=config.stale_extension_threshold,
-        origin_range_threshold=config.origin_range_prune_threshold,
-        origin_time_threshold=config.origin_time_prune_threshold,
-        max_turns=config.max_turns,
-        engulfed_breach_threshold=config.engulfed_breach_threshold,
-    )
+    return _config_response(config)
 
 
 @router.put("/api/dag/config", response_model=SwingConfigResponse)
@@ -842,22 +1086,10 @@ async def update_detection_config(request: SwingConfigUpdateRequest):
     detector = cache["detector"]
 
     # Start with current config (preserve existing settings)
-    new_config = detector.config
-
-    # Apply global threshold updates (#404: all symmetric)
-    if request.stale_extension_threshold is not None:
-        new_config = new_config.with_stale_extension(request.stale_extension_threshold)
-    if request.origin_range_threshold is not None or request.origin_time_threshold is not None:
-        new_config = new_config.with_origin_prune(
-            origin_range_prune_threshold=request.origin_range_threshold,
-            origin_time_prune_threshold=request.origin_time_threshold,
-        )
-    if request.max_turns is not None:
-        new_config = new_config.with_max_turns(request.max_turns)
-    if request.engulfed_breach_threshold is not None:
-        new_config = new_config.with_engulfed(request.engulfed_breach_threshold)
+    new_config = _apply_config_request(detector.config, request)
 
     # Update detector config (keeps current state, applies to future bars)
+    config_changed = new_config != detector.config
     detector.update_config(new_config)
 
     # Update reference layer with new config, preserving accumulated state and ReferenceConfig (#459)
@@ -868,15 +1100,109 @@ async def update_detection_config(request: SwingConfigUpdateRequest):
         new_ref_layer.copy_state_from(old_ref_layer)
     cache["reference_layer"] = new_ref_layer
 
+    # Undo entries were recorded under the old config
+    if detector.undo_journal is not None:
+        detector.undo_journal.clear()
+    new_ref_layer.undo_journal = detector.undo_journal
+
+    # Bars before now were detected with the old config; checkpoints would no
+    # longer match a replay from bar 0
+    if config_changed:
+        get_checkpoint_store().invalidate()
+
     logger.info(
         f"Config updated (continuing from current position): "
         f"{len([leg for leg in detector.state.active_legs if leg.status == 'active'])} active legs"
     )
 
-    return SwingConfigResponse(
-        stale_extension_threshold=new_config.stale_extension_threshold,
-        origin_range_threshold=new_config.origin_range_prune_threshold,
-        origin_time_threshold=new_config.origin_time_prune_threshold,
-        max_turns=new_config.max_turns,
-        engulfed_breach_threshold=new_config.engulfed_breach_threshold,
+    return _config_response(new_config)
+
+
+# ============================================================================
+# Config-Fork Branch Endpoints
+# ============================================================================
+
+
+async def _branch_response(branch: Branch) -> BranchResponse:
+    await branch.wait()
+    return BranchResponse(
+        name=branch.name,
+        fork_bar=branch.fork_bar,
+        bar_index=branch.target_index,
+        active_legs=len(branch.legs),
+        config=_config_response(branch.config),
+    )
+
+
+def _get_branch(name: str) -> Branch:
+    branch = get_branches().get(name)
+    if branch is None:
+        raise HTTPException(status_code=404, detail=f"Branch not found: {name}")
+    return branch
+
+
+@router.get("/api/dag/branches", response_model=BranchListResponse)
+async def list_branches():
+    """List the session's config-fork branches."""
+    return BranchListResponse(branches=[await _branch_response(branch) for branch in get_branches()])
+
+
+@router.post("/api/dag/branches", response_model=BranchResponse)
+async def fork_branch(request: BranchForkRequest):
+    """
+    Fork the session at the current bar into a branch with another config.
+
+    The branch starts from a copy of the current detector and reference
+    layer, applies the request's thresholds over the session config, and
+    then advances (or rewinds) together with the session.
+    """
+    cache = get_replay_cache()
+
+    # Lazy init: auto-initialize detector if not present (#412)
+    _ensure_initialized()
+
+    detector = cache["detector"]
+    ref_layer = cache["reference_layer"]
+    config = _apply_config_request(detector.config, request)
+    try:
+        branch = get_branches().fork(
+            request.name, config, detector, ref_layer, cache["last_bar_index"],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await _branch_response(branch)
+
+
+@router.delete("/api/dag/branches/{name}")
+async def delete_branch(name: str):
+    """Remove a config-fork branch."""
+    if not get_branches().drop(name):
+        raise HTTPException(status_code=404, detail=f"Branch not found: {name}")
+    return {"deleted": name}
+
+
+@router.get("/api/dag/branches/{name}/diff", response_model=BranchDiffResponse)
+async def diff_branch(name: str):
+    """
+    Compare a branch with the session at the current bar.
+
+    Reports the legs (by leg_id) active in only one of the two.
+    """
+    from ..api import get_state
+
+    branch = _get_branch(name)
+    await branch.wait()
+
+    cache = get_replay_cache()
+    s = get_state()
+
+    main_legs = cache["detector"].state.active_legs
+    only_main, only_branch = diff_legs(main_legs, branch.legs)
+    return BranchDiffResponse(
+        name=name,
+        bar_index=branch.target_index,
+        main_active_legs=len(main_legs),
+        branch_active_legs=len(branch.legs),
+        only_in_main=[build_dag_leg(leg, s.window_offset) for leg in only_main],
+        only_in_branch=[build_dag_leg(leg, s.window_offset) for leg in only_branch],
     )
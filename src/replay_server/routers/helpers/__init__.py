@@ -17,6 +17,7 @@ from .conversions import (
 from .builders import (
     build_swing_state,
     build_aggregated_bars,
+    build_dag_leg,
     build_dag_state,
     build_ref_state_snapshot,
     compute_tree_statistics,
@@ -36,6 +37,7 @@ __all__ = [
     # Builder functions
     'build_swing_state',
     'build_aggregated_bars',
+    'build_dag_leg',
     'build_dag_state',
     'build_ref_state_snapshot',
     'compute_tree_statistics',
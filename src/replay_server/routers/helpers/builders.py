@@ -153,6 +153,42 @@ def build_aggregated_bars(
     return result
 
 
+def build_dag_leg(leg: Leg, window_offset: int = 0) -> DagLegResponse:
+    """
+    Build the DAG response for one leg.
+
+    Args:
+        leg: The leg.
+        window_offset: CSV offset to convert bar-relative indices to csv indices.
+
+    Returns:
+        DagLegResponse for the leg.
+    """
+    return DagLegResponse(
+        leg_id=leg.leg_id,
+        direction=leg.direction,
+        pivot_price=float(leg.pivot_price),
+        pivot_index=window_offset + leg.pivot_index,
+        origin_price=float(leg.origin_price),
+        origin_index=window_offset + leg.origin_index,
+        retracement_pct=float(leg.retracement_pct),
+        status=leg.status,
+        bar_count=leg.bar_count,
+        origin_breached=leg.max_origin_breach is not None,
+        impulse=leg.impulse,
+        range=float(leg.range),
+        depth=leg.depth,
+        bin=leg.range_bin_index,
+        impulsiveness=leg.impulsiveness,
+        bin_impulsiveness=leg.bin_impulsiveness,
+        spikiness=leg.spikiness,
+        parent_leg_id=leg.parent_leg_id,
+        impulse_to_deepest=leg.impulse_to_deepest,
+        impulse_back=leg.impulse_back,
+        net_segment_impulse=leg.net_segment_impulse,
+    )
+
+
 def build_dag_state(detector: LegDetector, window_offset: int = 0) -> DagStateResponse:
     """
     Build DAG state response from detector.
@@ -166,32 +202,7 @@ def build_dag_state(detector: LegDetector, window_offset: int = 0) -> DagStateRe
     """
     state = detector.state
 
-    active_legs = [
-        DagLegResponse(
-            leg_id=leg.leg_id,
-            direction=leg.direction,
-            pivot_price=float(leg.pivot_price),
-            pivot_index=window_offset + leg.pivot_index,
-            origin_price=float(leg.origin_price),
-            origin_index=window_offset + leg.origin_index,
-            retracement_pct=float(leg.retracement_pct),
-            status=leg.status,
-            bar_count=leg.bar_count,
-            origin_breached=leg.max_origin_breach is not None,
-            impulse=leg.impulse,
-            range=float(leg.range),
-            depth=leg.depth,
-            bin=leg.range_bin_index,
-            impulsiveness=leg.impulsiveness,
-            bin_impulsiveness=leg.bin_impulsiveness,
-            spikiness=leg.spikiness,
-            parent_leg_id=leg.parent_leg_id,
-            impulse_to_deepest=leg.impulse_to_deepest,
-            impulse_back=leg.impulse_back,
-            net_segment_impulse=leg.net_segment_impulse,
-        )
-        for leg in state.active_legs
-    ]
+    active_legs = [build_dag_leg(leg, window_offset) for leg in state.active_legs]
 
     pending_origins = {
         direction: DagPendingOrigin(
@@ -34,7 +34,7 @@ from ..schemas import (
     ReferenceConfigResponse,
     ReferenceConfigUpdateRequest,
 )
-from .cache import get_replay_cache, is_initialized
+from .cache import get_checkpoint_store, get_replay_cache, is_initialized
 
 router = APIRouter(tags=["reference"])
 
@@ -869,6 +869,12 @@ async def update_reference_config(request: ReferenceConfigUpdateRequest):
     # Update reference layer config (preserves accumulated state)
     ref_layer.reference_config = new_config
 
+    # Earlier bars were processed with the old config; drop replay checkpoints
+    if new_config != current_config:
+        get_checkpoint_store().invalidate()
+        if ref_layer.undo_journal is not None:
+            ref_layer.undo_journal.clear()
+
     return ReferenceConfigResponse(
         range_weight=new_config.range_weight,
         impulse_weight=new_config.impulse_weight,
@@ -93,7 +93,8 @@ class ReplayAdvanceRequest(BaseModel):
 class ReplayReverseRequest(BaseModel):
     """Request to reverse playback by one bar.
 
-    Implementation: resets detector and replays from bar 0 to current_bar_index - 1.
+    Implementation: restores the nearest checkpoint and replays up to
+    current_bar_index - 1.
     """
     current_bar_index: int
     include_aggregated_bars: Optional[List[str]] = None
@@ -510,6 +511,7 @@ class FollowedLegsEventsRequest(BaseModel):
 class FollowedLegsEventsResponse(BaseModel):
     """Response with lifecycle events for followed legs."""
     events: List[LifecycleEvent]
+    total: Optional[int] = None  # Events in the requested range (/api/dag/events)
 
 
 # ============================================================================
@@ -585,6 +587,38 @@ class SwingConfigResponse(BaseModel):
     )
 
 
+class BranchForkRequest(SwingConfigUpdateRequest):
+    """Request to fork the session into a named config branch.
+
+    Config fields override the session's current config for the branch.
+    """
+    name: str
+
+
+class BranchResponse(BaseModel):
+    """A config branch of the session."""
+    name: str
+    fork_bar: int  # Session bar the branch was forked at
+    bar_index: int  # Bar the branch has processed through
+    active_legs: int
+    config: SwingConfigResponse
+
+
+class BranchListResponse(BaseModel):
+    """All config branches of the session."""
+    branches: List[BranchResponse]
+
+
+class BranchDiffResponse(BaseModel):
+    """Legs present in only one of the session and a branch, at bar_index."""
+    name: str
+    bar_index: int
+    main_active_legs: int
+    branch_active_legs: int
+    only_in_main: List[DagLegResponse]
+    only_in_branch: List[DagLegResponse]
+
+
 # ============================================================================
 # Reference Layer Models (Issue #375, #388 - Reference Layer UI)
 # ============================================================================
@@ -0,0 +1,11 @@
+"""
+Stateful services behind the Replay View Server routers.
+
+Services:
+- checkpoints.py: Periodic replay checkpoints for reverse, resync and seek
+- event_store.py: Indexed store of the session's lifecycle events
+- run_cache.py: On-disk cache of replay runs
+- branches.py: Config-fork branches running another DetectionConfig
+
+Routers (routers/) only hold the HTTP endpoints and use these modules.
+"""
@@ -0,0 +1,223 @@
+"""
+Config-fork branches: extra detectors running another DetectionConfig.
+
+PUT /api/dag/config only changes the live detector for future bars, so
+comparing two parameter sets meant restarting and replaying once per
+trial. POST /api/dag/branches forks the session at the current bar
+instead:
+
+- the detector and reference layer are copied through their checkpoint
+  bytes (DetectorState.to_bytes / ReferenceLayer.to_bytes), a bulk copy
+  that rebuilds the leg store in one pass instead of deep-copying objects
+- the copy switches to the branch config the same way a config PUT does
+  (LegDetector.update_config, ReferenceLayer.copy_state_from)
+
+Branches then follow the session's position. Bars the session advances
+over are queued to the branch's worker thread; each branch has its own
+single-thread executor, so its bars stay in order without blocking the
+session's response. A rewind to or past the fork bar rebuilds the branch
+from its fork snapshot, and a rewind before the fork bar drops it.
+Readers call sync() to wait until a branch has caught up; request
+handlers await wait() instead, which leaves the event loop free.
+
+Example:
+    >>> branches = BranchSet()
+    >>> branches.fork("tight", config.with_max_turns(3), detector, ref_layer, 499)
+    >>> branches.move_to(999, source_arrays)
+    >>> branch = branches.get("tight")
+    >>> branch.sync()
+    >>> only_main, only_branch = diff_legs(detector.state.active_legs, branch.legs)
+"""
+
+import asyncio
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ...swing_analysis.dag import DetectorState, Leg, LegDetector
+from ...swing_analysis.dag.batch import OHLCArrays
+from ...swing_analysis.detection_config import DetectionConfig
+from ...swing_analysis.reference_layer import ReferenceLayer
+
+logger = logging.getLogger(__name__)
+
+# Source arrays for bars [start, end)
+SourceArrays = Callable[[int, int], OHLCArrays]
+
+
+class Branch:
+    """
+    One forked detector and reference layer with its own config.
+
+    Args:
+        name: Branch name.
+        config: Detection config the branch runs from the fork bar on.
+        detector: Session detector to fork (not modified).
+        ref_layer: Session reference layer to fork (not modified).
+        bar_index: Bar the session is at (the fork bar).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        config: DetectionConfig,
+        detector: LegDetector,
+        ref_layer: ReferenceLayer,
+        bar_index: int,
+    ):
+        self.name = name
+        self.config = config
+        self.fork_bar = bar_index
+        self._source_config = detector.config
+        self._fork_state = detector.state.to_bytes(detector.config)
+        self._fork_reference = ref_layer.to_bytes()
+        self.detector: LegDetector
+        self.ref_layer: ReferenceLayer
+        self._restore_fork()
+        # Bar the queued work brings the branch to
+        self.target_index = bar_index
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"branch-{name}")
+        self._pending: Optional[Future] = None
+
+    @property
+    def legs(self) -> Sequence[Leg]:
+        """The branch's active legs (call sync() first)."""
+        return self.detector.state.active_legs
+
+    def _restore_fork(self) -> None:
+        state = DetectorState.from_bytes(self._fork_state, self._source_config)
+        detector = LegDetector.from_state(state, self._source_config)
+        detector.update_config(self.config)
+        restored = ReferenceLayer.from_bytes(self._fork_reference, self._source_config)
+        ref_layer = ReferenceLayer(self.config, reference_config=restored.reference_config)
+        ref_layer.copy_state_from(restored)
+        self.detector = detector
+        self.ref_layer = ref_layer
+
+    def _process(self, arrays: OHLCArrays, start_index: int) -> None:
+        detector, ref_layer = self.detector, self.ref_layer
+
+        def on_bar(bar, events):
+            ref_layer.update(detector.state.active_legs, bar, build_response=False)
+
+        detector.process_bars(*arrays, start_index=start_index, on_bar=on_bar)
+
+    def _rebuild(self, arrays: OHLCArrays) -> None:
+        self._restore_fork()
+        self._process(arrays, self.fork_bar + 1)
+
+    def move_to(self, bar_index: int, source_arrays: SourceArrays) -> None:
+        """
+        Queue the work that brings the branch to bar_index (>= fork_bar).
+
+        Raises:
+            ValueError: If bar_index is before the fork bar.
+        """
+        if bar_index < self.fork_bar:
+            raise ValueError(f"Branch {self.name} forked at bar {self.fork_bar}")
+        if bar_index > self.target_index:
+            arrays = source_arrays(self.target_index + 1, bar_index + 1)
+            self._pending = self._executor.submit(self._process, arrays, self.target_index + 1)
+        elif bar_index < self.target_index:
+            arrays = source_arrays(self.fork_bar + 1, bar_index + 1)
+            self._pending = self._executor.submit(self._rebuild, arrays)
+        self.target_index = bar_index
+
+    def sync(self) -> None:
+        """Wait for queued bars (re-raises a failure of the worker)."""
+        if self._pending is not None:
+            self._pending.result()
+
+    async def wait(self) -> None:
+        """
+        sync() for the event loop: await queued bars, including bars queued
+        by other requests while waiting, without blocking other requests.
+        """
+        pending = self._pending
+        while pending is not None:
+            await asyncio.wrap_future(pending)
+            if pending is self._pending:
+                return
+            pending = self._pending
+
+    def close(self) -> None:
+        """Stop the worker, dropping queued bars."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class BranchSet:
+    """The session's named branches."""
+
+    def __init__(self):
+        self._branches: Dict[str, Branch] = {}
+
+    def __len__(self) -> int:
+        return len(self._branches)
+
+    def __iter__(self) -> Iterator[Branch]:
+        return iter(list(self._branches.values()))
+
+    def get(self, name: str) -> Optional[Branch]:
+        return self._branches.get(name)
+
+    def fork(
+        self,
+        name: str,
+        config: DetectionConfig,
+        detector: LegDetector,
+        ref_layer: ReferenceLayer,
+        bar_index: int,
+    ) -> Branch:
+        """
+        Fork the session into a new branch.
+
+        Raises:
+            ValueError: If a branch with this name exists.
+        """
+        if name in self._branches:
+            raise ValueError(f"Branch {name} already exists")
+        branch = self._branches[name] = Branch(name, config, detector, ref_layer, bar_index)
+        logger.info(f"Forked branch {name} at bar {bar_index}")
+        return branch
+
+    def drop(self, name: str) -> bool:
+        """Remove a branch; False if there is none with this name."""
+        branch = self._branches.pop(name, None)
+        if branch is None:
+            return False
+        branch.close()
+        return True
+
+    def clear(self) -> None:
+        """Remove all branches."""
+        for name in list(self._branches):
+            self.drop(name)
+
+    def move_to(self, bar_index: int, source_arrays: SourceArrays) -> List[str]:
+        """
+        Bring every branch to the session's new position.
+
+        Returns:
+            Names of branches dropped because bar_index is before their fork.
+        """
+        dropped = []
+        for branch in self:
+            if bar_index < branch.fork_bar:
+                self.drop(branch.name)
+                dropped.append(branch.name)
+            else:
+                branch.move_to(bar_index, source_arrays)
+        return dropped
+
+
+def diff_legs(
+    main_legs: Sequence[Leg],
+    branch_legs: Sequence[Leg],
+) -> Tuple[List[Leg], List[Leg]]:
+    """Legs only in main and only in the branch (by leg_id, each sorted by leg_id)."""
+    main = {leg.leg_id: leg for leg in main_legs}
+    branch = {leg.leg_id: leg for leg in branch_legs}
+    return (
+        [main[leg_id] for leg_id in sorted(main.keys() - branch.keys())],
+        [branch[leg_id] for leg_id in sorted(branch.keys() - main.keys())],
+    )
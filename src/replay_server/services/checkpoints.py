@@ -0,0 +1,309 @@
+"""
+Periodic replay checkpoints for reverse, resync and seek.
+
+Reverse and the from_index resync used to rebuild the detector by replaying
+every bar from 0, so stepping back at bar 40k re-ran 40k bars through
+LegDetector and ReferenceLayer. During advance, a checkpoint is now taken
+every `interval` bars:
+
+    detector    DetectorState checkpoint bytes (dag/checkpoint.py)
+    reference   ReferenceLayer checkpoint bytes (reference_checkpoint.py)
+    events      length of cache["lifecycle_events"] at that bar
+
+Rewinding restores the nearest checkpoint at or before the target and
+replays at most `interval` bars. Checkpoints are deterministic functions of
+(source bars, config), so ones ahead of the current position stay valid
+after a rewind; they are only used once playback has passed them again,
+since the lifecycle events they point into have been truncated.
+
+The store is bounded by `memory_budget_bytes`; least recently used
+checkpoints are evicted first.
+
+When the on-disk run cache (run_cache.py) is enabled, the store is bound to
+the RunLog for the session's file, offset and configs: checkpoints taken
+while recording are also appended to it, together with the lifecycle
+events, and its checkpoints are loaded on demand by nearest(). A restarted
+session can then restore any previously recorded bar without replaying.
+
+Stepping back a few bars does not need a checkpoint at all: the session's
+detector and reference layer share an UndoJournal (dag/undo_journal.py)
+holding the last `undo_depth` bars, which reverse uses first.
+
+Example:
+    >>> store = CheckpointStore(interval=500)
+    >>> if store.due(bar.index):
+    ...     store.save(bar.index, detector, ref_layer, len(events))
+    >>> checkpoint = store.nearest(target_idx)
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from sortedcontainers import SortedDict
+
+from ...swing_analysis.dag import DetectorState, LegDetector, UndoJournal
+from ...swing_analysis.reference_layer import ReferenceLayer
+from ..schemas import LifecycleEvent
+from .run_cache import RunLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 500
+DEFAULT_MEMORY_BUDGET_BYTES = 256 * 1024 * 1024
+DEFAULT_UNDO_DEPTH = 64
+
+
+@dataclass
+class Checkpoint:
+    """Detector, reference layer and event cursor after bar_index."""
+    bar_index: int
+    detector_state: bytes
+    reference_layer: Optional[bytes]
+    event_cursor: int
+    nbytes: int
+    last_used: int = 0
+
+
+class CheckpointStore:
+    """
+    Interval checkpoints of one replay session, bounded by a memory budget.
+
+    Checkpoints are only valid for the source bars and config they were
+    recorded with. reset() binds the store to a source and starts
+    recording; invalidate() drops everything and stops recording until the
+    next reset(), for changes (e.g. a config update mid-run) after which
+    the live detector no longer matches a replay from bar 0.
+
+    A store reset with a RunLog reads and extends that cached run; the run
+    is detached again by the next reset() or invalidate().
+
+    Args:
+        interval: Bars between checkpoints (the most a rewind replays).
+        memory_budget_bytes: Total size of retained checkpoints.
+    """
+
+    def __init__(
+        self,
+        interval: int = DEFAULT_INTERVAL,
+        memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES,
+    ):
+        if interval < 1:
+            raise ValueError(f"Checkpoint interval must be >= 1, got {interval}")
+        if memory_budget_bytes < 0:
+            raise ValueError(f"Checkpoint memory budget must be >= 0, got {memory_budget_bytes}")
+        self.interval = interval
+        self.memory_budget_bytes = memory_budget_bytes
+        self.source_key: Optional[Hashable] = None
+        self.recording = False
+        self.run: Optional[RunLog] = None
+        self._checkpoints: SortedDict = SortedDict()  # bar_index -> Checkpoint
+        self._nbytes = 0
+        self._clock = 0
+
+    def __len__(self) -> int:
+        return len(self._checkpoints)
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of retained checkpoints."""
+        return self._nbytes
+
+    @property
+    def bar_indices(self) -> Tuple[int, ...]:
+        """Bar indices with a retained checkpoint, ascending."""
+        return tuple(self._checkpoints.keys())
+
+    def reset(
+        self,
+        source_key: Hashable = None,
+        recording: bool = True,
+        run: Optional[RunLog] = None,
+    ) -> None:
+        """Drop all checkpoints, bind to source_key (and run) and (by default) start recording."""
+        self._checkpoints.clear()
+        self._nbytes = 0
+        self.source_key = source_key
+        self.recording = recording
+        self.run = run
+
+    def invalidate(self) -> None:
+        """Drop all checkpoints and stop recording until the next reset()."""
+        self.reset(self.source_key, recording=False)
+
+    def due(self, bar_index: int) -> bool:
+        """Whether a checkpoint should be taken after bar_index."""
+        return (
+            self.recording
+            and (bar_index + 1) % self.interval == 0
+            and bar_index not in self._checkpoints
+        )
+
+    def save(
+        self,
+        bar_index: int,
+        detector: LegDetector,
+        ref_layer: Optional[ReferenceLayer],
+        event_cursor: int,
+        events: Optional[Sequence[LifecycleEvent]] = None,
+    ) -> Optional[Checkpoint]:
+        """
+        Snapshot the session after bar_index.
+
+        Args:
+            events: The session's lifecycle events (event_cursor long); given
+                while recording, the checkpoint is also appended to the run.
+
+        Returns:
+            The checkpoint, or None if it does not fit the memory budget.
+        """
+        detector_state = detector.state.to_bytes(detector.config)
+        reference = ref_layer.to_bytes() if ref_layer is not None else None
+        if self.run is not None and self.recording and events is not None:
+            self.run.append(bar_index, detector_state, reference, events, {
+                "active_legs": len(detector.state.active_legs),
+                "formed_refs": len(ref_layer._formed_refs) if ref_layer is not None else 0,
+            })
+        nbytes = len(detector_state) + (len(reference) if reference is not None else 0)
+        if nbytes > self.memory_budget_bytes:
+            return None
+
+        self.discard(bar_index)
+        self._clock += 1
+        checkpoint = Checkpoint(
+            bar_index=bar_index,
+            detector_state=detector_state,
+            reference_layer=reference,
+            event_cursor=event_cursor,
+            nbytes=nbytes,
+            last_used=self._clock,
+        )
+        self._checkpoints[bar_index] = checkpoint
+        self._nbytes += nbytes
+        self._evict()
+        return checkpoint
+
+    def discard(self, bar_index: int) -> None:
+        """Remove the checkpoint at bar_index, if any."""
+        checkpoint = self._checkpoints.pop(bar_index, None)
+        if checkpoint is not None:
+            self._nbytes -= checkpoint.nbytes
+
+    def nearest(self, bar_index: int) -> Optional[Checkpoint]:
+        """Latest checkpoint at or before bar_index (in memory or the run), or None."""
+        position = self._checkpoints.bisect_right(bar_index)
+        checkpoint = self._checkpoints.peekitem(position - 1)[1] if position else None
+        run_bar = self.run.nearest(bar_index) if self.run is not None else None
+        if run_bar is not None and (checkpoint is None or run_bar > checkpoint.bar_index):
+            checkpoint = self._load(run_bar)
+        if checkpoint is None:
+            return None
+        self._clock += 1
+        checkpoint.last_used = self._clock
+        return checkpoint
+
+    def logged_events(self, event_cursor: int) -> Optional[List[LifecycleEvent]]:
+        """The run's first event_cursor lifecycle events, or None if it has fewer."""
+        if self.run is None or event_cursor > self.run.event_count:
+            return None
+        return self.run.events(event_cursor)
+
+    def _load(self, bar_index: int) -> Checkpoint:
+        """Read a run checkpoint into memory (kept if it fits the budget)."""
+        detector_state, reference, event_cursor = self.run.read(bar_index)
+        nbytes = len(detector_state) + (len(reference) if reference is not None else 0)
+        checkpoint = Checkpoint(
+            bar_index=bar_index,
+            detector_state=detector_state,
+            reference_layer=reference,
+            event_cursor=event_cursor,
+            nbytes=nbytes,
+        )
+        if nbytes <= self.memory_budget_bytes:
+            self.discard(bar_index)
+            self._checkpoints[bar_index] = checkpoint
+            self._nbytes += nbytes
+            self._evict()
+        return checkpoint
+
+    def restore(
+        self,
+        checkpoint: Checkpoint,
+        detector: LegDetector,
+        ref_layer: ReferenceLayer,
+    ) -> None:
+        """
+        Load a checkpoint into detector and ref_layer in place.
+
+        Raises:
+            ValueError: If the checkpoint was recorded with a different
+                detection config than detector.config.
+        """
+        detector.state = DetectorState.from_bytes(checkpoint.detector_state, detector.config)
+        if checkpoint.reference_layer is not None:
+            ref_layer.copy_state_from(
+                ReferenceLayer.from_bytes(checkpoint.reference_layer, detector.config)
+            )
+
+    def _evict(self) -> None:
+        while self._nbytes > self.memory_budget_bytes and self._checkpoints:
+            oldest = min(self._checkpoints.values(), key=lambda c: c.last_used)
+            logger.debug(f"Evicting checkpoint at bar {oldest.bar_index}")
+            self.discard(oldest.bar_index)
+
+
+# Settings applied by new_checkpoint_store() and attach_undo_journal()
+_settings: Dict[str, int] = {
+    "interval": DEFAULT_INTERVAL,
+    "memory_budget_bytes": DEFAULT_MEMORY_BUDGET_BYTES,
+    "undo_depth": DEFAULT_UNDO_DEPTH,
+}
+
+
+def configure_checkpoints(
+    interval: Optional[int] = None,
+    memory_budget_bytes: Optional[int] = None,
+    undo_depth: Optional[int] = None,
+) -> None:
+    """
+    Set the checkpoint interval, memory budget and undo depth for replay sessions.
+
+    Applies to the current session (its checkpoints are dropped) and to
+    every store created afterwards. undo_depth=0 disables the undo journal
+    for detectors created afterwards.
+    """
+    from ..routers.cache import get_replay_cache
+
+    if interval is not None:
+        _settings["interval"] = interval
+    if memory_budget_bytes is not None:
+        _settings["memory_budget_bytes"] = memory_budget_bytes
+    if undo_depth is not None:
+        if undo_depth < 0:
+            raise ValueError(f"Undo depth must be >= 0, got {undo_depth}")
+        _settings["undo_depth"] = undo_depth
+
+    store = new_checkpoint_store()
+    cache = get_replay_cache()
+    old_store = cache.get("checkpoints")
+    if old_store is not None:
+        store.source_key = old_store.source_key
+        store.recording = old_store.recording
+        store.run = old_store.run
+    cache["checkpoints"] = store
+
+
+def new_checkpoint_store() -> CheckpointStore:
+    """Create an empty store with the configured interval and budget."""
+    return CheckpointStore(
+        interval=_settings["interval"],
+        memory_budget_bytes=_settings["memory_budget_bytes"],
+    )
+
+
+def attach_undo_journal(detector: LegDetector, ref_layer: ReferenceLayer) -> None:
+    """Give a new session detector and its reference layer a shared, empty undo journal."""
+    depth = _settings["undo_depth"]
+    journal = UndoJournal(depth) if depth > 0 else None
+    detector.undo_journal = journal
+    ref_layer.undo_journal = journal
@@ -0,0 +1,334 @@
+"""
+On-disk cache of replay runs, keyed by data and configuration.
+
+Replay checkpoints (checkpoints.py) live in memory, so every server start
+and every /api/session/restart replayed detection from bar 0 even for a
+file, offset and config that had been run before. Checkpoints recorded
+while playback follows a replay from bar 0 are now also written to a run
+directory keyed by:
+
+    file_digest        SHA-256 of the data file's bytes
+    window_offset      first source bar of the session
+    detection_config   DetectionConfig.fingerprint()
+    reference_config   ReferenceConfig.fingerprint()
+    code_version       hash of the detection and event code
+
+Detection at bar k only depends on bars 0..k, so a run is shared by
+sessions with any window size. A new session binds its CheckpointStore to
+the matching run and can restore any cached checkpoint (and the lifecycle
+events up to it) instead of replaying.
+
+Layout of one run (<root>/<run id>/):
+
+    meta.json      key, checkpoint index, summary stats, last_used
+    events.jsonl   lifecycle events, one JSON array per line
+    <bar>.dag      DetectorState checkpoint bytes (dag/checkpoint.py)
+    <bar>.ref      ReferenceLayer checkpoint bytes (reference_checkpoint.py)
+
+Runs are evicted least recently used first once the cache exceeds its
+disk budget. meta.json is replaced atomically after the files it indexes
+are written, so an interrupted write leaves the previous index valid.
+
+Example:
+    >>> cache = RunCache(user_cache_dir("run_cache"), disk_budget_bytes=1 << 30)
+    >>> run = cache.open(key)
+    >>> run.append(999, detector_bytes, reference_bytes, events, {"active_legs": 42})
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sortedcontainers import SortedDict
+
+from ..schemas import LifecycleEvent
+from .event_store import LifecycleEventStore
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the run directory layout changes
+RUN_FORMAT_VERSION = 1
+DEFAULT_DISK_BUDGET_BYTES = 1024 * 1024 * 1024
+
+# Event fields, in the order they are written to events.jsonl
+_EVENT_FIELDS = tuple(LifecycleEvent.model_fields)
+
+# Sources whose changes can alter recorded checkpoints or events
+_CODE_DIRS = ("swing_analysis", "replay_server/routers", "replay_server/services")
+
+
+@dataclass(frozen=True)
+class RunKey:
+    """Everything a recorded run depends on."""
+    file_digest: str
+    window_offset: int
+    detection_config: str
+    reference_config: str
+    code_version: str
+
+    @property
+    def run_id(self) -> str:
+        """Directory name of the run."""
+        encoded = json.dumps(asdict(self), sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()[:24]
+
+
+# resolved path -> (size, mtime_ns, SHA-256 hex digest) of its latest version
+_file_digests: Dict[str, Tuple[int, int, str]] = {}
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents, memoized until its size or mtime changes."""
+    resolved = Path(path).resolve()
+    stat = resolved.stat()
+    memo = _file_digests.get(str(resolved))
+    if memo is not None and memo[:2] == (stat.st_size, stat.st_mtime_ns):
+        return memo[2]
+    hasher = hashlib.sha256()
+    with open(resolved, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(chunk)
+    digest = hasher.hexdigest()
+    # One entry per path: a rewritten file replaces its old digest
+    _file_digests[str(resolved)] = (stat.st_size, stat.st_mtime_ns, digest)
+    return digest
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    """Hash of the detection and replay event sources (computed once per process)."""
+    src_root = Path(__file__).resolve().parent.parent.parent
+    hasher = hashlib.sha256(str(RUN_FORMAT_VERSION).encode())
+    for directory in _CODE_DIRS:
+        for path in sorted((src_root / directory).rglob("*.py")):
+            hasher.update(str(path.relative_to(src_root)).encode())
+            hasher.update(path.read_bytes())
+    return hasher.hexdigest()[:16]
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class RunLog:
+    """
+    One cached run: checkpoints and the lifecycle event log up to the last one.
+
+    Created by RunCache.open(). Checkpoints can only be appended past the
+    last one, so the event log always ends at the latest checkpoint.
+    """
+
+    def __init__(self, cache: "RunCache", key: RunKey, meta: Optional[Dict[str, Any]] = None):
+        self.cache = cache
+        self.key = key
+        self.path = cache.root / key.run_id
+        meta = meta or {}
+        # bar_index -> event cursor
+        self.checkpoints: SortedDict = SortedDict(
+            (int(bar), cursor) for bar, cursor in meta.get("checkpoints", {}).items()
+        )
+        self.event_count: int = meta.get("event_count", 0)
+        self.events_nbytes: int = meta.get("events_nbytes", 0)
+        self.nbytes: int = meta.get("nbytes", 0)
+        self.summary: Dict[str, Any] = meta.get("summary", {})
+        self.last_used: float = meta.get("last_used", 0.0)
+        self._events: Optional[LifecycleEventStore] = None
+
+    def __len__(self) -> int:
+        return len(self.checkpoints)
+
+    @property
+    def last_bar_index(self) -> int:
+        """Bar of the latest checkpoint, -1 if there is none."""
+        return self.checkpoints.peekitem(-1)[0] if self.checkpoints else -1
+
+    def nearest(self, bar_index: int) -> Optional[int]:
+        """Latest checkpoint bar at or before bar_index, or None."""
+        position = self.checkpoints.bisect_right(bar_index)
+        return self.checkpoints.peekitem(position - 1)[0] if position else None
+
+    def read(self, bar_index: int) -> Tuple[bytes, Optional[bytes], int]:
+        """Detector bytes, reference layer bytes (or None) and event cursor of a checkpoint."""
+        reference_path = self.path / f"{bar_index}.ref"
+        return (
+            (self.path / f"{bar_index}.dag").read_bytes(),
+            reference_path.read_bytes() if reference_path.exists() else None,
+            self.checkpoints[bar_index],
+        )
+
+    def events(self, cursor: int) -> List[LifecycleEvent]:
+        """The first `cursor` logged lifecycle events (cursor <= event_count)."""
+        if self._events is None:
+            self._events = LifecycleEventStore()
+            path = self.path / "events.jsonl"
+            if path.exists():
+                with open(path, "r") as f:
+                    for line in f:
+                        if len(self._events) == self.event_count:
+                            break  # Lines past the index are from an interrupted write
+                        values = json.loads(line)
+                        self._events.append(
+                            LifecycleEvent.model_construct(**dict(zip(_EVENT_FIELDS, values)))
+                        )
+        return self._events[:cursor]
+
+    def append(
+        self,
+        bar_index: int,
+        detector_state: bytes,
+        reference_layer: Optional[bytes],
+        events: Sequence[LifecycleEvent],
+        summary: Dict[str, Any],
+    ) -> bool:
+        """
+        Persist a checkpoint after bar_index with the events recorded so far.
+
+        Returns:
+            False if the checkpoint was not written: not past the last one,
+            or the run would not fit the cache's disk budget.
+        """
+        if bar_index <= self.last_bar_index:
+            return False
+        new_events = events[self.event_count:]
+        lines = "".join(
+            json.dumps([getattr(event, name) for name in _EVENT_FIELDS], separators=(",", ":")) + "\n"
+            for event in new_events
+        ).encode("utf-8")
+        added = len(detector_state) + len(lines) + (len(reference_layer) if reference_layer else 0)
+        if self.nbytes + added > self.cache.disk_budget_bytes:
+            return False
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / f"{bar_index}.dag").write_bytes(detector_state)
+        if reference_layer is not None:
+            (self.path / f"{bar_index}.ref").write_bytes(reference_layer)
+        with open(self.path / "events.jsonl", "ab") as f:
+            # Drop lines left past the index by an interrupted append
+            f.truncate(self.events_nbytes)
+            f.write(lines)
+
+        self.checkpoints[bar_index] = len(events)
+        self.event_count = len(events)
+        if self._events is not None:
+            self._events.extend(new_events)
+        self.nbytes += added
+        self.events_nbytes += len(lines)
+        self.summary = dict(summary, bars=bar_index + 1, events=self.event_count,
+                            checkpoints=len(self.checkpoints))
+        self._write_meta()
+        self.cache._evict(keep=self)
+        return True
+
+    def touch(self) -> None:
+        """Mark the run as used now (for LRU eviction)."""
+        self.last_used = time.time()
+        if self.path.exists():
+            self._write_meta()
+
+    def _write_meta(self) -> None:
+        meta = {
+            "format_version": RUN_FORMAT_VERSION,
+            "key": asdict(self.key),
+            "checkpoints": {str(bar): cursor for bar, cursor in self.checkpoints.items()},
+            "event_count": self.event_count,
+            "events_nbytes": self.events_nbytes,
+            "nbytes": self.nbytes,
+            "summary": self.summary,
+            "last_used": self.last_used,
+        }
+        _write_atomic(self.path / "meta.json", json.dumps(meta).encode("utf-8"))
+
+
+class RunCache:
+    """
+    Directory of cached runs, bounded by a total disk budget.
+
+    Args:
+        root: Cache directory (created on first write).
+        disk_budget_bytes: Total size of cached runs; least recently used
+            runs are deleted to stay under it.
+    """
+
+    def __init__(self, root: Path, disk_budget_bytes: int = DEFAULT_DISK_BUDGET_BYTES):
+        if disk_budget_bytes < 0:
+            raise ValueError(f"Run cache disk budget must be >= 0, got {disk_budget_bytes}")
+        self.root = Path(root)
+        self.disk_budget_bytes = disk_budget_bytes
+        self._runs: Dict[str, RunLog] = {}
+
+    def open(self, key: RunKey) -> RunLog:
+        """The cached run for key (empty if never recorded), marked as used."""
+        run = self._runs.get(key.run_id)
+        if run is None:
+            run = RunLog(self, key, self._read_meta(self.root / key.run_id))
+            self._runs[key.run_id] = run
+        run.touch()
+        return run
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of cached runs, as recorded in their indexes."""
+        return sum(meta.get("nbytes", 0) for _, meta in self._scan())
+
+    def _scan(self) -> List[Tuple[Path, Dict[str, Any]]]:
+        if not self.root.exists():
+            return []
+        runs = []
+        for path in self.root.iterdir():
+            if path.is_dir():
+                runs.append((path, self._read_meta(path) or {}))
+        return runs
+
+    @staticmethod
+    def _read_meta(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            meta = json.loads((path / "meta.json").read_bytes())
+        except (OSError, ValueError):
+            return None
+        if meta.get("format_version") != RUN_FORMAT_VERSION:
+            return None
+        return meta
+
+    def _evict(self, keep: Optional[RunLog] = None) -> None:
+        """Delete least recently used runs (never keep) until under the disk budget."""
+        runs = self._scan()
+        total = sum(meta.get("nbytes", 0) for _, meta in runs)
+        for path, meta in sorted(runs, key=lambda item: item[1].get("last_used", 0.0)):
+            if total <= self.disk_budget_bytes:
+                break
+            if keep is not None and path == keep.path:
+                continue
+            logger.info(f"Evicting cached run {path.name}")
+            shutil.rmtree(path, ignore_errors=True)
+            total -= meta.get("nbytes", 0)
+            self._runs.pop(path.name, None)
+
+
+# Process-wide run cache (None = disabled)
+_run_cache: Optional[RunCache] = None
+
+
+def configure_run_cache(
+    root: Optional[str],
+    disk_budget_bytes: int = DEFAULT_DISK_BUDGET_BYTES,
+) -> None:
+    """Enable the run cache at root, or disable it with root=None or a zero budget."""
+    global _run_cache
+    if root is None or disk_budget_bytes == 0:
+        _run_cache = None
+    else:
+        _run_cache = RunCache(Path(root), disk_budget_bytes)
+
+
+def get_run_cache() -> Optional[RunCache]:
+    """The configured run cache, or None when disabled."""
+    return _run_cache
@@ -9,8 +9,12 @@ Key Components:
 - Leg: Directional price movement with known temporal ordering
 - PendingOrigin: Potential origin for a new leg awaiting confirmation
 - DetectorState: Serializable state for pause/resume
+- LegStore: Partitioned, indexed container backing DetectorState.active_legs
+- LegArchive: Cold leg archive backing DetectorState.archived_legs
 - BarType: Classification of bar relationships
 - LegPruner: Stateless helper for leg pruning operations
+- EventBuffer: Events collected by LegDetector.process_bars()
+- UndoJournal: Bounded per-bar undo log for stepping back recent bars
 
 Example:
     >>> from swing_analysis.dag import LegDetector
@@ -24,8 +28,12 @@ Example:
 from .leg_detector import LegDetector, HierarchicalDetector
 from .leg import Leg, PendingOrigin
 from .state import DetectorState, BarType
+from .leg_store import LegStore
+from .leg_archive import LegArchive
 from .leg_pruner import LegPruner
 from .range_distribution import RollingBinDistribution, BIN_MULTIPLIERS, NUM_BINS
+from .batch import EventBuffer, bars_from_arrays, iter_bars, ohlc_arrays
+from .undo_journal import UndoJournal
 
 __all__ = [
     # Main detector
@@ -36,10 +44,19 @@ __all__ = [
     "PendingOrigin",
     "DetectorState",
     "BarType",
+    "LegStore",
+    "LegArchive",
     # Pruning
     "LegPruner",
     # Range distribution (#434)
     "RollingBinDistribution",
     "BIN_MULTIPLIERS",
     "NUM_BINS",
+    # Batch ingestion
+    "EventBuffer",
+    "bars_from_arrays",
+    "iter_bars",
+    "ohlc_arrays",
+    # Undo
+    "UndoJournal",
 ]
@@ -0,0 +1,192 @@
+"""
+Batch ingestion helpers for LegDetector.process_bars().
+
+Bulk replays used to build a Bar per DataFrame row via iterrows() and call
+process_bar() in a Python loop, collecting events into ad-hoc lists. This
+module provides the array-based pieces:
+
+- ohlc_arrays(): DataFrame -> (timestamps, open, high, low, close) arrays
+- iter_bars(): arrays -> Bar per row, built as the caller consumes them
+- bars_from_arrays(): arrays -> List[Bar] without per-row pandas access
+- EventBuffer: flat event list with per-event bar indices, as returned by
+  process_bars()
+"""
+
+import bisect
+from typing import Iterator, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..events import DetectionEvent
+from ..types import Bar
+
+# (timestamps, open, high, low, close); timestamps are int64 Unix seconds
+OHLCArrays = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+# Rows converted to Python values at a time by iter_bars()
+_CHUNK_ROWS = 4096
+
+
+def to_unix_seconds(timestamps) -> np.ndarray:
+    """
+    Normalize a timestamp array to int64 Unix seconds.
+
+    Accepts integer seconds, numpy datetime64 arrays or a pandas
+    DatetimeIndex (naive timestamps are treated as UTC, matching
+    pd.Timestamp.timestamp()).
+    """
+    if isinstance(timestamps, pd.DatetimeIndex):
+        if timestamps.tz is not None:
+            timestamps = timestamps.tz_convert(None)
+        timestamps = timestamps.values
+    values = np.asarray(timestamps)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[s]').astype(np.int64)
+    return values.astype(np.int64, copy=False)
+
+
+def ohlc_arrays(df: pd.DataFrame) -> OHLCArrays:
+    """
+    Extract contiguous OHLC arrays from a load_ohlc() DataFrame.
+
+    Args:
+        df: DataFrame with a DatetimeIndex and open/high/low/close columns.
+
+    Returns:
+        (timestamps, open, high, low, close) with int64 Unix-second
+        timestamps and float64 prices.
+    """
+    return (
+        to_unix_seconds(df.index),
+        df['open'].to_numpy(dtype=np.float64),
+        df['high'].to_numpy(dtype=np.float64),
+        df['low'].to_numpy(dtype=np.float64),
+        df['close'].to_numpy(dtype=np.float64),
+    )
+
+
+def iter_bars(
+    timestamps: Sequence,
+    open_: Sequence,
+    high: Sequence,
+    low: Sequence,
+    close: Sequence,
+    start_index: int = 0,
+) -> Iterator[Bar]:
+    """
+    Yield a Bar per row of OHLC arrays.
+
+    Rows are converted to Python ints/floats a chunk at a time (tolist()),
+    so only the bars being processed exist at once and the values are
+    identical to the per-row int(...)/float(...) path.
+
+    Args:
+        timestamps: Unix seconds (or datetime64) per bar.
+        open_, high, low, close: Prices per bar.
+        start_index: Bar.index of the first bar.
+
+    Raises:
+        ValueError: If the arrays differ in length (before any bar is yielded).
+    """
+    columns = (
+        to_unix_seconds(timestamps),
+        np.asarray(open_, dtype=np.float64),
+        np.asarray(high, dtype=np.float64),
+        np.asarray(low, dtype=np.float64),
+        np.asarray(close, dtype=np.float64),
+    )
+    lengths = {len(column) for column in columns}
+    if len(lengths) != 1:
+        raise ValueError(f"OHLC arrays must have equal lengths, got {sorted(lengths)}")
+    return _iter_bar_chunks(columns, lengths.pop(), start_index)
+
+
+def _iter_bar_chunks(columns, rows: int, start_index: int) -> Iterator[Bar]:
+    for start in range(0, rows, _CHUNK_ROWS):
+        chunk = [column[start:start + _CHUNK_ROWS].tolist() for column in columns]
+        index = start_index + start
+        for ts, o, h, l, c in zip(*chunk):
+            yield Bar(index=index, timestamp=ts, open=o, high=h, low=l, close=c)
+            index += 1
+
+
+def bars_from_arrays(
+    timestamps: Sequence,
+    open_: Sequence,
+    high: Sequence,
+    low: Sequence,
+    close: Sequence,
+    start_index: int = 0,
+) -> List[Bar]:
+    """
+    Build Bar objects from OHLC arrays.
+
+    Values are converted to Python ints/floats in bulk (tolist()), so the
+    resulting bars are identical to the per-row int(...)/float(...) path.
+
+    Args:
+        timestamps: Unix seconds (or datetime64) per bar.
+        open_, high, low, close: Prices per bar.
+        start_index: Bar.index of the first bar.
+
+    Returns:
+        List of Bar with sequential indices from start_index.
+    """
+    return list(iter_bars(timestamps, open_, high, low, close, start_index))
+
+
+class EventBuffer:
+    """
+    Events produced by a batch of bars, in emission order.
+
+    Events are kept in one flat list with a parallel list of the bar index
+    that produced each event (non-decreasing), so per-bar lookups are a
+    bisect rather than a list-of-lists.
+
+    Example:
+        >>> buffer = detector.process_bars(ts, o, h, l, c)
+        >>> len(buffer)
+        42
+        >>> for bar_index, events in buffer.by_bar():
+        ...     print(bar_index, len(events))
+    """
+
+    __slots__ = ('events', 'bar_indices', 'bars_processed')
+
+    def __init__(self):
+        self.events: List[DetectionEvent] = []
+        self.bar_indices: List[int] = []
+        self.bars_processed = 0
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self) -> Iterator[DetectionEvent]:
+        return iter(self.events)
+
+    def __getitem__(self, i):
+        return self.events[i]
+
+    def extend(self, bar_index: int, events: List[DetectionEvent]) -> None:
+        """Append the events of one bar."""
+        if events:
+            self.events.extend(events)
+            self.bar_indices.extend([bar_index] * len(events))
+
+    def for_bar(self, bar_index: int) -> List[DetectionEvent]:
+        """Events produced by a single bar."""
+        lo = bisect.bisect_left(self.bar_indices, bar_index)
+        hi = bisect.bisect_right(self.bar_indices, bar_index, lo)
+        return self.events[lo:hi]
+
+    def by_bar(self) -> Iterator[Tuple[int, List[DetectionEvent]]]:
+        """Yield (bar_index, events) for every bar that produced events."""
+        events = self.events
+        indices = self.bar_indices
+        start = 0
+        while start < len(events):
+            bar_index = indices[start]
+            end = bisect.bisect_right(indices, bar_index, start)
+            yield bar_index, events[start:end]
+            start = end
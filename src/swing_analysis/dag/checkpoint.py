@@ -0,0 +1,327 @@
+"""
+Binary checkpoint format for DetectorState.
+
+DetectorState.to_dict() writes every leg as a ~30-key dict with stringified
+Decimals, which is slow and bulky once a session holds thousands of legs.
+A checkpoint stores the legs as fixed-width little-endian records instead:
+
+    header   magic, schema version, flags, leg count, config fingerprint,
+             section sizes (HEADER)
+    strings  string table: count, end offsets, UTF-8 text
+    legs     leg_count records of LEG_DTYPE
+    fields   JSON of the remaining (small) DetectorState fields
+    archive  only with FLAG_ARCHIVE: count (u4) and LEG_DTYPE records of
+             the cold leg archive (DetectorState.archived_legs), sharing
+             the string table
+
+Leg IDs, parent IDs, direction/status and every Decimal (as str(), which
+round-trips exactly, exponent included) are interned in the string table;
+records refer to them by index. Optional numeric fields carry a presence
+bit, so None survives the round trip.
+
+Checkpoints are lossless: restored legs compare equal to the saved ones,
+including breach state and the other fields the dict form leaves out.
+decode_state() also accepts the JSON dict form for compatibility.
+
+Example:
+    >>> data = encode_state(detector.state, detector.config)
+    >>> state = decode_state(data, detector.config)
+"""
+
+import json
+import struct
+from decimal import Decimal
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, TYPE_CHECKING
+
+import numpy as np
+
+from .leg import Leg, RefMetadata
+
+if TYPE_CHECKING:
+    from ..detection_config import DetectionConfig
+    from .state import DetectorState
+
+MAGIC = b"DAGSTATE"
+SCHEMA_VERSION = 1
+
+# magic, version, flags, leg_count, config fingerprint, strings/legs/fields sizes
+HEADER = struct.Struct("<8sHHI8sIII")
+FLAG_CONFIG = 1
+FLAG_ARCHIVE = 2
+
+# String table reference for None
+NO_STRING = 0xFFFFFFFF
+
+# Leg fields stored as string table references (shared with the leg
+# archive, reference layer checkpoints and state digests)
+STRING_FIELDS = ('direction', 'status', 'leg_id', 'parent_leg_id')
+DECIMAL_FIELDS = (
+    'origin_price', 'pivot_price', 'retracement_pct', 'price_at_creation',
+    'max_origin_breach', 'max_pivot_breach', 'segment_deepest_price',
+)
+_INT_FIELDS = (
+    'origin_index', 'pivot_index', 'bar_count', 'gap_count',
+    'last_modified_bar', '_moment_n', 'depth',
+)
+_FLOAT_FIELDS = ('_moment_sum_x', '_moment_sum_x2', '_moment_sum_x3')
+# Optional numeric fields, in presence-bit order
+_OPTIONAL_INT_FIELDS = ('segment_deepest_index', 'range_bin_index')
+_OPTIONAL_FLOAT_FIELDS = (
+    'impulse', 'impulsiveness', 'spikiness', 'impulse_to_deepest',
+    'impulse_back', 'counter_trend_ratio', 'origin_counter_trend_range',
+    '_max_counter_leg_range', 'bin_impulsiveness', 'ref_max_location',
+)
+_OPTIONAL_FIELDS = _OPTIONAL_INT_FIELDS + _OPTIONAL_FLOAT_FIELDS
+
+LEG_DTYPE = np.dtype(
+    [(name, '<u4') for name in STRING_FIELDS + DECIMAL_FIELDS]
+    + [(name, '<i8') for name in _INT_FIELDS + _OPTIONAL_INT_FIELDS]
+    + [(name, '<f8') for name in _FLOAT_FIELDS + _OPTIONAL_FLOAT_FIELDS]
+    + [('present', '<u2')]
+)
+
+
+class CheckpointHeader(NamedTuple):
+    """Decoded checkpoint header."""
+    version: int
+    leg_count: int
+    config_fingerprint: Optional[str]
+
+
+def _leg_value(leg: Leg, name: str):
+    if name == 'ref_max_location':
+        return leg.ref.max_location
+    return getattr(leg, name)
+
+
+def pack_strings(strings: List[str]) -> bytes:
+    """String table section: count, end offsets (u4), concatenated UTF-8 text."""
+    offsets = np.cumsum([len(text) for text in strings], dtype=np.uint32)
+    return (
+        struct.pack("<I", len(strings))
+        + offsets.astype('<u4').tobytes()
+        + "".join(strings).encode("utf-8")
+    )
+
+
+def unpack_strings(view: memoryview, position: int, size: int) -> List[str]:
+    """Decode a pack_strings() section of `size` bytes starting at position."""
+    (count,) = struct.unpack_from("<I", view, position)
+    ends = np.frombuffer(view, dtype='<u4', count=count, offset=position + 4).tolist()
+    text = bytes(view[position + 4 + 4 * count:position + size]).decode("utf-8")
+    return [text[start:end] for start, end in zip([0] + ends, ends)]
+
+
+class StringTable:
+    """Interned strings in first-use order (the checkpoint string table)."""
+
+    __slots__ = ('strings', '_index')
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def intern(self, value) -> int:
+        """Reference to str(value) in the table (NO_STRING for None)."""
+        if value is None:
+            return NO_STRING
+        text = str(value)
+        index = self._index.get(text)
+        if index is None:
+            index = self._index[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+
+def encode_legs(legs: List[Leg], intern: Callable[[object], int]) -> np.ndarray:
+    """
+    Encode legs as LEG_DTYPE records.
+
+    Args:
+        legs: Legs to encode.
+        intern: Maps a string field value (or Decimal) to its string table
+            reference, NO_STRING for None (StringTable.intern).
+    """
+    records = np.zeros(len(legs), dtype=LEG_DTYPE)
+    for name in STRING_FIELDS + DECIMAL_FIELDS:
+        records[name] = [intern(getattr(leg, name)) for leg in legs]
+    for name in _INT_FIELDS + _FLOAT_FIELDS:
+        records[name] = [getattr(leg, name) for leg in legs]
+
+    present = np.zeros(len(legs), dtype=np.uint16)
+    for bit, name in enumerate(_OPTIONAL_FIELDS):
+        values = [_leg_value(leg, name) for leg in legs]
+        mask = np.array([value is not None for value in values], dtype=bool)
+        records[name] = [0 if value is None else value for value in values]
+        present |= mask.astype(np.uint16) << bit
+    records['present'] = present
+    return records
+
+
+def decode_legs(records: np.ndarray, strings: Sequence[str]) -> List[Leg]:
+    """Rebuild Leg objects from LEG_DTYPE records and their string table."""
+    columns = {name: records[name].tolist() for name in LEG_DTYPE.names}
+
+    def text_column(name: str) -> List[Optional[str]]:
+        return [None if ref == NO_STRING else strings[ref] for ref in columns[name]]
+
+    decimal_refs = np.unique(
+        np.concatenate([records[name] for name in DECIMAL_FIELDS])
+    ).tolist()
+    decimals = {ref: Decimal(strings[ref]) for ref in decimal_refs if ref != NO_STRING}
+    decimals[NO_STRING] = None
+    for name in DECIMAL_FIELDS:
+        columns[name] = [decimals[ref] for ref in columns[name]]
+    for name in STRING_FIELDS:
+        columns[name] = text_column(name)
+    present = columns.pop('present')
+    for bit, name in enumerate(_OPTIONAL_FIELDS):
+        columns[name] = [
+            value if flags >> bit & 1 else None
+            for value, flags in zip(columns[name], present)
+        ]
+
+    columns['ref'] = [RefMetadata(max_location=value) for value in columns.pop('ref_max_location')]
+    names = tuple(columns)
+    restore = Leg._from_field_values
+    return [restore(dict(zip(names, values))) for values in zip(*columns.values())]
+
+
+def _encode_json_value(value):
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    raise TypeError(f"Cannot encode {type(value).__name__} in a checkpoint")
+
+
+def _decode_json_object(obj: Dict):
+    if obj.keys() == {"__decimal__"}:
+        return Decimal(obj["__decimal__"])
+    return obj
+
+
+def encode_state(state: "DetectorState", config: Optional["DetectionConfig"] = None) -> bytes:
+    """
+    Serialize a DetectorState to checkpoint bytes.
+
+    Args:
+        state: State to serialize.
+        config: Detection config the state was produced with. Its
+            fingerprint is stored in the header and checked on restore.
+
+    Returns:
+        Checkpoint bytes (see module docstring for the layout).
+    """
+    legs = list(state.active_legs)
+    archived = list(state.archived_legs)
+    strings = StringTable()
+    records = encode_legs(legs, strings.intern)
+    archive_records = encode_legs(archived, strings.intern)
+
+    strings_section = pack_strings(strings.strings)
+    legs_section = records.tobytes()
+    fields_section = json.dumps(
+        state._fields_to_dict(), default=_encode_json_value, separators=(",", ":")
+    ).encode("utf-8")
+
+    flags = 0
+    archive_section = b""
+    if archived:
+        flags |= FLAG_ARCHIVE
+        archive_section = struct.pack("<I", len(archived)) + archive_records.tobytes()
+    fingerprint = bytes(8)
+    if config is not None:
+        flags |= FLAG_CONFIG
+        fingerprint = bytes.fromhex(config.fingerprint())
+
+    header = HEADER.pack(
+        MAGIC, SCHEMA_VERSION, flags, len(legs), fingerprint,
+        len(strings_section), len(legs_section), len(fields_section),
+    )
+    return header + strings_section + legs_section + fields_section + archive_section
+
+
+def is_checkpoint(data: bytes) -> bool:
+    """Whether data starts with the checkpoint magic."""
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def read_header(data: bytes) -> CheckpointHeader:
+    """
+    Decode and validate a checkpoint header.
+
+    Raises:
+        ValueError: If data is not a checkpoint or uses a newer schema.
+    """
+    if len(data) < HEADER.size or not is_checkpoint(data):
+        raise ValueError("Not a detector state checkpoint")
+    _, version, flags, leg_count, fingerprint, *_ = HEADER.unpack_from(data)
+    if version > SCHEMA_VERSION:
+        raise ValueError(
+            f"Checkpoint schema version {version} is newer than supported ({SCHEMA_VERSION})"
+        )
+    return CheckpointHeader(
+        version=version,
+        leg_count=leg_count,
+        config_fingerprint=fingerprint.hex() if flags & FLAG_CONFIG else None,
+    )
+
+
+def decode_state(data: bytes, config: Optional["DetectionConfig"] = None) -> "DetectorState":
+    """
+    Restore a DetectorState from checkpoint bytes or the JSON dict form.
+
+    Args:
+        data: Output of encode_state(), or UTF-8 JSON of DetectorState.to_dict().
+        config: If given, must match the config fingerprint stored in the
+            checkpoint header (checkpoints saved without a config and the
+            dict form are not checked).
+
+    Raises:
+        ValueError: If data is neither format, or the config does not match.
+    """
+    from .state import DetectorState
+
+    if not is_checkpoint(data):
+        if bytes(data).lstrip()[:1] == b"{":
+            return DetectorState.from_dict(json.loads(data))
+        raise ValueError("Not a detector state checkpoint or state dict")
+
+    header = read_header(data)
+    if (
+        config is not None
+        and header.config_fingerprint is not None
+        and header.config_fingerprint != config.fingerprint()
+    ):
+        raise ValueError(
+            "Checkpoint was saved with a different detection config "
+            f"({header.config_fingerprint} != {config.fingerprint()})"
+        )
+
+    _, _, flags, _, _, strings_size, legs_size, fields_size = HEADER.unpack_from(data)
+    view = memoryview(data)
+    position = HEADER.size
+
+    strings = unpack_strings(view, position, strings_size)
+    position += strings_size
+
+    # Leg records
+    records = np.frombuffer(view, dtype=LEG_DTYPE, count=header.leg_count, offset=position)
+    position += legs_size
+    legs = decode_legs(records, strings)
+
+    fields = json.loads(
+        bytes(view[position:position + fields_size]), object_hook=_decode_json_object
+    )
+    position += fields_size
+
+    archived: List[Leg] = []
+    if flags & FLAG_ARCHIVE:
+        (archive_count,) = struct.unpack_from("<I", view, position)
+        archive_records = np.frombuffer(
+            view, dtype=LEG_DTYPE, count=archive_count, offset=position + 4
+        )
+        archived = decode_legs(archive_records, strings)
+    return DetectorState._from_fields_dict(fields, legs, archived)
@@ -0,0 +1,198 @@
+"""
+Incrementally maintained impulse population for impulsiveness ranking.
+
+Impulsiveness (#241, #243, #394) is the percentile rank of a live leg's
+impulse against the impulses of all active legs with impulse > 0. The
+detector used to rebuild ``sorted(leg.impulse for leg in active_legs)`` on
+every bar and bisect for every live leg.
+
+ImpulsePopulation keeps the same population in a SortedList:
+- insert on leg creation
+- move when a pivot extension changes a leg's impulse
+- remove on prune
+- kept (untracked) when a leg moves to the cold archive, see leg_archive.py
+
+Impulsiveness itself is computed on read (see Leg.impulsiveness) and
+memoized against ``version``, which commit() bumps at the end of a bar when
+the population changed. Reads always reflect the population as of the last
+commit - exactly what the per-bar eager update used to store - because the
+changes made since (added and removed values, each leg's impulse at the
+last commit) are logged and subtracted back out. When a leg stops being
+live (origin breach or removal), freeze() pins its value.
+"""
+
+from typing import Dict, List, Optional
+
+from sortedcontainers import SortedList
+
+
+class ImpulsePopulation:
+    """
+    Sorted multiset of positive leg impulses with per-bar commit.
+
+    Example:
+        >>> population = ImpulsePopulation()
+        >>> population.update(leg)
+        >>> population.commit()
+        >>> population.committed_percentile(leg)
+        0.0
+    """
+
+    __slots__ = ('_values', '_by_leg', 'version', '_added', '_removed', '_start', '_new')
+
+    def __init__(self):
+        self._values = SortedList()
+        # id(leg) -> impulse currently counted in _values
+        self._by_leg: Dict[int, float] = {}
+        # Bumped by commit() when the population changed since the last commit
+        self.version = 0
+        # Changes since the last commit()
+        self._added: List[float] = []
+        self._removed: List[float] = []
+        # id(leg) -> impulse at the last commit (0.0 if it was not counted)
+        self._start: Dict[int, float] = {}
+        # id(leg) of legs attached since the last commit
+        self._new: set = set()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @staticmethod
+    def _counted(impulse: Optional[float]) -> bool:
+        return impulse is not None and impulse > 0
+
+    def _insert(self, value: float) -> None:
+        self._values.add(value)
+        self._added.append(value)
+
+    def _delete(self, value: float) -> None:
+        self._values.remove(value)
+        self._removed.append(value)
+
+    def attach(self, leg) -> None:
+        """
+        Register a newly stored leg.
+
+        Live legs get their impulsiveness computed on read from this
+        population; until the next commit() they keep the value they were
+        created with (the eager update ran at the end of the bar).
+        """
+        key = id(leg)
+        self._new.add(key)
+        leg._population = self if leg.max_origin_breach is None else None
+        self.update(leg)
+
+    def attach_all(self, legs) -> None:
+        """
+        Bulk attach() for an empty population (sorts the impulses once).
+        """
+        if self._by_leg or self._new:
+            raise ValueError("ImpulsePopulation.attach_all() requires an empty population")
+        values = []
+        for leg in legs:
+            key = id(leg)
+            self._new.add(key)
+            leg._population = self if leg.max_origin_breach is None else None
+            impulse = leg.impulse
+            if self._counted(impulse):
+                values.append(impulse)
+                self._by_leg[key] = impulse
+        self._values = SortedList(values)
+        self._added.extend(values)
+
+    def update(self, leg) -> None:
+        """Insert, move or remove a leg's impulse to match leg.impulse."""
+        key = id(leg)
+        new = leg.impulse
+        old = self._by_leg.get(key)
+        if new == old or (old is None and not self._counted(new)):
+            return
+        if key not in self._new:
+            self._start.setdefault(key, 0.0 if old is None else old)
+        if old is not None:
+            self._delete(old)
+            del self._by_leg[key]
+        if self._counted(new):
+            self._insert(new)
+            self._by_leg[key] = new
+
+    def discard(self, leg) -> None:
+        """Remove a leg's impulse (no-op if it was not counted)."""
+        key = id(leg)
+        old = self._by_leg.pop(key, None)
+        if old is not None:
+            self._delete(old)
+        self._start.pop(key, None)
+        self._new.discard(key)
+
+    def retain(self, leg) -> None:
+        """Stop tracking a leg but keep its impulse counted (cold archive)."""
+        key = id(leg)
+        self._by_leg.pop(key, None)
+        self._start.pop(key, None)
+        self._new.discard(key)
+
+    def add_values(self, impulses) -> None:
+        """Count impulses of legs not tracked here (archived legs on restore)."""
+        for impulse in impulses:
+            if self._counted(impulse):
+                self._insert(impulse)
+
+    def remove_value(self, impulse: Optional[float]) -> None:
+        """Uncount an impulse added with add_values() or kept by retain()."""
+        if self._counted(impulse):
+            self._delete(impulse)
+
+    def percentile(self, impulse: float) -> Optional[float]:
+        """
+        Percentile rank (0-100) of an impulse against the current population.
+
+        Identical to bisect_left on the sorted list / len * 100; None when
+        the population is empty.
+        """
+        values = self._values
+        if not values:
+            return None
+        return (values.bisect_left(impulse) / len(values)) * 100
+
+    def committed_percentile(self, leg) -> Optional[float]:
+        """
+        Percentile rank of a leg's impulse as of the last commit().
+
+        Uses the leg's impulse at the last commit and the population with
+        this bar's insertions and removals undone.
+        """
+        size = len(self._values) - len(self._added) + len(self._removed)
+        if size == 0:
+            return None
+        impulse = self._start.get(id(leg), leg.impulse)
+        rank = self._values.bisect_left(impulse)
+        for value in self._added:
+            if value < impulse:
+                rank -= 1
+        for value in self._removed:
+            if value < impulse:
+                rank += 1
+        return (rank / size) * 100
+
+    def is_new(self, leg) -> bool:
+        """Whether the leg was attached since the last commit()."""
+        return id(leg) in self._new
+
+    def freeze(self, leg) -> None:
+        """Pin a leg's impulsiveness when it stops being live (breach or prune)."""
+        if leg._population is not self:
+            return
+        if leg._impulsiveness_version != self.version and id(leg) not in self._new:
+            leg._impulsiveness = self.committed_percentile(leg)
+            leg._impulsiveness_version = self.version
+        leg._population = None
+
+    def commit(self) -> None:
+        """End of bar: make this bar's changes visible to impulsiveness reads."""
+        if self._added or self._removed:
+            self.version += 1
+            self._added = []
+            self._removed = []
+        self._start.clear()
+        self._new.clear()
@@ -5,9 +5,111 @@ These are the fundamental building blocks for tracking price movements
 before they form into swings.
 """
 
+import math
 from dataclasses import dataclass, field
 from decimal import Decimal
-from typing import Optional, Literal
+from typing import Any, Dict, Optional, Literal
+
+
+def _calculate_spikiness(n: int, sum_x: float, sum_x2: float, sum_x3: float) -> Optional[float]:
+    """
+    Calculate spikiness (0-100) from running moments using Fisher's skewness (#241, #244).
+
+    Spikiness measures whether the move was spike-driven or evenly distributed:
+    - 50 = neutral (symmetric distribution)
+    - 70+ = moderately spiky
+    - 90+ = very spiky (outlier bars drove the move)
+    - 30- = moderately smooth
+    - 10- = very smooth (evenly distributed)
+
+    Uses sigmoid normalization: spikiness = 100 / (1 + exp(-skewness))
+
+    Args:
+        n: Number of bar contributions tracked
+        sum_x: Sum of contributions
+        sum_x2: Sum of squared contributions
+        sum_x3: Sum of cubed contributions
+
+    Returns:
+        Spikiness (0-100) or None if n < 3 (skewness undefined).
+    """
+    # Need at least 3 samples for meaningful skewness
+    if n < 3:
+        return None
+
+    # Calculate mean and variance from moments
+    mean = sum_x / n
+    variance = (sum_x2 / n) - mean * mean
+
+    # Guard against near-zero variance (would cause division by zero)
+    if variance < 1e-10:
+        return 50.0  # Neutral if all contributions are identical
+
+    std_dev = math.sqrt(variance)
+
+    # Calculate third central moment for skewness
+    # E[(X - μ)³] = E[X³] - 3μE[X²] + 2μ³
+    third_moment = (sum_x3 / n) - 3 * mean * (sum_x2 / n) + 2 * mean ** 3
+
+    # Fisher's skewness = third_moment / std_dev³
+    skewness = third_moment / (std_dev ** 3)
+
+    # Sigmoid normalization to 0-100 range
+    # This maps any skewness value to a bounded 0-100 scale
+    spikiness = 100 / (1 + math.exp(-skewness))
+
+    return spikiness
+
+
+class _Spikiness:
+    """
+    Leg.spikiness, computed on read from the running moments.
+
+    Memoized against _moment_n, which every moment update bumps. Assigning
+    a value (constructor, tests) pins it until the moments next change.
+    """
+
+    def __get__(self, leg, owner=None):
+        if leg is None:
+            return None  # Dataclass field default
+        if leg._spikiness_n != leg._moment_n:
+            leg._spikiness = _calculate_spikiness(
+                leg._moment_n, leg._moment_sum_x, leg._moment_sum_x2, leg._moment_sum_x3
+            )
+            leg._spikiness_n = leg._moment_n
+        return leg._spikiness
+
+    def __set__(self, leg, value):
+        leg._spikiness = value
+        leg._spikiness_n = leg._moment_n
+
+
+class _Impulsiveness:
+    """
+    Leg.impulsiveness, computed on read from the stored impulse population.
+
+    While a leg is live and stored in a LegStore, the value is the percentile
+    rank as of the last completed bar, memoized against the population's
+    version. Breach or removal freezes it (ImpulsePopulation.freeze()).
+    Assigning a value pins it until the population next changes.
+    """
+
+    def __get__(self, leg, owner=None):
+        if leg is None:
+            return None  # Dataclass field default
+        population = leg._population
+        if population is not None:
+            if leg.max_origin_breach is not None:
+                population.freeze(leg)
+            elif leg._impulsiveness_version != population.version and not population.is_new(leg):
+                leg._impulsiveness = population.committed_percentile(leg)
+                leg._impulsiveness_version = population.version
+        return leg._impulsiveness
+
+    def __set__(self, leg, value):
+        leg._impulsiveness = value
+        population = leg._population
+        leg._impulsiveness_version = population.version if population is not None else -1
 
 
 @dataclass
@@ -76,10 +178,12 @@ class Leg:
     impulse: float = 0.0  # Points per bar (range / bar_count) - measures move intensity (#236)
     # Impulsiveness (0-100): Percentile rank of raw impulse against all formed legs (#241, #243)
     # Updated for live legs (max_origin_breach is None), frozen when leg stops being live
-    impulsiveness: Optional[float] = None
+    # Computed on read, memoized per population version (see _Impulsiveness)
+    impulsiveness: Optional[float] = _Impulsiveness()
     # Spikiness (0-100): Sigmoid-normalized skewness of bar contributions (#241, #244)
     # 50 = neutral (symmetric), 90+ = very spiky, 10- = very smooth
-    spikiness: Optional[float] = None
+    # Computed on read from the running moments (see _Spikiness)
+    spikiness: Optional[float] = _Spikiness()
     # Running moments for incremental spikiness calculation (#244)
     # These are O(1) space per leg and allow O(1) updates per bar
     _moment_n: int = 0  # Number of contributions tracked
@@ -125,6 +229,11 @@ class Leg:
     # Lives on Leg for lifecycle management (prunes with leg, no cleanup).
     ref: RefMetadata = field(default_factory=RefMetadata)
 
+    # Lazy metric memo state (plain attributes, not dataclass fields)
+    _population = None  # ImpulsePopulation while live and stored, else None
+    _impulsiveness_version = -1
+    _spikiness_n = 0
+
     def __post_init__(self) -> None:
         """Compute deterministic leg_id if not provided."""
         if not self.leg_id:
@@ -134,6 +243,24 @@ class Leg:
         # Initialize cached range
         self._cached_range = abs(self.origin_price - self.pivot_price)
 
+    @classmethod
+    def _from_field_values(cls, values: Dict[str, Any]) -> "Leg":
+        """
+        Rebuild a leg from a complete set of field values, skipping __init__.
+
+        Used by checkpoint restore, where running the generated __init__ for
+        thousands of legs dominates. values must hold every dataclass field;
+        impulsiveness and spikiness are pinned as constructor arguments are.
+        """
+        leg = cls.__new__(cls)
+        state = leg.__dict__
+        state.update(values)
+        state['_impulsiveness'] = state.pop('impulsiveness')
+        state['_spikiness'] = state.pop('spikiness')
+        state['_spikiness_n'] = state['_moment_n']
+        state['_cached_range'] = abs(state['origin_price'] - state['pivot_price'])
+        return leg
+
     @staticmethod
     def make_leg_id(
         direction: str, origin_price: Decimal, origin_index: int
@@ -0,0 +1,505 @@
+"""
+Cold leg archive for long-horizon runs.
+
+Root legs whose origin has been breached are never pruned by extension
+(#261), and with engulfed pruning relaxed most breached legs are never
+pruned at all. Over a multi-year run they pile up in active_legs, and every
+per-bar pass that walks the store (engulfed check, reference layer) keeps
+paying for legs that can no longer extend, dominate or parent anything.
+
+With DetectionConfig.archive_breach_multiple set, a leg whose origin breach
+reaches that multiple of its range moves here at the end of the bar
+(LegDetector._archive_cold_legs). LegArchive keeps it in columnar form:
+
+- the full leg as a LEG_DTYPE record (see checkpoint.py), its strings and
+  Decimals interned in the archive's string table
+- the fields that can still change, and the ones their updates read, as
+  per-slot columns: max_origin_breach, max_pivot_breach, parent_leg_id,
+  direction, origin/pivot price, range, impulse
+- a TriggerIndex over the breach and extension prune prices, the same
+  triggers the LegStore indexes for origin-breached legs
+
+Everything an origin-breached leg can still go through is handled here,
+and a leg is only revisited when a price trigger fires or a related leg
+changes:
+
+- breach growth (apply_breaches, mirrors LegDetector._update_breach_tracking)
+- engulfed pruning (engulfed_slots, checks only legs whose breach changed)
+- extension pruning of child legs (extension_prune_slots)
+- reparenting when the parent is pruned (reparent)
+- counter-trend range lookups at its pivot (max_range_at_pivot)
+
+so detector output over active and archived legs together is unchanged;
+events for archived legs follow those for active legs within each phase.
+Archived impulses stay counted in the impulse population. The reference
+layer only sees active_legs.
+
+get(), get_all() and iteration decode Leg objects on demand (lineage,
+digests, checkpoints). Mutations are reported to an attached UndoJournal.
+
+Example:
+    >>> archive = LegArchive()
+    >>> archive.add(cold_legs)
+    >>> first_pivot_breaches = archive.apply_breaches(bar_high, bar_low)
+    >>> leg = archive.get("leg_bull_4425.50_1234")
+"""
+
+import heapq
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from .checkpoint import (
+    DECIMAL_FIELDS,
+    LEG_DTYPE,
+    NO_STRING,
+    STRING_FIELDS,
+    StringTable,
+    decode_legs,
+    encode_legs,
+)
+from .leg import Leg
+from .trigger_index import KIND_ORIGIN, KIND_PIVOT, KIND_PRUNE, TriggerIndex, breached_leg_triggers
+
+if TYPE_CHECKING:
+    from .undo_journal import UndoJournal
+
+_INITIAL_CAPACITY = 64
+
+# Per-slot columns besides the record, in _saved_columns() order
+_HOT_COLUMNS = (
+    '_leg_id', '_bull', '_origin', '_pivot', '_range',
+    '_parent', '_origin_breach', '_pivot_breach', '_impulse', '_seq',
+)
+
+# Approximate bytes held per archived leg: the record, the column slots,
+# string table entries and index entries (tracemalloc over 925 archived ES
+# legs: ~1.9 KB, against ~3.3 KB for a Leg object plus its LegStore entries)
+ARCHIVED_LEG_BYTES = 1950
+
+# String tables are compacted once they hold this many strings per live
+# record field (and at least _MIN_COMPACT_STRINGS)
+_COMPACT_RATIO = 2
+_MIN_COMPACT_STRINGS = 4096
+
+_REF_FIELDS = STRING_FIELDS + DECIMAL_FIELDS
+
+
+class LegArchive:
+    """
+    Compact store of cold origin-breached legs, revisited by price triggers.
+
+    Args:
+        legs: Legs to archive (state restore), in archive order.
+    """
+
+    __slots__ = (
+        '_records', '_free', '_strings', '_order', '_seq_heap',
+        '_next_seq', '_by_id', '_children', '_pivots', '_triggers',
+        '_prune_threshold', '_dirty', '_engulfed_threshold', 'undo_journal',
+    ) + _HOT_COLUMNS
+
+    def __init__(self, legs: Iterable[Leg] = ()):
+        self._records = np.zeros(_INITIAL_CAPACITY, dtype=LEG_DTYPE)
+        # Min-heap of free slots (lowest reused first)
+        self._free: List[int] = list(range(_INITIAL_CAPACITY))
+        for name in _HOT_COLUMNS:
+            setattr(self, name, [None] * _INITIAL_CAPACITY)
+        self._strings = StringTable()
+        # seq -> slot (seq = archive order)
+        self._order: Dict[int, int] = {}
+        # Min-heap of seqs for oldest(); entries of removed legs are skipped
+        self._seq_heap: List[int] = []
+        self._next_seq = 0
+        # leg_id -> slots; parent_leg_id -> slots; (bull, pivot) -> slots.
+        # Nearly every key has one slot, so tuples rather than sets
+        self._by_id: Dict[str, Tuple[int, ...]] = {}
+        self._children: Dict[str, Tuple[int, ...]] = {}
+        self._pivots: Dict[Tuple[bool, Decimal], Tuple[int, ...]] = {}
+        # Price triggers keyed by seq
+        self._triggers = TriggerIndex()
+        self._prune_threshold: Optional[Decimal] = None
+        # Slots whose breach changed since the last engulfed check; None
+        # threshold forces a full check (restore, undo, config change)
+        self._dirty: Set[int] = set()
+        self._engulfed_threshold: Optional[float] = None
+        self.undo_journal: Optional["UndoJournal"] = None
+        self.add(list(legs), record=False)
+
+    # ------------------------------------------------------------------
+    # Size
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held for the archived legs."""
+        return len(self._order) * ARCHIVED_LEG_BYTES
+
+    def oldest(self) -> Optional[int]:
+        """Slot of the earliest archived leg still present, or None."""
+        heap = self._seq_heap
+        while heap:
+            slot = self._order.get(heap[0])
+            if slot is not None:
+                return slot
+            heapq.heappop(heap)
+        return None
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _grow(self) -> None:
+        old = len(self._records)
+        grown = np.zeros(old * 2, dtype=LEG_DTYPE)
+        grown[:old] = self._records
+        self._records = grown
+        for name in _HOT_COLUMNS:
+            getattr(self, name).extend([None] * old)
+        for slot in range(old, old * 2):
+            heapq.heappush(self._free, slot)
+
+    def _compact_strings(self) -> None:
+        """Drop strings no live record refers to (evicted and pruned legs)."""
+        slots = sorted(self._order.values())
+        records = self._records[slots]
+        refs = np.concatenate([records[name] for name in _REF_FIELDS])
+        used = np.unique(refs[refs != NO_STRING])
+        remap = np.full(len(self._strings), NO_STRING, dtype=np.uint32)
+        remap[used] = np.arange(len(used), dtype=np.uint32)
+        for name in _REF_FIELDS:
+            column = records[name]
+            # NO_STRING % NO_STRING == 0 keeps the lookup in bounds
+            records[name] = np.where(column == NO_STRING, NO_STRING, remap[column % NO_STRING])
+        self._records[slots] = records
+        strings = StringTable()
+        for ref in used.tolist():
+            strings.intern(self._strings.strings[ref])
+        self._strings = strings
+
+    def _maybe_compact(self) -> None:
+        live_refs = len(self._order) * len(_REF_FIELDS)
+        if len(self._strings) > max(_MIN_COMPACT_STRINGS, _COMPACT_RATIO * live_refs):
+            self._compact_strings()
+
+    def _index(self, slot: int) -> None:
+        """Add a filled slot to the registries and trigger index."""
+        seq = self._seq[slot]
+        self._order[seq] = slot
+        heapq.heappush(self._seq_heap, seq)
+        _insert(self._by_id, self._leg_id[slot], slot)
+        parent = self._parent[slot]
+        if parent is not None:
+            _insert(self._children, parent, slot)
+        _insert(self._pivots, (self._bull[slot], self._pivot[slot]), slot)
+        self._sync_triggers(slot)
+        self._dirty.add(slot)
+
+    def _unindex(self, slot: int) -> None:
+        seq = self._seq[slot]
+        del self._order[seq]
+        self._triggers.discard(seq)
+        self._dirty.discard(slot)
+        _discard(self._by_id, self._leg_id[slot], slot)
+        parent = self._parent[slot]
+        if parent is not None:
+            _discard(self._children, parent, slot)
+        _discard(self._pivots, (self._bull[slot], self._pivot[slot]), slot)
+
+    def _sync_triggers(self, slot: int) -> None:
+        self._triggers.update(self._seq[slot], breached_leg_triggers(
+            self._bull[slot], self._origin[slot], self._pivot[slot], self._range[slot],
+            self._origin_breach[slot], self._pivot_breach[slot], self._prune_threshold,
+        ))
+
+    def _record(self, op: tuple) -> None:
+        if self.undo_journal is not None:
+            self.undo_journal.record_archive(op)
+
+    def add(self, legs: List[Leg], record: bool = True) -> None:
+        """Archive origin-breached legs (already removed from active_legs)."""
+        if not legs:
+            return
+        while len(self._free) < len(legs):
+            self._grow()
+        slots = [heapq.heappop(self._free) for _ in legs]
+        self._records[slots] = encode_legs(legs, self._strings.intern)
+        for slot, leg in zip(slots, legs):
+            self._leg_id[slot] = leg.leg_id
+            self._bull[slot] = leg.direction == 'bull'
+            self._origin[slot] = leg.origin_price
+            self._pivot[slot] = leg.pivot_price
+            self._range[slot] = leg.range
+            self._parent[slot] = leg.parent_leg_id
+            self._origin_breach[slot] = leg.max_origin_breach
+            self._pivot_breach[slot] = leg.max_pivot_breach
+            self._impulse[slot] = leg.impulse
+            self._seq[slot] = self._next_seq
+            self._next_seq += 1
+            self._index(slot)
+            if record:
+                self._record(('add', slot))
+
+    def _release(self, slot: int) -> None:
+        self._unindex(slot)
+        for name in _HOT_COLUMNS:
+            getattr(self, name)[slot] = None
+        heapq.heappush(self._free, slot)
+
+    def _saved_columns(self, slot: int) -> tuple:
+        return tuple(getattr(self, name)[slot] for name in _HOT_COLUMNS)
+
+    def remove(self, slots: List[int]) -> List[Leg]:
+        """
+        Remove archived legs.
+
+        Returns:
+            The removed legs, decoded.
+        """
+        legs = self._decode(slots)
+        for slot, leg in zip(slots, legs):
+            # The leg itself, not the record: compaction renumbers strings
+            self._record(('remove', slot, leg, self._saved_columns(slot)))
+            self._release(slot)
+        self._maybe_compact()
+        return legs
+
+    def reparent(self, parent_leg_id: str, new_parent_leg_id: Optional[str]) -> None:
+        """Move the archived children of parent_leg_id to new_parent_leg_id (#281)."""
+        children = self._children.get(parent_leg_id)
+        if not children:
+            return
+        for slot in children:
+            self._record(('parent', slot, parent_leg_id))
+            self._set_parent(slot, new_parent_leg_id)
+
+    def _set_parent(self, slot: int, parent_leg_id: Optional[str]) -> None:
+        old = self._parent[slot]
+        if old is not None:
+            _discard(self._children, old, slot)
+        self._parent[slot] = parent_leg_id
+        if parent_leg_id is not None:
+            _insert(self._children, parent_leg_id, slot)
+
+    # ------------------------------------------------------------------
+    # Per-bar updates
+    # ------------------------------------------------------------------
+
+    def apply_breaches(self, bar_high: Decimal, bar_low: Decimal) -> List[Tuple[str, Decimal, Decimal]]:
+        """
+        Grow the origin and pivot breaches a bar reaches.
+
+        Mirrors the origin-breached branch of
+        LegDetector._update_breach_tracking().
+
+        Returns:
+            (leg_id, breach_price, breach_amount) of each first pivot breach,
+            in archive order.
+        """
+        fired = set()
+        for kind in (KIND_ORIGIN, KIND_PIVOT):
+            up, down = self._triggers.fired(kind, bar_high, bar_low)
+            fired.update(up, down)
+        first_breaches = []
+        for seq in sorted(fired):
+            slot = self._order[seq]
+            bull = self._bull[slot]
+            origin = self._origin[slot]
+            old_origin_breach = origin_breach = self._origin_breach[slot]
+            old_pivot_breach = pivot_breach = self._pivot_breach[slot]
+
+            if bull:
+                if bar_low < origin and origin - bar_low > origin_breach:
+                    origin_breach = origin - bar_low
+            elif bar_high > origin and bar_high - origin > origin_breach:
+                origin_breach = bar_high - origin
+
+            if self._range[slot] > 0:
+                pivot = self._pivot[slot]
+                if bull:
+                    breach_price, breach = bar_high, bar_high - pivot
+                    reached = bar_high > pivot
+                else:
+                    breach_price, breach = bar_low, pivot - bar_low
+                    reached = bar_low < pivot
+                if reached:
+                    if pivot_breach is None:
+                        first_breaches.append((self._leg_id[slot], breach_price, breach))
+                    if pivot_breach is None or breach > pivot_breach:
+                        pivot_breach = breach
+
+            if (origin_breach, pivot_breach) != (old_origin_breach, old_pivot_breach):
+                self._record(('breach', slot, old_origin_breach, old_pivot_breach))
+                self._origin_breach[slot] = origin_breach
+                self._pivot_breach[slot] = pivot_breach
+                self._sync_triggers(slot)
+                self._dirty.add(slot)
+        return first_breaches
+
+    def engulfed_slots(self, threshold: float) -> List[int]:
+        """
+        Archived legs meeting the engulfed condition (LegPruner.prune_engulfed_legs).
+
+        Only legs whose breach changed since the previous call are checked;
+        a leg that did not qualify then cannot qualify now.
+        """
+        if threshold != self._engulfed_threshold:
+            self._engulfed_threshold = threshold
+            candidates = self._order.values()
+        else:
+            candidates = self._dirty
+        self._dirty = set()
+        if threshold >= 1.0:
+            return []
+        slots = []
+        for slot in candidates:
+            leg_range = self._range[slot]
+            pivot_breach = self._pivot_breach[slot]
+            if leg_range == 0 or pivot_breach is None:
+                continue
+            combined_breach = float(self._origin_breach[slot] + pivot_breach) / float(leg_range)
+            if combined_breach >= threshold:
+                slots.append(slot)
+        return sorted(slots, key=self._seq.__getitem__)
+
+    def extension_prune_slots(
+        self, bar_high: Decimal, bar_low: Decimal, threshold: Decimal
+    ) -> List[int]:
+        """
+        Archived child legs past threshold * range beyond their origin (#203, #261).
+
+        Mirrors LegDetector._check_extension_prune(); root legs are exempt.
+        """
+        if threshold != self._prune_threshold:
+            self._prune_threshold = threshold
+            for slot in self._order.values():
+                self._sync_triggers(slot)
+        up, down = self._triggers.fired(KIND_PRUNE, bar_high, bar_low)
+        slots = []
+        for seq in sorted(up + down):
+            slot = self._order[seq]
+            if self._parent[slot] is None or self._range[slot] == 0:
+                continue
+            extension_amount = threshold * self._range[slot]
+            if self._bull[slot]:
+                if bar_low < self._origin[slot] - extension_amount:
+                    slots.append(slot)
+            elif bar_high > self._origin[slot] + extension_amount:
+                slots.append(slot)
+        return slots
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _decode(self, slots: List[int]) -> List[Leg]:
+        legs = decode_legs(self._records[slots], self._strings.strings)
+        for slot, leg in zip(slots, legs):
+            leg.max_origin_breach = self._origin_breach[slot]
+            leg.max_pivot_breach = self._pivot_breach[slot]
+            leg.parent_leg_id = self._parent[slot]
+        return legs
+
+    def _sorted_slots(self, slots: Iterable[int]) -> List[int]:
+        return sorted(slots, key=self._seq.__getitem__)
+
+    def leg(self, slot: int) -> Leg:
+        """Decoded leg at a slot."""
+        if self._seq[slot] is None:
+            raise KeyError(f"slot {slot} is free")
+        return self._decode([slot])[0]
+
+    def leg_id(self, slot: int) -> str:
+        return self._leg_id[slot]
+
+    def get(self, leg_id: str) -> Optional[Leg]:
+        """First archived leg with this ID, or None."""
+        slots = self._by_id.get(leg_id)
+        if not slots:
+            return None
+        return self._decode(self._sorted_slots(slots)[:1])[0]
+
+    def get_all(self, leg_id: str) -> List[Leg]:
+        """All archived legs with this ID, in archive order."""
+        return self._decode(self._sorted_slots(self._by_id.get(leg_id, ())))
+
+    def slots_with_ids(self, leg_ids: Iterable[str]) -> List[int]:
+        """Slots of the archived legs with any of these IDs, in archive order."""
+        slots = []
+        for leg_id in leg_ids:
+            slots.extend(self._by_id.get(leg_id, ()))
+        return self._sorted_slots(slots)
+
+    def children_of(self, leg_id: str) -> List[Leg]:
+        """Archived legs whose parent is leg_id."""
+        return self._decode(self._sorted_slots(self._children.get(leg_id, ())))
+
+    def max_range_at_pivot(self, direction: str, pivot_price: Decimal) -> Optional[Decimal]:
+        """Largest range among archived legs of a direction with this pivot (#336)."""
+        slots = self._pivots.get((direction == 'bull', pivot_price))
+        if not slots:
+            return None
+        return max(self._range[slot] for slot in slots)
+
+    def impulses(self) -> List[float]:
+        """Impulses of the archived legs (counted in the impulse population)."""
+        return [self._impulse[slot] for slot in self._order.values()]
+
+    def __contains__(self, leg_id: object) -> bool:
+        return leg_id in self._by_id
+
+    def __iter__(self) -> Iterator[Leg]:
+        return iter(self._decode([self._order[seq] for seq in sorted(self._order)]))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LegArchive):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"LegArchive({len(self)} legs)"
+
+    # ------------------------------------------------------------------
+    # Undo (see UndoJournal.record_archive)
+    # ------------------------------------------------------------------
+
+    def _undo(self, op: tuple) -> None:
+        """Revert one recorded mutation (journal replays them newest first)."""
+        kind = op[0]
+        if kind == 'add':
+            self._release(op[1])
+        elif kind == 'remove':
+            _, slot, leg, columns = op
+            self._free.remove(slot)
+            heapq.heapify(self._free)
+            self._records[slot] = encode_legs([leg], self._strings.intern)[0]
+            for name, value in zip(_HOT_COLUMNS, columns):
+                getattr(self, name)[slot] = value
+            self._index(slot)
+        elif kind == 'breach':
+            _, slot, origin_breach, pivot_breach = op
+            self._origin_breach[slot] = origin_breach
+            self._pivot_breach[slot] = pivot_breach
+            self._sync_triggers(slot)
+        elif kind == 'parent':
+            self._set_parent(op[1], op[2])
+        # Restored breaches were not checked under the current threshold
+        self._engulfed_threshold = None
+
+
+def _insert(index: Dict, key, slot: int) -> None:
+    index[key] = index.get(key, ()) + (slot,)
+
+
+def _discard(index: Dict, key, slot: int) -> None:
+    slots = index.get(key)
+    if slots is not None:
+        slots = tuple(other for other in slots if other != slot)
+        if slots:
+            index[key] = slots
+        else:
+            del index[key]
@@ -23,26 +23,28 @@ See Docs/Working/DAG_spec.md for full specification.
 See Docs/Working/Performance_question.md for design rationale.
 """
 
-import bisect
-from datetime import datetime
 from decimal import Decimal
-from typing import List, Dict, Tuple, Optional, TYPE_CHECKING
+from typing import Callable, List, Dict, Tuple, Optional, Sequence, TYPE_CHECKING
 
 from ..detection_config import DetectionConfig
 from ..types import Bar
 from ..events import (
     DetectionEvent,
+    EventTime,
     LegCreatedEvent,
     LegPrunedEvent,
     OriginBreachedEvent,
     PivotBreachedEvent,
+    event_time,
 )
+from .batch import EventBuffer, iter_bars
 from .leg import Leg, PendingOrigin
 from .state import DetectorState, BarType
 from .leg_pruner import LegPruner
 
 if TYPE_CHECKING:
     from ..reference_layer import ReferenceLayer
+    from .undo_journal import UndoJournal
 
 
 def _calculate_impulse(range_value: Decimal, origin_index: int, pivot_index: int) -> float:
@@ -66,29 +68,6 @@ def _calculate_impulse(range_value: Decimal, origin_index: int, pivot_index: int
     return float(range_value) / bar_count
 
 
-def _calculate_impulsiveness(raw_impulse: float, formed_impulses: List[float]) -> Optional[float]:
-    """
-    Calculate impulsiveness (0-100) as percentile rank of raw impulse (#241, #243).
-
-    Uses binary search for O(log n) percentile lookup against sorted population.
-
-    Args:
-        raw_impulse: Raw impulse value (points per bar)
-        formed_impulses: Sorted list of impulse values from all formed legs
-
-    Returns:
-        Percentile rank (0-100) or None if population is empty.
-    """
-    if not formed_impulses:
-        return None
-
-    # Find position where raw_impulse would be inserted
-    position = bisect.bisect_left(formed_impulses, raw_impulse)
-
-    # Percentile = (count of values below) / total * 100
-    return (position / len(formed_impulses)) * 100
-
-
 def _calculate_segment_impulse(
     parent: Leg,
     child_origin_price: Decimal,
@@ -172,58 +151,6 @@ def _update_segment_impulse_for_new_child(
     parent.impulse_back = float(range_back) / bars_back if bars_back > 0 else 0.0
 
 
-def _calculate_spikiness(n: int, sum_x: float, sum_x2: float, sum_x3: float) -> Optional[float]:
-    """
-    Calculate spikiness (0-100) from running moments using Fisher's skewness (#241, #244).
-
-    Spikiness measures whether the move was spike-driven or evenly distributed:
-    - 50 = neutral (symmetric distribution)
-    - 70+ = moderately spiky
-    - 90+ = very spiky (outlier bars drove the move)
-    - 30- = moderately smooth
-    - 10- = very smooth (evenly distributed)
-
-    Uses sigmoid normalization: spikiness = 100 / (1 + exp(-skewness))
-
-    Args:
-        n: Number of bar contributions tracked
-        sum_x: Sum of contributions
-        sum_x2: Sum of squared contributions
-        sum_x3: Sum of cubed contributions
-
-    Returns:
-        Spikiness (0-100) or None if n < 3 (skewness undefined).
-    """
-    import math
-
-    # Need at least 3 samples for meaningful skewness
-    if n < 3:
-        return None
-
-    # Calculate mean and variance from moments
-    mean = sum_x / n
-    variance = (sum_x2 / n) - mean * mean
-
-    # Guard against near-zero variance (would cause division by zero)
-    if variance < 1e-10:
-        return 50.0  # Neutral if all contributions are identical
-
-    std_dev = math.sqrt(variance)
-
-    # Calculate third central moment for skewness
-    # E[(X - μ)³] = E[X³] - 3μE[X²] + 2μ³
-    third_moment = (sum_x3 / n) - 3 * mean * (sum_x2 / n) + 2 * mean ** 3
-
-    # Fisher's skewness = third_moment / std_dev³
-    skewness = third_moment / (std_dev ** 3)
-
-    # Sigmoid normalization to 0-100 range
-    # This maps any skewness value to a bounded 0-100 scale
-    spikiness = 100 / (1 + math.exp(-skewness))
-
-    return spikiness
-
-
 class LegDetector:
     """
     DAG-based leg detector for the structural layer.
@@ -231,8 +158,8 @@ class LegDetector:
     Detects and tracks legs incrementally. Forms swings when legs
     reach the formation threshold (default 38.2% retracement).
 
-    Processes one bar at a time via process_bar(). Batch processing is just
-    a loop calling process_bar() - no special batch logic.
+    Processes one bar at a time via process_bar(). Batch processing over OHLC
+    arrays (process_bars()) is the same per-bar path - no special batch logic.
 
     Key design principles:
     1. No lookahead - Algorithm only sees current and past bars
@@ -263,6 +190,24 @@ class LegDetector:
         self.config = config or DetectionConfig.default()
         self.state = DetectorState()
         self._pruner = LegPruner(self.config)
+        # Optional per-bar undo log (see undo_journal.py)
+        self.undo_journal: Optional["UndoJournal"] = None
+        # Long-horizon mode (see leg_archive.py): legs whose origin breach
+        # reached the archive multiple this bar, and whether every breached
+        # leg must be checked (after a restore or config change)
+        self._archive_multiple = self._resolve_archive_multiple(self.config)
+        self._archive_pending: List[Leg] = []
+        self._archive_sweep = False
+
+    @staticmethod
+    def _resolve_archive_multiple(config: DetectionConfig) -> Optional[Decimal]:
+        """Validate the cold archive multiple; None when long-horizon mode is off."""
+        multiple = config.archive_breach_multiple
+        if multiple is None:
+            return None
+        if multiple < 0:
+            raise ValueError(f"archive_breach_multiple must be >= 0, got {multiple}")
+        return Decimal(str(multiple))
 
     def _classify_bar_type(self, bar: Bar, prev_bar: Bar) -> BarType:
         """
@@ -332,8 +277,12 @@ class LegDetector:
             bar_high: Current bar's high as Decimal
             bar_low: Current bar's low as Decimal
         """
+        legs = self.state.active_legs
+        # Only legs whose pivot lies beyond this bar (price-indexed triggers)
+        bull_candidates, bear_candidates = legs.extension_triggers(bar_high, bar_low)
+
         # Extend bull leg pivots on new highs (only if origin not breached #208, #345)
-        for leg in self.state.active_legs:
+        for leg in bull_candidates:
             # Only extend legs that are structurally live (no origin breach)
             if leg.direction == 'bull' and leg.max_origin_breach is None:
                 if bar_high > leg.pivot_price:
@@ -341,6 +290,7 @@ class LegDetector:
                     leg.last_modified_bar = bar.index
                     # Recalculate impulse when pivot extends (#236)
                     leg.impulse = _calculate_impulse(leg.range, leg.origin_index, leg.pivot_index)
+                    legs.sync(leg)
                     # Update pending bear origin to this pivot (#338, #395)
                     # This ensures bear legs form at bull pivots where R0 will match
                     # Only update if new price is higher (better for bear legs)
@@ -351,7 +301,7 @@ class LegDetector:
                         )
 
         # Extend bear leg pivots on new lows (only if origin not breached #208, #345)
-        for leg in self.state.active_legs:
+        for leg in bear_candidates:
             # Only extend legs that are structurally live (no origin breach)
             if leg.direction == 'bear' and leg.max_origin_breach is None:
                 if bar_low < leg.pivot_price:
@@ -359,6 +309,7 @@ class LegDetector:
                     leg.last_modified_bar = bar.index
                     # Recalculate impulse when pivot extends (#236)
                     leg.impulse = _calculate_impulse(leg.range, leg.origin_index, leg.pivot_index)
+                    legs.sync(leg)
                     # Update pending bull origin to this pivot (#338, #395)
                     # This ensures bull legs form at bear pivots where R0 will match
                     # Only update if new price is lower (better for bull legs)
@@ -394,15 +345,18 @@ class LegDetector:
 
         # Don't filter by status - we want ANY leg that ever existed at this pivot
         # The leg may be invalidated but still in active_legs
-        matching_legs = [
-            leg for leg in self.state.active_legs
+        ranges = [
+            leg.range for leg in self.state.active_legs
             if leg.direction == opposite_direction
             and leg.pivot_price == origin_price
         ]
+        # Cold archive (long-horizon mode) is indexed by pivot
+        archived_range = self.state.archived_legs.max_range_at_pivot(opposite_direction, origin_price)
+        if archived_range is not None:
+            ranges.append(archived_range)
 
-        if matching_legs:
-            longest = max(matching_legs, key=lambda l: l.range)
-            return float(longest.range)
+        if ranges:
+            return float(max(ranges))
         return None
 
     def _update_breach_tracking(
@@ -410,7 +364,7 @@ class LegDetector:
         bar: Bar,
         bar_high: Decimal,
         bar_low: Decimal,
-        timestamp: datetime
+        timestamp: EventTime,
     ) -> Tuple[List[DetectionEvent], List[Leg]]:
         """
         Update breach tracking for all active legs (#208, #345).
@@ -434,7 +388,7 @@ class LegDetector:
             bar: Current bar being processed
             bar_high: Current bar's high as Decimal
             bar_low: Current bar's low as Decimal
-            timestamp: Timestamp for events
+            timestamp: Bar timestamp for events (see event_time())
 
         Returns:
             Tuple of (events, newly_breached_legs) where events include
@@ -442,11 +396,18 @@ class LegDetector:
         """
         events: List[DetectionEvent] = []
         newly_breached_legs: List[Leg] = []
+        archive_multiple = self._archive_multiple
 
-        for leg in self.state.active_legs:
+        # Only legs whose origin or pivot breach state changes on this bar
+        # (price-indexed triggers). Exact Decimal checks below decide.
+        legs = self.state.active_legs
+        candidates = legs.breach_triggers(bar_high, bar_low)
+
+        for leg in candidates:
             # Skip legs that are completely done (stale/pruned)
             if leg.status != 'active':
                 continue
+            prior_breaches = (leg.max_origin_breach, leg.max_pivot_breach)
 
             # Origin breach tracking (only for legs not yet breached)
             if leg.max_origin_breach is None:
@@ -468,10 +429,11 @@ class LegDetector:
                         breach_price = bar_high
 
                 if origin_just_breached:
+                    legs.mark_origin_breached(leg)
                     newly_breached_legs.append(leg)
                     events.append(OriginBreachedEvent(
                         bar_index=bar.index,
-                        timestamp=timestamp,
+                        timestamp=event_time(timestamp),
                         leg_id=leg.leg_id,
                         breach_price=breach_price,
                         breach_amount=leg.max_origin_breach,
@@ -504,7 +466,7 @@ class LegDetector:
                         if was_first_breach:
                             events.append(PivotBreachedEvent(
                                 bar_index=bar.index,
-                                timestamp=timestamp,
+                                timestamp=event_time(timestamp),
                                 leg_id=leg.leg_id,
                                 breach_price=bar_high,
                                 breach_amount=breach,
@@ -520,15 +482,38 @@ class LegDetector:
                         if was_first_breach:
                             events.append(PivotBreachedEvent(
                                 bar_index=bar.index,
-                                timestamp=timestamp,
+                                timestamp=event_time(timestamp),
                                 leg_id=leg.leg_id,
                                 breach_price=bar_low,
                                 breach_amount=breach,
                             ))
 
+            # Move this leg's breach triggers to the new thresholds
+            if (leg.max_origin_breach, leg.max_pivot_breach) != prior_breaches:
+                legs.sync_triggers(leg)
+                # Long-horizon mode: archived at the end of the bar
+                if (
+                    archive_multiple is not None
+                    and leg.max_origin_breach is not None
+                    and leg.max_origin_breach >= archive_multiple * leg.range
+                ):
+                    self._archive_pending.append(leg)
+
+        # Cold archive: same updates, revisited by its own price triggers
+        for leg_id, breach_price, breach_amount in self.state.archived_legs.apply_breaches(
+            bar_high, bar_low
+        ):
+            events.append(PivotBreachedEvent(
+                bar_index=bar.index,
+                timestamp=event_time(timestamp),
+                leg_id=leg_id,
+                breach_price=breach_price,
+                breach_amount=breach_amount,
+            ))
+
         return events, newly_breached_legs
 
-    def _update_dag_state(self, bar: Bar, timestamp: datetime) -> List[DetectionEvent]:
+    def _update_dag_state(self, bar: Bar, timestamp: EventTime) -> List[DetectionEvent]:
         """
         Update DAG state with new bar using streaming leg tracking.
 
@@ -538,7 +523,7 @@ class LegDetector:
 
         Args:
             bar: Current bar being processed
-            timestamp: Timestamp for events
+            timestamp: Bar timestamp for events (see event_time())
 
         Returns:
             List of DetectionEvent for any events generated
@@ -626,14 +611,18 @@ class LegDetector:
             events.extend(self._process_type3(bar, timestamp, bar_high, bar_low, bar_close, prev_high, prev_low))
 
         # Increment bar count for all live legs (origin not breached) (#345)
-        for leg in self.state.active_legs:
-            if leg.status == 'active' and leg.max_origin_breach is None:
+        for leg in self.state.active_legs.live_legs():
+            if leg.status == 'active':
                 leg.bar_count += 1
 
         # Check 3x extension pruning for origin-breached legs (#203, #345)
         extension_prune_events = self._check_extension_prune(bar, timestamp)
         events.extend(extension_prune_events)
 
+        # Long-horizon mode: archive cold legs
+        if self._archive_multiple is not None:
+            events.extend(self._archive_cold_legs(bar, timestamp))
+
         # Store current bar as previous for next iteration
         self.state.prev_bar = bar
 
@@ -664,7 +653,7 @@ class LegDetector:
         )
 
     def _process_type2_bull(
-        self, bar: Bar, timestamp: datetime,
+        self, bar: Bar, timestamp: EventTime,
         bar_high: Decimal, bar_low: Decimal, bar_close: Decimal,
         prev_high: Decimal, prev_low: Decimal
     ) -> List[DetectionEvent]:
@@ -692,9 +681,10 @@ class LegDetector:
             # Check if we already have a live bull leg from this origin (#345)
             # Origin-breached legs don't block new leg creation at the same price
             existing_bull_leg = any(
-                leg.direction == 'bull' and leg.max_origin_breach is None
-                and leg.origin_price == pending.price and leg.origin_index == pending.bar_index
-                for leg in self.state.active_legs
+                leg.origin_index == pending.bar_index
+                for leg in self.state.active_legs.live_by_origin(
+                    'bull', above=pending.price, below=pending.price, inclusive=True
+                )
             )
             # Skip if dominated by existing leg with better origin (#194)
             if self._pruner.would_leg_be_dominated(self.state, 'bull', pending.price):
@@ -747,7 +737,7 @@ class LegDetector:
                 # Emit LegCreatedEvent (#168)
                 events.append(LegCreatedEvent(
                     bar_index=bar.index,
-                    timestamp=timestamp,
+                    timestamp=event_time(timestamp),
                     leg_id=new_leg.leg_id,
                     direction=new_leg.direction,
                     origin_price=new_leg.origin_price,
@@ -773,7 +763,7 @@ class LegDetector:
         return events
 
     def _process_type2_bear(
-        self, bar: Bar, timestamp: datetime,
+        self, bar: Bar, timestamp: EventTime,
         bar_high: Decimal, bar_low: Decimal, bar_close: Decimal,
         prev_high: Decimal, prev_low: Decimal
     ) -> List[DetectionEvent]:
@@ -803,9 +793,10 @@ class LegDetector:
             # Only create if we don't already have a live bear leg with this origin (#345)
             # Origin-breached legs don't block new leg creation at the same price
             existing_bear_leg = any(
-                leg.direction == 'bear' and leg.max_origin_breach is None
-                and leg.origin_price == pending.price and leg.origin_index == pending.bar_index
-                for leg in self.state.active_legs
+                leg.origin_index == pending.bar_index
+                for leg in self.state.active_legs.live_by_origin(
+                    'bear', above=pending.price, below=pending.price, inclusive=True
+                )
             )
             # Skip if dominated by existing leg with better origin (#194)
             if self._pruner.would_leg_be_dominated(self.state, 'bear', pending.price):
@@ -857,7 +848,7 @@ class LegDetector:
                 # Emit LegCreatedEvent (#168)
                 events.append(LegCreatedEvent(
                     bar_index=bar.index,
-                    timestamp=timestamp,
+                    timestamp=event_time(timestamp),
                     leg_id=new_bear_leg.leg_id,
                     direction=new_bear_leg.direction,
                     origin_price=new_bear_leg.origin_price,
@@ -883,7 +874,7 @@ class LegDetector:
         return events
 
     def _process_type1(
-        self, bar: Bar, timestamp: datetime,
+        self, bar: Bar, timestamp: EventTime,
         bar_high: Decimal, bar_low: Decimal, bar_close: Decimal
     ) -> List[DetectionEvent]:
         """
@@ -957,7 +948,7 @@ class LegDetector:
                     # Emit LegCreatedEvent (#168)
                     events.append(LegCreatedEvent(
                         bar_index=bar.index,
-                        timestamp=timestamp,
+                        timestamp=event_time(timestamp),
                         leg_id=new_bear_leg.leg_id,
                         direction=new_bear_leg.direction,
                         origin_price=new_bear_leg.origin_price,
@@ -1022,7 +1013,7 @@ class LegDetector:
                     # Emit LegCreatedEvent (#168)
                     events.append(LegCreatedEvent(
                         bar_index=bar.index,
-                        timestamp=timestamp,
+                        timestamp=event_time(timestamp),
                         leg_id=new_bull_leg.leg_id,
                         direction=new_bull_leg.direction,
                         origin_price=new_bull_leg.origin_price,
@@ -1048,25 +1039,23 @@ class LegDetector:
         # Update retracement for bull legs using bar.high (prev.L was before bar.H)
         # Bull: origin=LOW, pivot=HIGH, retracement = (current - origin) / range
         # Only update for legs with live origin (#345)
-        for leg in self.state.active_legs:
-            if leg.direction == 'bull' and leg.max_origin_breach is None:
-                if leg.range > 0:
-                    retracement = (bar_high - leg.origin_price) / leg.range
-                    leg.retracement_pct = retracement
+        for leg in self.state.active_legs.live_legs('bull'):
+            if leg.range > 0:
+                retracement = (bar_high - leg.origin_price) / leg.range
+                leg.retracement_pct = retracement
 
         # Update retracement for bear legs using bar.low (prev.H was before bar.L)
         # Bear: origin=HIGH, pivot=LOW, retracement = (origin - current) / range
         # Only update for legs with live origin (#345)
-        for leg in self.state.active_legs:
-            if leg.direction == 'bear' and leg.max_origin_breach is None:
-                if leg.range > 0:
-                    retracement = (leg.origin_price - bar_low) / leg.range
-                    leg.retracement_pct = retracement
+        for leg in self.state.active_legs.live_legs('bear'):
+            if leg.range > 0:
+                retracement = (leg.origin_price - bar_low) / leg.range
+                leg.retracement_pct = retracement
 
         return events
 
     def _process_type3(
-        self, bar: Bar, timestamp: datetime,
+        self, bar: Bar, timestamp: EventTime,
         bar_high: Decimal, bar_low: Decimal, bar_close: Decimal,
         prev_high: Decimal, prev_low: Decimal
     ) -> List[DetectionEvent]:
@@ -1094,7 +1083,7 @@ class LegDetector:
 
         return events
 
-    def _check_extension_prune(self, bar: Bar, timestamp: datetime) -> List[LegPrunedEvent]:
+    def _check_extension_prune(self, bar: Bar, timestamp: EventTime) -> List[LegPrunedEvent]:
         """
         Prune origin-breached child legs that have reached 3x extension (#203, #261, #345).
 
@@ -1111,7 +1100,11 @@ class LegDetector:
         bar_low = Decimal(str(bar.low))
         pruned_legs: List[Leg] = []
 
-        for leg in self.state.active_legs:
+        # Only legs whose prune price this bar passes (price-indexed triggers)
+        candidates = self.state.active_legs.extension_prune_triggers(
+            bar_high, bar_low, extension_threshold
+        )
+        for leg in candidates:
             # Only check origin-breached legs (#345)
             if leg.max_origin_breach is None:
                 continue
@@ -1139,19 +1132,79 @@ class LegDetector:
                     leg.status = 'stale'
                     pruned_legs.append(leg)
 
+        # Cold archive (long-horizon mode): same rule, same triggers
+        archive = self.state.archived_legs
+        archived_slots = archive.extension_prune_slots(bar_high, bar_low, extension_threshold)
+
         # Reparent children and emit LegPrunedEvent for each pruned leg (#281)
         for leg in pruned_legs:
             self._pruner.reparent_children(self.state, leg)
             events.append(LegPrunedEvent(
                 bar_index=bar.index,
-                timestamp=timestamp,
+                timestamp=event_time(timestamp),
                 leg_id=leg.leg_id,
                 reason="extension_prune",
             ))
+        for slot in archived_slots:
+            # Decoded now: earlier reparenting may have changed its parent
+            self._pruner.reparent_children(self.state, archive.leg(slot))
+            events.append(LegPrunedEvent(
+                bar_index=bar.index,
+                timestamp=event_time(timestamp),
+                leg_id=archive.leg_id(slot),
+                reason="extension_prune",
+            ))
 
         # Remove pruned legs
-        self.state.active_legs = [leg for leg in self.state.active_legs if leg.status != 'stale']
+        if pruned_legs:
+            self.state.active_legs.retain(lambda leg: leg.status != 'stale')
+        if archived_slots:
+            self.state.drop_archived(archived_slots)
+
+        return events
+
+    def _archive_cold_legs(self, bar: Bar, timestamp: EventTime) -> List[LegPrunedEvent]:
+        """
+        Long-horizon mode: move cold legs to the archive (see leg_archive.py).
+
+        A leg is cold once its origin breach reaches archive_breach_multiple
+        times its range. Legs pruned earlier in the bar are skipped. When the
+        archive outgrows archive_budget_bytes, its oldest legs are pruned.
+
+        Returns:
+            LegPrunedEvent (reason "archive_evicted") for each evicted leg.
+        """
+        multiple = self._archive_multiple
+        legs = self.state.active_legs
+        if self._archive_sweep:
+            self._archive_sweep = False
+            self._archive_pending = [
+                leg for leg in legs.breached_legs()
+                if leg.max_origin_breach >= multiple * leg.range
+            ]
+        cold = [
+            leg for leg in self._archive_pending
+            if leg.status == 'active' and legs.holds(leg)
+        ]
+        self._archive_pending = []
+        if cold:
+            self.state.archive_legs(cold)
 
+        events: List[LegPrunedEvent] = []
+        budget = self.config.archive_budget_bytes
+        archive = self.state.archived_legs
+        if budget is None:
+            return events
+        while archive.nbytes > budget:
+            slot = archive.oldest()
+            self._pruner.reparent_children(self.state, archive.leg(slot))
+            events.append(LegPrunedEvent(
+                bar_index=bar.index,
+                timestamp=event_time(timestamp),
+                leg_id=archive.leg_id(slot),
+                reason="archive_evicted",
+            ))
+            self.state.drop_archived([slot])
         return events
 
     def _should_track_pending_origin(self, direction: str, price: Decimal) -> bool:
@@ -1183,16 +1236,16 @@ class LegDetector:
         # Get the turn boundary - only legs from current turn matter
         turn_start = self.state.last_turn_bar.get(direction, -1)
 
-        for leg in self.state.active_legs:
-            # Only consider legs with live origin (not breached) (#345)
-            if leg.direction == direction and leg.max_origin_breach is None:
-                # #202: Skip legs from previous turns
-                if leg.origin_index < turn_start:
-                    continue
-                if direction == 'bull' and leg.origin_price <= price:
-                    return False  # Active bull leg has lower/equal origin
-                elif direction == 'bear' and leg.origin_price >= price:
-                    return False  # Active bear leg has higher/equal origin
+        # Live-origin index (#345: breached origins excluded): bull looks at
+        # origins <= price (lower/equal is better), bear at origins >= price.
+        if direction == 'bull':
+            candidates = self.state.active_legs.live_by_origin('bull', below=price, inclusive=True)
+        else:
+            candidates = self.state.active_legs.live_by_origin('bear', above=price, inclusive=True)
+        for leg in candidates:
+            # #202: Skip legs from previous turns
+            if leg.origin_index >= turn_start:
+                return False  # Active leg has better/equal origin
         return True
 
     def process_bar(self, bar: Bar) -> List[DetectionEvent]:
@@ -1215,55 +1268,91 @@ class LegDetector:
             List of DetectionEvent subclasses generated by this bar.
         """
         events: List[DetectionEvent] = []
+        if self.undo_journal is not None:
+            self.undo_journal.begin_bar(self.state, bar.index)
+        self.state.archived_legs.undo_journal = self.undo_journal
         self.state.last_bar_index = bar.index
 
-        # Create timestamp from bar
-        timestamp = datetime.fromtimestamp(bar.timestamp) if bar.timestamp else datetime.now()
+        # Unix seconds; events convert it with event_time() when they are built
+        timestamp = bar.timestamp
 
         # Update DAG state (O(1) per bar)
         dag_events = self._update_dag_state(bar, timestamp)
         events.extend(dag_events)
 
-        # 5. Update running moments and spikiness for live legs (#241, #244)
+        # 5. Update running moments for live legs (spikiness derives on read, #241, #244)
         # Must happen after _update_dag_state where bar_count is incremented
         self._update_leg_moments_and_spikiness(bar)
 
-        # 6. Update impulsiveness for all live legs (#241, #243)
+        # 6. Publish impulsiveness for all live legs (#241, #243)
         # Live legs have max_origin_breach=None (origin not yet violated)
-        self._update_live_leg_impulsiveness()
+        self._commit_impulsiveness()
 
         return events
 
-    def _update_live_leg_impulsiveness(self) -> None:
+    def process_bars(
+        self,
+        timestamps: Sequence,
+        open_: Sequence,
+        high: Sequence,
+        low: Sequence,
+        close: Sequence,
+        start_index: int = 0,
+        on_bar: Optional[Callable[[Bar, List[DetectionEvent]], None]] = None,
+    ) -> EventBuffer:
         """
-        Update impulsiveness for all live legs (#241, #243).
+        Process a contiguous run of bars given as OHLC arrays.
+
+        Equivalent to calling process_bar() for each row, but takes arrays
+        directly (no DataFrame row access or per-row float conversion) and
+        collects all events into one EventBuffer. Bars are built lazily as
+        they are processed (see iter_bars()). Bulk replays that need
+        side effects per bar (reference layer updates, snapshots) pass
+        on_bar; everything else can ignore it.
+
+        Args:
+            timestamps: Unix seconds (or datetime64) per bar.
+            open_, high, low, close: Prices per bar (same length).
+            start_index: Bar index of the first row. Must follow the last
+                processed bar when continuing an existing run.
+            on_bar: Optional callback(bar, events) invoked after each bar.
+
+        Returns:
+            EventBuffer with every event, tagged by bar index.
+        """
+        buffer = EventBuffer()
+        process_bar = self.process_bar
+        processed = 0
+        for bar in iter_bars(timestamps, open_, high, low, close, start_index):
+            events = process_bar(bar)
+            buffer.extend(bar.index, events)
+            if on_bar is not None:
+                on_bar(bar, events)
+            processed += 1
+        buffer.bars_processed = processed
+        return buffer
+
+    def _commit_impulsiveness(self) -> None:
+        """
+        Publish this bar's impulse population changes (#241, #243).
 
         A leg is "live" if its origin has never been breached (max_origin_breach is None).
         Once a leg stops being live, its impulsiveness is frozen and not updated.
 
         Impulsiveness is the percentile rank (0-100) of the leg's raw impulse
         against all active legs' impulses (#394: no longer uses formed_leg_impulses).
+        It is computed on read (Leg.impulsiveness) against the population as of
+        the last commit, so nothing is ranked here; committing bumps the
+        population version when it changed, invalidating memoized values.
         """
-        # Build sorted impulse population from all active legs with non-zero impulse
-        all_impulses = sorted(
-            leg.impulse for leg in self.state.active_legs
-            if leg.impulse > 0
-        )
-
-        for leg in self.state.active_legs:
-            # Only update live legs (origin never breached)
-            if leg.max_origin_breach is not None:
-                continue
-
-            # Calculate impulsiveness as percentile rank against active legs
-            leg.impulsiveness = _calculate_impulsiveness(
-                leg.impulse,
-                all_impulses
-            )
+        self.state.active_legs.impulses.commit()
 
     def _update_leg_moments_and_spikiness(self, bar: 'Bar') -> None:
         """
-        Update running moments and spikiness for all live legs (#241, #244).
+        Update running moments for all live legs (#241, #244).
+
+        Spikiness is not computed here: Leg.spikiness derives it from the
+        moments on read, so bulk runs that never read it skip the work.
 
         Per-bar contribution:
         - Bull leg: contribution = bar.close - prev_bar.high
@@ -1282,11 +1371,8 @@ class LegDetector:
         prev_low = float(self.state.prev_bar.low)
         bar_close = float(bar.close)
 
-        for leg in self.state.active_legs:
-            # Only update live legs
-            if leg.max_origin_breach is not None:
-                continue
-
+        # Only update live legs
+        for leg in self.state.active_legs.live_legs():
             # Skip first bar of leg (no contribution baseline)
             # bar_count is incremented AFTER this runs, so bar_count >= 1 means
             # we have at least one prior bar in this leg
@@ -1306,18 +1392,11 @@ class LegDetector:
             leg._moment_sum_x += contribution
             leg._moment_sum_x2 += contribution * contribution
             leg._moment_sum_x3 += contribution * contribution * contribution
-
-            # Recalculate spikiness from updated moments
-            leg.spikiness = _calculate_spikiness(
-                leg._moment_n,
-                leg._moment_sum_x,
-                leg._moment_sum_x2,
-                leg._moment_sum_x3
-            )
+            # Spikiness is derived from these on read (Leg.spikiness)
 
     def _find_leg_by_id(self, leg_id: str) -> Optional[Leg]:
         """
-        Find a leg by its ID in active_legs.
+        Find a leg by its ID in active_legs (O(1) via the state registry).
 
         Args:
             leg_id: The leg ID to find.
@@ -1325,10 +1404,7 @@ class LegDetector:
         Returns:
             Leg if found, None otherwise.
         """
-        for leg in self.state.active_legs:
-            if leg.leg_id == leg_id:
-                return leg
-        return None
+        return self.state.find_leg(leg_id)
 
     def _compute_depth_for_leg(self, parent_leg_id: Optional[str]) -> int:
         """
@@ -1365,32 +1441,30 @@ class LegDetector:
         Returns:
             leg_id of parent leg, or None if no eligible parent found
         """
-        eligible = [
-            leg for leg in self.state.active_legs
-            if leg.direction == direction
-            and leg.max_origin_breach is None  # Rule: non-breached only (#345)
-            and leg.origin_index < origin_index  # Earlier in time
-        ]
-
-        if not eligible:
+        # Live-origin index is sorted by (origin_price, origin_index) and only
+        # holds non-breached legs (Rule: non-breached only, #345)
+        legs = self.state.active_legs
+        if direction == 'bull':
+            # Bull: parent has lower origin price (lower low is ancestor).
+            # Select max origin_price; on tie, latest origin_index. Walking
+            # down from the price, the first earlier-in-time leg is the max.
+            for leg in legs.live_by_origin('bull', below=origin_price, reverse=True):
+                if leg.origin_index < origin_index:
+                    return leg.leg_id
             return None
 
-        if direction == 'bull':
-            # Bull: parent has lower origin price (lower low is ancestor)
-            eligible = [l for l in eligible if l.origin_price < origin_price]
-            if not eligible:
-                return None
-            # Select max origin_price; on tie, latest origin_index
-            parent = max(eligible, key=lambda l: (l.origin_price, l.origin_index))
-        else:  # bear
-            # Bear: parent has higher origin price (higher high is ancestor)
-            eligible = [l for l in eligible if l.origin_price > origin_price]
-            if not eligible:
-                return None
-            # Select min origin_price; on tie, latest origin_index (negate for min)
-            parent = min(eligible, key=lambda l: (l.origin_price, -l.origin_index))
-
-        return parent.leg_id
+        # Bear: parent has higher origin price (higher high is ancestor).
+        # Select min origin_price; on tie, latest origin_index. Walking up,
+        # take the latest earlier-in-time leg within the lowest price level.
+        parent = None
+        for leg in legs.live_by_origin('bear', above=origin_price):
+            if leg.origin_index >= origin_index:
+                continue
+            if parent is not None and leg.origin_price != parent.origin_price:
+                break
+            if parent is None or leg.origin_index > parent.origin_index:
+                parent = leg
+        return parent.leg_id if parent is not None else None
 
     def get_state(self) -> DetectorState:
         """
@@ -1417,6 +1491,7 @@ class LegDetector:
         """
         detector = cls(config)
         detector.state = state
+        detector._archive_sweep = detector._archive_multiple is not None
         return detector
 
     def update_config(self, config: DetectionConfig) -> None:
@@ -1438,6 +1513,9 @@ class LegDetector:
         """
         self.config = config
         self._pruner = LegPruner(self.config)
+        self._archive_multiple = self._resolve_archive_multiple(config)
+        self._archive_pending = []
+        self._archive_sweep = self._archive_multiple is not None
 
 
 # Backward compatibility alias
@@ -8,13 +8,14 @@ Handles all pruning operations:
 
 import bisect
 from collections import defaultdict
-from datetime import datetime
 from decimal import Decimal
 from typing import List, Dict, Set, Optional, Tuple, TYPE_CHECKING
 
+from sortedcontainers import SortedList
+
 from ..detection_config import DetectionConfig
 from ..types import Bar
-from ..events import LegPrunedEvent
+from ..events import EventTime, LegPrunedEvent, event_time
 from .leg import Leg
 from .state import DetectorState
 
@@ -71,20 +72,22 @@ class LegPruner:
         # Get the turn boundary - only legs from current turn can dominate
         turn_start = state.last_turn_bar.get(direction, -1)
 
-        for leg in state.active_legs:
-            # Only consider active legs with live origin (not breached) (#345)
+        # Only active legs with live origin (not breached) can dominate (#345);
+        # the live-origin index holds exactly those, sorted by origin price.
+        # Bull: lower origin is better (origin=LOW, larger range)
+        # Bear: higher origin is better (origin=HIGH, larger range)
+        if direction == 'bull':
+            candidates = state.active_legs.live_by_origin('bull', below=origin_price, inclusive=True)
+        else:
+            candidates = state.active_legs.live_by_origin('bear', above=origin_price, inclusive=True)
+        for leg in candidates:
             # Stale legs don't dominate - they're no longer actively tracking price
-            if leg.direction != direction or leg.status == 'stale' or leg.max_origin_breach is not None:
+            if leg.status == 'stale':
                 continue
             # #202: Skip legs from previous turns - they don't dominate current turn
             if leg.origin_index < turn_start:
                 continue
-            # Bull: lower origin is better (origin=LOW, larger range)
-            # Bear: higher origin is better (origin=HIGH, larger range)
-            if direction == 'bull' and leg.origin_price <= origin_price:
-                return True
-            if direction == 'bear' and leg.origin_price >= origin_price:
-                return True
+            return True
         return False
 
     def apply_origin_proximity_prune(
@@ -92,7 +95,7 @@ class LegPruner:
         state: DetectorState,
         direction: str,
         bar: Bar,
-        timestamp: datetime,
+        timestamp: EventTime,
     ) -> List[LegPrunedEvent]:
         """
         Apply origin-proximity based consolidation within pivot groups (#294, #298, #319).
@@ -119,7 +122,7 @@ class LegPruner:
             state: Current detector state (mutated)
             direction: 'bull' or 'bear' - which legs to prune
             bar: Current bar (for event metadata)
-            timestamp: Timestamp for events
+            timestamp: Bar timestamp for events (see event_time())
 
         Returns:
             List of LegPrunedEvent for pruned legs with reason="origin_proximity_prune"
@@ -133,10 +136,7 @@ class LegPruner:
             return events
 
         # Get live (non-breached) legs of the specified direction (#345)
-        legs = [
-            leg for leg in state.active_legs
-            if leg.direction == direction and leg.max_origin_breach is None
-        ]
+        legs = state.active_legs.live_legs(direction)
 
         if len(legs) <= 1:
             return events  # Nothing to prune
@@ -172,16 +172,17 @@ class LegPruner:
                 ))
 
         # Reparent children of pruned legs before removal (#281)
-        for leg in state.active_legs:
-            if leg.leg_id in pruned_leg_ids:
+        # Registry lookup by ID; the final parent (nearest surviving
+        # ancestor) does not depend on the order legs are reparented in.
+        for leg_id in sorted(pruned_leg_ids):
+            for leg in state.active_legs.get_all(leg_id):
+                self.reparent_children(state, leg)
+            for leg in state.archived_legs.get_all(leg_id):
                 self.reparent_children(state, leg)
 
         # Remove pruned legs from active_legs
         if pruned_leg_ids:
-            state.active_legs = [
-                leg for leg in state.active_legs
-                if leg.leg_id not in pruned_leg_ids
-            ]
+            self._remove_by_id(state, pruned_leg_ids)
 
         return events
 
@@ -193,7 +194,7 @@ class LegPruner:
         time_threshold: Decimal,
         current_bar: int,
         bar: Bar,
-        timestamp: datetime,
+        timestamp: EventTime,
         pruned_leg_ids: Set[str],
     ) -> List[LegPrunedEvent]:
         """
@@ -271,7 +272,7 @@ class LegPruner:
                 pruned_leg_ids.add(leg.leg_id)
                 events.append(LegPrunedEvent(
                     bar_index=bar.index,
-                    timestamp=timestamp,
+                    timestamp=event_time(timestamp),
                     leg_id=leg.leg_id,
                     reason="origin_proximity_prune",
                     explanation=prune_explanation,
@@ -291,7 +292,7 @@ class LegPruner:
         time_threshold: Decimal,
         current_bar: int,
         bar: Bar,
-        timestamp: datetime,
+        timestamp: EventTime,
         pruned_leg_ids: Set[str],
     ) -> List[LegPrunedEvent]:
         """
@@ -330,7 +331,7 @@ class LegPruner:
                 pruned_leg_ids.add(leg.leg_id)
                 events.append(LegPrunedEvent(
                     bar_index=bar.index,
-                    timestamp=timestamp,
+                    timestamp=event_time(timestamp),
                     leg_id=leg.leg_id,
                     reason="origin_proximity_prune",
                     explanation=(
@@ -355,6 +356,16 @@ class LegPruner:
         - time_ratio < time_threshold (formed around same time)
         - range_ratio < range_threshold (similar ranges)
 
+        Sweep in origin_index order instead of checking all pairs. For a
+        fixed newer leg, the older legs passing the time test are a suffix
+        in origin order, and once an older leg fails it fails for every
+        later leg, so they live in a sliding window. The window is sorted by
+        range; the legs passing the range test form one contiguous run
+        around the newer leg's range. Gaps between range-adjacent window
+        legs already known to be connected are skipped, so each gap is
+        unioned at most once per time it opens: O(N log N) overall, with
+        the same clusters as the pairwise check.
+
         Args:
             legs: Legs to cluster (all share same pivot)
             range_threshold: Max relative range difference
@@ -370,43 +381,99 @@ class LegPruner:
 
         # Sort by origin_index for consistent processing
         legs = sorted(legs, key=lambda l: l.origin_index)
+        ranges = [leg.range for leg in legs]
+        bars_since = [current_bar - leg.origin_index for leg in legs]
 
         # Union-find structure
         parent = list(range(n))
 
         def find(x: int) -> int:
-            if parent[x] != x:
-                parent[x] = find(parent[x])
-            return parent[x]
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
 
         def union(x: int, y: int) -> None:
             px, py = find(x), find(y)
             if px != py:
                 parent[px] = py
 
-        # Check all pairs for proximity
-        for i in range(n):
-            for j in range(i + 1, n):
-                leg_i, leg_j = legs[i], legs[j]
-
-                # Time ratio
-                bars_since_i = current_bar - leg_i.origin_index
-                bars_since_j = current_bar - leg_j.origin_index
-
-                if bars_since_i <= 0:
-                    continue
-
-                time_ratio = Decimal(abs(bars_since_i - bars_since_j)) / Decimal(bars_since_i)
-
-                # Range ratio
-                max_range = max(leg_i.range, leg_j.range)
-                if max_range == 0:
-                    continue
-
-                range_ratio = abs(leg_i.range - leg_j.range) / max_range
-
-                # If both conditions met, same cluster
-                if time_ratio < time_threshold and range_ratio < range_threshold:
+        def time_close(older: int, newer: int) -> bool:
+            bars_since_older = bars_since[older]
+            if bars_since_older <= 0:
+                return False
+            time_ratio = (
+                Decimal(abs(bars_since_older - bars_since[newer])) / Decimal(bars_since_older)
+            )
+            return time_ratio < time_threshold
+
+        def range_close(i: int, j: int) -> bool:
+            max_range = max(ranges[i], ranges[j])
+            if max_range == 0:
+                return False
+            return abs(ranges[i] - ranges[j]) / max_range < range_threshold
+
+        def first_index(lo: int, hi: int, pred) -> int:
+            """First index in [lo, hi) where a monotone False..True pred holds."""
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if pred(mid):
+                    hi = mid
+                else:
+                    lo = mid + 1
+            return lo
+
+        # Older legs within time proximity of the sweep, keyed (range, i)
+        window = SortedList()
+        # Window keys whose gap to the next key is not known to be connected
+        open_gaps = SortedList()
+        expire = 0
+
+        def add_open(key) -> None:
+            if key not in open_gaps:
+                open_gaps.add(key)
+
+        # Legs at or after the current bar (bars_since <= 0) sort last and
+        # never pass the time test as the older leg; as the newer leg their
+        # time test is not a suffix, so they are checked pairwise below.
+        swept = bisect.bisect_left([leg.origin_index for leg in legs], current_bar)
+
+        for j in range(swept):
+            # Expire older legs that are no longer within time proximity
+            while expire < j and not time_close(expire, j):
+                key = (ranges[expire], expire)
+                pos = window.index(key)
+                gap_was_open = key in open_gaps
+                window.remove(key)
+                open_gaps.discard(key)
+                if pos > 0:
+                    prev = window[pos - 1]
+                    if pos == len(window):
+                        open_gaps.discard(prev)
+                    elif gap_was_open:
+                        add_open(prev)
+                expire += 1
+
+            # Union with the run of window legs within range proximity
+            key_j = (ranges[j], j)
+            split = window.bisect_left(key_j)
+            lo = first_index(0, split, lambda k: range_close(window[k][1], j))
+            hi = first_index(split, len(window), lambda k: not range_close(window[k][1], j))
+            if lo < hi:
+                union(j, window[lo][1])
+                for key in list(open_gaps.irange(window[lo], window[hi - 1], inclusive=(True, False))):
+                    union(key[1], window[window.index(key) + 1][1])
+                    open_gaps.remove(key)
+
+            window.add(key_j)
+            if split > 0:
+                add_open(window[split - 1])
+            if split + 1 < len(window):
+                add_open(key_j)
+
+        for j in range(swept, n):
+            for i in range(swept):
+                if time_close(i, j) and range_close(i, j):
                     union(i, j)
 
         # Build clusters
@@ -440,14 +507,18 @@ class LegPruner:
         """
         scored: List[Tuple[Leg, float]] = []
 
-        # Build parent lookup
+        # Build parent lookup (parents may have moved to the cold archive)
         leg_by_id = {l.leg_id: l for l in state.active_legs}
 
         for leg in cluster:
             score = 0.0
+            parent = None
+            if leg.parent_leg_id:
+                parent = leg_by_id.get(leg.parent_leg_id)
+                if parent is None:
+                    parent = state.archived_legs.get(leg.parent_leg_id)
 
-            if leg.parent_leg_id and leg.parent_leg_id in leg_by_id:
-                parent = leg_by_id[leg.parent_leg_id]
+            if parent is not None:
 
                 if parent.segment_deepest_price is not None:
                     # Counter-trend range: how far price moved to reach this origin
@@ -468,7 +539,7 @@ class LegPruner:
         self,
         state: DetectorState,
         bar: Bar,
-        timestamp: datetime,
+        timestamp: EventTime,
     ) -> List[LegPrunedEvent]:
         """
         Delete engulfed legs (#208, #404).
@@ -491,7 +562,7 @@ class LegPruner:
         Args:
             state: Current detector state (mutated)
             bar: Current bar (for event metadata)
-            timestamp: Timestamp for events
+            timestamp: Bar timestamp for events (see event_time())
 
         Returns:
             List of LegPrunedEvent for pruned legs with reason="engulfed"
@@ -501,7 +572,7 @@ class LegPruner:
 
         # Check legs for engulfed condition (#345)
         # Engulfed: both origin AND pivot have been breached at some point
-        for leg in state.active_legs:
+        for leg in state.active_legs.breached_legs():
             if leg.range == 0:
                 continue
 
@@ -523,26 +594,44 @@ class LegPruner:
                     legs_to_prune.append(leg)
                     prune_events.append(LegPrunedEvent(
                         bar_index=bar.index,
-                        timestamp=timestamp,
+                        timestamp=event_time(timestamp),
                         leg_id=leg.leg_id,
                         reason="engulfed",
                     ))
 
+        # Cold archive (long-horizon mode): legs whose breach changed
+        archive = state.archived_legs
+        archived_slots = archive.engulfed_slots(self.config.engulfed_breach_threshold)
+        for slot in archived_slots:
+            prune_events.append(LegPrunedEvent(
+                bar_index=bar.index,
+                timestamp=event_time(timestamp),
+                leg_id=archive.leg_id(slot),
+                reason="engulfed",
+            ))
+
         # Reparent children before removal (#281)
         for leg in legs_to_prune:
             self.reparent_children(state, leg)
             leg.status = 'stale'
+        for slot in archived_slots:
+            self.reparent_children(state, archive.leg(slot))
 
         # Remove pruned legs from active_legs
-        if legs_to_prune:
+        if legs_to_prune or archived_slots:
             pruned_ids = {leg.leg_id for leg in legs_to_prune}
-            state.active_legs = [
-                leg for leg in state.active_legs
-                if leg.leg_id not in pruned_ids
-            ]
+            pruned_ids.update(archive.leg_id(slot) for slot in archived_slots)
+            self._remove_by_id(state, pruned_ids)
 
         return prune_events
 
+    @staticmethod
+    def _remove_by_id(state: DetectorState, leg_ids: Set[str]) -> None:
+        """Remove every leg with one of these IDs from active_legs and the cold archive."""
+        state.active_legs.retain(lambda leg: leg.leg_id not in leg_ids)
+        if len(state.archived_legs):
+            state.drop_archived(state.archived_legs.slots_with_ids(leg_ids))
+
     def reparent_children(self, state: DetectorState, pruned_leg: Leg) -> None:
         """
         Reparent children of a pruned leg to its parent (grandparent) (#281).
@@ -560,16 +649,17 @@ class LegPruner:
             state: Current detector state (mutated)
             pruned_leg: The leg being pruned
         """
-        for leg in state.active_legs:
-            if leg.parent_leg_id == pruned_leg.leg_id:
-                leg.parent_leg_id = pruned_leg.parent_leg_id  # Could be None (root)
+        # Registry lookup: O(children) instead of a scan over all legs
+        for leg in state.children_of(pruned_leg.leg_id):
+            state.set_parent(leg, pruned_leg.parent_leg_id)  # Could be None (root)
+        state.archived_legs.reparent(pruned_leg.leg_id, pruned_leg.parent_leg_id)
 
     def prune_by_max_legs(
         self,
         state: DetectorState,
         new_leg: Leg,
         bar: Bar,
-        timestamp: datetime,
+        timestamp: EventTime,
     ) -> List[LegPrunedEvent]:
         """
         Limit legs at each pivot to max_turns (#404).
@@ -590,7 +680,7 @@ class LegPruner:
             state: Current detector state (mutated)
             new_leg: The newly created leg (trigger for pruning)
             bar: Current bar (for event metadata)
-            timestamp: Timestamp for events
+            timestamp: Bar timestamp for events (see event_time())
 
         Returns:
             List of LegPrunedEvent for pruned counter-legs with reason="max_legs"
@@ -605,10 +695,8 @@ class LegPruner:
         # Find counter-legs: opposite direction, pivot == new_leg.origin (#345)
         opposite_direction = 'bear' if new_leg.direction == 'bull' else 'bull'
         counter_legs = [
-            leg for leg in state.active_legs
-            if leg.direction == opposite_direction
-            and leg.pivot_price == new_leg.origin_price
-            and leg.max_origin_breach is None  # Only consider live legs
+            leg for leg in state.active_legs.live_legs(opposite_direction)  # Only consider live legs
+            if leg.pivot_price == new_leg.origin_price
             and leg.leg_id != new_leg.leg_id  # Exclude self (shouldn't match anyway)
         ]
 
@@ -655,7 +743,7 @@ class LegPruner:
             pruned_leg_ids.add(counter_leg.leg_id)
             events.append(LegPrunedEvent(
                 bar_index=bar.index,
-                timestamp=timestamp,
+                timestamp=event_time(timestamp),
                 leg_id=counter_leg.leg_id,
                 reason="max_legs",
                 explanation=(
@@ -665,15 +753,16 @@ class LegPruner:
             ))
 
         # Reparent children of pruned legs before removal
-        for leg in state.active_legs:
-            if leg.leg_id in pruned_leg_ids:
+        # Registry lookup by ID; the final parent (nearest surviving
+        # ancestor) does not depend on the order legs are reparented in.
+        for leg_id in sorted(pruned_leg_ids):
+            for leg in state.active_legs.get_all(leg_id):
+                self.reparent_children(state, leg)
+            for leg in state.archived_legs.get_all(leg_id):
                 self.reparent_children(state, leg)
 
         # Remove pruned legs
         if pruned_leg_ids:
-            state.active_legs = [
-                leg for leg in state.active_legs
-                if leg.leg_id not in pruned_leg_ids
-            ]
+            self._remove_by_id(state, pruned_leg_ids)
 
         return events
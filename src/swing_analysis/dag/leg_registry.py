@@ -0,0 +1,92 @@
+"""
+Leg lookups by ID, parent and direction.
+
+The detector, pruner, reference layer and routers look legs up by ID, walk
+children when reparenting, and group legs by direction. Scanning
+active_legs for each of those was a per-call O(n) pass. LegRegistry keeps
+three maps, updated by LegStore on every append, removal and reparent:
+
+- leg_id -> legs (a breached leg and a new leg can share a deterministic ID)
+- parent_leg_id -> children
+- direction -> legs (insertion ordered)
+
+Entries are keyed by id(leg), so removal is O(1) and equal legs are still
+told apart.
+"""
+
+from typing import Dict, List, Optional
+
+from .leg import Leg
+
+
+class LegRegistry:
+    """
+    ID, parent and direction indexes of the legs in a LegStore.
+
+    Example:
+        >>> registry = LegRegistry()
+        >>> registry.add(leg)
+        >>> registry.get(leg.leg_id) is leg
+        True
+    """
+
+    __slots__ = ('_by_id', '_children', '_by_direction')
+
+    def __init__(self):
+        self._by_id: Dict[str, List[Leg]] = {}
+        # Dicts keyed by id(leg) keep insertion order with O(1) delete
+        self._children: Dict[str, Dict[int, Leg]] = {}
+        self._by_direction: Dict[str, Dict[int, Leg]] = {'bull': {}, 'bear': {}}
+
+    def add(self, leg: Leg) -> None:
+        """Index a leg (after any legs already indexed)."""
+        key = id(leg)
+        self._by_id.setdefault(leg.leg_id, []).append(leg)
+        self._by_direction.setdefault(leg.direction, {})[key] = leg
+        if leg.parent_leg_id is not None:
+            self._children.setdefault(leg.parent_leg_id, {})[key] = leg
+
+    def discard(self, leg: Leg) -> None:
+        """Drop a leg from every index."""
+        same_id = self._by_id.get(leg.leg_id)
+        if same_id is not None:
+            same_id[:] = [l for l in same_id if l is not leg]
+            if not same_id:
+                del self._by_id[leg.leg_id]
+        self._by_direction.get(leg.direction, {}).pop(id(leg), None)
+        self._unlink_child(leg)
+
+    def set_parent(self, leg: Leg, parent_leg_id: Optional[str]) -> None:
+        """Change an indexed leg's parent, keeping the children index in sync."""
+        self._unlink_child(leg)
+        leg.parent_leg_id = parent_leg_id
+        if parent_leg_id is not None:
+            self._children.setdefault(parent_leg_id, {})[id(leg)] = leg
+
+    def _unlink_child(self, leg: Leg) -> None:
+        """Drop a leg from its current parent's children index."""
+        if leg.parent_leg_id is None:
+            return
+        siblings = self._children.get(leg.parent_leg_id)
+        if siblings is not None:
+            siblings.pop(id(leg), None)
+            if not siblings:
+                del self._children[leg.parent_leg_id]
+
+    def get(self, leg_id: str) -> Optional[Leg]:
+        """First indexed leg (in insertion order) with this ID, or None."""
+        same_id = self._by_id.get(leg_id)
+        return same_id[0] if same_id else None
+
+    def get_all(self, leg_id: str) -> List[Leg]:
+        """All indexed legs with this ID, in insertion order."""
+        return list(self._by_id.get(leg_id, ()))
+
+    def children_of(self, leg_id: str) -> List[Leg]:
+        """Indexed legs whose parent_leg_id is leg_id."""
+        children = self._children.get(leg_id)
+        return list(children.values()) if children else []
+
+    def of_direction(self, direction: str) -> List[Leg]:
+        """Indexed legs of one direction, in insertion order."""
+        return list(self._by_direction.get(direction, {}).values())
@@ -0,0 +1,389 @@
+"""
+Leg storage for the DAG layer.
+
+DetectorState.active_legs used to be a plain list of Leg dataclasses that
+every per-bar pass walked in full. LegStore keeps the same legs, read like
+that list (iteration order, len, indexing), in two partitions ordered by
+insertion sequence: live legs and origin-breached legs. Per-bar loops that
+only touch one kind iterate live_legs() or breached_legs().
+
+Secondary indexes live in their own classes and are kept in sync by the
+store's mutators (append/extend/remove/retain/detach):
+
+- LegRegistry (leg_registry.py): lookups by ID, parent and direction
+- LiveOriginIndex (live_origin_index.py): live legs ordered by origin
+- TriggerIndex (trigger_index.py): per-bar price thresholds
+- ImpulsePopulation (impulse_population.py): impulsiveness ranking
+
+A stored leg's parent is changed through set_parent(). Setting
+max_origin_breach is followed by mark_origin_breached(); a pivot change by
+sync(), and other breach updates by sync_triggers().
+"""
+
+import heapq
+from decimal import Decimal
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from sortedcontainers import SortedDict
+
+from .impulse_population import ImpulsePopulation
+from .leg import Leg
+from .leg_registry import LegRegistry
+from .live_origin_index import DIRECTIONS, LiveOriginIndex
+from .trigger_index import (
+    KIND_EXTEND,
+    KIND_ORIGIN,
+    KIND_PIVOT,
+    KIND_PRUNE,
+    Trigger,
+    TriggerIndex,
+    breached_leg_triggers,
+)
+
+
+class LegStore:
+    """
+    Ordered leg container with live/breached partitions and secondary indexes.
+
+    Example:
+        >>> store = LegStore()
+        >>> store.append(leg)
+        >>> [l.leg_id for l in store.live_by_origin('bull', below=Decimal("4500"))]
+    """
+
+    __slots__ = (
+        '_view', '_seq_of', '_next_seq', '_live', '_breached',
+        'registry', 'live_origins', 'impulses', 'triggers', '_prune_threshold',
+    )
+
+    def __init__(self, legs: Iterable[Leg] = ()):
+        # Both partitions merged in insertion order (None: rebuild on read)
+        self._view: Optional[List[Leg]] = []
+        # id(leg) -> insertion sequence
+        self._seq_of: Dict[int, int] = {}
+        self._next_seq = 0
+        # Partitions, seq -> leg: live legs are appended in seq order and
+        # only ever leave; breached legs arrive out of order
+        self._live: Dict[int, Leg] = {}
+        self._breached = SortedDict()
+        self.registry = LegRegistry()
+        self.live_origins = LiveOriginIndex()
+        # Sorted impulses of all stored legs with impulse > 0
+        self.impulses = ImpulsePopulation()
+        # Price triggers per leg (keyed by seq)
+        self.triggers = TriggerIndex()
+        # Extension prune multiple the prune triggers were built with
+        self._prune_threshold: Optional[Decimal] = None
+
+        self._load(list(legs))
+
+    def _load(self, legs: List[Leg]) -> None:
+        """
+        Bulk append() into an empty store (state restore).
+
+        Builds the sorted indexes once, leaving the store exactly as
+        appending the legs one by one would.
+        """
+        if not legs:
+            return
+        self._view = list(legs)
+        self._seq_of = {id(leg): seq for seq, leg in enumerate(legs)}
+        self._next_seq = len(legs)
+
+        breached = []
+        for seq, leg in enumerate(legs):
+            if leg.max_origin_breach is None and leg.direction in DIRECTIONS:
+                self._live[seq] = leg
+            else:
+                breached.append((seq, leg))
+        self._breached = SortedDict(breached)
+        self.live_origins.load((leg, seq) for seq, leg in self._live.items())
+
+        self.impulses.attach_all(legs)
+        self.triggers.load({seq: self._leg_triggers(leg) for seq, leg in enumerate(legs)})
+        for leg in legs:
+            self.registry.add(leg)
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def append(self, leg: Leg) -> None:
+        """Add a leg at the end of the ordering."""
+        seq = self._next_seq
+        self._next_seq += 1
+        self._seq_of[id(leg)] = seq
+        if self._view is not None:
+            # The new seq is the largest, so the merged order just grows
+            self._view.append(leg)
+
+        if leg.max_origin_breach is None and leg.direction in DIRECTIONS:
+            self.live_origins.add(leg, seq)
+            self._live[seq] = leg
+        else:
+            self._breached[seq] = leg
+
+        self.impulses.attach(leg)
+        self._sync_triggers(leg, seq)
+        self.registry.add(leg)
+
+    def extend(self, legs: Iterable[Leg]) -> None:
+        """Append several legs in order."""
+        for leg in legs:
+            self.append(leg)
+
+    def _release(self, leg: Leg, keep_impulse: bool = False) -> None:
+        """Drop a leg from its partition and every index."""
+        seq = self._seq_of.pop(id(leg))
+        if not self._discard_live(leg, seq):
+            self._breached.pop(seq, None)
+        self._view = None
+        self.triggers.discard(seq)
+        if keep_impulse:
+            self.impulses.retain(leg)
+        else:
+            self.impulses.freeze(leg)
+            self.impulses.discard(leg)
+        self.registry.discard(leg)
+
+    def _discard_live(self, leg: Leg, seq: int) -> bool:
+        """Drop a leg from the live partition and origin index; whether it was there."""
+        if self._live.pop(seq, None) is None:
+            return False
+        self.live_origins.discard(leg, seq)
+        return True
+
+    def mark_origin_breached(self, leg: Leg) -> None:
+        """Move a leg to the breached partition and freeze its impulsiveness once its origin is breached."""
+        seq = self._seq_of.get(id(leg))
+        if seq is not None:
+            if self._discard_live(leg, seq):
+                self._breached[seq] = leg
+            self.impulses.freeze(leg)
+            self._sync_triggers(leg, seq)
+
+    def remove(self, leg: Leg) -> None:
+        """Remove a leg (list.remove semantics: ValueError if absent)."""
+        if id(leg) not in self._seq_of:
+            raise ValueError("leg not in LegStore")
+        self._release(leg)
+
+    def retain(self, keep: Callable[[Leg], bool]) -> List[Leg]:
+        """
+        Remove every leg for which keep(leg) is False, in place.
+
+        Relative order of the remaining legs is preserved.
+
+        Returns:
+            The removed legs, in their original order.
+        """
+        removed = [leg for leg in self._ordered() if not keep(leg)]
+        for leg in removed:
+            self._release(leg)
+        return removed
+
+    def detach(self, legs: List[Leg]) -> None:
+        """
+        Remove origin-breached legs that move to the cold archive.
+
+        Unlike retain(), their impulses stay counted in the population:
+        archived legs still take part in impulsiveness ranking.
+        """
+        for leg in legs:
+            self._release(leg, keep_impulse=True)
+
+    def clear(self) -> None:
+        """Remove all legs."""
+        for leg in self._ordered():
+            self._release(leg)
+
+    def sync(self, leg: Leg) -> None:
+        """Refresh a leg's impulse and triggers after its pivot changed."""
+        seq = self._seq_of.get(id(leg))
+        if seq is None:
+            return
+        self.impulses.update(leg)
+        self._sync_triggers(leg, seq)
+
+    def sync_triggers(self, leg: Leg) -> None:
+        """Refresh a stored leg's price triggers after its breach state changed."""
+        seq = self._seq_of.get(id(leg))
+        if seq is not None:
+            self._sync_triggers(leg, seq)
+
+    def _sync_triggers(self, leg: Leg, seq: int) -> None:
+        """Index the price thresholds at which the leg's next per-bar update fires."""
+        self.triggers.update(seq, self._leg_triggers(leg))
+
+    def _leg_triggers(self, leg: Leg) -> Dict[str, Trigger]:
+        """
+        Price triggers a leg should have indexed (kind -> (fires_up, price)).
+
+        Mirrors the exact tests in LegDetector._extend_leg_pivots(),
+        _update_breach_tracking() and _check_extension_prune().
+        """
+        bull = leg.direction == 'bull'
+        if leg.max_origin_breach is None:
+            # Live: pivot extends on a new extreme; origin breach ends liveness
+            return {
+                KIND_EXTEND: (bull, leg.pivot_price),
+                KIND_ORIGIN: (not bull, leg.origin_price),
+            }
+
+        return breached_leg_triggers(
+            bull, leg.origin_price, leg.pivot_price, leg.range,
+            leg.max_origin_breach, leg.max_pivot_breach, self._prune_threshold,
+        )
+
+    def set_parent(self, leg: Leg, parent_leg_id: Optional[str]) -> None:
+        """Change a stored leg's parent, keeping the children index in sync."""
+        if id(leg) not in self._seq_of:
+            leg.parent_leg_id = parent_leg_id
+            return
+        self.registry.set_parent(leg, parent_leg_id)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get(self, leg_id: str) -> Optional[Leg]:
+        """First stored leg (in insertion order) with this ID, or None."""
+        return self.registry.get(leg_id)
+
+    def get_all(self, leg_id: str) -> List[Leg]:
+        """All stored legs with this ID, in insertion order."""
+        return self.registry.get_all(leg_id)
+
+    def children_of(self, leg_id: str) -> List[Leg]:
+        """Stored legs whose parent_leg_id is leg_id."""
+        return self.registry.children_of(leg_id)
+
+    def of_direction(self, direction: str) -> List[Leg]:
+        """Stored legs of one direction, in insertion order."""
+        return self.registry.of_direction(direction)
+
+    def live_legs(self, direction: Optional[str] = None) -> List[Leg]:
+        """Live legs (origin never breached), optionally of one direction, in insertion order."""
+        if direction is None:
+            return list(self._live.values())
+        return [leg for leg in self._live.values() if leg.direction == direction]
+
+    def breached_legs(self) -> List[Leg]:
+        """Origin-breached legs, in insertion order."""
+        return list(self._breached.values())
+
+    def live_by_origin(
+        self,
+        direction: str,
+        *,
+        below=None,
+        above=None,
+        inclusive: bool = False,
+        reverse: bool = False,
+    ) -> Iterator[Leg]:
+        """
+        Iterate live legs of a direction in (origin_price, origin_index) order.
+
+        Arguments as LiveOriginIndex.seqs().
+        """
+        live = self._live
+        for seq in self.live_origins.seqs(
+            direction, below=below, above=above, inclusive=inclusive, reverse=reverse
+        ):
+            yield live[seq]
+
+    # ------------------------------------------------------------------
+    # Trigger queries
+    # ------------------------------------------------------------------
+
+    def _legs_by_seq(self, seqs: Iterable[int]) -> List[Leg]:
+        """Legs for a set of sequence numbers, in insertion order."""
+        live, breached = self._live, self._breached
+        return [live[seq] if seq in live else breached[seq] for seq in sorted(seqs)]
+
+    def extension_triggers(self, bar_high: Decimal, bar_low: Decimal):
+        """
+        Live legs whose pivot extends on this bar.
+
+        Returns:
+            (bull, bear): bull legs with pivot < bar_high and bear legs with
+            pivot > bar_low, each in insertion order.
+        """
+        up, down = self.triggers.fired(KIND_EXTEND, bar_high, bar_low)
+        return self._legs_by_seq(up), self._legs_by_seq(down)
+
+    def breach_triggers(self, bar_high: Decimal, bar_low: Decimal) -> List[Leg]:
+        """Legs whose origin or pivot breach state changes on this bar, in insertion order."""
+        origin_up, origin_down = self.triggers.fired(KIND_ORIGIN, bar_high, bar_low)
+        pivot_up, pivot_down = self.triggers.fired(KIND_PIVOT, bar_high, bar_low)
+        return self._legs_by_seq(set(origin_up).union(origin_down, pivot_up, pivot_down))
+
+    def extension_prune_triggers(
+        self, bar_high: Decimal, bar_low: Decimal, threshold: Decimal
+    ) -> List[Leg]:
+        """
+        Origin-breached legs past threshold * range beyond their origin (#203).
+
+        Parentless legs are included; the caller applies the root exemption.
+        The prune triggers are rebuilt when threshold changes.
+        """
+        if threshold != self._prune_threshold:
+            self._prune_threshold = threshold
+            for leg in self._ordered():
+                self._sync_triggers(leg, self._seq_of[id(leg)])
+        up, down = self.triggers.fired(KIND_PRUNE, bar_high, bar_low)
+        return self._legs_by_seq(up + down)
+
+    # ------------------------------------------------------------------
+    # Read-only list view
+    # ------------------------------------------------------------------
+
+    def _ordered(self) -> List[Leg]:
+        """Both partitions merged by seq (insertion order), cached until a removal."""
+        if self._view is None:
+            if not self._breached:
+                self._view = list(self._live.values())
+            elif not self._live:
+                self._view = list(self._breached.values())
+            else:
+                merged = heapq.merge(self._live.items(), self._breached.items(), key=itemgetter(0))
+                self._view = [leg for _, leg in merged]
+        return self._view
+
+    def __iter__(self) -> Iterator[Leg]:
+        return iter(self._ordered())
+
+    def __len__(self) -> int:
+        return len(self._live) + len(self._breached)
+
+    def __getitem__(self, index: Union[int, slice]):
+        return self._ordered()[index]
+
+    def holds(self, leg: Leg) -> bool:
+        """Whether this leg object is stored (identity only, unlike `in`)."""
+        return id(leg) in self._seq_of
+
+    def __contains__(self, leg: object) -> bool:
+        return id(leg) in self._seq_of or leg in self._ordered()
+
+    def __reversed__(self) -> Iterator[Leg]:
+        return reversed(self._ordered())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LegStore):
+            return self._ordered() == other._ordered()
+        if isinstance(other, list):
+            return self._ordered() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"LegStore({self._ordered()!r})"
+
+    def index(self, leg: Leg) -> int:
+        """Position of a leg in insertion order."""
+        return self._ordered().index(leg)
+
+    def copy(self) -> List[Leg]:
+        """Shallow list copy of the legs in insertion order."""
+        return list(self._ordered())
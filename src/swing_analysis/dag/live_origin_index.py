@@ -0,0 +1,82 @@
+"""
+Live legs ordered by origin price, per direction.
+
+Parent assignment and the domination check on new pending origins ask for
+the live legs of one direction whose origin lies below (bull) or above
+(bear) a price, nearest first. LiveOriginIndex keeps one SortedList per
+direction keyed by (origin_price, origin_index, seq), so those lookups are
+an O(log n) range query instead of a scan of every live leg.
+
+LegStore adds a leg when it is stored live and drops it on origin breach
+or removal; seq resolves an entry back to the stored leg.
+"""
+
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+from .leg import Leg
+
+DIRECTIONS = ('bull', 'bear')
+
+
+class LiveOriginIndex:
+    """
+    (origin_price, origin_index, seq) keys of live legs, per direction.
+
+    Example:
+        >>> index = LiveOriginIndex()
+        >>> index.add(leg, seq=0)
+        >>> list(index.seqs('bull', below=Decimal("4500")))
+        [0]
+    """
+
+    __slots__ = ('_keys',)
+
+    def __init__(self):
+        self._keys: Dict[str, SortedList] = {direction: SortedList() for direction in DIRECTIONS}
+
+    def load(self, entries: Iterable[Tuple[Leg, int]]) -> None:
+        """Index (leg, seq) pairs in one pass (state restore)."""
+        keys: Dict[str, list] = {direction: [] for direction in DIRECTIONS}
+        for leg, seq in entries:
+            keys[leg.direction].append((leg.origin_price, leg.origin_index, seq))
+        self._keys = {direction: SortedList(direction_keys) for direction, direction_keys in keys.items()}
+
+    def add(self, leg: Leg, seq: int) -> None:
+        self._keys[leg.direction].add((leg.origin_price, leg.origin_index, seq))
+
+    def discard(self, leg: Leg, seq: int) -> None:
+        self._keys[leg.direction].discard((leg.origin_price, leg.origin_index, seq))
+
+    def count(self, direction: str) -> int:
+        """Number of indexed legs of a direction."""
+        return len(self._keys[direction])
+
+    def seqs(
+        self,
+        direction: str,
+        *,
+        below: Optional[Decimal] = None,
+        above: Optional[Decimal] = None,
+        inclusive: bool = False,
+        reverse: bool = False,
+    ) -> Iterator[int]:
+        """
+        Seqs of a direction's legs in (origin_price, origin_index) order.
+
+        Args:
+            direction: 'bull' or 'bear'.
+            below: Only origins below this price (<= if inclusive).
+            above: Only origins above this price (>= if inclusive).
+            inclusive: Whether the price bound itself is included.
+            reverse: Iterate from highest to lowest key.
+        """
+        minimum = maximum = None
+        if below is not None:
+            maximum = (below, float('inf')) if inclusive else (below,)
+        if above is not None:
+            minimum = (above,) if inclusive else (above, float('inf'))
+        for _, _, seq in self._keys[direction].irange(minimum, maximum, reverse=reverse):
+            yield seq
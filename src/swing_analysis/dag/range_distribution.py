@@ -89,6 +89,9 @@ class RollingBinDistribution:
     leg_ranges: Dict[str, float] = field(default_factory=dict)  # leg_id -> current range
     _warmup_complete: bool = False  # True after first median computation
 
+    # Optional UndoJournal recording mutations (plain attribute, not a dataclass field)
+    journal = None
+
     def __post_init__(self) -> None:
         """Ensure bin_counts is initialized correctly."""
         if len(self.bin_counts) != NUM_BINS:
@@ -199,6 +202,8 @@ class RollingBinDistribution:
         # Skip if already tracked
         if leg_id in self.leg_ranges:
             return
+        if self.journal is not None:
+            self.journal.record_distribution(self, ('add', leg_id))
 
         # Store in lookup
         self.leg_ranges[leg_id] = range_val
@@ -235,6 +240,8 @@ class RollingBinDistribution:
         old_range = self.leg_ranges[leg_id]
         if old_range == new_range:
             return
+        if self.journal is not None:
+            self.journal.record_distribution(self, ('update', leg_id, old_range))
 
         # Update bin counts
         old_bin = self.get_bin_index(old_range)
@@ -314,6 +321,9 @@ class RollingBinDistribution:
         evicted: List[str] = []
 
         while self.window and self.window[0][2] < cutoff:
+            if self.journal is not None:
+                item = self.window[0]
+                self.journal.record_distribution(self, ('evict', item, self.leg_ranges.get(item[0])))
             leg_id, range_val, _ = self.window.popleft()
             if leg_id in self.leg_ranges:
                 old_bin = self.get_bin_index(range_val)
@@ -323,6 +333,32 @@ class RollingBinDistribution:
 
         return evicted
 
+    def journal_counters(self) -> Tuple[List[int], float, int, bool]:
+        """Bin counts, median and recompute counters, for UndoJournal."""
+        return (list(self.bin_counts), self.median, self.legs_since_recompute, self._warmup_complete)
+
+    def undo(self, op: tuple) -> None:
+        """Revert one change recorded through the undo journal."""
+        kind = op[0]
+        if kind == 'counters':
+            _, bin_counts, self.median, self.legs_since_recompute, self._warmup_complete = op
+            self.bin_counts = list(bin_counts)
+        elif kind == 'add':
+            self.window.pop()
+            del self.leg_ranges[op[1]]
+        elif kind == 'update':
+            _, leg_id, old_range = op
+            self.leg_ranges[leg_id] = old_range
+            for i, (lid, _, ts) in enumerate(self.window):
+                if lid == leg_id:
+                    self.window[i] = (leg_id, old_range, ts)
+                    break
+        elif kind == 'evict':
+            _, item, old_range = op
+            self.window.appendleft(item)
+            if old_range is not None:
+                self.leg_ranges[item[0]] = old_range
+
     def to_dict(self) -> Dict[str, Any]:
         """
         Serialize to dictionary for persistence.
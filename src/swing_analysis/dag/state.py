@@ -8,10 +8,16 @@ the bar type classification enum.
 from dataclasses import dataclass, field
 from decimal import Decimal
 from enum import Enum
-from typing import List, Dict, Optional
+from pathlib import Path
+from typing import List, Dict, Optional, Union, TYPE_CHECKING
 
 from ..types import Bar
 from .leg import Leg, PendingOrigin
+from .leg_archive import LegArchive
+from .leg_store import LegStore
+
+if TYPE_CHECKING:
+    from ..detection_config import DetectionConfig
 
 
 class BarType(Enum):
@@ -35,7 +41,8 @@ class DetectorState:
     Serializable state for pause/resume.
 
     Contains all information needed to resume detection from a saved point.
-    Can be serialized to JSON for persistence.
+    Can be serialized to JSON for persistence (to_dict), or to a compact
+    binary checkpoint (to_bytes / save).
 
     Attributes:
         last_bar_index: Most recent bar index processed.
@@ -47,7 +54,12 @@ class DetectorState:
         # DAG-based algorithm state:
         prev_bar: Previous bar for type classification.
         active_legs: Currently tracked legs (bull and bear can coexist).
+            Held in a LegStore; assigning a list wraps it.
         pending_origins: Potential origins for new legs awaiting temporal confirmation.
+        archived_legs: Cold origin-breached legs moved out of active_legs in
+            long-horizon mode (DetectionConfig.archive_breach_multiple, see
+            leg_archive.py). Their impulses stay counted in
+            active_legs.impulses; assigning a list wraps it.
 
         # Population tracking for percentile ranking (#241, #242):
         formed_leg_impulses: Sorted list of impulse values from legs.
@@ -63,7 +75,7 @@ class DetectorState:
 
     # DAG-based algorithm state
     prev_bar: Optional[Bar] = None
-    active_legs: List[Leg] = field(default_factory=list)
+    active_legs: LegStore = field(default_factory=LegStore)
     pending_origins: Dict[str, Optional[PendingOrigin]] = field(
         default_factory=lambda: {'bull': None, 'bear': None}
     )
@@ -88,48 +100,151 @@ class DetectorState:
     _has_created_bull_leg: bool = False
     _has_created_bear_leg: bool = False
 
+    # Long-horizon mode: cold leg archive
+    archived_legs: LegArchive = field(default_factory=LegArchive)
+
+    def __setattr__(self, name, value) -> None:
+        # Keep active_legs a LegStore even when callers assign a plain list
+        if name == 'active_legs' and not isinstance(value, LegStore):
+            value = LegStore(value)
+        elif name == 'archived_legs' and not isinstance(value, LegArchive):
+            value = LegArchive(value)
+        object.__setattr__(self, name, value)
+
+    # ------------------------------------------------------------------
+    # Leg registry (maintained by the LegStore on create/prune/reparent)
+    # ------------------------------------------------------------------
+
+    def find_leg(self, leg_id: str) -> Optional[Leg]:
+        """Look up an active leg by ID in O(1)."""
+        return self.active_legs.get(leg_id)
+
+    def children_of(self, leg_id: str) -> List[Leg]:
+        """Active legs whose parent is leg_id."""
+        return self.active_legs.children_of(leg_id)
+
+    def legs_in_direction(self, direction: str) -> List[Leg]:
+        """Active legs of one direction, in creation order."""
+        return self.active_legs.of_direction(direction)
+
+    def set_parent(self, leg: Leg, parent_leg_id: Optional[str]) -> None:
+        """Reparent an active leg, keeping the registry consistent."""
+        self.active_legs.set_parent(leg, parent_leg_id)
+
+    def lookup_leg(self, leg_id: str) -> Optional[Leg]:
+        """Look up a leg by ID in active_legs, then the cold archive."""
+        leg = self.active_legs.get(leg_id)
+        if leg is None:
+            leg = self.archived_legs.get(leg_id)
+        return leg
+
+    # ------------------------------------------------------------------
+    # Cold leg archive (see leg_archive.py)
+    # ------------------------------------------------------------------
+
+    def archive_legs(self, legs: List[Leg]) -> None:
+        """Move origin-breached legs from active_legs to the cold archive."""
+        self.active_legs.detach(legs)
+        self.archived_legs.add(legs)
+
+    def drop_archived(self, slots: List[int]) -> List[Leg]:
+        """Remove archived legs by slot, uncounting their impulses."""
+        legs = self.archived_legs.remove(slots)
+        impulses = self.active_legs.impulses
+        for leg in legs:
+            impulses.remove_value(leg.impulse)
+        return legs
+
+    # ------------------------------------------------------------------
+    # Binary checkpoints (see checkpoint.py)
+    # ------------------------------------------------------------------
+
+    def to_bytes(self, config: Optional["DetectionConfig"] = None) -> bytes:
+        """Serialize to the binary checkpoint format, tagged with config's fingerprint."""
+        from .checkpoint import encode_state
+        return encode_state(self, config)
+
+    @classmethod
+    def from_bytes(
+        cls, data: bytes, config: Optional["DetectionConfig"] = None
+    ) -> "DetectorState":
+        """Restore from checkpoint bytes (or JSON of to_dict()), checking config if given."""
+        from .checkpoint import decode_state
+        return decode_state(data, config)
+
+    def save(self, path: Union[str, Path], config: Optional["DetectionConfig"] = None) -> None:
+        """Write a binary checkpoint to path."""
+        Path(path).write_bytes(self.to_bytes(config))
+
+    @classmethod
+    def load(
+        cls, path: Union[str, Path], config: Optional["DetectionConfig"] = None
+    ) -> "DetectorState":
+        """Read a checkpoint (or a JSON to_dict() dump) from path."""
+        return cls.from_bytes(Path(path).read_bytes(), config)
+
+    # ------------------------------------------------------------------
+    # Dict serialization
+    # ------------------------------------------------------------------
+
     def to_dict(self) -> Dict:
         """Convert to dictionary for JSON serialization."""
-        # Serialize active legs
-        legs_data = []
-        for leg in self.active_legs:
-            legs_data.append({
-                "direction": leg.direction,
-                "pivot_price": str(leg.pivot_price),
-                "pivot_index": leg.pivot_index,
-                "origin_price": str(leg.origin_price),
-                "origin_index": leg.origin_index,
-                "retracement_pct": str(leg.retracement_pct),
-                "parent_leg_id": leg.parent_leg_id,
-                "status": leg.status,
-                "bar_count": leg.bar_count,
-                "gap_count": leg.gap_count,
-                "last_modified_bar": leg.last_modified_bar,
-                "price_at_creation": str(leg.price_at_creation),
-                "leg_id": leg.leg_id,
-                "impulse": leg.impulse,
-                "impulsiveness": leg.impulsiveness,
-                "spikiness": leg.spikiness,
-                "_moment_n": leg._moment_n,
-                "_moment_sum_x": leg._moment_sum_x,
-                "_moment_sum_x2": leg._moment_sum_x2,
-                "_moment_sum_x3": leg._moment_sum_x3,
-                # Segment impulse tracking (#307)
-                "segment_deepest_price": str(leg.segment_deepest_price) if leg.segment_deepest_price is not None else None,
-                "segment_deepest_index": leg.segment_deepest_index,
-                "impulse_to_deepest": leg.impulse_to_deepest,
-                "impulse_back": leg.impulse_back,
-                # Counter-trend ratio (#336)
-                "counter_trend_ratio": leg.counter_trend_ratio,
-                "origin_counter_trend_range": leg.origin_counter_trend_range,
-                # Hierarchy depth (#361)
-                "depth": leg.depth,
-                # Range bin index (#434)
-                "range_bin_index": leg.range_bin_index,
-                # Bin-normalized impulsiveness (#491)
-                "bin_impulsiveness": leg.bin_impulsiveness,
-            })
+        data = self._fields_to_dict()
+        data["active_legs"] = [self._leg_to_dict(leg) for leg in self.active_legs]
+        if len(self.archived_legs):
+            data["archived_legs"] = [self._archived_leg_to_dict(leg) for leg in self.archived_legs]
+        return data
+
+    @classmethod
+    def _archived_leg_to_dict(cls, leg: Leg) -> Dict:
+        """Serialize one archived leg: the active leg form plus its breaches."""
+        data = cls._leg_to_dict(leg)
+        data["max_origin_breach"] = str(leg.max_origin_breach)
+        data["max_pivot_breach"] = str(leg.max_pivot_breach) if leg.max_pivot_breach is not None else None
+        return data
+
+    @staticmethod
+    def _leg_to_dict(leg: Leg) -> Dict:
+        """Serialize one active leg."""
+        return {
+            "direction": leg.direction,
+            "pivot_price": str(leg.pivot_price),
+            "pivot_index": leg.pivot_index,
+            "origin_price": str(leg.origin_price),
+            "origin_index": leg.origin_index,
+            "retracement_pct": str(leg.retracement_pct),
+            "parent_leg_id": leg.parent_leg_id,
+            "status": leg.status,
+            "bar_count": leg.bar_count,
+            "gap_count": leg.gap_count,
+            "last_modified_bar": leg.last_modified_bar,
+            "price_at_creation": str(leg.price_at_creation),
+            "leg_id": leg.leg_id,
+            "impulse": leg.impulse,
+            "impulsiveness": leg.impulsiveness,
+            "spikiness": leg.spikiness,
+            "_moment_n": leg._moment_n,
+            "_moment_sum_x": leg._moment_sum_x,
+            "_moment_sum_x2": leg._moment_sum_x2,
+            "_moment_sum_x3": leg._moment_sum_x3,
+            # Segment impulse tracking (#307)
+            "segment_deepest_price": str(leg.segment_deepest_price) if leg.segment_deepest_price is not None else None,
+            "segment_deepest_index": leg.segment_deepest_index,
+            "impulse_to_deepest": leg.impulse_to_deepest,
+            "impulse_back": leg.impulse_back,
+            # Counter-trend ratio (#336)
+            "counter_trend_ratio": leg.counter_trend_ratio,
+            "origin_counter_trend_range": leg.origin_counter_trend_range,
+            # Hierarchy depth (#361)
+            "depth": leg.depth,
+            # Range bin index (#434)
+            "range_bin_index": leg.range_bin_index,
+            # Bin-normalized impulsiveness (#491)
+            "bin_impulsiveness": leg.bin_impulsiveness,
+        }
 
+    def _fields_to_dict(self) -> Dict:
+        """Serialize everything except active_legs and archived_legs."""
         # Serialize pending origins
         pending_origins_data = {}
         for direction, origin in self.pending_origins.items():
@@ -164,7 +279,6 @@ class DetectorState:
             "_threshold_valid": self._threshold_valid,
             # DAG state
             "prev_bar": prev_bar_data,
-            "active_legs": legs_data,
             "pending_origins": pending_origins_data,
             # Note: price_high_water/price_low_water removed in #203 (staleness removal)
             # Turn tracking (#202)
@@ -180,53 +294,70 @@ class DetectorState:
     @classmethod
     def from_dict(cls, data: Dict) -> "DetectorState":
         """Create from dictionary."""
+        active_legs = [cls._leg_from_dict(leg_data) for leg_data in data.get("active_legs", [])]
+        archived_legs = [cls._archived_leg_from_dict(leg_data) for leg_data in data.get("archived_legs", [])]
+        return cls._from_fields_dict(data, active_legs, archived_legs)
+
+    @staticmethod
+    def _leg_from_dict(leg_data: Dict) -> Leg:
+        """Deserialize one active leg."""
+        return Leg(
+            direction=leg_data["direction"],
+            pivot_price=Decimal(leg_data["pivot_price"]),
+            pivot_index=leg_data["pivot_index"],
+            origin_price=Decimal(leg_data["origin_price"]),
+            origin_index=leg_data["origin_index"],
+            retracement_pct=Decimal(leg_data.get("retracement_pct", "0")),
+            parent_leg_id=leg_data.get("parent_leg_id"),
+            status=leg_data.get("status", "active"),
+            bar_count=leg_data.get("bar_count", 0),
+            gap_count=leg_data.get("gap_count", 0),
+            last_modified_bar=leg_data.get("last_modified_bar", 0),
+            price_at_creation=Decimal(leg_data.get("price_at_creation", "0")),
+            # Prefer stored leg_id for backward compatibility; if missing,
+            # __post_init__ will compute deterministic ID from properties (#299)
+            leg_id=leg_data.get("leg_id", ""),
+            impulse=leg_data.get("impulse", 0.0),
+            impulsiveness=leg_data.get("impulsiveness"),
+            spikiness=leg_data.get("spikiness"),
+            _moment_n=leg_data.get("_moment_n", 0),
+            _moment_sum_x=leg_data.get("_moment_sum_x", 0.0),
+            _moment_sum_x2=leg_data.get("_moment_sum_x2", 0.0),
+            _moment_sum_x3=leg_data.get("_moment_sum_x3", 0.0),
+            # Segment impulse tracking (#307)
+            segment_deepest_price=Decimal(leg_data["segment_deepest_price"]) if leg_data.get("segment_deepest_price") else None,
+            segment_deepest_index=leg_data.get("segment_deepest_index"),
+            impulse_to_deepest=leg_data.get("impulse_to_deepest"),
+            impulse_back=leg_data.get("impulse_back"),
+            # Counter-trend ratio (#336)
+            counter_trend_ratio=leg_data.get("counter_trend_ratio"),
+            origin_counter_trend_range=leg_data.get("origin_counter_trend_range"),
+            # Hierarchy depth (#361)
+            depth=leg_data.get("depth", 0),
+            # Range bin index (#434)
+            range_bin_index=leg_data.get("range_bin_index"),
+            # Bin-normalized impulsiveness (#491)
+            bin_impulsiveness=leg_data.get("bin_impulsiveness"),
+        )
+
+    @classmethod
+    def _archived_leg_from_dict(cls, leg_data: Dict) -> Leg:
+        """Deserialize one archived leg (see _archived_leg_to_dict)."""
+        leg = cls._leg_from_dict(leg_data)
+        leg.max_origin_breach = Decimal(leg_data["max_origin_breach"])
+        if leg_data.get("max_pivot_breach") is not None:
+            leg.max_pivot_breach = Decimal(leg_data["max_pivot_breach"])
+        return leg
+
+    @classmethod
+    def _from_fields_dict(
+        cls, data: Dict, active_legs: List[Leg], archived_legs: List[Leg] = ()
+    ) -> "DetectorState":
+        """Create from a _fields_to_dict() dictionary and already restored legs."""
         # Restore cache fields if present (they'll be recomputed on first use anyway)
         cached_bull = data.get("_cached_big_threshold_bull")
         cached_bear = data.get("_cached_big_threshold_bear")
 
-        # Deserialize active legs
-        active_legs = []
-        for leg_data in data.get("active_legs", []):
-            leg = Leg(
-                direction=leg_data["direction"],
-                pivot_price=Decimal(leg_data["pivot_price"]),
-                pivot_index=leg_data["pivot_index"],
-                origin_price=Decimal(leg_data["origin_price"]),
-                origin_index=leg_data["origin_index"],
-                retracement_pct=Decimal(leg_data.get("retracement_pct", "0")),
-                parent_leg_id=leg_data.get("parent_leg_id"),
-                status=leg_data.get("status", "active"),
-                bar_count=leg_data.get("bar_count", 0),
-                gap_count=leg_data.get("gap_count", 0),
-                last_modified_bar=leg_data.get("last_modified_bar", 0),
-                price_at_creation=Decimal(leg_data.get("price_at_creation", "0")),
-                # Prefer stored leg_id for backward compatibility; if missing,
-                # __post_init__ will compute deterministic ID from properties (#299)
-                leg_id=leg_data.get("leg_id", ""),
-                impulse=leg_data.get("impulse", 0.0),
-                impulsiveness=leg_data.get("impulsiveness"),
-                spikiness=leg_data.get("spikiness"),
-                _moment_n=leg_data.get("_moment_n", 0),
-                _moment_sum_x=leg_data.get("_moment_sum_x", 0.0),
-                _moment_sum_x2=leg_data.get("_moment_sum_x2", 0.0),
-                _moment_sum_x3=leg_data.get("_moment_sum_x3", 0.0),
-                # Segment impulse tracking (#307)
-                segment_deepest_price=Decimal(leg_data["segment_deepest_price"]) if leg_data.get("segment_deepest_price") else None,
-                segment_deepest_index=leg_data.get("segment_deepest_index"),
-                impulse_to_deepest=leg_data.get("impulse_to_deepest"),
-                impulse_back=leg_data.get("impulse_back"),
-                # Counter-trend ratio (#336)
-                counter_trend_ratio=leg_data.get("counter_trend_ratio"),
-                origin_counter_trend_range=leg_data.get("origin_counter_trend_range"),
-                # Hierarchy depth (#361)
-                depth=leg_data.get("depth", 0),
-                # Range bin index (#434)
-                range_bin_index=leg_data.get("range_bin_index"),
-                # Bin-normalized impulsiveness (#491)
-                bin_impulsiveness=leg_data.get("bin_impulsiveness"),
-            )
-            active_legs.append(leg)
-
         # Deserialize pending origins
         pending_origins: Dict[str, Optional[PendingOrigin]] = {'bull': None, 'bear': None}
         pending_origins_data = data.get("pending_origins", {})
@@ -264,7 +395,7 @@ class DetectorState:
         has_created_bull_leg = data.get("_has_created_bull_leg", False)
         has_created_bear_leg = data.get("_has_created_bear_leg", False)
 
-        return cls(
+        state = cls(
             last_bar_index=data.get("last_bar_index", -1),
             all_swing_ranges=[
                 Decimal(r) for r in data.get("all_swing_ranges", [])
@@ -284,4 +415,7 @@ class DetectorState:
             # Bootstrap tracking (#357)
             _has_created_bull_leg=has_created_bull_leg,
             _has_created_bear_leg=has_created_bear_leg,
+            archived_legs=archived_legs,
         )
+        state.active_legs.impulses.add_values(state.archived_legs.impulses())
+        return state
@@ -0,0 +1,190 @@
+"""
+Price-indexed triggers for per-bar leg updates.
+
+Each per-bar leg update fires at a price threshold:
+- pivot extension: bull when high > pivot, bear when low < pivot
+- origin breach: bull when low < origin, bear when high > origin; once
+  breached, max_origin_breach only grows when price passes
+  origin -/+ max_origin_breach
+- pivot breach (origin-breached legs): bull when high > pivot + max breach,
+  bear when low < pivot - max breach
+- extension prune (#203): bull when low < origin - threshold * range,
+  bear when high > origin + threshold * range
+
+TriggerIndex keeps those thresholds in sorted order, one SortedList per
+(kind, side). "Up" triggers fire when the bar high exceeds the price, "down"
+triggers when the bar low falls below it, so each bar does a range query per
+kind against [bar_low, bar_high] and only sees the legs that actually fire.
+An inside bar in a quiet session touches nothing.
+
+Thresholds are exact Decimals (the same expressions the detector evaluates),
+so the fired set equals the set of legs the full scan would have updated.
+"""
+
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+KIND_EXTEND = 'extend'
+KIND_ORIGIN = 'origin'
+KIND_PIVOT = 'pivot'
+KIND_PRUNE = 'prune'
+KINDS = (KIND_EXTEND, KIND_ORIGIN, KIND_PIVOT, KIND_PRUNE)
+
+# (fires_up, price)
+Trigger = Tuple[bool, Decimal]
+
+_AFTER_ALL_SEQS = float('inf')
+
+
+class TriggerIndex:
+    """
+    Sorted price triggers keyed by leg sequence number.
+
+    Example:
+        >>> index = TriggerIndex()
+        >>> index.set(0, KIND_EXTEND, True, Decimal("101"))
+        >>> index.fired(KIND_EXTEND, Decimal("102"), Decimal("99"))
+        ([0], [])
+    """
+
+    __slots__ = ('_up', '_down', '_entries')
+
+    def __init__(self):
+        self._up: Dict[str, SortedList] = {kind: SortedList() for kind in KINDS}
+        self._down: Dict[str, SortedList] = {kind: SortedList() for kind in KINDS}
+        # seq -> kind -> trigger currently indexed
+        self._entries: Dict[int, Dict[str, Trigger]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def get(self, seq: int, kind: str) -> Optional[Trigger]:
+        """Trigger currently indexed for a leg and kind, if any."""
+        return self._entries.get(seq, {}).get(kind)
+
+    def set(self, seq: int, kind: str, up: bool, price: Decimal) -> None:
+        """Index (or move) a leg's trigger of one kind."""
+        entries = self._entries.setdefault(seq, {})
+        trigger = (up, price)
+        old = entries.get(kind)
+        if old == trigger:
+            return
+        if old is not None:
+            self._remove(seq, kind, old)
+        (self._up if up else self._down)[kind].add((price, seq))
+        entries[kind] = trigger
+
+    def clear(self, seq: int, kind: str) -> None:
+        """Drop a leg's trigger of one kind (no-op if absent)."""
+        entries = self._entries.get(seq)
+        if entries is None:
+            return
+        old = entries.pop(kind, None)
+        if old is not None:
+            self._remove(seq, kind, old)
+
+    def discard(self, seq: int) -> None:
+        """Drop every trigger of a leg."""
+        entries = self._entries.pop(seq, None)
+        if entries:
+            for kind, old in entries.items():
+                self._remove(seq, kind, old)
+
+    def update(self, seq: int, triggers: Dict[str, Trigger]) -> None:
+        """Make a leg's indexed triggers match triggers (kind -> trigger)."""
+        entries = self._entries.setdefault(seq, {})
+        if entries == triggers:
+            return
+        for kind in KINDS:
+            old = entries.get(kind)
+            new = triggers.get(kind)
+            if old == new:
+                continue
+            if old is not None:
+                self._remove(seq, kind, old)
+            if new is None:
+                del entries[kind]
+            else:
+                up, price = new
+                (self._up if up else self._down)[kind].add((price, seq))
+                entries[kind] = new
+
+    def load(self, triggers_by_seq: Dict[int, Dict[str, Trigger]]) -> None:
+        """
+        Bulk-index the triggers of many legs into an empty index.
+
+        Builds each sorted list once instead of inserting trigger by trigger.
+        """
+        if self._entries:
+            raise ValueError("TriggerIndex.load() requires an empty index")
+        up: Dict[str, list] = {kind: [] for kind in KINDS}
+        down: Dict[str, list] = {kind: [] for kind in KINDS}
+        for seq, triggers in triggers_by_seq.items():
+            if not triggers:
+                continue
+            self._entries[seq] = dict(triggers)
+            for kind, (fires_up, price) in triggers.items():
+                (up if fires_up else down)[kind].append((price, seq))
+        for kind in KINDS:
+            self._up[kind] = SortedList(up[kind])
+            self._down[kind] = SortedList(down[kind])
+
+    def _remove(self, seq: int, kind: str, trigger: Trigger) -> None:
+        up, price = trigger
+        (self._up if up else self._down)[kind].remove((price, seq))
+
+    def fired(self, kind: str, bar_high: Decimal, bar_low: Decimal) -> Tuple[List[int], List[int]]:
+        """
+        Sequence numbers whose trigger of this kind fires for a bar.
+
+        Returns:
+            (up, down): up triggers with price < bar_high and down triggers
+            with price > bar_low, each in price order.
+        """
+        up = [seq for _, seq in self._up[kind].irange(
+            maximum=(bar_high,), inclusive=(True, False)
+        )]
+        down = [seq for _, seq in self._down[kind].irange(
+            minimum=(bar_low, _AFTER_ALL_SEQS), inclusive=(False, True)
+        )]
+        return up, down
+
+
+def breached_leg_triggers(
+    bull: bool,
+    origin_price: Decimal,
+    pivot_price: Decimal,
+    leg_range: Decimal,
+    max_origin_breach: Decimal,
+    max_pivot_breach: Optional[Decimal],
+    prune_threshold: Optional[Decimal],
+) -> Dict[str, Trigger]:
+    """
+    Triggers of an origin-breached leg (kind -> (fires_up, price)).
+
+    Mirrors the exact tests in LegDetector._update_breach_tracking() and
+    _check_extension_prune(). Shared by LegStore and the cold LegArchive.
+    """
+    # Max origin breach only grows past the deepest breach so far
+    if bull:
+        triggers = {KIND_ORIGIN: (False, origin_price - max_origin_breach)}
+    else:
+        triggers = {KIND_ORIGIN: (True, origin_price + max_origin_breach)}
+    if leg_range == 0:
+        return triggers
+    # Pivot breach: first breach past the pivot, then past the max breach
+    pivot_breach = max_pivot_breach or 0
+    if bull:
+        triggers[KIND_PIVOT] = (True, pivot_price + pivot_breach)
+    else:
+        triggers[KIND_PIVOT] = (False, pivot_price - pivot_breach)
+    # Extension prune at origin -/+ threshold * range (#203)
+    if prune_threshold is not None:
+        extension_amount = prune_threshold * leg_range
+        if bull:
+            triggers[KIND_PRUNE] = (False, origin_price - extension_amount)
+        else:
+            triggers[KIND_PRUNE] = (True, origin_price + extension_amount)
+    return triggers
@@ -0,0 +1,278 @@
+"""
+Bounded per-bar undo journal for LegDetector and ReferenceLayer.
+
+Stepping back one bar used to mean replaying from bar 0 (or, since the
+replay checkpoints, from the nearest checkpoint). With a journal attached,
+each bar records what it changed so the last `depth` bars can be undone
+directly:
+
+- legs: field-level diffs (old values of the changed fields only), legs
+  created during the bar, and pruned legs with their position and fields
+- DetectorState scalar fields (pending origins, turn tracking, prev_bar)
+- cold leg archive mutations (recorded by the LegArchive, see
+  leg_archive.py)
+- ReferenceLayer: _formed_refs / _seen_leg_ids changes and the rolling bin
+  distribution's window, range and counter changes (recorded by the
+  ReferenceLayer and RollingBinDistribution as they mutate)
+
+Leg diffs are taken against a snapshot made when the bar starts and
+finalized when the next bar starts (or on undo), so the writes
+ReferenceLayer.update() makes to legs after process_bar() (ref metadata,
+bin classification) belong to the same bar.
+
+Undo restores the recorded values and reloads the LegStore indexes from
+the restored legs in one bulk pass (LegStore._load). Live legs get their
+impulsiveness pinned to the restored population's ranking, which is what
+an uninterrupted detector reads at the start of that bar.
+
+Example:
+    >>> journal = UndoJournal(depth=64)
+    >>> detector.undo_journal = journal
+    >>> ref_layer.undo_journal = journal
+    >>> ... process bars ...
+    >>> journal.undo(detector.state, ref_layer)  # back one bar
+"""
+
+from collections import deque
+from dataclasses import dataclass, field, fields
+from typing import Any, Deque, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from .leg import Leg
+from .leg_store import LegStore
+
+if TYPE_CHECKING:
+    from ..reference_layer import ReferenceLayer
+    from .range_distribution import RollingBinDistribution
+    from .state import DetectorState
+
+DEFAULT_DEPTH = 64
+
+# Marks a leg attribute that did not exist before the bar
+_MISSING = object()
+
+# DetectorState fields restored from a per-bar snapshot (everything but the legs)
+_STATE_FIELDS: Tuple[str, ...] = ()
+
+
+def _state_fields() -> Tuple[str, ...]:
+    global _STATE_FIELDS
+    if not _STATE_FIELDS:
+        from .state import DetectorState
+        _STATE_FIELDS = tuple(
+            f.name for f in fields(DetectorState)
+            if f.name not in ('active_legs', 'archived_legs')
+        )
+    return _STATE_FIELDS
+
+
+def _copy_value(value):
+    # pending_origins and last_turn_bar are small dicts updated in place. The
+    # list fields (all_swing_ranges, formed_leg_impulses) are only replaced
+    # wholesale on restore, so keeping the reference is enough.
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+@dataclass
+class _BarEntry:
+    """Everything needed to undo one bar."""
+    bar_index: int
+    state_fields: Dict[str, Any]
+    # id(leg) -> [leg, {field: old value}, old ref.max_location or _MISSING]
+    changed: Dict[int, list] = field(default_factory=dict)
+    created: List[Leg] = field(default_factory=list)
+    # (position in the ordering, leg, fields, ref.max_location), ascending
+    removed: List[Tuple[int, Leg, Dict[str, Any], Optional[float]]] = field(default_factory=list)
+    # ('ref', op) / ('dist', op) in the order they happened
+    reference_ops: List[Tuple[str, tuple]] = field(default_factory=list)
+    distribution_recorded: bool = False
+    # LegArchive ops in the order they happened
+    archive_ops: List[tuple] = field(default_factory=list)
+
+
+class UndoJournal:
+    """
+    Undo log for the last `depth` bars of one detector (and reference layer).
+
+    Assign the same journal to LegDetector.undo_journal and
+    ReferenceLayer.undo_journal. Replacing the detector state (checkpoint
+    restore, from_state) or changing config invalidates the journal: call
+    clear().
+
+    Args:
+        depth: Maximum number of bars that can be undone; older entries are
+            discarded.
+    """
+
+    def __init__(self, depth: int = DEFAULT_DEPTH):
+        if depth < 1:
+            raise ValueError(f"Undo journal depth must be >= 1, got {depth}")
+        self.depth = depth
+        self._entries: Deque[_BarEntry] = deque(maxlen=depth)
+        self._state: Optional["DetectorState"] = None
+        # Leg snapshot the open entry's diffs are taken against
+        self._baseline: Optional[List[Tuple[Leg, Dict[str, Any], Optional[float]]]] = None
+
+    def __len__(self) -> int:
+        """Number of bars that can be undone."""
+        return len(self._entries)
+
+    @property
+    def bar_index(self) -> Optional[int]:
+        """Bar the next undo() reverts, or None when empty."""
+        return self._entries[-1].bar_index if self._entries else None
+
+    def clear(self) -> None:
+        """Forget all entries."""
+        self._entries.clear()
+        self._state = None
+        self._baseline = None
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def begin_bar(self, state: "DetectorState", bar_index: int) -> None:
+        """Close the previous bar's entry and open one for bar_index (LegDetector.process_bar)."""
+        if state is not self._state:
+            self.clear()
+            self._state = state
+        elif self._entries:
+            self._finalize(self._entries[-1])
+
+        self._entries.append(_BarEntry(
+            bar_index=bar_index,
+            state_fields={name: _copy_value(getattr(state, name)) for name in _state_fields()},
+        ))
+        self._snapshot_legs()
+
+    def record_reference(self, op: tuple) -> None:
+        """Record a ReferenceLayer mutation (see ReferenceLayer._undo)."""
+        if self._entries:
+            self._entries[-1].reference_ops.append(('ref', op))
+
+    def record_archive(self, op: tuple) -> None:
+        """Record a LegArchive mutation (see LegArchive._undo)."""
+        if self._entries:
+            self._entries[-1].archive_ops.append(op)
+
+    def record_distribution(self, distribution: "RollingBinDistribution", op: tuple) -> None:
+        """Record a RollingBinDistribution mutation, before it is applied."""
+        if not self._entries:
+            return
+        entry = self._entries[-1]
+        if not entry.distribution_recorded:
+            # Counters and median change wholesale on recompute; keep them once per bar
+            entry.reference_ops.append(('dist', ('counters',) + distribution.journal_counters()))
+            entry.distribution_recorded = True
+        entry.reference_ops.append(('dist', op))
+
+    def _snapshot_legs(self) -> None:
+        self._baseline = [
+            (leg, leg.__dict__.copy(), leg.ref.max_location)
+            for leg in self._state.active_legs
+        ]
+
+    def _finalize(self, entry: _BarEntry) -> None:
+        """Fold changes since the baseline snapshot into entry (older values win)."""
+        baseline = self._baseline
+        if baseline is None:
+            return
+        self._baseline = None
+        legs = list(self._state.active_legs)
+        current_ids = {id(leg) for leg in legs}
+        baseline_ids = set()
+
+        for position, (leg, old_fields, old_max_location) in enumerate(baseline):
+            key = id(leg)
+            baseline_ids.add(key)
+            if key not in current_ids:
+                entry.removed.append((position, leg, old_fields, old_max_location))
+                continue
+            current = leg.__dict__
+            max_location = leg.ref.max_location
+            if current == old_fields and max_location == old_max_location:
+                continue
+            record = entry.changed.get(key)
+            if record is None:
+                record = entry.changed[key] = [leg, {}, _MISSING]
+            diff = record[1]
+            for name, old in old_fields.items():
+                if name not in diff:
+                    value = current.get(name, _MISSING)
+                    if value is not old and value != old:
+                        diff[name] = old
+            for name in current.keys() - old_fields.keys():
+                diff.setdefault(name, _MISSING)
+            if max_location != old_max_location and record[2] is _MISSING:
+                record[2] = old_max_location
+
+        entry.created.extend(leg for leg in legs if id(leg) not in baseline_ids)
+
+    # ------------------------------------------------------------------
+    # Undo
+    # ------------------------------------------------------------------
+
+    def undo(self, state: "DetectorState", ref_layer: Optional["ReferenceLayer"] = None) -> int:
+        """
+        Revert the most recent bar.
+
+        Args:
+            state: The detector state the journal recorded.
+            ref_layer: Reference layer sharing this journal, if any.
+
+        Returns:
+            The bar index state is now at (state.last_bar_index).
+
+        Raises:
+            ValueError: If the journal is empty or belongs to another state.
+        """
+        if not self._entries or state is not self._state:
+            raise ValueError("Nothing to undo for this detector state")
+        entry = self._entries.pop()
+        self._finalize(entry)
+
+        if ref_layer is not None:
+            distribution = ref_layer._bin_distribution
+            for target, op in reversed(entry.reference_ops):
+                if target == 'ref':
+                    ref_layer._undo(op)
+                else:
+                    distribution.undo(op)
+
+        archive = state.archived_legs
+        for op in reversed(entry.archive_ops):
+            archive._undo(op)
+
+        created = {id(leg) for leg in entry.created}
+        order = [leg for leg in state.active_legs if id(leg) not in created]
+        for position, leg, old_fields, old_max_location in entry.removed:
+            order.insert(position, leg)
+            leg.__dict__.clear()
+            leg.__dict__.update(old_fields)
+            leg.ref.max_location = old_max_location
+        for leg, diff, old_max_location in entry.changed.values():
+            attributes = leg.__dict__
+            for name, old in diff.items():
+                if old is _MISSING:
+                    attributes.pop(name, None)
+                else:
+                    attributes[name] = old
+            if old_max_location is not _MISSING:
+                leg.ref.max_location = old_max_location
+
+        store = LegStore(order)
+        population = store.impulses
+        population.add_values(archive.impulses())
+        for leg in order:
+            if leg._population is population and leg.impulse is not None:
+                leg.impulsiveness = population.percentile(leg.impulse)
+        state.active_legs = store
+        for name, value in entry.state_fields.items():
+            setattr(state, name, value)
+
+        # The previous bar's entry stays open for writes made before the next bar
+        if self._entries:
+            self._snapshot_legs()
+        return state.last_bar_index
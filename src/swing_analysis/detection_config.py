@@ -7,8 +7,10 @@ Extracts magic numbers from the codebase into a single config.
 See Docs/Reference/valid_swings.md for the canonical rules these parameters implement.
 """
 
+import hashlib
+import json
 from dataclasses import dataclass, field, asdict
-from typing import Any
+from typing import Any, Optional
 
 
 @dataclass(frozen=True)
@@ -73,6 +75,15 @@ class DetectionConfig:
             Retain engulfed legs until combined breach exceeds this fraction of range.
             0 = immediate prune (most aggressive). 1 = never prune (disabled).
             Default: 0.236 (first fib level).
+        archive_breach_multiple: Long-horizon mode. Origin-breached legs whose
+            origin breach reaches this multiple of their range move from
+            active_legs to the cold leg archive (DetectorState.archived_legs,
+            see dag/leg_archive.py), which only revisits them when a price
+            trigger fires. Detection output is unchanged. None (default)
+            keeps every leg in active_legs.
+        archive_budget_bytes: Memory budget of the cold leg archive. Once
+            exceeded, the oldest archived legs are pruned (reason
+            "archive_evicted"). None (default) means unbounded.
 
     Example:
         >>> config = DetectionConfig.default()
@@ -89,12 +100,30 @@ class DetectionConfig:
     stale_extension_threshold: float = 3.0
     # #404: symmetric engulfed threshold (applies to both directions)
     engulfed_breach_threshold: float = 0.236
+    # Long-horizon mode: cold leg archive (None = disabled)
+    archive_breach_multiple: Optional[float] = None
+    archive_budget_bytes: Optional[int] = None
 
     @classmethod
     def default(cls) -> "DetectionConfig":
         """Create a config with default values."""
         return cls()
 
+    def fingerprint(self) -> str:
+        """
+        Stable 16-hex-digit hash of the parameters that affect detection output.
+
+        archive_breach_multiple is left out: the cold leg archive produces
+        identical results. archive_budget_bytes only counts when set.
+        Used to tag saved detector state.
+        """
+        params = asdict(self)
+        del params['archive_breach_multiple']
+        if params['archive_budget_bytes'] is None:
+            del params['archive_budget_bytes']
+        encoded = json.dumps(params, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
     def with_bull(self, **kwargs: Any) -> "DetectionConfig":
         """
         Create a new config with modified bull parameters.
@@ -118,6 +147,8 @@ class DetectionConfig:
             max_turns=self.max_turns,
             stale_extension_threshold=self.stale_extension_threshold,
             engulfed_breach_threshold=self.engulfed_breach_threshold,
+            archive_breach_multiple=self.archive_breach_multiple,
+            archive_budget_bytes=self.archive_budget_bytes,
         )
 
     def with_bear(self, **kwargs: Any) -> "DetectionConfig":
@@ -137,6 +168,8 @@ class DetectionConfig:
             max_turns=self.max_turns,
             stale_extension_threshold=self.stale_extension_threshold,
             engulfed_breach_threshold=self.engulfed_breach_threshold,
+            archive_breach_multiple=self.archive_breach_multiple,
+            archive_budget_bytes=self.archive_budget_bytes,
         )
 
     def with_origin_prune(
@@ -182,6 +215,8 @@ class DetectionConfig:
             max_turns=self.max_turns,
             stale_extension_threshold=self.stale_extension_threshold,
             engulfed_breach_threshold=self.engulfed_breach_threshold,
+            archive_breach_multiple=self.archive_breach_multiple,
+            archive_budget_bytes=self.archive_budget_bytes,
         )
 
     def with_stale_extension(self, stale_extension_threshold: float) -> "DetectionConfig":
@@ -204,6 +239,8 @@ class DetectionConfig:
             max_turns=self.max_turns,
             stale_extension_threshold=stale_extension_threshold,
             engulfed_breach_threshold=self.engulfed_breach_threshold,
+            archive_breach_multiple=self.archive_breach_multiple,
+            archive_budget_bytes=self.archive_budget_bytes,
         )
 
     def with_max_turns(self, max_turns: int) -> "DetectionConfig":
@@ -225,6 +262,8 @@ class DetectionConfig:
             max_turns=max_turns,
             stale_extension_threshold=self.stale_extension_threshold,
             engulfed_breach_threshold=self.engulfed_breach_threshold,
+            archive_breach_multiple=self.archive_breach_multiple,
+            archive_budget_bytes=self.archive_budget_bytes,
         )
 
     def with_engulfed(self, engulfed_breach_threshold: float) -> "DetectionConfig":
@@ -248,4 +287,36 @@ class DetectionConfig:
             max_turns=self.max_turns,
             stale_extension_threshold=self.stale_extension_threshold,
             engulfed_breach_threshold=engulfed_breach_threshold,
+            archive_breach_multiple=self.archive_breach_multiple,
+            archive_budget_bytes=self.archive_budget_bytes,
+        )
+
+    def with_long_horizon(
+        self,
+        archive_breach_multiple: Optional[float] = 1.0,
+        archive_budget_bytes: Optional[int] = None,
+    ) -> "DetectionConfig":
+        """
+        Create a new config with long-horizon mode (cold leg archive) settings.
+
+        Since DetectionConfig is frozen, this creates a new instance.
+
+        Args:
+            archive_breach_multiple: Origin breach, as a multiple of range,
+                at which a leg is archived (None disables the archive).
+                The default of 1.0 archives a leg once price has travelled
+                its full range beyond the origin.
+            archive_budget_bytes: Archive memory budget (None = unbounded).
+        """
+        return DetectionConfig(
+            bull=self.bull,
+            bear=self.bear,
+            origin_range_prune_threshold=self.origin_range_prune_threshold,
+            origin_time_prune_threshold=self.origin_time_prune_threshold,
+            proximity_prune_strategy=self.proximity_prune_strategy,
+            max_turns=self.max_turns,
+            stale_extension_threshold=self.stale_extension_threshold,
+            engulfed_breach_threshold=self.engulfed_breach_threshold,
+            archive_breach_multiple=archive_breach_multiple,
+            archive_budget_bytes=archive_budget_bytes,
         )
@@ -10,7 +10,23 @@ See Docs/Working/swing_detection_rewrite_spec.md for design rationale.
 from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Literal, Optional
+from typing import List, Literal, Optional, Union
+
+# Event timestamp as passed through the detector: the bar's Unix seconds
+# (converted by event_time() when an event is built) or a datetime
+EventTime = Union[datetime, int, float]
+
+
+def event_time(timestamp: Optional[EventTime]) -> datetime:
+    """
+    Datetime of an event timestamp.
+
+    Unix seconds are converted (local time, as datetime.fromtimestamp());
+    a missing timestamp (None or 0) means now.
+    """
+    if isinstance(timestamp, datetime):
+        return timestamp
+    return datetime.fromtimestamp(timestamp) if timestamp else datetime.now()
 
 
 @dataclass
@@ -87,6 +103,8 @@ class LegPrunedEvent(DetectionEvent):
     - "pivot_breach": Formed leg's pivot was breached beyond threshold
     - "engulfed": Leg's origin was breached and pivot threshold exceeded
     - "inner_structure": Leg from inner structure pivot pruned when outer exists
+    - "archive_evicted": Oldest cold-archived leg dropped to stay within
+      DetectionConfig.archive_budget_bytes (long-horizon mode)
 
     Attributes:
         event_type: Always "LEG_PRUNED".
@@ -0,0 +1,400 @@
+"""
+Serialization of accumulated ReferenceLayer state.
+
+ReferenceLayer state used to live only in memory (copy_state_from() between
+instances), so checkpoints and restored sessions had to replay the layer
+from bar 0. Two lossless forms are provided, both schema-versioned:
+
+Dict form (JSON-ready, ReferenceLayer.to_dict()):
+    schema_version, config fingerprint, reference_config, bin distribution,
+    formed refs, seen leg IDs, crossing tracking, session level touches,
+    last price and pending level cross events.
+
+Binary form (ReferenceLayer.to_bytes()), laid out like dag/checkpoint.py:
+
+    header   magic, schema version, flags, config fingerprint, record
+             counts, section sizes (HEADER)
+    strings  string table (leg IDs, formation pivot prices)
+    records  bin window (WINDOW_DTYPE), leg ranges (RANGE_DTYPE), formed
+             refs (FORMED_DTYPE), seen leg IDs (u4 string refs)
+    fields   JSON of the remaining (small) state
+
+The bin window and the formed/seen sets grow with the session, so they are
+fixed-width records; everything else is small and stays JSON. Legs inside
+level touches are written with all of their fields, so they restore equal
+but as copies, no longer shared with the DAG's active legs.
+
+Example:
+    >>> data = ref_layer.to_bytes()
+    >>> restored = ReferenceLayer.from_bytes(data, detector.config)
+"""
+
+import json
+import struct
+from dataclasses import fields
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+import numpy as np
+
+from .dag.checkpoint import DECIMAL_FIELDS, pack_strings, unpack_strings
+from .dag.leg import Leg, RefMetadata
+from .dag.range_distribution import RollingBinDistribution
+from .events import LevelCrossEvent
+from .reference_config import ReferenceConfig
+
+if TYPE_CHECKING:
+    from .detection_config import DetectionConfig
+    from .reference_layer import ReferenceLayer
+
+MAGIC = b"REFLAYER"
+SCHEMA_VERSION = 1
+
+# magic, version, flags, config fingerprint,
+# window/range/formed/seen counts, strings/records/fields sizes
+HEADER = struct.Struct("<8sHH8sIIIIIII")
+FLAG_CONFIG = 1
+# Every bin window timestamp was an int (bar timestamps); restore them as ints
+FLAG_INT_TIMESTAMPS = 2
+
+WINDOW_DTYPE = np.dtype([('leg_id', '<u4'), ('range', '<f8'), ('timestamp', '<f8')])
+RANGE_DTYPE = np.dtype([('leg_id', '<u4'), ('range', '<f8')])
+FORMED_DTYPE = np.dtype([('leg_id', '<u4'), ('pivot_price', '<u4'), ('bar_index', '<i8')])
+
+
+def _check_version(version: int) -> None:
+    if version > SCHEMA_VERSION:
+        raise ValueError(
+            f"Reference layer schema version {version} is newer than supported ({SCHEMA_VERSION})"
+        )
+
+
+def _check_config(fingerprint: Optional[str], config: Optional["DetectionConfig"]) -> None:
+    if config is not None and fingerprint is not None and fingerprint != config.fingerprint():
+        raise ValueError(
+            "Reference layer state was saved with a different detection config "
+            f"({fingerprint} != {config.fingerprint()})"
+        )
+
+
+# ----------------------------------------------------------------------
+# Nested values (shared by both forms)
+# ----------------------------------------------------------------------
+
+
+def _leg_to_dict(leg: Leg) -> Dict[str, Any]:
+    """Every Leg field, Decimals as strings (unlike DetectorState._leg_to_dict)."""
+    data: Dict[str, Any] = {}
+    for f in fields(Leg):
+        name = f.name
+        if name == '_cached_range':
+            continue
+        if name == 'ref':
+            data['ref_max_location'] = leg.ref.max_location
+            continue
+        value = getattr(leg, name)
+        if name in DECIMAL_FIELDS and value is not None:
+            value = str(value)
+        data[name] = value
+    return data
+
+
+def _leg_from_dict(data: Dict[str, Any]) -> Leg:
+    values = dict(data)
+    for name in DECIMAL_FIELDS:
+        if values[name] is not None:
+            values[name] = Decimal(values[name])
+    values['ref'] = RefMetadata(max_location=values.pop('ref_max_location'))
+    return Leg._from_field_values(values)
+
+
+def _touch_to_dict(touch) -> Dict[str, Any]:
+    level = touch.level
+    reference = level.reference
+    return {
+        "level": {
+            "price": level.price,
+            "ratio": level.ratio,
+            "reference": {
+                "leg": _leg_to_dict(reference.leg),
+                "bin": reference.bin,
+                "depth": reference.depth,
+                "location": reference.location,
+                "salience_score": reference.salience_score,
+            },
+        },
+        "bar_index": touch.bar_index,
+        "touch_price": touch.touch_price,
+        "cross_direction": touch.cross_direction,
+    }
+
+
+def _touch_from_dict(data: Dict[str, Any]):
+    from .reference_layer import LevelInfo, LevelTouch, ReferenceSwing
+
+    level = data["level"]
+    reference = level["reference"]
+    return LevelTouch(
+        level=LevelInfo(
+            price=level["price"],
+            ratio=level["ratio"],
+            reference=ReferenceSwing(
+                leg=_leg_from_dict(reference["leg"]),
+                bin=reference["bin"],
+                depth=reference["depth"],
+                location=reference["location"],
+                salience_score=reference["salience_score"],
+            ),
+        ),
+        bar_index=data["bar_index"],
+        touch_price=data["touch_price"],
+        cross_direction=data["cross_direction"],
+    )
+
+
+def _cross_event_to_dict(event: LevelCrossEvent) -> Dict[str, Any]:
+    return {
+        "bar_index": event.bar_index,
+        "timestamp": event.timestamp.isoformat(),
+        "leg_id": event.leg_id,
+        "direction": event.direction,
+        "level_crossed": event.level_crossed,
+        "cross_direction": event.cross_direction,
+    }
+
+
+def _cross_event_from_dict(data: Dict[str, Any]) -> LevelCrossEvent:
+    return LevelCrossEvent(
+        bar_index=data["bar_index"],
+        timestamp=datetime.fromisoformat(data["timestamp"]),
+        leg_id=data["leg_id"],
+        direction=data["direction"],
+        level_crossed=data["level_crossed"],
+        cross_direction=data["cross_direction"],
+    )
+
+
+def _distribution_scalars(distribution: RollingBinDistribution) -> Dict[str, Any]:
+    return {
+        "window_duration_days": distribution.window_duration_days,
+        "recompute_interval_legs": distribution.recompute_interval_legs,
+        "bin_counts": list(distribution.bin_counts),
+        "median": distribution.median,
+        "legs_since_recompute": distribution.legs_since_recompute,
+        "_warmup_complete": distribution._warmup_complete,
+    }
+
+
+def _common_fields(ref_layer: "ReferenceLayer") -> Dict[str, Any]:
+    """State other than the bin window, leg ranges and formed/seen sets."""
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "config_fingerprint": ref_layer.config.fingerprint(),
+        "reference_config": ref_layer.reference_config.to_dict(),
+        "tracked_for_crossing": sorted(ref_layer._tracked_for_crossing),
+        "last_level": dict(ref_layer._last_level),
+        "session_level_touches": [_touch_to_dict(t) for t in ref_layer._session_level_touches],
+        "last_price": ref_layer._last_price,
+        "pending_cross_events": [_cross_event_to_dict(e) for e in ref_layer._pending_cross_events],
+    }
+
+
+def _restore(
+    data: Dict[str, Any],
+    distribution: RollingBinDistribution,
+    formed_refs: Dict[str, tuple],
+    seen_leg_ids: set,
+    config: Optional["DetectionConfig"],
+) -> "ReferenceLayer":
+    from .reference_layer import ReferenceLayer
+
+    ref_layer = ReferenceLayer(
+        config, reference_config=ReferenceConfig.from_dict(data["reference_config"])
+    )
+    ref_layer._bin_distribution = distribution
+    ref_layer._formed_refs = formed_refs
+    ref_layer._seen_leg_ids = seen_leg_ids
+    ref_layer._tracked_for_crossing = set(data["tracked_for_crossing"])
+    ref_layer._last_level = dict(data["last_level"])
+    ref_layer._session_level_touches = [_touch_from_dict(t) for t in data["session_level_touches"]]
+    ref_layer._last_price = data["last_price"]
+    ref_layer._pending_cross_events = [
+        _cross_event_from_dict(e) for e in data["pending_cross_events"]
+    ]
+    return ref_layer
+
+
+# ----------------------------------------------------------------------
+# Dict form
+# ----------------------------------------------------------------------
+
+
+def reference_layer_to_dict(ref_layer: "ReferenceLayer") -> Dict[str, Any]:
+    """JSON-ready dict of all accumulated ReferenceLayer state."""
+    data = _common_fields(ref_layer)
+    distribution = ref_layer._bin_distribution
+    data["bin_distribution"] = _distribution_scalars(distribution)
+    data["bin_distribution"]["window"] = [list(item) for item in distribution.window]
+    data["bin_distribution"]["leg_ranges"] = dict(distribution.leg_ranges)
+    data["formed_refs"] = {
+        leg_id: [str(pivot_price), bar_index]
+        for leg_id, (pivot_price, bar_index) in ref_layer._formed_refs.items()
+    }
+    data["seen_leg_ids"] = sorted(ref_layer._seen_leg_ids)
+    return data
+
+
+def reference_layer_from_dict(
+    data: Dict[str, Any], config: Optional["DetectionConfig"] = None
+) -> "ReferenceLayer":
+    """
+    Restore a ReferenceLayer from reference_layer_to_dict() output.
+
+    Args:
+        data: Dict form of the state.
+        config: Detection config for the restored layer. If given, must
+            match the fingerprint the state was saved with.
+
+    Raises:
+        ValueError: If the schema is newer than supported or config does not match.
+    """
+    _check_version(data.get("schema_version", 0))
+    _check_config(data.get("config_fingerprint"), config)
+    distribution = RollingBinDistribution.from_dict(data["bin_distribution"])
+    # from_dict keeps references to the input containers
+    distribution.bin_counts = list(distribution.bin_counts)
+    distribution.leg_ranges = dict(distribution.leg_ranges)
+    formed_refs = {
+        leg_id: (Decimal(pivot_price), bar_index)
+        for leg_id, (pivot_price, bar_index) in data["formed_refs"].items()
+    }
+    return _restore(data, distribution, formed_refs, set(data["seen_leg_ids"]), config)
+
+
+# ----------------------------------------------------------------------
+# Binary form
+# ----------------------------------------------------------------------
+
+
+def encode_reference_layer(ref_layer: "ReferenceLayer") -> bytes:
+    """Serialize ReferenceLayer state to the binary form (see module docstring)."""
+    strings: List[str] = []
+    string_index: Dict[str, int] = {}
+
+    def intern(text: str) -> int:
+        index = string_index.get(text)
+        if index is None:
+            index = string_index[text] = len(strings)
+            strings.append(text)
+        return index
+
+    distribution = ref_layer._bin_distribution
+    window = list(distribution.window)
+    window_records = np.zeros(len(window), dtype=WINDOW_DTYPE)
+    window_records['leg_id'] = [intern(leg_id) for leg_id, _, _ in window]
+    window_records['range'] = [range_val for _, range_val, _ in window]
+    window_records['timestamp'] = [timestamp for _, _, timestamp in window]
+
+    range_records = np.zeros(len(distribution.leg_ranges), dtype=RANGE_DTYPE)
+    range_records['leg_id'] = [intern(leg_id) for leg_id in distribution.leg_ranges]
+    range_records['range'] = list(distribution.leg_ranges.values())
+
+    formed = ref_layer._formed_refs
+    formed_records = np.zeros(len(formed), dtype=FORMED_DTYPE)
+    formed_records['leg_id'] = [intern(leg_id) for leg_id in formed]
+    formed_records['pivot_price'] = [intern(str(pivot)) for pivot, _ in formed.values()]
+    formed_records['bar_index'] = [bar_index for _, bar_index in formed.values()]
+
+    seen_records = np.array(
+        [intern(leg_id) for leg_id in sorted(ref_layer._seen_leg_ids)], dtype='<u4'
+    )
+
+    fields_data = _common_fields(ref_layer)
+    fields_data["bin_distribution"] = _distribution_scalars(distribution)
+
+    flags = FLAG_CONFIG
+    if all(type(timestamp) is int for _, _, timestamp in window):
+        flags |= FLAG_INT_TIMESTAMPS
+    strings_section = pack_strings(strings)
+    records_section = (
+        window_records.tobytes() + range_records.tobytes()
+        + formed_records.tobytes() + seen_records.tobytes()
+    )
+    fields_section = json.dumps(fields_data, separators=(",", ":")).encode("utf-8")
+
+    header = HEADER.pack(
+        MAGIC, SCHEMA_VERSION, flags, bytes.fromhex(ref_layer.config.fingerprint()),
+        len(window), len(range_records), len(formed_records), len(seen_records),
+        len(strings_section), len(records_section), len(fields_section),
+    )
+    return header + strings_section + records_section + fields_section
+
+
+def decode_reference_layer(
+    data: bytes, config: Optional["DetectionConfig"] = None
+) -> "ReferenceLayer":
+    """
+    Restore a ReferenceLayer from encode_reference_layer() bytes or JSON of the dict form.
+
+    Raises:
+        ValueError: If data is neither format, the schema is newer than
+            supported, or config does not match.
+    """
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        if bytes(data).lstrip()[:1] == b"{":
+            return reference_layer_from_dict(json.loads(data), config)
+        raise ValueError("Not a reference layer checkpoint or state dict")
+    if len(data) < HEADER.size:
+        raise ValueError("Truncated reference layer checkpoint")
+
+    (
+        _, version, flags, fingerprint,
+        window_count, range_count, formed_count, seen_count,
+        strings_size, records_size, fields_size,
+    ) = HEADER.unpack_from(data)
+    _check_version(version)
+    _check_config(fingerprint.hex() if flags & FLAG_CONFIG else None, config)
+
+    view = memoryview(data)
+    position = HEADER.size
+    strings = unpack_strings(view, position, strings_size)
+    position += strings_size
+
+    def records(dtype, count):
+        nonlocal position
+        array = np.frombuffer(view, dtype=dtype, count=count, offset=position)
+        position += array.nbytes
+        return array
+
+    window = records(WINDOW_DTYPE, window_count)
+    ranges = records(RANGE_DTYPE, range_count)
+    formed = records(FORMED_DTYPE, formed_count)
+    seen = records(np.dtype('<u4'), seen_count)
+    fields_data = json.loads(bytes(view[position:position + fields_size]))
+
+    distribution = RollingBinDistribution.from_dict(fields_data["bin_distribution"])
+    timestamps = window['timestamp']
+    if flags & FLAG_INT_TIMESTAMPS:
+        timestamps = timestamps.astype(np.int64)
+    distribution.window.extend(zip(
+        [strings[ref] for ref in window['leg_id'].tolist()],
+        window['range'].tolist(),
+        timestamps.tolist(),
+    ))
+    distribution.leg_ranges = dict(zip(
+        [strings[ref] for ref in ranges['leg_id'].tolist()], ranges['range'].tolist()
+    ))
+
+    pivots: Dict[int, Decimal] = {}
+    formed_refs = {}
+    for leg_ref, pivot_ref, bar_index in zip(
+        formed['leg_id'].tolist(), formed['pivot_price'].tolist(), formed['bar_index'].tolist()
+    ):
+        pivot = pivots.get(pivot_ref)
+        if pivot is None:
+            pivot = pivots[pivot_ref] = Decimal(strings[pivot_ref])
+        formed_refs[strings[leg_ref]] = (pivot, bar_index)
+
+    seen_leg_ids = {strings[ref] for ref in seen.tolist()}
+    return _restore(fields_data, distribution, formed_refs, seen_leg_ids, config)
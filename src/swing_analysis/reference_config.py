@@ -12,6 +12,8 @@ Separate from DetectionConfig because:
 See #436 for bin-based classification migration.
 """
 
+import hashlib
+import json
 from dataclasses import dataclass, asdict
 from typing import Dict, Any
 
@@ -132,6 +134,11 @@ class ReferenceConfig:
         """Convert to dictionary for JSON serialization."""
         return asdict(self)
 
+    def fingerprint(self) -> str:
+        """Stable 16-hex-digit hash of all parameters (see DetectionConfig.fingerprint)."""
+        encoded = json.dumps(self.to_dict(), sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "ReferenceConfig":
         """Create from dictionary."""
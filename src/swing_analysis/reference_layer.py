@@ -26,7 +26,8 @@ from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
-from typing import List, Optional, Dict, Tuple, Set
+from pathlib import Path
+from typing import List, Optional, Dict, Tuple, Set, TYPE_CHECKING, Union
 
 from .detection_config import DetectionConfig
 from .events import LevelCrossEvent
@@ -37,6 +38,9 @@ from .dag import BIN_MULTIPLIERS
 from .dag.leg import Leg
 from .dag.range_distribution import RollingBinDistribution
 
+if TYPE_CHECKING:
+    from .dag.undo_journal import UndoJournal
+
 
 # Standard fib levels used for level crossing detection
 STANDARD_FIB_LEVELS = [0.0, 0.382, 0.5, 0.618, 1.0, 1.382, 1.5, 1.618, 2.0]
@@ -478,6 +482,8 @@ class ReferenceLayer:
         self._last_price: Optional[float] = None
         # Accumulated level crossing events (cleared after retrieval)
         self._pending_cross_events: List[LevelCrossEvent] = []
+        # Optional per-bar undo log shared with the LegDetector (dag/undo_journal.py)
+        self._undo_journal: Optional['UndoJournal'] = None
 
     def copy_state_from(self, other: 'ReferenceLayer') -> None:
         """
@@ -501,6 +507,78 @@ class ReferenceLayer:
         self._session_level_touches = other._session_level_touches.copy()
         self._last_price = other._last_price
         self._pending_cross_events = other._pending_cross_events.copy()
+        self._bin_distribution.journal = self._undo_journal
+
+    # ------------------------------------------------------------------
+    # Serialization (see reference_checkpoint.py)
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict:
+        """All accumulated state as a JSON-ready, schema-versioned dict."""
+        from .reference_checkpoint import reference_layer_to_dict
+        return reference_layer_to_dict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict, config: DetectionConfig = None) -> 'ReferenceLayer':
+        """Restore from to_dict(), checking config's fingerprint if given."""
+        from .reference_checkpoint import reference_layer_from_dict
+        return reference_layer_from_dict(data, config)
+
+    def to_bytes(self) -> bytes:
+        """Serialize to the binary reference layer checkpoint format."""
+        from .reference_checkpoint import encode_reference_layer
+        return encode_reference_layer(self)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, config: DetectionConfig = None) -> 'ReferenceLayer':
+        """Restore from to_bytes() (or JSON of to_dict()), checking config if given."""
+        from .reference_checkpoint import decode_reference_layer
+        return decode_reference_layer(data, config)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write a binary checkpoint to path."""
+        Path(path).write_bytes(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: Union[str, Path], config: DetectionConfig = None) -> 'ReferenceLayer':
+        """Read a checkpoint (or a JSON to_dict() dump) from path."""
+        return cls.from_bytes(Path(path).read_bytes(), config)
+
+    @property
+    def undo_journal(self) -> Optional['UndoJournal']:
+        """Undo journal recording formation and bin distribution changes, or None."""
+        return self._undo_journal
+
+    @undo_journal.setter
+    def undo_journal(self, journal: Optional['UndoJournal']) -> None:
+        self._undo_journal = journal
+        self._bin_distribution.journal = journal
+
+    def _set_formed(self, leg_id: str, formation: Tuple[Decimal, int]) -> None:
+        if self._undo_journal is not None:
+            self._undo_journal.record_reference(('formed', leg_id, self._formed_refs.get(leg_id)))
+        self._formed_refs[leg_id] = formation
+
+    def _drop_formed(self, leg_id: str) -> None:
+        formation = self._formed_refs.pop(leg_id, None)
+        if formation is not None and self._undo_journal is not None:
+            self._undo_journal.record_reference(('formed', leg_id, formation))
+
+    def _mark_seen(self, leg_id: str) -> None:
+        if self._undo_journal is not None:
+            self._undo_journal.record_reference(('seen', leg_id))
+        self._seen_leg_ids.add(leg_id)
+
+    def _undo(self, op: tuple) -> None:
+        """Revert one change recorded by _set_formed, _drop_formed or _mark_seen."""
+        if op[0] == 'seen':
+            self._seen_leg_ids.discard(op[1])
+            return
+        _, leg_id, formation = op
+        if formation is None:
+            self._formed_refs.pop(leg_id, None)
+        else:
+            self._formed_refs[leg_id] = formation
 
     def track_formation(self, legs: List[Leg], bar: Bar) -> None:
         """
@@ -797,7 +875,7 @@ class ReferenceLayer:
         # Check this BEFORE checking _formed_refs to prevent re-entry
         if self._is_completed(leg):
             # Ensure it's removed from _formed_refs if still there
-            self._formed_refs.pop(leg.leg_id, None)
+            self._drop_formed(leg.leg_id)
             return False
 
         # Check if previously formed
@@ -811,7 +889,7 @@ class ReferenceLayer:
             )
             if pivot_extended:
                 # Pivot extended - nullify formation, must re-form at new level
-                del self._formed_refs[leg.leg_id]
+                self._drop_formed(leg.leg_id)
             else:
                 # Pivot unchanged - still formed
                 return True
@@ -824,10 +902,10 @@ class ReferenceLayer:
         # This means location must be >= threshold
         if location >= threshold:
             # Store pivot price and bar index at formation (Issue #448, #451)
-            self._formed_refs[leg.leg_id] = (leg.pivot_price, bar_index)
+            self._set_formed(leg.leg_id, (leg.pivot_price, bar_index))
             # Add to bin distribution on first formation (#372, #439)
             if leg.leg_id not in self._seen_leg_ids:
-                self._seen_leg_ids.add(leg.leg_id)
+                self._mark_seen(leg.leg_id)
                 self._bin_distribution.add_leg(leg.leg_id, float(leg.range), timestamp)
             return True
 
@@ -869,24 +947,24 @@ class ReferenceLayer:
             # Small refs: pivot breach when location < -pivot_breach_tolerance
             pivot_tolerance = self.reference_config.pivot_breach_tolerance
             if location < -pivot_tolerance:
-                self._formed_refs.pop(leg.leg_id, None)
+                self._drop_formed(leg.leg_id)
                 return FilterReason.PIVOT_BREACHED
         else:
             # Significant refs (bin >= 8): two thresholds for pivot breach
             # Trade breach: invalidates if price TRADES beyond pivot by 15%
             if location < -self.reference_config.significant_trade_breach_tolerance:
-                self._formed_refs.pop(leg.leg_id, None)
+                self._drop_formed(leg.leg_id)
                 return FilterReason.PIVOT_BREACHED
             # Close breach: invalidates if price CLOSES beyond pivot by 10%
             if bar_close_location < -self.reference_config.significant_close_breach_tolerance:
-                self._formed_refs.pop(leg.leg_id, None)
+                self._drop_formed(leg.leg_id)
                 return FilterReason.PIVOT_BREACHED
 
         # Past completion (#467): Check both current location AND max_location
         # - location > threshold: current bar triggered completion (strict >)
         # - _is_completed: leg was completed on a previous bar (>= via max_location)
         if location > completion_threshold or self._is_completed(leg):
-            self._formed_refs.pop(leg.leg_id, None)
+            self._drop_formed(leg.leg_id)
             return FilterReason.COMPLETED
 
         return None
@@ -1833,7 +1911,7 @@ class ReferenceLayer:
             # Check completion FIRST (#467): If leg was ever completed, report COMPLETED
             # This catches both "completing this bar" and "was completed before"
             if self._is_completed(leg):
-                self._formed_refs.pop(leg.leg_id, None)
+                self._drop_formed(leg.leg_id)
                 results.append(FilteredLeg(
                     leg=leg,
                     reason=FilterReason.COMPLETED,
@@ -1859,7 +1937,7 @@ class ReferenceLayer:
                 # Small refs: pivot breach when location < -pivot_breach_tolerance
                 pivot_tolerance = self.reference_config.pivot_breach_tolerance
                 if breach_extreme_location < -pivot_tolerance:
-                    self._formed_refs.pop(leg.leg_id, None)
+                    self._drop_formed(leg.leg_id)
                     results.append(FilteredLeg(
                         leg=leg,
                         reason=FilterReason.PIVOT_BREACHED,
@@ -1873,7 +1951,7 @@ class ReferenceLayer:
                 trade_tolerance = self.reference_config.significant_trade_breach_tolerance
                 close_tolerance = self.reference_config.significant_close_breach_tolerance
                 if breach_extreme_location < -trade_tolerance:
-                    self._formed_refs.pop(leg.leg_id, None)
+                    self._drop_formed(leg.leg_id)
                     results.append(FilteredLeg(
                         leg=leg,
                         reason=FilterReason.PIVOT_BREACHED,
@@ -1883,7 +1961,7 @@ class ReferenceLayer:
                     ))
                     continue
                 if bar_close_location < -close_tolerance:
-                    self._formed_refs.pop(leg.leg_id, None)
+                    self._drop_formed(leg.leg_id)
                     results.append(FilteredLeg(
                         leg=leg,
                         reason=FilterReason.PIVOT_BREACHED,
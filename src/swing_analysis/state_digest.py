@@ -0,0 +1,268 @@
+"""
+Canonical digests of detector and reference layer state.
+
+Optimizations of LegDetector, LegPruner and ReferenceLayer must not change
+the structure they produce. The digests here reduce that structure to a
+SHA-256 hash every N bars. A run is checked against a stored golden file
+of digests, and two configs run side by side are compared digest by
+digest to find where they diverge:
+
+    detector    every active and archived leg in leg_id order, using the
+                DetectorState.to_dict() fields with prices normalized
+                (Decimal('100.50') == Decimal('100.5')), plus the
+                non-cache DetectorState fields
+    reference   bin distribution, formed refs, seen leg IDs and crossing
+                tracking
+
+Cache fields (cached thresholds, leading underscore) are left out: an
+optimized path may keep them differently. Session level touches and level
+cross events are left out too, since they carry wall-clock timestamps.
+
+find_divergence() runs two configs side by side and reports the first
+differing bar and, within it, the first differing leg and fields.
+
+Example:
+    >>> digests = run_digests(bars, DetectionConfig.default(), every=100)
+    >>> divergence = find_divergence(bars, config, config.with_max_turns(5))
+    >>> divergence is None
+    True
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .dag import DetectorState, Leg, LegDetector
+from .dag.checkpoint import DECIMAL_FIELDS
+from .detection_config import DetectionConfig
+from .reference_config import ReferenceConfig
+from .reference_layer import ReferenceLayer
+from .types import Bar
+
+# Bumped when the canonical form changes (golden files must be regenerated)
+DIGEST_VERSION = 1
+DEFAULT_EVERY = 100
+
+
+def canonical_price(value: Any) -> Optional[str]:
+    """Normalized decimal string of a price ('100.50' -> '100.5', '1E+2' -> '100')."""
+    if value is None:
+        return None
+    normalized = Decimal(str(value)).normalize()
+    return format(normalized + 0, 'f')  # + 0 turns -0 into 0
+
+
+def _hash(data: Any) -> str:
+    encoded = json.dumps(data, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def leg_record(leg) -> Dict[str, Any]:
+    """Canonical field dict of one leg."""
+    record = DetectorState._leg_to_dict(leg)
+    for name in DECIMAL_FIELDS:
+        if name in record:
+            record[name] = canonical_price(record[name])
+    return record
+
+
+def _state_record(state: DetectorState) -> Dict[str, Any]:
+    record = {
+        name: value for name, value in state._fields_to_dict().items()
+        if not name.startswith('_')
+    }
+    record["all_swing_ranges"] = [canonical_price(r) for r in record["all_swing_ranges"]]
+    if record["prev_bar"] is not None:
+        for name in ("open", "high", "low", "close"):
+            record["prev_bar"][name] = canonical_price(record["prev_bar"][name])
+    for origin in record["pending_origins"].values():
+        if origin is not None:
+            origin["price"] = canonical_price(origin["price"])
+    return record
+
+
+def _reference_record(ref_layer: ReferenceLayer) -> Dict[str, Any]:
+    distribution = ref_layer._bin_distribution
+    return {
+        "window": [list(item) for item in distribution.window],
+        "leg_ranges": dict(distribution.leg_ranges),
+        "bin_counts": list(distribution.bin_counts),
+        "median": distribution.median,
+        "legs_since_recompute": distribution.legs_since_recompute,
+        "formed_refs": {
+            leg_id: [canonical_price(pivot_price), bar_index]
+            for leg_id, (pivot_price, bar_index) in ref_layer._formed_refs.items()
+        },
+        "seen_leg_ids": sorted(ref_layer._seen_leg_ids),
+        "tracked_for_crossing": sorted(ref_layer._tracked_for_crossing),
+        "last_level": ref_layer._last_level,
+    }
+
+
+def _all_legs(state: DetectorState) -> List[Leg]:
+    # The cold archive (long-horizon mode) is part of the structure
+    return list(state.active_legs) + list(state.archived_legs)
+
+
+def leg_digests(state: DetectorState) -> Dict[str, str]:
+    """leg_id -> digest of the leg's canonical record."""
+    return {leg.leg_id: _hash(leg_record(leg)) for leg in _all_legs(state)}
+
+
+def detector_digest(state: DetectorState) -> str:
+    """Digest of the detector state (legs in leg_id order plus state fields)."""
+    legs = leg_digests(state)
+    return _hash([_state_record(state), sorted(legs.items())])
+
+
+def reference_digest(ref_layer: ReferenceLayer) -> str:
+    """Digest of the reference layer's accumulated state."""
+    return _hash(_reference_record(ref_layer))
+
+
+def state_digest(state: DetectorState, ref_layer: Optional[ReferenceLayer] = None) -> str:
+    """Combined digest of the detector state and (optionally) reference layer."""
+    parts = [DIGEST_VERSION, detector_digest(state)]
+    if ref_layer is not None:
+        parts.append(reference_digest(ref_layer))
+    return _hash(parts)
+
+
+class _Session:
+    """Detector and reference layer advanced one bar at a time."""
+
+    def __init__(self, config: DetectionConfig, reference_config: Optional[ReferenceConfig]):
+        self.detector = LegDetector(config)
+        self.ref_layer = ReferenceLayer(config, reference_config=reference_config)
+
+    def process(self, bar: Bar) -> None:
+        self.detector.process_bar(bar)
+        self.ref_layer.update(self.detector.state.active_legs, bar, build_response=False)
+
+    def digest(self) -> str:
+        return state_digest(self.detector.state, self.ref_layer)
+
+
+def run_digests(
+    bars: Sequence[Bar],
+    config: DetectionConfig,
+    reference_config: Optional[ReferenceConfig] = None,
+    every: int = DEFAULT_EVERY,
+) -> Dict[int, str]:
+    """
+    Process bars and digest the state after every `every`-th bar.
+
+    Returns:
+        bar_index -> state_digest() after that bar, for bar indices
+        every - 1, 2 * every - 1, ... and the last bar.
+    """
+    if every < 1:
+        raise ValueError(f"Digest interval must be >= 1, got {every}")
+    session = _Session(config, reference_config)
+    digests = {}
+    for position, bar in enumerate(bars):
+        session.process(bar)
+        if (position + 1) % every == 0 or position == len(bars) - 1:
+            digests[bar.index] = session.digest()
+    return digests
+
+
+@dataclass
+class Divergence:
+    """First difference between two runs."""
+    bar_index: int
+    component: str  # 'detector' or 'reference'
+    leg_id: Optional[str] = None
+    # field -> (value in a, value in b) for leg_id, or for the state fields
+    fields: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+    only_in_a: List[str] = field(default_factory=list)
+    only_in_b: List[str] = field(default_factory=list)
+
+    def describe(self) -> str:
+        """Human-readable report."""
+        lines = [f"First divergence after bar {self.bar_index} ({self.component})"]
+        if self.only_in_a:
+            lines.append(f"  legs only in a: {', '.join(self.only_in_a)}")
+        if self.only_in_b:
+            lines.append(f"  legs only in b: {', '.join(self.only_in_b)}")
+        if self.leg_id is not None:
+            lines.append(f"  first differing leg: {self.leg_id}")
+        for name, (a, b) in sorted(self.fields.items()):
+            lines.append(f"    {name}: {a!r} != {b!r}")
+        return "\n".join(lines)
+
+
+def _diff(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Tuple[Any, Any]]:
+    return {
+        name: (a.get(name), b.get(name))
+        for name in sorted(a.keys() | b.keys())
+        if a.get(name) != b.get(name)
+    }
+
+
+def _explain(bar_index: int, a: _Session, b: _Session) -> Divergence:
+    state_a, state_b = a.detector.state, b.detector.state
+    if detector_digest(state_a) != detector_digest(state_b):
+        legs_a = {leg.leg_id: leg for leg in _all_legs(state_a)}
+        legs_b = {leg.leg_id: leg for leg in _all_legs(state_b)}
+        divergence = Divergence(
+            bar_index, 'detector',
+            only_in_a=sorted(legs_a.keys() - legs_b.keys()),
+            only_in_b=sorted(legs_b.keys() - legs_a.keys()),
+        )
+        for leg_id in sorted(legs_a.keys() & legs_b.keys()):
+            fields_diff = _diff(leg_record(legs_a[leg_id]), leg_record(legs_b[leg_id]))
+            if fields_diff:
+                divergence.leg_id = leg_id
+                divergence.fields = fields_diff
+                break
+        if divergence.leg_id is None and not divergence.only_in_a and not divergence.only_in_b:
+            divergence.fields = _diff(_state_record(state_a), _state_record(state_b))
+        return divergence
+    return Divergence(
+        bar_index, 'reference',
+        fields=_diff(_reference_record(a.ref_layer), _reference_record(b.ref_layer)),
+    )
+
+
+def find_divergence(
+    bars: Sequence[Bar],
+    config_a: DetectionConfig,
+    config_b: DetectionConfig,
+    reference_config: Optional[ReferenceConfig] = None,
+    every: int = DEFAULT_EVERY,
+) -> Optional[Divergence]:
+    """
+    Run two configs over bars and locate the first bar where state differs.
+
+    Digests are compared every `every` bars; on a mismatch both runs are
+    replayed up to the previous matching sample and compared bar by bar.
+
+    Returns:
+        The first divergence, or None if the runs agree on every bar.
+    """
+    if every < 1:
+        raise ValueError(f"Digest interval must be >= 1, got {every}")
+    a = _Session(config_a, reference_config)
+    b = _Session(config_b, reference_config)
+    matched = 0  # bars known to agree
+    for position, bar in enumerate(bars):
+        a.process(bar)
+        b.process(bar)
+        if (position + 1) % every and position != len(bars) - 1:
+            continue
+        if a.digest() == b.digest():
+            matched = position + 1
+            continue
+
+        # Narrow down within the last interval
+        a = _Session(config_a, reference_config)
+        b = _Session(config_b, reference_config)
+        for replay_position, replay_bar in enumerate(bars[:position + 1]):
+            a.process(replay_bar)
+            b.process(replay_bar)
+            if replay_position >= matched and a.digest() != b.digest():
+                return _explain(replay_bar.index, a, b)
+    return None
@@ -2,10 +2,38 @@
 Shared test fixtures and helpers for swing analysis tests.
 """
 
+import os
+
 import pytest
+from src.data.bar_cache import configure_bar_cache
+from src.data.file_index import configure_file_index
+from src.data.row_index import configure_row_index
 from src.swing_analysis.types import Bar
 
 
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: long-running scale test (deselect with -m 'not slow')")
+
+
+@pytest.fixture(autouse=True, scope="session")
+def test_cache_dir(tmp_path_factory):
+    """Keep the on-disk caches in a temporary directory for the whole run."""
+    directory = tmp_path_factory.mktemp("cache")
+    previous = os.environ.get("FRACTAL_CACHE_DIR")
+    os.environ["FRACTAL_CACHE_DIR"] = str(directory)
+    configure_bar_cache(directory / "bar_cache")
+    configure_row_index(directory / "row_index")
+    configure_file_index(directory / "file_index.json", background=False)
+    yield directory
+    configure_bar_cache(None)
+    configure_row_index(None)
+    configure_file_index(None)
+    if previous is None:
+        del os.environ["FRACTAL_CACHE_DIR"]
+    else:
+        os.environ["FRACTAL_CACHE_DIR"] = previous
+
+
 def make_bar(
     index: int,
     open_: float,
@@ -0,0 +1,178 @@
+"""
+Tests for the on-disk bar cache behind load_ohlc() (src/data/bar_cache.py).
+
+Cached loads must return exactly what parsing the CSV returns, and any
+change to the file must invalidate the entry.
+"""
+
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.data import bar_cache, ohlc_loader
+from src.data.bar_cache import BarCache, configure_bar_cache, get_bar_cache
+from src.data.ohlc_loader import load_ohlc, load_ohlc_window
+
+DEMO_FILE = Path(__file__).parent.parent / "test_data" / "es-30m-demo.csv"
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    """Point the bar cache at a temporary directory for one test."""
+    previous = get_bar_cache()
+    directory = tmp_path / "bar_cache"
+    configure_bar_cache(directory)
+    yield directory
+    bar_cache._bar_cache = previous
+
+
+@pytest.fixture
+def demo_copy(tmp_path, monkeypatch):
+    """First 2000 rows of the demo file, cached despite their size."""
+    monkeypatch.setattr(ohlc_loader, "MIN_CACHED_FILE_BYTES", 0)
+    path = tmp_path / "demo.csv"
+    with open(DEMO_FILE) as f:
+        path.write_text("".join(f.readlines()[:2000]))
+    return str(path)
+
+
+def _assert_same(loaded, expected):
+    pd.testing.assert_frame_equal(loaded[0], expected[0])
+    assert loaded[1] == expected[1]
+
+
+class TestCachedLoads:
+    """Cache hits return the same bars and gaps as parsing."""
+
+    def test_full_load(self, cache_dir, demo_copy):
+        expected = load_ohlc(demo_copy, use_cache=False)
+        first = load_ohlc(demo_copy)
+        assert (BarCache(cache_dir).entry_dir(demo_copy) / "meta.json").exists()
+        second = load_ohlc(demo_copy)
+
+        _assert_same(first, expected)
+        _assert_same(second, expected)
+        assert get_bar_cache().get(demo_copy) is not None
+
+    @pytest.mark.parametrize("start_row,num_rows", [(0, 200), (500, 1000), (1900, 500)])
+    def test_window(self, cache_dir, demo_copy, start_row, num_rows):
+        load_ohlc(demo_copy)
+        _assert_same(
+            load_ohlc_window(demo_copy, start_row, num_rows),
+            load_ohlc_window(demo_copy, start_row, num_rows, use_cache=False),
+        )
+
+    def test_unsorted_duplicate_and_invalid_rows(self, cache_dir, tmp_path, monkeypatch):
+        monkeypatch.setattr(ohlc_loader, "MIN_CACHED_FILE_BYTES", 0)
+        path = tmp_path / "messy.csv"
+        path.write_text(
+            "01/04/2007;18:02:00;100;110;90;105;100\n"
+            "01/04/2007;18:00:00;100;110;90;105;100\n"
+            "01/04/2007;18:01:00;101;111;91;106;100\n"
+            "01/04/2007;18:00:00;102;112;92;107;100\n"
+            + "".join(f"02/04/2007;{h:02d}:{m:02d};100;110;90;105;100\n" for h in range(9, 12) for m in range(60))
+            + "02/04/2007;12:00:00;100;90;95;100;100\n"
+        )
+        expected = load_ohlc(str(path), use_cache=False)
+        load_ohlc(str(path))
+
+        cached = get_bar_cache().get(str(path))
+        assert cached is not None and cached.order is not None
+        assert cached.duplicates_removed == 1 and cached.invalid_dropped == 1
+        _assert_same(load_ohlc(str(path)), expected)
+        _assert_same(load_ohlc_window(str(path), 1, 5), load_ohlc_window(str(path), 1, 5, use_cache=False))
+
+    def test_small_files_not_cached(self, cache_dir, tmp_path):
+        path = tmp_path / "small.csv"
+        path.write_text("01/04/2007;18:00:00;100;110;90;105;100\n")
+        load_ohlc(str(path))
+        assert not cache_dir.exists()
+
+
+class TestInvalidation:
+    """Entries follow the data file."""
+
+    def test_changed_file_is_reparsed(self, cache_dir, demo_copy):
+        load_ohlc(demo_copy)
+        with open(demo_copy, "a") as f:
+            f.write("31/12/2030;10:00:00;100;110;90;105;100\n")
+
+        assert get_bar_cache().get(demo_copy) is None
+        df, _ = load_ohlc(demo_copy)
+        assert df.index[-1] == pd.Timestamp("2030-12-31 10:00", tz="UTC")
+        assert get_bar_cache().get(demo_copy) is not None
+
+    def test_same_size_edit_is_detected(self, cache_dir, demo_copy):
+        load_ohlc(demo_copy)
+        data = Path(demo_copy).read_bytes()
+        Path(demo_copy).write_bytes(data.replace(b";2508.0;", b";2509.0;", 1))
+
+        assert get_bar_cache().get(demo_copy) is None
+        assert load_ohlc(demo_copy)[0].iloc[0]["open"] == 2509.0
+
+    def test_touched_file_stays_cached(self, cache_dir, demo_copy):
+        load_ohlc(demo_copy)
+        stat = os.stat(demo_copy)
+        os.utime(demo_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert get_bar_cache().get(demo_copy) is not None
+
+    def test_invalidate(self, cache_dir, demo_copy):
+        load_ohlc(demo_copy)
+        get_bar_cache().invalidate(demo_copy)
+        assert get_bar_cache().get(demo_copy) is None
+
+
+class TestDisabling:
+    """The cache can be switched off."""
+
+    def test_use_cache_false(self, cache_dir, demo_copy):
+        load_ohlc(demo_copy, use_cache=False)
+        assert not cache_dir.exists()
+
+    def test_configure_none(self, cache_dir, demo_copy):
+        configure_bar_cache(None)
+        assert get_bar_cache() is None
+        df, _ = load_ohlc(demo_copy)
+        assert len(df) > 0
+        assert not cache_dir.exists()
+
+
+class TestEviction:
+    """Entries beyond the disk budget are evicted least recently used first."""
+
+    def _copies(self, tmp_path, demo_copy, count):
+        paths = []
+        for i in range(count):
+            path = tmp_path / f"copy-{i}.csv"
+            path.write_bytes(Path(demo_copy).read_bytes())
+            paths.append(str(path))
+        return paths
+
+    def test_least_recently_used_first(self, cache_dir, tmp_path, demo_copy):
+        load_ohlc(demo_copy)
+        entry_bytes = get_bar_cache().nbytes
+        configure_bar_cache(cache_dir, disk_budget_bytes=int(entry_bytes * 2.5))
+        first, second, third = self._copies(tmp_path, demo_copy, 3)
+        get_bar_cache().invalidate(demo_copy)
+
+        load_ohlc(first)
+        load_ohlc(second)
+        assert get_bar_cache().get(first) is not None
+        load_ohlc(third)
+
+        cache = get_bar_cache()
+        assert cache.get(second) is None
+        assert cache.get(first) is not None and cache.get(third) is not None
+        assert cache.nbytes <= cache.disk_budget_bytes
+
+    def test_newest_entry_kept_over_budget(self, cache_dir, demo_copy):
+        configure_bar_cache(cache_dir, disk_budget_bytes=1)
+        load_ohlc(demo_copy)
+        assert get_bar_cache().get(demo_copy) is not None
+
+    def test_zero_budget_disables(self, cache_dir):
+        configure_bar_cache(cache_dir, disk_budget_bytes=0)
+        assert get_bar_cache() is None
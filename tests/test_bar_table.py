@@ -0,0 +1,223 @@
+"""
+Tests for the array-backed bar table behind session loads (src/data/bar_table.py).
+
+The table must answer resolution, metrics and start offsets the way the
+separate loads did, and /api/session/restart must either seek to its window
+through the row index or parse the file once.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from src.data import bar_table, row_index
+from src.data.bar_table import BarTable, load_bar_table, load_bar_window
+from src.data.ohlc_loader import load_ohlc
+from src.data.row_index import configure_row_index, get_row_index
+from src.replay_server import api
+from src.replay_server.api import app, init_app
+from src.swing_analysis.dag.batch import ohlc_arrays
+
+DEMO_FILE = Path(__file__).parent.parent / "test_data" / "es-30m-demo.csv"
+
+
+@pytest.fixture
+def demo_copy(tmp_path):
+    """First 1500 rows of the demo file."""
+    path = tmp_path / "es-30m-demo.csv"
+    with open(DEMO_FILE) as f:
+        path.write_text("".join(f.readlines()[:1500]))
+    return str(path)
+
+
+@pytest.fixture
+def duplicates_copy(tmp_path):
+    """First 1500 rows of the demo file with rows 100-119 repeated after row 300."""
+    path = tmp_path / "es-30m-dupes.csv"
+    with open(DEMO_FILE) as f:
+        lines = f.readlines()[:1500]
+    path.write_text("".join(lines[:300] + lines[100:120] + lines[300:]))
+    return str(path)
+
+
+@pytest.fixture
+def count_loads(monkeypatch):
+    """Count load_ohlc() calls made through the bar table."""
+    calls = []
+
+    def counted(path, use_cache=True):
+        calls.append(path)
+        return load_ohlc(path, use_cache=use_cache)
+
+    monkeypatch.setattr(bar_table, "load_ohlc", counted)
+    return calls
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    """Point the row index at a temporary directory."""
+    previous = get_row_index()
+    directory = tmp_path / "row_index"
+    configure_row_index(directory)
+    yield directory
+    row_index._row_index = previous
+
+
+@pytest.fixture
+def no_index():
+    """Disable the row index."""
+    previous = get_row_index()
+    configure_row_index(None)
+    yield
+    row_index._row_index = previous
+
+
+def _frame(minutes):
+    """Flat bars at the given minute offsets."""
+    index = pd.DatetimeIndex([pd.Timestamp("2024-01-02", tz="UTC") + pd.Timedelta(minutes=m) for m in minutes])
+    df = pd.DataFrame({c: [1.0] * len(index) for c in ("open", "high", "low", "close")}, index=index)
+    df["volume"] = 0
+    return df
+
+
+def _restart(data_file, start):
+    response = TestClient(app).post(
+        "/api/session/restart",
+        json={"data_file": data_file, "start_date": start.tz_localize(None).isoformat()},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestBarTable:
+    """The table reproduces load_ohlc() and the lookups built on it."""
+
+    def test_matches_load_ohlc(self, demo_copy):
+        df, gaps = load_ohlc(demo_copy, use_cache=False)
+        table = load_bar_table(demo_copy, use_cache=False)
+
+        assert len(table) == len(df)
+        assert table.gaps == gaps
+        for expected, actual in zip(ohlc_arrays(df.iloc[100:400]), table.arrays(100, 400)):
+            np.testing.assert_array_equal(actual, expected)
+
+    def test_resolution(self, demo_copy):
+        # The demo file is hourly despite its name
+        assert load_bar_table(demo_copy).resolution_minutes() == 60
+
+    @pytest.mark.parametrize("spacing,expected", [(1, 1), (4, 5), (45, 30), (120, 60), (1440, 1440)])
+    def test_resolution_snaps(self, spacing, expected):
+        df = _frame([spacing * i for i in range(3)])
+        assert BarTable.from_frame("x.csv", df).resolution_minutes() == expected
+
+    def test_resolution_ignores_gaps(self):
+        # Missing second bar and a session gap: the median spacing still wins
+        df = _frame([0, 30, 45, 60, 75, 90, 1000, 1015, 1030])
+        assert BarTable.from_frame("x.csv", df).resolution_minutes() == 15
+
+    def test_metrics(self, demo_copy):
+        df, _ = load_ohlc(demo_copy, use_cache=False)
+        metrics = load_bar_table(demo_copy).metrics()
+
+        assert metrics.total_bars == len(df)
+        assert metrics.format == "format_a"
+        assert metrics.first_timestamp == df.index[0].tz_localize(None).to_pydatetime()
+        assert metrics.last_timestamp == df.index[-1].tz_localize(None).to_pydatetime()
+
+    def test_row_at_or_after(self, demo_copy):
+        df, _ = load_ohlc(demo_copy, use_cache=False)
+        table = load_bar_table(demo_copy)
+
+        for row in (0, 1, 700, len(df) - 1):
+            assert table.row_at_or_after(df.index[row]) == row
+            assert table.row_at_or_after(df.index[row] - pd.Timedelta(minutes=1)) == row
+        assert table.row_at_or_after(df.index[700].tz_localize(None)) == 700
+        assert table.row_at_or_after(df.index[-1] + pd.Timedelta(minutes=1)) is None
+
+
+class TestBarWindow:
+    """Window tables hold the file rows from the start timestamp on."""
+
+    def test_matches_full_table(self, index_dir, demo_copy):
+        full = load_bar_table(demo_copy, use_cache=False)
+        start = pd.Timestamp(int(full.timestamps[700]), tz="UTC")
+        window = load_bar_window(demo_copy, start, 400)
+
+        assert window.first_row == 700 and len(window) == 400
+        assert window.total_bars == len(full)
+        assert window.row_at_or_after(start) == 700
+        for expected, actual in zip(full.arrays(750, 1100), window.arrays(750, 1100)):
+            np.testing.assert_array_equal(actual, expected)
+        with pytest.raises(ValueError):
+            window.arrays(699, 800)
+
+    def test_after_last_bar(self, index_dir, demo_copy):
+        window = load_bar_window(demo_copy, pd.Timestamp("2099-01-01"), 400)
+        assert len(window) == 0 and window.first_row == window.total_bars
+        assert window.row_at_or_after(pd.Timestamp("2099-01-01")) is None
+
+    def test_without_index(self, no_index, demo_copy):
+        assert load_bar_window(demo_copy, None, 400) is None
+
+
+class TestSessionLoads:
+    """Sessions start from a seek or one parse of the file."""
+
+    def test_init_app_matches_dataframe_path(self, demo_copy):
+        df, _ = load_ohlc(demo_copy, use_cache=False)
+        init_app(demo_copy, 30, window_size=400, window_offset=250, cached_df=df)
+        expected = api.state.source_arrays
+
+        init_app(demo_copy, 30, window_size=400, window_offset=250, bar_table=load_bar_table(demo_copy))
+        assert api.state.total_source_bars == len(df)
+        assert len(api.state.source_bars) == 800
+        for expected_column, column in zip(expected, api.state.source_arrays):
+            np.testing.assert_array_equal(column, expected_column)
+
+    def test_restart_seeks_window(self, index_dir, demo_copy, count_loads):
+        df, _ = load_ohlc(demo_copy, use_cache=False)
+        body = _restart(demo_copy, df.index[600])
+
+        assert body["window_offset"] == 600
+        assert body["resolution"] == "1h"
+        assert body["total_source_bars"] == len(df)
+        assert count_loads == []
+        assert len(api.state.source_bars) == len(df) - 600
+        assert api.state.source_bars[0].timestamp == int(df.index[600].timestamp())
+
+    def test_restart_parses_once(self, no_index, demo_copy, count_loads):
+        df, _ = load_ohlc(demo_copy, use_cache=False)
+        body = _restart(demo_copy, df.index[600])
+
+        assert body["window_offset"] == 600
+        assert body["resolution"] == "1h"
+        assert body["total_source_bars"] == len(df)
+        assert count_loads == [demo_copy]
+        assert api.state.source_bars[0].timestamp == int(df.index[600].timestamp())
+
+    def test_restart_with_duplicate_rows(self, index_dir, duplicates_copy):
+        # File rows are not load_ohlc() rows here, so the index must not be
+        # used to seek: both restarts report load_ohlc() offsets and counts
+        df, _ = load_ohlc(duplicates_copy, use_cache=False)
+        indexed = _restart(duplicates_copy, df.index[600])
+        assert get_row_index().get(duplicates_copy).clean is False
+
+        configure_row_index(None)
+        parsed = _restart(duplicates_copy, df.index[600])
+
+        assert indexed["window_offset"] == parsed["window_offset"] == 600
+        assert indexed["total_source_bars"] == parsed["total_source_bars"] == len(df)
+        assert api.state.source_bars[0].timestamp == int(df.index[600].timestamp())
+
+    @pytest.mark.parametrize("fixture", ["index_dir", "no_index"])
+    def test_restart_after_last_bar(self, request, demo_copy, fixture):
+        request.getfixturevalue(fixture)
+        response = TestClient(app).post(
+            "/api/session/restart",
+            json={"data_file": demo_copy, "start_date": "2099-01-01"},
+        )
+        assert response.status_code == 400
+        assert "No data found" in response.json()["detail"]
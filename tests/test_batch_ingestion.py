@@ -0,0 +1,135 @@
+"""
+Tests for batch ingestion via LegDetector.process_bars().
+
+process_bars() over OHLC arrays must be equivalent to a process_bar() loop
+over Bar objects built from the same data.
+"""
+
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.data.ohlc_loader import load_ohlc
+from src.swing_analysis.dag import EventBuffer, LegDetector, bars_from_arrays, iter_bars, ohlc_arrays
+from src.swing_analysis.dag import batch
+from src.swing_analysis.types import Bar
+
+DEMO_FILE = Path(__file__).parent.parent / "test_data" / "es-30m-demo.csv"
+
+
+@pytest.fixture(scope="module")
+def demo_arrays():
+    """OHLC arrays for the first 1500 bars of the ES 30m demo file."""
+    df, _ = load_ohlc(str(DEMO_FILE))
+    return ohlc_arrays(df.head(1500))
+
+
+def _row_bars(df):
+    """Reference per-row Bar construction (the old iterrows path)."""
+    return [
+        Bar(
+            index=idx,
+            timestamp=int(timestamp.timestamp()),
+            open=float(row['open']),
+            high=float(row['high']),
+            low=float(row['low']),
+            close=float(row['close']),
+        )
+        for idx, (timestamp, row) in enumerate(df.iterrows())
+    ]
+
+
+class TestArrays:
+    """Test array extraction and Bar construction."""
+
+    def test_bars_match_row_conversion(self):
+        df, _ = load_ohlc(str(DEMO_FILE))
+        df = df.head(200)
+        assert bars_from_arrays(*ohlc_arrays(df)) == _row_bars(df)
+
+    def test_start_index(self, demo_arrays):
+        bars = bars_from_arrays(*(column[10:20] for column in demo_arrays), start_index=10)
+        assert [bar.index for bar in bars] == list(range(10, 20))
+
+    def test_datetime64_timestamps(self, demo_arrays):
+        timestamps = demo_arrays[0][:5].astype('datetime64[s]')
+        bars = bars_from_arrays(timestamps, *(column[:5] for column in demo_arrays[1:]))
+        assert [bar.timestamp for bar in bars] == demo_arrays[0][:5].tolist()
+
+    def test_length_mismatch_rejected(self):
+        with pytest.raises(ValueError):
+            bars_from_arrays(np.arange(3), np.ones(3), np.ones(3), np.ones(2), np.ones(3))
+        with pytest.raises(ValueError):
+            iter_bars(np.arange(3), np.ones(3), np.ones(3), np.ones(2), np.ones(3))
+
+    def test_iter_bars_across_chunks(self, demo_arrays, monkeypatch):
+        monkeypatch.setattr(batch, "_CHUNK_ROWS", 64)
+        bars = iter_bars(*demo_arrays, start_index=5)
+
+        assert next(bars) == Bar(5, int(demo_arrays[0][0]), *(float(c[0]) for c in demo_arrays[1:]))
+        assert [next(bars), *bars] == bars_from_arrays(*demo_arrays, start_index=5)[1:]
+
+
+class TestProcessBars:
+    """process_bars() must match the process_bar() loop exactly."""
+
+    def test_parity_with_process_bar(self, demo_arrays):
+        reference = LegDetector()
+        expected = []
+        for bar in bars_from_arrays(*demo_arrays):
+            expected.extend(reference.process_bar(bar))
+
+        detector = LegDetector()
+        buffer = detector.process_bars(*demo_arrays)
+
+        assert [repr(e) for e in buffer] == [repr(e) for e in expected]
+        assert detector.state.to_dict() == reference.state.to_dict()
+        assert buffer.bars_processed == len(demo_arrays[0])
+
+    def test_chunked_equals_single_run(self, demo_arrays):
+        single = LegDetector()
+        single.process_bars(*demo_arrays)
+
+        chunked = LegDetector()
+        for start in range(0, 1500, 400):
+            chunked.process_bars(
+                *(column[start:start + 400] for column in demo_arrays),
+                start_index=start,
+            )
+
+        assert chunked.state.to_dict() == single.state.to_dict()
+
+    def test_callback_per_bar(self, demo_arrays):
+        calls = []
+        detector = LegDetector()
+        buffer = detector.process_bars(
+            *(column[:300] for column in demo_arrays),
+            on_bar=lambda bar, events: calls.append((bar.index, list(events))),
+        )
+
+        assert [index for index, _ in calls] == list(range(300))
+        for index, events in calls:
+            assert buffer.for_bar(index) == events
+
+    def test_by_bar_groups_events(self, demo_arrays):
+        buffer = LegDetector().process_bars(*(column[:300] for column in demo_arrays))
+        grouped = list(buffer.by_bar())
+
+        assert [e for _, events in grouped for e in events] == list(buffer)
+        assert all(events for _, events in grouped)
+        assert [index for index, _ in grouped] == sorted({index for index, _ in grouped})
+
+    def test_event_timestamps(self, demo_arrays):
+        buffer = LegDetector().process_bars(*(column[:300] for column in demo_arrays))
+
+        assert len(buffer)
+        for event, bar_index in zip(buffer, buffer.bar_indices):
+            assert event.timestamp == datetime.fromtimestamp(int(demo_arrays[0][bar_index]))
+
+    def test_empty_arrays(self):
+        buffer = LegDetector().process_bars([], [], [], [], [])
+        assert isinstance(buffer, EventBuffer)
+        assert len(buffer) == 0
+        assert list(buffer.by_bar()) == []
@@ -0,0 +1,169 @@
+"""
+Tests for config-fork branches (services/branches.py).
+
+A branch forked at bar k must hold the same legs as a detector restored
+from bar k's state and run on with the branch config, and must follow the
+session through advances and rewinds.
+"""
+
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.data.ohlc_loader import load_ohlc
+from src.replay_server.api import app, init_app
+from src.replay_server.services.branches import diff_legs
+from src.replay_server.routers.cache import get_branches, get_replay_cache, reset_replay_cache
+from src.swing_analysis.dag import DetectorState, LegDetector
+from src.swing_analysis.detection_config import DetectionConfig
+
+from helpers import dataframe_to_bars
+
+DEMO_FILE = Path(__file__).parent.parent / "test_data" / "es-30m-demo.csv"
+FORK_BAR = 149
+
+
+@pytest.fixture(scope="module")
+def demo_df():
+    """First 800 bars of the ES 30m demo file."""
+    df, _ = load_ohlc(str(DEMO_FILE))
+    return df.head(800)
+
+
+@pytest.fixture
+def client(demo_df):
+    """Client for a 600-bar session of the demo file."""
+    reset_replay_cache()
+    init_app(
+        data_file=str(DEMO_FILE),
+        resolution_minutes=30,
+        window_size=600,
+        target_bars=200,
+        window_offset=0,
+        cached_df=demo_df,
+        mode="dag",
+    )
+    with TestClient(app) as client:
+        client.post("/api/dag/init")
+        yield client
+    reset_replay_cache()
+
+
+def _advance(client, current, count):
+    response = client.post("/api/dag/advance", json={
+        "current_bar_index": current,
+        "advance_by": count,
+    })
+    assert response.status_code == 200
+
+
+def _fork(client, name="tight", max_turns=1):
+    return client.post("/api/dag/branches", json={"name": name, "max_turns": max_turns})
+
+
+def _fork_state():
+    detector = get_replay_cache()["detector"]
+    return detector.state.to_bytes(detector.config)
+
+
+def _expected_leg_ids(demo_df, fork_state, config, end_bar):
+    """Leg IDs of a detector restored at FORK_BAR and run to end_bar with config."""
+    source_config = DetectionConfig.default()
+    state = DetectorState.from_bytes(fork_state, source_config)
+    detector = LegDetector.from_state(state, source_config)
+    detector.update_config(config)
+    for bar in dataframe_to_bars(demo_df)[FORK_BAR + 1:end_bar + 1]:
+        detector.process_bar(bar)
+    return sorted(leg.leg_id for leg in detector.state.active_legs)
+
+
+class TestBranchEndpoints:
+    """Test forking, following and diffing branches."""
+
+    def test_branch_follows_session(self, client, demo_df):
+        _advance(client, -1, FORK_BAR + 1)
+        fork_state = _fork_state()
+        response = _fork(client)
+        assert response.status_code == 200
+        assert response.json()["fork_bar"] == FORK_BAR
+        assert response.json()["config"]["max_turns"] == 1
+
+        _advance(client, FORK_BAR, 200)
+        branch = get_branches().get("tight")
+        branch.sync()
+
+        assert branch.target_index == FORK_BAR + 200
+        assert sorted(leg.leg_id for leg in branch.legs) == _expected_leg_ids(
+            demo_df, fork_state, DetectionConfig.default().with_max_turns(1), FORK_BAR + 200,
+        )
+        # The session keeps its own config
+        assert get_replay_cache()["detector"].config.max_turns != 1
+
+    def test_diff_reports_one_sided_legs(self, client):
+        _advance(client, -1, FORK_BAR + 1)
+        _fork(client)
+        _advance(client, FORK_BAR, 300)
+
+        response = client.get("/api/dag/branches/tight/diff")
+        assert response.status_code == 200
+        data = response.json()
+
+        main_legs = get_replay_cache()["detector"].state.active_legs
+        branch_legs = get_branches().get("tight").legs
+        only_main, only_branch = diff_legs(main_legs, branch_legs)
+        assert [leg["leg_id"] for leg in data["only_in_main"]] == [leg.leg_id for leg in only_main]
+        assert [leg["leg_id"] for leg in data["only_in_branch"]] == [leg.leg_id for leg in only_branch]
+        assert data["main_active_legs"] == len(main_legs)
+        assert data["branch_active_legs"] == len(branch_legs)
+        assert only_main or only_branch
+
+    def test_rewind_rebuilds_or_drops_branch(self, client, demo_df):
+        _advance(client, -1, FORK_BAR + 1)
+        fork_state = _fork_state()
+        _fork(client)
+        _advance(client, FORK_BAR, 300)
+
+        client.post("/api/dag/seek?bar_index=250")
+        branch = get_branches().get("tight")
+        branch.sync()
+        assert branch.target_index == 250
+        assert sorted(leg.leg_id for leg in branch.legs) == _expected_leg_ids(
+            demo_df, fork_state, DetectionConfig.default().with_max_turns(1), 250,
+        )
+
+        client.post(f"/api/dag/seek?bar_index={FORK_BAR - 10}")
+        assert get_branches().get("tight") is None
+        assert client.get("/api/dag/branches").json()["branches"] == []
+
+    def test_duplicate_and_missing_names(self, client):
+        assert _fork(client).status_code == 200
+        assert _fork(client).status_code == 400
+        assert client.get("/api/dag/branches/other/diff").status_code == 404
+        assert client.delete("/api/dag/branches/tight").status_code == 200
+        assert client.delete("/api/dag/branches/tight").status_code == 404
+
+    def test_wait_leaves_event_loop_free(self, client):
+        _fork(client)
+        branch = get_branches().get("tight")
+        release = threading.Event()
+        branch._process = lambda arrays, start_index: release.wait(5)
+        branch.move_to(branch.fork_bar + 10, lambda start, end: None)
+
+        async def scenario():
+            waiting = asyncio.ensure_future(branch.wait())
+            await asyncio.sleep(0)
+            # The loop still runs other work while the branch is busy
+            assert not waiting.done()
+            release.set()
+            await waiting
+
+        # A private loop: asyncio.run() would unset the thread's event loop
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(scenario())
+        finally:
+            loop.close()
+        assert branch.target_index == branch.fork_bar + 10
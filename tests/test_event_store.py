@@ -0,0 +1,123 @@
+"""
+Tests for the indexed lifecycle event store (services/event_store.py).
+"""
+
+import pytest
+
+from src.replay_server.services.event_store import LifecycleEventStore
+from src.replay_server.schemas import LifecycleEvent
+
+
+def _event(leg_id, bar_index, event_type="formed", direction="bull"):
+    return LifecycleEvent(
+        leg_id=leg_id, direction=direction, event_type=event_type,
+        bar_index=bar_index, csv_index=1000 + bar_index,
+        timestamp=f"2020-01-01T00:{bar_index:02d}:00",
+        explanation=f"{event_type} at {bar_index}",
+    )
+
+
+@pytest.fixture
+def events():
+    """Events of three legs over bars 0..9 (two per bar on even bars)."""
+    result = []
+    for bar_index in range(10):
+        result.append(_event(f"leg_{bar_index % 3}", bar_index))
+        if bar_index % 2 == 0:
+            result.append(_event("leg_even", bar_index, "pruned", direction=None))
+    return result
+
+
+class TestLifecycleEventStore:
+    """The store behaves like the event list it replaces."""
+
+    def test_round_trip(self, events):
+        store = LifecycleEventStore(events)
+
+        assert len(store) == len(events)
+        assert list(store) == events
+        assert store[3] == events[3]
+        assert store[-1] == events[-1]
+        assert store[2:5] == events[2:5]
+        assert store == events
+        with pytest.raises(IndexError):
+            store[len(events)]
+
+    def test_grows_past_initial_capacity(self):
+        events = [_event(f"leg_{i % 50}", i // 3) for i in range(3000)]
+        store = LifecycleEventStore(events)
+
+        assert store == events
+
+    def test_for_legs(self, events):
+        store = LifecycleEventStore(events)
+
+        expected = [e for e in events if e.leg_id in {"leg_1", "leg_even"} and e.bar_index >= 4]
+        assert store.for_legs({"leg_1", "leg_even"}, since_bar=4) == expected
+        assert store.for_legs({"unknown"}, since_bar=0) == []
+
+    def test_truncate_to_bar(self, events):
+        store = LifecycleEventStore(events)
+        store.truncate_to_bar(5)
+
+        assert store == [e for e in events if e.bar_index <= 5]
+        assert store.last_bar_index == 5
+        assert store.for_legs({"leg_0"}) == [e for e in events if e.leg_id == "leg_0" and e.bar_index <= 5]
+
+        # Appending again after a truncation rebuilds the leg chains
+        store.extend(e for e in events if e.bar_index > 5)
+        assert store == events
+        assert store.for_legs({"leg_0"}) == [e for e in events if e.leg_id == "leg_0"]
+
+    def test_truncate_and_clear(self, events):
+        store = LifecycleEventStore(events)
+        store.truncate(4)
+        assert store == events[:4]
+
+        store.clear()
+        assert len(store) == 0
+        assert store.last_bar_index is None
+        assert store.for_legs({"leg_0", "leg_even"}) == []
+
+    def test_range_pages(self, events):
+        store = LifecycleEventStore(events)
+        in_range = [e for e in events if 2 <= e.bar_index <= 7]
+
+        assert store.count(2, 7) == len(in_range)
+        assert store.range(2, 7) == in_range
+        assert store.range(2, 7, offset=2, limit=3) == in_range[2:5]
+        assert store.range(2, 7, offset=100) == []
+        assert store.range(limit=2) == events[:2]
+
+    def test_rejects_out_of_order(self, events):
+        store = LifecycleEventStore(events)
+
+        with pytest.raises(ValueError):
+            store.append(_event("leg_0", 3))
+
+
+class TestEventsEndpoint:
+    """/api/dag/events pages through the session's events."""
+
+    def test_paginated_range(self, events):
+        from fastapi.testclient import TestClient
+
+        from src.replay_server.api import app
+        from src.replay_server.routers.cache import get_replay_cache, reset_replay_cache
+
+        reset_replay_cache()
+        cache = get_replay_cache()
+        cache["detector"] = object()
+        cache["lifecycle_events"] = LifecycleEventStore(events)
+        try:
+            with TestClient(app) as client:
+                response = client.get("/api/dag/events?start_bar=2&end_bar=7&offset=1&limit=2")
+                everything = client.get("/api/dag/events").json()
+        finally:
+            reset_replay_cache()
+
+        in_range = [e for e in events if 2 <= e.bar_index <= 7]
+        assert response.status_code == 200
+        assert response.json()["total"] == len(in_range)
+        assert [LifecycleEvent(**e) for e in response.json()["events"]] == in_range[1:3]
+        assert len(everything["events"]) == everything["total"] == len(events)
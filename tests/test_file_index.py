@@ -0,0 +1,137 @@
+"""
+Tests for the data file metadata index behind /api/files (src/data/file_index.py).
+
+Listings must match get_file_metrics(), survive a restart through the
+index file, and follow added, changed and removed files.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from src.data import file_index
+from src.data.file_index import FileIndex
+from src.data.ohlc_loader import get_file_metrics
+
+DEMO_FILE = Path(__file__).parent.parent / "test_data" / "es-30m-demo.csv"
+
+
+def _resolution(name):
+    return "30m" if "30m" in name else "unknown"
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """A data directory with two format_a files and one unparseable file."""
+    directory = tmp_path / "data"
+    directory.mkdir()
+    with open(DEMO_FILE) as f:
+        lines = f.readlines()
+    (directory / "es-30m-a.csv").write_text("".join(lines[:300]))
+    (directory / "es-30m-b.csv").write_text("".join(lines[300:500]))
+    (directory / "broken.csv").write_text("not,a,data,file\n")
+    (directory / ".hidden.csv").write_text("".join(lines[:10]))
+    return directory
+
+
+@pytest.fixture
+def count_metrics(monkeypatch):
+    """Count get_file_metrics() calls made by the index."""
+    calls = []
+
+    def counted(path):
+        calls.append(Path(path).name)
+        return get_file_metrics(path)
+
+    monkeypatch.setattr(file_index, "get_file_metrics", counted)
+    return calls
+
+
+class TestListing:
+    """Listings carry the metrics of the files."""
+
+    def test_matches_file_metrics(self, tmp_path, data_dir):
+        files = FileIndex(tmp_path / "index.json").files(data_dir, _resolution)
+
+        assert [f.name for f in files] == ["es-30m-a.csv", "es-30m-b.csv"]
+        for f in files:
+            metrics = get_file_metrics(f.path)
+            assert f.total_bars == metrics.total_bars
+            assert f.first_timestamp == metrics.first_timestamp
+            assert f.last_timestamp == metrics.last_timestamp
+            assert f.format == "format_a" and f.resolution == "30m"
+
+    def test_served_from_memory(self, tmp_path, data_dir, count_metrics):
+        index = FileIndex(tmp_path / "index.json", refresh_interval=3600)
+        first = index.files(data_dir, _resolution)
+        assert sorted(count_metrics) == ["broken.csv", "es-30m-a.csv", "es-30m-b.csv"]
+
+        assert index.files(data_dir, _resolution) == first
+        assert len(count_metrics) == 3
+
+    def test_persisted_across_restarts(self, tmp_path, data_dir, count_metrics):
+        first = FileIndex(tmp_path / "index.json").files(data_dir, _resolution)
+        count_metrics.clear()
+
+        assert FileIndex(tmp_path / "index.json").files(data_dir, _resolution) == first
+        assert count_metrics == []
+
+    def test_memory_only(self, tmp_path, data_dir):
+        files = FileIndex(None).files(data_dir, _resolution)
+        assert len(files) == 2
+        assert not (tmp_path / "index.json").exists()
+
+
+class TestRefresh:
+    """Refreshes only re-read changed files."""
+
+    def test_changed_added_and_removed_files(self, tmp_path, data_dir, count_metrics):
+        index = FileIndex(tmp_path / "index.json")
+        index.files(data_dir, _resolution)
+        count_metrics.clear()
+
+        with open(data_dir / "es-30m-a.csv", "a") as f:
+            f.write("31/12/2030;10:00:00;100;110;90;105;100\n")
+        (data_dir / "es-30m-c.csv").write_text((data_dir / "es-30m-b.csv").read_text())
+        os.remove(data_dir / "es-30m-b.csv")
+
+        assert index.refresh(data_dir, _resolution)
+        assert sorted(count_metrics) == ["es-30m-a.csv", "es-30m-c.csv"]
+        files = index.files(data_dir, _resolution)
+        assert [f.name for f in files] == ["es-30m-a.csv", "es-30m-c.csv"]
+        assert files[0].total_bars == 301
+
+        count_metrics.clear()
+        assert not index.refresh(data_dir, _resolution)
+        assert count_metrics == []
+
+    def test_background_refresh(self, tmp_path, data_dir):
+        index = FileIndex(tmp_path / "index.json", refresh_interval=0)
+        index.files(data_dir, _resolution)
+        (data_dir / "es-30m-c.csv").write_text((data_dir / "es-30m-b.csv").read_text())
+
+        # Answered from memory, then refreshed in the background
+        assert len(index.files(data_dir, _resolution)) == 2
+        index.wait()
+        assert len(index.files(data_dir, _resolution)) == 3
+
+    def test_synchronous_refresh(self, tmp_path, data_dir):
+        index = FileIndex(tmp_path / "index.json", refresh_interval=0, background=False)
+        index.files(data_dir, _resolution)
+        (data_dir / "es-30m-c.csv").write_text((data_dir / "es-30m-b.csv").read_text())
+
+        assert len(index.files(data_dir, _resolution)) == 3
+        assert index._thread is None
+
+    def test_close_stops_background_refreshes(self, tmp_path, data_dir):
+        index = FileIndex(tmp_path / "index.json", refresh_interval=0)
+        index.files(data_dir, _resolution)
+        index.files(data_dir, _resolution)
+        index.close()
+        thread = index._thread
+        assert thread is None or not thread.is_alive()
+
+        (data_dir / "es-30m-c.csv").write_text((data_dir / "es-30m-b.csv").read_text())
+        assert len(index.files(data_dir, _resolution)) == 2
+        assert index._thread is thread
@@ -0,0 +1,124 @@
+"""
+Tests for ImpulsePopulation, the incremental impulsiveness ranking.
+
+Impulsiveness must match the original full rebuild (sorted impulses of all
+active legs + bisect per live leg) exactly, as of the last completed bar.
+"""
+
+import bisect
+import random
+
+import pytest
+
+from src.swing_analysis.dag import LegDetector
+from src.swing_analysis.dag.impulse_population import ImpulsePopulation
+
+from conftest import make_bar
+
+
+class _FakeLeg:
+    def __init__(self, impulse):
+        self.impulse = impulse
+
+
+def _reference_percentile(values, impulse):
+    population = sorted(v for v in values if v > 0)
+    if not population:
+        return None
+    return (bisect.bisect_left(population, impulse) / len(population)) * 100
+
+
+class TestImpulsePopulation:
+    """Population bookkeeping."""
+
+    def test_insert_move_remove(self):
+        population = ImpulsePopulation()
+        legs = [_FakeLeg(v) for v in (1.0, 2.0, 3.0)]
+        for leg in legs:
+            population.update(leg)
+        assert len(population) == 3
+        assert population.percentile(2.0) == pytest.approx(100 / 3)
+
+        legs[0].impulse = 5.0
+        population.update(legs[0])
+        assert population.percentile(5.0) == (2 / 3) * 100
+
+        population.discard(legs[1])
+        assert len(population) == 2
+
+    def test_zero_impulse_not_counted(self):
+        population = ImpulsePopulation()
+        population.update(_FakeLeg(0.0))
+        assert len(population) == 0
+        assert population.percentile(0.0) is None
+
+    def test_committed_percentile_ignores_uncommitted_changes(self):
+        population = ImpulsePopulation()
+        legs = [_FakeLeg(v) for v in (1.0, 2.0, 3.0)]
+        for leg in legs:
+            population.update(leg)
+        population.commit()
+        version = population.version
+        assert population.committed_percentile(legs[1]) == pytest.approx(100 / 3)
+
+        # Mid-bar changes are invisible until commit()
+        legs[1].impulse = 5.0
+        population.update(legs[1])
+        population.discard(legs[0])
+        assert population.committed_percentile(legs[1]) == pytest.approx(100 / 3)
+        assert population.committed_percentile(legs[2]) == pytest.approx(200 / 3)
+
+        population.commit()
+        assert population.version == version + 1
+        assert population.committed_percentile(legs[1]) == 50.0
+
+    def test_commit_without_changes_keeps_version(self):
+        population = ImpulsePopulation()
+        population.update(_FakeLeg(1.0))
+        population.commit()
+        version = population.version
+        population.commit()
+        assert population.version == version
+
+    def test_randomized_percentiles_match(self):
+        rng = random.Random(7)
+        population = ImpulsePopulation()
+        legs = []
+        for _ in range(500):
+            action = rng.random()
+            if action < 0.4 or not legs:
+                leg = _FakeLeg(rng.choice([0.0, round(rng.uniform(0, 10), 2)]))
+                legs.append(leg)
+                population.update(leg)
+            elif action < 0.8:
+                leg = rng.choice(legs)
+                leg.impulse = round(rng.uniform(0, 10), 2)
+                population.update(leg)
+            else:
+                leg = legs.pop(rng.randrange(len(legs)))
+                population.discard(leg)
+            values = [l.impulse for l in legs]
+            probe = round(rng.uniform(0, 10), 2)
+            assert population.percentile(probe) == _reference_percentile(values, probe)
+
+
+class TestDetectorImpulsiveness:
+    """Detector output matches a full rebuild after every bar."""
+
+    def test_matches_full_rebuild(self):
+        rng = random.Random(42)
+        detector = LegDetector()
+        price = 1000.0
+        for i in range(400):
+            open_ = price
+            close = open_ + rng.choice([-1, 1]) * rng.randint(0, 12) * 0.25
+            high = max(open_, close) + rng.randint(0, 6) * 0.25
+            low = min(open_, close) - rng.randint(0, 6) * 0.25
+            detector.process_bar(make_bar(i, open_, high, low, close))
+            price = close
+
+            legs = list(detector.state.active_legs)
+            values = [leg.impulse for leg in legs]
+            for leg in legs:
+                if leg.max_origin_breach is None:
+                    assert leg.impulsiveness == _reference_percentile(values, leg.impulse)
@@ -6,6 +6,8 @@ with "highest counter-trend range wins" for selecting which leg survives
 proximity pruning.
 """
 
+import random
+
 import pytest
 from datetime import datetime
 from decimal import Decimal
@@ -248,6 +250,36 @@ class TestCounterTrendScoring:
         assert remaining[0].leg_id == leg1.leg_id
 
 
+def _pairwise_clusters(legs, range_threshold, time_threshold, current_bar):
+    """Reference O(N^2) clustering: union every pair within proximity."""
+    legs = sorted(legs, key=lambda l: l.origin_index)
+    parent = list(range(len(legs)))
+
+    def find(x):
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
+    for i in range(len(legs)):
+        for j in range(i + 1, len(legs)):
+            bars_since_i = current_bar - legs[i].origin_index
+            bars_since_j = current_bar - legs[j].origin_index
+            if bars_since_i <= 0:
+                continue
+            time_ratio = Decimal(abs(bars_since_i - bars_since_j)) / Decimal(bars_since_i)
+            max_range = max(legs[i].range, legs[j].range)
+            if max_range == 0:
+                continue
+            range_ratio = abs(legs[i].range - legs[j].range) / max_range
+            if time_ratio < time_threshold and range_ratio < range_threshold:
+                parent[find(i)] = find(j)
+
+    clusters = {}
+    for i, leg in enumerate(legs):
+        clusters.setdefault(find(i), []).append(id(leg))
+    return list(clusters.values())
+
+
 class TestProximityClusterBuilding:
     """Test the _build_proximity_clusters helper."""
 
@@ -329,6 +361,52 @@ class TestProximityClusterBuilding:
         sizes = sorted([len(c) for c in clusters])
         assert sizes == [1, 2]
 
+    def test_chained_legs_join_one_cluster(self):
+        """Legs linked only through intermediate legs end up in one cluster."""
+        pruner = LegPruner(DetectionConfig.default())
+
+        # Adjacent ranges differ by < 15%, ends differ by ~27%
+        leg1 = make_bull_leg(100.0, 0, 110.0, 10)   # range = 10
+        leg2 = make_bull_leg(101.0, 1, 110.0, 10)   # range = 9
+        leg3 = make_bull_leg(101.8, 2, 110.0, 10)   # range = 8.2
+        leg4 = make_bull_leg(102.7, 3, 110.0, 10)   # range = 7.3
+
+        clusters = pruner._build_proximity_clusters(
+            [leg4, leg2, leg1, leg3], Decimal("0.15"), Decimal("0.50"), 20
+        )
+
+        assert len(clusters) == 1
+        assert [l.origin_index for l in clusters[0]] == [0, 1, 2, 3]
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_pairwise_clustering(self, seed):
+        """Sweep clustering matches checking every pair of legs."""
+        rng = random.Random(seed)
+        pruner = LegPruner(DetectionConfig.default())
+        current_bar = 200
+
+        for _ in range(40):
+            legs = [
+                make_bull_leg(
+                    round(rng.uniform(90.0, 110.0), rng.choice([0, 1, 2])),
+                    rng.randint(0, current_bar),
+                    110.0,
+                    current_bar,
+                )
+                for _ in range(rng.randint(2, 60))
+            ]
+            range_threshold = Decimal(rng.choice(["0", "0.05", "0.1", "0.3", "1"]))
+            time_threshold = Decimal(rng.choice(["0", "0.05", "0.1", "0.3", "1.5"]))
+
+            clusters = pruner._build_proximity_clusters(
+                legs, range_threshold, time_threshold, current_bar
+            )
+            expected = _pairwise_clusters(
+                legs, range_threshold, time_threshold, current_bar
+            )
+
+            assert [[id(l) for l in c] for c in clusters] == expected
+
 
 class TestOldestWinsStrategy:
     """Test that legacy 'oldest' strategy still works."""
@@ -0,0 +1,110 @@
+"""
+Tests for lazily computed leg metrics.
+
+Leg.spikiness derives from the running moments on read and
+Leg.impulsiveness from the stored impulse population, memoized per
+version. Values must equal the old eager per-bar updates no matter when
+(or whether) they are read.
+"""
+
+import random
+from decimal import Decimal
+
+from src.swing_analysis.dag import Leg, LegDetector
+from src.swing_analysis.dag.leg import _calculate_spikiness
+
+from conftest import make_bar
+
+
+def _random_bars(seed, count):
+    rng = random.Random(seed)
+    price = 1000.0
+    bars = []
+    for i in range(count):
+        open_ = price
+        close = open_ + rng.choice([-1, 1]) * rng.randint(0, 12) * 0.25
+        high = max(open_, close) + rng.randint(0, 6) * 0.25
+        low = min(open_, close) - rng.randint(0, 6) * 0.25
+        bars.append(make_bar(i, open_, high, low, close))
+        price = close
+    return bars
+
+
+def _make_leg():
+    return Leg(
+        direction='bull',
+        origin_price=Decimal("100"),
+        origin_index=0,
+        pivot_price=Decimal("110"),
+        pivot_index=5,
+    )
+
+
+class TestSpikiness:
+    """Spikiness is derived from the running moments."""
+
+    def test_computed_from_moments(self):
+        leg = _make_leg()
+        assert leg.spikiness is None
+        for x in (1.0, -0.5, 3.0, 0.25):
+            leg._moment_n += 1
+            leg._moment_sum_x += x
+            leg._moment_sum_x2 += x * x
+            leg._moment_sum_x3 += x * x * x
+        assert leg.spikiness == _calculate_spikiness(
+            leg._moment_n, leg._moment_sum_x, leg._moment_sum_x2, leg._moment_sum_x3
+        )
+
+    def test_assigned_value_pinned_until_moments_change(self):
+        leg = _make_leg()
+        leg.spikiness = 70.0
+        assert leg.spikiness == 70.0
+        leg._moment_n = 1
+        leg._moment_sum_x = leg._moment_sum_x2 = leg._moment_sum_x3 = 1.0
+        assert leg.spikiness is None  # n < 3
+
+
+class TestImpulsiveness:
+    """Impulsiveness is ranked on read against the stored population."""
+
+    def test_standalone_leg_keeps_assigned_value(self):
+        leg = _make_leg()
+        assert leg.impulsiveness is None
+        leg.impulsiveness = 42.0
+        assert leg.impulsiveness == 42.0
+        assert Leg(
+            direction='bear', origin_price=Decimal("5"), origin_index=0,
+            pivot_price=Decimal("4"), pivot_index=1, impulsiveness=10.0,
+        ).impulsiveness == 10.0
+
+    def test_frozen_at_previous_bar_on_breach(self):
+        detector = LegDetector()
+        previous = {}
+        checked = 0
+        for bar in _random_bars(3, 400):
+            live_before = {
+                id(leg): leg for leg in detector.state.active_legs
+                if leg.max_origin_breach is None
+            }
+            detector.process_bar(bar)
+            for key, leg in live_before.items():
+                if leg.max_origin_breach is not None:
+                    assert leg.impulsiveness == previous[key]
+                    checked += 1
+            previous = {id(leg): leg.impulsiveness for leg in detector.state.active_legs}
+        assert checked > 0
+
+    def test_unread_run_matches_read_every_bar(self):
+        """Skipping reads (bulk advance) does not change any value."""
+        bars = _random_bars(11, 400)
+        read = LegDetector()
+        for bar in bars:
+            read.process_bar(bar)
+            for leg in read.state.active_legs:
+                _ = (leg.impulsiveness, leg.spikiness)  # Force evaluation
+
+        unread = LegDetector()
+        for bar in bars:
+            unread.process_bar(bar)
+
+        assert unread.state.to_dict() == read.state.to_dict()
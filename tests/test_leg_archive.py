@@ -0,0 +1,217 @@
+"""
+Tests for long-horizon mode and the cold leg archive (dag/leg_archive.py).
+
+Archiving origin-breached legs must not change detector output: the same
+events per bar (in a different order within a phase) and the same digests
+over active and archived legs together.
+"""
+
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from src.data.ohlc_loader import load_ohlc
+from src.swing_analysis.dag import DetectorState, LegArchive, LegDetector, UndoJournal
+from src.swing_analysis.dag.leg_archive import ARCHIVED_LEG_BYTES
+from src.swing_analysis.detection_config import DetectionConfig
+from src.swing_analysis.events import LegPrunedEvent
+from src.swing_analysis.state_digest import detector_digest, leg_digests
+
+from helpers import dataframe_to_bars
+
+DEMO_FILE = Path(__file__).parent.parent / "test_data" / "es-30m-demo.csv"
+BARS = 3000
+# Engulfed pruning off, so breached legs stay around long enough to archive
+BASE_CONFIG = DetectionConfig.default().with_engulfed(1.0)
+
+
+@pytest.fixture(scope="module")
+def demo_bars():
+    """First BARS bars of the ES 30m demo file."""
+    df, _ = load_ohlc(str(DEMO_FILE))
+    return dataframe_to_bars(df.head(BARS))
+
+
+def _event_key(event) -> str:
+    return repr(event)
+
+
+def _run(config, bars, digest_every=250):
+    detector = LegDetector(config)
+    events, digests = [], []
+    for bar in bars:
+        events.append(Counter(_event_key(event) for event in detector.process_bar(bar)))
+        if bar.index % digest_every == 0:
+            digests.append(detector_digest(detector.state))
+    digests.append(detector_digest(detector.state))
+    return detector, events, digests
+
+
+@pytest.fixture(scope="module")
+def baseline(demo_bars):
+    return _run(BASE_CONFIG, demo_bars)
+
+
+@pytest.fixture(scope="module")
+def long_horizon(demo_bars):
+    return _run(BASE_CONFIG.with_long_horizon(), demo_bars)
+
+
+class TestParity:
+    """Long-horizon mode reproduces the default detector."""
+
+    def test_archive_is_used(self, long_horizon):
+        detector = long_horizon[0]
+        assert len(detector.state.archived_legs) > 0
+        assert all(leg.max_origin_breach is not None for leg in detector.state.archived_legs)
+
+    def test_digests_match(self, baseline, long_horizon):
+        assert long_horizon[2] == baseline[2]
+
+    def test_events_match_per_bar(self, baseline, long_horizon):
+        for bar_index, (expected, actual) in enumerate(zip(baseline[1], long_horizon[1])):
+            assert actual == expected, f"events differ at bar {bar_index}"
+
+    def test_legs_split_between_tiers(self, baseline, long_horizon):
+        state = long_horizon[0].state
+        assert leg_digests(state) == leg_digests(baseline[0].state)
+        assert len(state.active_legs) + len(state.archived_legs) == len(baseline[0].state.active_legs)
+
+    def test_default_disabled(self, baseline):
+        assert len(baseline[0].state.archived_legs) == 0
+
+    def test_engulfed_pruning_reaches_archive(self, demo_bars):
+        config = DetectionConfig.default().with_engulfed(0.5)
+        expected = _run(config, demo_bars[:1500])
+        actual = _run(config.with_long_horizon(0.5), demo_bars[:1500])
+        assert actual[2] == expected[2]
+        assert actual[1] == expected[1]
+
+
+class TestPersistence:
+    """Archived legs survive checkpoints, dicts and undo."""
+
+    def test_checkpoint_round_trip(self, long_horizon, demo_bars):
+        detector = long_horizon[0]
+        data = detector.state.to_bytes(detector.config)
+        restored = DetectorState.from_bytes(data, detector.config)
+
+        assert list(restored.archived_legs) == list(detector.state.archived_legs)
+        assert detector_digest(restored) == detector_digest(detector.state)
+
+    def test_restored_detector_continues(self, demo_bars):
+        config = BASE_CONFIG.with_long_horizon()
+        uninterrupted = LegDetector(config)
+        for bar in demo_bars:
+            uninterrupted.process_bar(bar)
+
+        detector = LegDetector(config)
+        for bar in demo_bars[:2000]:
+            detector.process_bar(bar)
+        restored = LegDetector.from_state(
+            DetectorState.from_bytes(detector.state.to_bytes(config), config), config
+        )
+        for bar in demo_bars[2000:]:
+            restored.process_bar(bar)
+
+        assert detector_digest(restored.state) == detector_digest(uninterrupted.state)
+
+    def test_dict_round_trip(self, long_horizon):
+        state = long_horizon[0].state
+        data = state.to_dict()
+        assert len(data["archived_legs"]) == len(state.archived_legs)
+        assert detector_digest(DetectorState.from_dict(data)) == detector_digest(state)
+
+    def test_dict_omits_empty_archive(self, baseline):
+        assert "archived_legs" not in baseline[0].state.to_dict()
+
+    def test_undo_across_archival(self, demo_bars):
+        depth = 60
+        detector = LegDetector(BASE_CONFIG.with_long_horizon())
+        detector.undo_journal = UndoJournal(depth)
+        for bar in demo_bars[:-depth]:
+            detector.process_bar(bar)
+        snapshots = [(detector_digest(detector.state), len(detector.state.archived_legs))]
+        for bar in demo_bars[-depth:]:
+            detector.process_bar(bar)
+            snapshots.append((detector_digest(detector.state), len(detector.state.archived_legs)))
+        # Some of the journaled bars archive or touch archived legs
+        assert len({count for _, count in snapshots}) > 1
+
+        for expected in reversed(snapshots[:-1]):
+            detector.undo_journal.undo(detector.state)
+            assert (detector_digest(detector.state), len(detector.state.archived_legs)) == expected
+
+
+class TestLookup:
+    """Archived legs stay reachable by ID."""
+
+    def test_lookup_leg(self, long_horizon):
+        state = long_horizon[0].state
+        leg = next(iter(state.archived_legs))
+        assert leg.leg_id in state.archived_legs
+        assert state.lookup_leg(leg.leg_id) == leg
+        assert state.archived_legs.get(leg.leg_id) == leg
+
+    def test_lookup_prefers_active(self, long_horizon):
+        state = long_horizon[0].state
+        leg = state.active_legs[0]
+        assert state.lookup_leg(leg.leg_id) is leg
+        assert state.lookup_leg("no_such_leg") is None
+
+    def test_children_of(self, long_horizon):
+        state = long_horizon[0].state
+        children = [leg for leg in state.archived_legs if leg.parent_leg_id is not None]
+        assert children
+        parent_id = children[0].parent_leg_id
+        assert state.archived_legs.children_of(parent_id) == [
+            leg for leg in children if leg.parent_leg_id == parent_id
+        ]
+
+    def test_reparent(self, long_horizon):
+        archive = LegArchive(long_horizon[0].state.archived_legs)
+        child = next(leg for leg in archive if leg.parent_leg_id is not None)
+        archive.reparent(child.parent_leg_id, "new_parent")
+        assert archive.get(child.leg_id).parent_leg_id == "new_parent"
+        assert child.leg_id in [leg.leg_id for leg in archive.children_of("new_parent")]
+        assert archive.children_of(child.parent_leg_id) == []
+
+
+class TestBudget:
+    """archive_budget_bytes evicts the oldest archived legs."""
+
+    def test_eviction_keeps_archive_within_budget(self, demo_bars):
+        budget = 40 * ARCHIVED_LEG_BYTES
+        detector = LegDetector(BASE_CONFIG.with_long_horizon(archive_budget_bytes=budget))
+        evicted = []
+        for bar in demo_bars:
+            for event in detector.process_bar(bar):
+                if isinstance(event, LegPrunedEvent) and event.reason == "archive_evicted":
+                    evicted.append(event.leg_id)
+            assert detector.state.archived_legs.nbytes <= budget
+
+        assert 0 < len(detector.state.archived_legs) <= 40
+        assert len(evicted) > 0
+        assert all(leg_id not in detector.state.archived_legs for leg_id in evicted)
+
+
+class TestConfig:
+    """Long-horizon settings and the config fingerprint."""
+
+    def test_fingerprint_ignores_breach_multiple(self):
+        config = DetectionConfig.default()
+        assert config.with_long_horizon().fingerprint() == config.fingerprint()
+
+    def test_fingerprint_includes_budget(self):
+        config = DetectionConfig.default()
+        assert config.with_long_horizon(archive_budget_bytes=1 << 20).fingerprint() != config.fingerprint()
+
+    def test_with_methods_keep_archive_settings(self):
+        config = DetectionConfig.default().with_long_horizon(2.0, 1 << 20).with_engulfed(0.5)
+        assert config.archive_breach_multiple == 2.0
+        assert config.archive_budget_bytes == 1 << 20
+
+    def test_negative_multiple_rejected(self):
+        with pytest.raises(ValueError):
+            LegDetector(DetectionConfig.default().with_long_horizon(-1.0))
@@ -0,0 +1,129 @@
+"""
+Tests for the leg registry on DetectorState.
+
+The registry (leg_id -> leg, parent -> children, direction -> legs) must
+stay consistent through create, prune and reparent, and be rebuilt when
+state is restored from a dict.
+"""
+
+from decimal import Decimal
+
+from src.swing_analysis.dag import DetectorState, Leg, LegDetector, LegPruner
+from src.swing_analysis.detection_config import DetectionConfig
+
+from conftest import make_bar
+
+
+def _leg(leg_id: str, direction: str, origin: str, origin_index: int, parent: str = None) -> Leg:
+    origin_price = Decimal(origin)
+    pivot_price = origin_price + (Decimal("10") if direction == 'bull' else Decimal("-10"))
+    return Leg(
+        leg_id=leg_id,
+        direction=direction,
+        origin_price=origin_price,
+        origin_index=origin_index,
+        pivot_price=pivot_price,
+        pivot_index=origin_index + 1,
+        parent_leg_id=parent,
+    )
+
+
+class TestRegistryLookups:
+    """Basic lookups after creation."""
+
+    def test_find_leg(self):
+        root = _leg("root", 'bull', "100", 0)
+        state = DetectorState(active_legs=[root])
+        assert state.find_leg("root") is root
+        assert state.find_leg("missing") is None
+
+    def test_children_and_direction(self):
+        root = _leg("root", 'bull', "100", 0)
+        child = _leg("child", 'bull', "105", 2, parent="root")
+        bear = _leg("bear", 'bear', "120", 3)
+        state = DetectorState(active_legs=[root, child, bear])
+
+        assert state.children_of("root") == [child]
+        assert state.children_of("child") == []
+        assert state.legs_in_direction('bull') == [root, child]
+        assert state.legs_in_direction('bear') == [bear]
+
+
+class TestRegistryConsistency:
+    """Registry follows prune and reparent."""
+
+    def test_reparent_children_uses_registry(self):
+        """Pruning the middle of a chain moves children to the grandparent."""
+        l1 = _leg("L1", 'bull', "100", 0)
+        l2 = _leg("L2", 'bull', "102", 2, parent="L1")
+        l3 = _leg("L3", 'bull', "104", 4, parent="L2")
+        state = DetectorState(active_legs=[l1, l2, l3])
+
+        pruner = LegPruner(DetectionConfig.default())
+        pruner.reparent_children(state, l2)
+        state.active_legs.remove(l2)
+
+        assert l3.parent_leg_id == "L1"
+        assert state.children_of("L1") == [l3]
+        assert state.children_of("L2") == []
+        assert state.find_leg("L2") is None
+        assert state.legs_in_direction('bull') == [l1, l3]
+
+    def test_root_prune_makes_children_roots(self):
+        root = _leg("root", 'bear', "120", 0)
+        child = _leg("child", 'bear', "115", 2, parent="root")
+        state = DetectorState(active_legs=[root, child])
+
+        LegPruner(DetectionConfig.default()).reparent_children(state, root)
+
+        assert child.parent_leg_id is None
+        assert state.children_of("root") == []
+
+    def test_duplicate_ids_resolve_to_first(self):
+        """Legs sharing a deterministic ID resolve in creation order."""
+        first = _leg("dup", 'bull', "100", 0)
+        second = _leg("dup", 'bull', "100", 0)
+        state = DetectorState(active_legs=[first, second])
+
+        assert state.find_leg("dup") is first
+        state.active_legs.remove(first)
+        assert state.find_leg("dup") is second
+
+    def test_registry_rebuilt_from_dict(self):
+        root = _leg("root", 'bull', "100", 0)
+        child = _leg("child", 'bull', "105", 2, parent="root")
+        restored = DetectorState.from_dict(
+            DetectorState(active_legs=[root, child]).to_dict()
+        )
+
+        restored_child = restored.find_leg("child")
+        assert restored_child is not None
+        assert restored.children_of("root") == [restored_child]
+
+
+class TestRegistryDuringDetection:
+    """Registry matches a full scan after real processing."""
+
+    def test_registry_matches_scan(self):
+        detector = LegDetector()
+        prices = [
+            (100, 105, 95, 102), (102, 110, 100, 108), (108, 109, 98, 99),
+            (99, 115, 97, 114), (114, 116, 104, 105), (105, 106, 90, 91),
+            (91, 120, 89, 119), (119, 121, 110, 111), (111, 125, 108, 124),
+        ]
+        for i, (o, h, l, c) in enumerate(prices):
+            detector.process_bar(make_bar(i, float(o), float(h), float(l), float(c)))
+
+        state = detector.state
+        for leg in state.active_legs:
+            assert state.find_leg(leg.leg_id) is next(
+                l for l in state.active_legs if l.leg_id == leg.leg_id
+            )
+            expected_children = [l for l in state.active_legs if l.parent_leg_id == leg.leg_id]
+            assert sorted(id(l) for l in state.children_of(leg.leg_id)) == sorted(
+                id(l) for l in expected_children
+            )
+        for direction in ('bull', 'bear'):
+            assert state.legs_in_direction(direction) == [
+                l for l in state.active_legs if l.direction == direction
+            ]
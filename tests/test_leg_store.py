@@ -0,0 +1,185 @@
+"""
+Tests for LegStore, the container behind DetectorState.active_legs.
+
+Covers list compatibility, bulk loading, trigger sync and the
+live/breached partitions.
+"""
+
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from src.data.ohlc_loader import load_ohlc
+from src.swing_analysis.dag import DetectorState, Leg, LegDetector, LegStore
+from src.swing_analysis.detection_config import DetectionConfig
+
+from conftest import make_bar
+from helpers import dataframe_to_bars
+
+DEMO_FILE = Path(__file__).parent.parent / "test_data" / "es-30m-demo.csv"
+
+
+def _leg(direction: str, origin: float, pivot: float, origin_index: int, pivot_index: int) -> Leg:
+    return Leg(
+        direction=direction,
+        origin_price=Decimal(str(origin)),
+        origin_index=origin_index,
+        pivot_price=Decimal(str(pivot)),
+        pivot_index=pivot_index,
+    )
+
+
+class TestListCompatibility:
+    """LegStore behaves like the list it replaces."""
+
+    def test_append_iterate_index(self):
+        store = LegStore()
+        legs = [_leg('bull', 100 + i, 110 + i, i, i + 1) for i in range(5)]
+        for leg in legs:
+            store.append(leg)
+
+        assert len(store) == 5
+        assert list(store) == legs
+        assert store[0] is legs[0]
+        assert store[-1] is legs[-1]
+        assert store[1:3] == legs[1:3]
+        assert legs[2] in store
+        assert store == legs
+
+    def test_state_wraps_assigned_list(self):
+        """Assigning a list to active_legs produces a LegStore."""
+        leg = _leg('bear', 110, 100, 0, 1)
+        state = DetectorState(active_legs=[leg])
+        assert isinstance(state.active_legs, LegStore)
+
+        state.active_legs = []
+        assert isinstance(state.active_legs, LegStore)
+        assert len(state.active_legs) == 0
+
+    def test_remove_and_retain_preserve_order(self):
+        legs = [_leg('bull', 100 + i, 110 + i, i, i + 1) for i in range(6)]
+        store = LegStore(legs)
+
+        store.remove(legs[0])
+        removed = store.retain(lambda leg: leg.origin_index % 2 == 1)
+
+        assert removed == [legs[2], legs[4]]
+        assert list(store) == [legs[1], legs[3], legs[5]]
+
+
+class TestBulkLoad:
+    """Constructing from legs matches appending them."""
+
+    def test_bulk_load_matches_appends(self):
+        legs = [_leg('bull' if i % 2 else 'bear', 100 + i, 110 - i, i, i + 1) for i in range(10)]
+        legs[3].max_origin_breach = Decimal("1")
+        legs[4].impulse = 2.5
+        bulk = LegStore(legs)
+        appended = LegStore()
+        appended.extend(legs)
+
+        assert list(bulk) == list(appended)
+        assert bulk.triggers._entries == appended.triggers._entries
+        assert list(bulk.live_by_origin('bull')) == list(appended.live_by_origin('bull'))
+        assert bulk.breached_legs() == appended.breached_legs() == [legs[3]]
+        assert bulk.get(legs[3].leg_id) is legs[3]
+        # Sequence numbers continue after the loaded legs
+        extra = _leg('bull', 50, 60, 20, 21)
+        bulk.append(extra)
+        assert bulk[-1] is extra
+
+    def test_sync_refreshes_triggers(self):
+        leg = _leg('bull', 100, 105, 0, 1)
+        store = LegStore([leg])
+        leg.update_pivot(Decimal("115"), 5)
+        store.sync(leg)
+
+        bull, _ = store.extension_triggers(Decimal("110"), Decimal("100"))
+        assert bull == []
+        bull, _ = store.extension_triggers(Decimal("116"), Decimal("100"))
+        assert bull == [leg]
+
+
+class TestPartitions:
+    """Live and origin-breached legs are kept apart, each in insertion order."""
+
+    def _store(self):
+        legs = [_leg('bull' if i % 2 else 'bear', 100 + i, 110 - i, i, i + 1) for i in range(6)]
+        legs[2].max_origin_breach = Decimal("1")
+        return LegStore(legs), legs
+
+    def test_load_and_append_partition(self):
+        store, legs = self._store()
+        late = _leg('bull', 90, 95, 7, 8)
+        late.max_origin_breach = Decimal("2")
+        store.append(late)
+
+        assert store.live_legs() == [legs[0], legs[1], legs[3], legs[4], legs[5]]
+        assert store.live_legs('bull') == [legs[1], legs[3], legs[5]]
+        assert store.breached_legs() == [legs[2], late]
+        assert list(store) == legs + [late]
+
+    def test_mark_origin_breached_moves_leg(self):
+        store, legs = self._store()
+        legs[4].max_origin_breach = Decimal("1")
+        store.mark_origin_breached(legs[4])
+        store.mark_origin_breached(legs[4])
+
+        assert legs[4] not in store.live_legs()
+        assert store.breached_legs() == [legs[2], legs[4]]
+
+    def test_view_merges_partitions_in_insertion_order(self):
+        store, legs = self._store()
+        for leg in (legs[4], legs[0]):
+            leg.max_origin_breach = Decimal("1")
+            store.mark_origin_breached(leg)
+        late = _leg('bear', 120, 110, 7, 8)
+        store.append(late)
+
+        assert store.breached_legs() == [legs[0], legs[2], legs[4]]
+        assert list(store) == legs + [late]
+        assert store[0] is legs[0] and store[-1] is late and len(store) == 7
+        with pytest.raises(TypeError):
+            store[0] = late
+
+    def test_removal_leaves_partitions(self):
+        store, legs = self._store()
+        store.remove(legs[2])
+        store.retain(lambda leg: leg is not legs[3])
+
+        assert store.breached_legs() == []
+        assert store.live_legs() == [legs[0], legs[1], legs[4], legs[5]]
+
+
+class TestDetectorIntegration:
+    """Detector keeps working on a LegStore."""
+
+    def test_detector_state_uses_store(self):
+        detector = LegDetector()
+        bars = [
+            make_bar(0, 100.0, 105.0, 95.0, 102.0),
+            make_bar(1, 102.0, 110.0, 100.0, 108.0),
+            make_bar(2, 108.0, 109.0, 98.0, 99.0),
+            make_bar(3, 99.0, 115.0, 97.0, 114.0),
+        ]
+        for bar in bars:
+            detector.process_bar(bar)
+
+        legs = detector.state.active_legs
+        assert isinstance(legs, LegStore)
+        for leg in legs:
+            assert leg in legs.get_all(leg.leg_id)
+
+    def test_partitions_cover_store(self):
+        df, _ = load_ohlc(str(DEMO_FILE))
+        detector = LegDetector(DetectionConfig.default().with_engulfed(1.0))
+        for bar in dataframe_to_bars(df.head(300)):
+            detector.process_bar(bar)
+
+        legs = detector.state.active_legs
+        live, breached = legs.live_legs(), legs.breached_legs()
+        assert live and breached
+        assert all(leg.max_origin_breach is None for leg in live)
+        assert all(leg.max_origin_breach is not None for leg in breached)
+        assert sorted(live + breached, key=list(legs).index) == list(legs)
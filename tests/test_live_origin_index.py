@@ -0,0 +1,129 @@
+"""
+Tests for the per-direction live-origin SortedList index.
+
+Parent lookup, domination and pending-origin tracking use the index instead
+of scanning all legs. They must agree with the original linear scans,
+including tie-breaking.
+"""
+
+import random
+from decimal import Decimal
+
+from src.swing_analysis.dag import Leg, LegDetector, LegPruner
+from src.swing_analysis.detection_config import DetectionConfig
+
+
+def _scan_parent(legs, direction, origin_price, origin_index):
+    """Reference implementation: the pre-index linear scan."""
+    eligible = [
+        leg for leg in legs
+        if leg.direction == direction
+        and leg.max_origin_breach is None
+        and leg.origin_index < origin_index
+    ]
+    if direction == 'bull':
+        eligible = [l for l in eligible if l.origin_price < origin_price]
+        if not eligible:
+            return None
+        return max(eligible, key=lambda l: (l.origin_price, l.origin_index)).leg_id
+    eligible = [l for l in eligible if l.origin_price > origin_price]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda l: (l.origin_price, -l.origin_index)).leg_id
+
+
+def _scan_dominated(legs, direction, origin_price, turn_start):
+    for leg in legs:
+        if leg.direction != direction or leg.status == 'stale' or leg.max_origin_breach is not None:
+            continue
+        if leg.origin_index < turn_start:
+            continue
+        if direction == 'bull' and leg.origin_price <= origin_price:
+            return True
+        if direction == 'bear' and leg.origin_price >= origin_price:
+            return True
+    return False
+
+
+def _random_detector(seed: int, count: int = 60) -> LegDetector:
+    rng = random.Random(seed)
+    detector = LegDetector()
+    for i in range(count):
+        direction = rng.choice(['bull', 'bear'])
+        origin = Decimal(rng.randint(80, 120)) / 4
+        offset = Decimal(rng.randint(1, 20)) / 4
+        leg = Leg(
+            direction=direction,
+            origin_price=origin,
+            origin_index=rng.randint(0, 40),
+            pivot_price=origin + offset if direction == 'bull' else origin - offset,
+            pivot_index=41 + i,
+        )
+        detector.state.active_legs.append(leg)
+        if rng.random() < 0.3:
+            leg.max_origin_breach = Decimal("0.25")
+            detector.state.active_legs.mark_origin_breached(leg)
+    return detector
+
+
+class TestParentLookup:
+    """_find_parent_for_leg matches the linear scan."""
+
+    def test_randomized_parity(self):
+        for seed in range(20):
+            detector = _random_detector(seed)
+            legs = list(detector.state.active_legs)
+            for direction in ('bull', 'bear'):
+                for price in range(80, 121, 3):
+                    origin_price = Decimal(price) / 4
+                    for origin_index in (0, 10, 25, 45):
+                        assert detector._find_parent_for_leg(
+                            direction, origin_price, origin_index
+                        ) == _scan_parent(legs, direction, origin_price, origin_index)
+
+    def test_bear_tie_prefers_latest_origin(self):
+        detector = LegDetector()
+        early = Leg(direction='bear', origin_price=Decimal("110"), origin_index=1,
+                    pivot_price=Decimal("100"), pivot_index=5)
+        late = Leg(direction='bear', origin_price=Decimal("110"), origin_index=3,
+                   pivot_price=Decimal("100"), pivot_index=6)
+        higher = Leg(direction='bear', origin_price=Decimal("115"), origin_index=4,
+                     pivot_price=Decimal("100"), pivot_index=7)
+        for leg in (late, early, higher):
+            detector.state.active_legs.append(leg)
+
+        assert detector._find_parent_for_leg('bear', Decimal("105"), 10) == late.leg_id
+        assert detector._find_parent_for_leg('bear', Decimal("105"), 2) == early.leg_id
+
+
+class TestDomination:
+    """would_leg_be_dominated and pending-origin tracking match the scan."""
+
+    def test_randomized_parity(self):
+        pruner = LegPruner(DetectionConfig.default())
+        for seed in range(20):
+            detector = _random_detector(seed)
+            state = detector.state
+            legs = list(state.active_legs)
+            for direction in ('bull', 'bear'):
+                for turn_start in (-1, 10, 30):
+                    state.last_turn_bar[direction] = turn_start
+                    for price in range(80, 121, 3):
+                        origin_price = Decimal(price) / 4
+                        expected = _scan_dominated(legs, direction, origin_price, turn_start)
+                        assert pruner.would_leg_be_dominated(state, direction, origin_price) == expected
+                        assert detector._should_track_pending_origin(direction, origin_price) == (not expected)
+
+    def test_breached_legs_leave_index(self):
+        detector = LegDetector()
+        leg = Leg(direction='bull', origin_price=Decimal("100"), origin_index=0,
+                  pivot_price=Decimal("110"), pivot_index=2)
+        detector.state.active_legs.append(leg)
+        assert list(detector.state.active_legs.live_by_origin('bull')) == [leg]
+
+        leg.max_origin_breach = Decimal("1")
+        detector.state.active_legs.mark_origin_breached(leg)
+        assert list(detector.state.active_legs.live_by_origin('bull')) == []
+
+        detector.state.active_legs.remove(leg)
+        assert detector.state.active_legs.live_origins.count('bull') == 0
@@ -170,3 +170,51 @@ def test_edge_cases(tmp_path):
     # Then read_csv returns empty DF (or DF with index but no rows).
     df, gaps = load_ohlc(str(p_header))
     assert len(df) == 0
+
+
+def _mixed_parse(date, time):
+    """The general format_a parse the fast path must reproduce."""
+    return pd.DatetimeIndex(pd.to_datetime(date + ' ' + time, format='mixed', dayfirst=True, utc=True))
+
+
+def test_format_a_fast_path_matches_mixed_parse():
+    """Fixed-width parsing agrees with pd.to_datetime(format='mixed')."""
+    from src.data.ohlc_loader import _fast_format_a_epoch, _parse_format_a_timestamps
+
+    date = pd.Series(['01/04/2007', '29/02/2008', '31/12/1999', '01/03/2100', '29/02/2000', '15/06/2025'])
+    time = pd.Series(['18:00:00', '23:59:59', '00:00', '12:30', '06:07:08', '09:30'])
+
+    assert _fast_format_a_epoch(date, time) is not None
+    parsed = _parse_format_a_timestamps(date, time)
+    assert (parsed == _mixed_parse(date, time)).all()
+    assert str(parsed.dtype) == 'datetime64[ns, UTC]'
+
+
+@pytest.mark.parametrize("date,time", [
+    ('1/04/2007', '18:00:00'),     # unpadded day
+    ('01-04-2007', '18:00:00'),    # other separator
+    ('01/04/2007', '18:00:00.5'),  # fractional seconds
+    ('01/04/2007', '9:30'),        # unpadded hour
+    ('01/13/2001', '10:00:00'),    # month > 12: mixed parsing reads it month-first
+])
+def test_format_a_fast_path_falls_back(date, time):
+    """Rows outside the fixed-width shape still parse as before."""
+    from src.data.ohlc_loader import _fast_format_a_epoch, _parse_format_a_timestamps
+
+    dates = pd.Series(['02/04/2007', date])
+    times = pd.Series(['09:30:00', time])
+    assert _fast_format_a_epoch(dates, times) is None
+    assert (pd.DatetimeIndex(_parse_format_a_timestamps(dates, times)) == _mixed_parse(dates, times)).all()
+
+
+@pytest.mark.parametrize("row", [
+    "30/02/2001;10:00:00;100;110;90;105;100\n",
+    "29/02/2001;10:00:00;100;110;90;105;100\n",
+    "01/04/2007;24:00:00;100;110;90;105;100\n",
+])
+def test_format_a_invalid_dates_still_rejected(tmp_path, row):
+    """Out-of-range fields fail the same way they did before the fast path."""
+    p = tmp_path / "bad_date.csv"
+    p.write_text("01/04/2007;18:00:00;1790;1791.75;1789.25;1791.75;115\n" + row)
+    with pytest.raises(ValueError, match="Error parsing file"):
+        load_ohlc(str(p), use_cache=False)
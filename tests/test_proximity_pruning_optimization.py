@@ -252,9 +252,8 @@ class TestPerformanceScaling:
         O(N^2) would have times[1000] / times[100] ~= 100
         O(N log N) would have times[1000] / times[100] ~= 15
 
-        Note: This test uses the 'oldest' strategy which is O(N log N).
-        The 'counter_trend' strategy (#319) uses O(N^2) for cluster building,
-        which is acceptable since N (legs per pivot group) is typically small.
+        Note: This test uses the 'oldest' strategy; the 'counter_trend'
+        strategy (#319) is covered by test_counter_trend_scaling_is_not_quadratic.
         """
         # Use 'oldest' strategy for O(N log N) optimization test
         config = DetectionConfig.default().with_origin_prune(0.10, 0.10, 'oldest')
@@ -279,6 +278,28 @@ class TestPerformanceScaling:
         # typical case. Accept up to 60 to account for test variance.
         assert ratio < 60, f"Scaling ratio {ratio:.1f} suggests O(N^2) behavior"
 
+    @pytest.mark.slow
+    def test_counter_trend_scaling_is_not_quadratic(self):
+        """Cluster building (#319) scales O(N log N) at 100, 1k and 10k legs."""
+        config = DetectionConfig.default().with_origin_prune(0.10, 0.10, 'counter_trend')
+        pruner = LegPruner(config)
+
+        times = {}
+        for size in [100, 1000, 10000]:
+            state = DetectorState()
+            state.active_legs = self._create_many_legs_same_pivot(size, size + 100)
+
+            bar = make_bar(size + 200)
+
+            start = time.perf_counter()
+            pruner.apply_origin_proximity_prune(state, 'bull', bar, datetime.now())
+            times[size] = time.perf_counter() - start
+
+        # O(N^2) would give ~100x per 10x step
+        for small, large in [(100, 1000), (1000, 10000)]:
+            ratio = times[large] / max(times[small], 1e-9)
+            assert ratio < 60, f"Scaling ratio {ratio:.1f} at {large} legs suggests O(N^2) behavior"
+
     @pytest.mark.slow
     def test_performance_stable_across_thresholds(self):
         """Performance should be similar at 1% vs 10% threshold after optimization."""
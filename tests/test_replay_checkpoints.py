@@ -0,0 +1,285 @@
+"""
+Tests for replay checkpoints (services/checkpoints.py) and the reverse,
+resync and seek endpoints that restore them.
+
+Restoring a checkpoint and replaying the remaining bars must give the same
+detector, reference layer and lifecycle events as a replay from bar 0.
+"""
+
+import copy
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.data.ohlc_loader import load_ohlc
+from src.replay_server.api import app, init_app
+from src.replay_server.routers.cache import (
+    get_checkpoint_store,
+    get_replay_cache,
+    reset_replay_cache,
+)
+from src.replay_server.services.checkpoints import (
+    DEFAULT_INTERVAL,
+    CheckpointStore,
+    configure_checkpoints,
+)
+from src.swing_analysis.dag import LegDetector
+from src.swing_analysis.reference_layer import ReferenceLayer
+
+from conftest import make_bar
+
+DEMO_FILE = Path(__file__).parent.parent / "test_data" / "es-30m-demo.csv"
+INTERVAL = 50
+
+
+def _run_detector(bars):
+    detector = LegDetector()
+    ref_layer = ReferenceLayer(detector.config)
+    for bar in bars:
+        detector.process_bar(bar)
+        ref_layer.update(detector.state.active_legs, bar, build_response=False)
+    return detector, ref_layer
+
+
+class TestCheckpointStore:
+    """Test checkpoint bookkeeping."""
+
+    def _bars(self, count):
+        return [make_bar(i, 100 + i % 7, 103 + i % 5, 98 - i % 3, 101 + i % 4) for i in range(count)]
+
+    def test_due_every_interval(self):
+        store = CheckpointStore(interval=10)
+        store.reset("source")
+
+        assert [i for i in range(35) if store.due(i)] == [9, 19, 29]
+
+    def test_not_due_until_reset(self):
+        store = CheckpointStore(interval=10)
+        assert not store.due(9)
+
+        store.reset("source")
+        store.invalidate()
+        assert not store.due(9)
+
+    def test_nearest(self):
+        store = CheckpointStore(interval=10)
+        store.reset("source")
+        detector, ref_layer = _run_detector(self._bars(30))
+        for bar_index in (9, 19, 29):
+            store.save(bar_index, detector, ref_layer, 0)
+
+        assert store.nearest(8) is None
+        assert store.nearest(9).bar_index == 9
+        assert store.nearest(25).bar_index == 19
+        assert store.nearest(1000).bar_index == 29
+
+    def test_restore_is_detached(self):
+        bars = self._bars(40)
+        detector, ref_layer = _run_detector(bars[:20])
+        store = CheckpointStore(interval=20)
+        store.reset("source")
+        checkpoint = store.save(19, detector, ref_layer, 3)
+        expected_state = copy.deepcopy(detector.state.to_dict())
+        expected_seen = set(ref_layer._seen_leg_ids)
+
+        # Keep running the live instances; the checkpoint must not change
+        for bar in bars[20:]:
+            detector.process_bar(bar)
+            ref_layer.update(detector.state.active_legs, bar, build_response=False)
+
+        restored = LegDetector()
+        restored_ref = ReferenceLayer(restored.config)
+        store.restore(checkpoint, restored, restored_ref)
+
+        assert checkpoint.event_cursor == 3
+        assert restored.state.to_dict() == expected_state
+        assert restored_ref._seen_leg_ids == expected_seen
+
+    def test_evicts_least_recently_used_over_budget(self):
+        detector, ref_layer = _run_detector(self._bars(30))
+        probe = CheckpointStore()
+        size = probe.save(0, detector, ref_layer, 0).nbytes
+
+        store = CheckpointStore(interval=1, memory_budget_bytes=2 * size)
+        store.reset("source")
+        store.save(0, detector, ref_layer, 0)
+        store.save(1, detector, ref_layer, 0)
+        store.nearest(0)  # touch 0 so 1 is least recently used
+        store.save(2, detector, ref_layer, 0)
+
+        assert store.bar_indices == (0, 2)
+        assert store.nbytes <= store.memory_budget_bytes
+
+    def test_oversized_checkpoint_skipped(self):
+        detector, ref_layer = _run_detector(self._bars(30))
+        store = CheckpointStore(interval=1, memory_budget_bytes=10)
+        store.reset("source")
+
+        assert store.save(0, detector, ref_layer, 0) is None
+        assert len(store) == 0
+
+    def test_invalid_settings(self):
+        with pytest.raises(ValueError):
+            CheckpointStore(interval=0)
+        with pytest.raises(ValueError):
+            CheckpointStore(memory_budget_bytes=-1)
+
+
+@pytest.fixture(scope="module")
+def demo_df():
+    """First 1200 bars of the ES 30m demo file."""
+    df, _ = load_ohlc(str(DEMO_FILE))
+    return df.head(1200)
+
+
+@pytest.fixture
+def client(demo_df):
+    """Test client with a 600-bar window of the ES 30m demo file."""
+    reset_replay_cache()
+    configure_checkpoints(interval=INTERVAL)
+    init_app(
+        data_file=str(DEMO_FILE),
+        resolution_minutes=30,
+        window_size=600,
+        target_bars=200,
+        window_offset=0,
+        cached_df=demo_df,
+        mode="dag",
+    )
+    with TestClient(app) as client:
+        client.post("/api/dag/init")
+        yield client
+    configure_checkpoints(interval=DEFAULT_INTERVAL)
+    reset_replay_cache()
+
+
+@pytest.fixture
+def replayed_bars(monkeypatch):
+    """Record how many bars each process_bars() call replays."""
+    calls = []
+    original = LegDetector.process_bars
+
+    def spy(self, timestamps, *args, **kwargs):
+        calls.append(len(timestamps))
+        return original(self, timestamps, *args, **kwargs)
+
+    monkeypatch.setattr(LegDetector, "process_bars", spy)
+    return calls
+
+
+def _snapshot():
+    cache = get_replay_cache()
+    ref_layer = cache["reference_layer"]
+    return copy.deepcopy((
+        cache["last_bar_index"],
+        cache["detector"].state.to_dict(),
+        dict(ref_layer._formed_refs),
+        set(ref_layer._seen_leg_ids),
+        ref_layer._bin_distribution.to_dict(),
+        cache["lifecycle_events"],
+    ))
+
+
+def _advance(client, current, count):
+    response = client.post("/api/dag/advance", json={
+        "current_bar_index": current,
+        "advance_by": count,
+    })
+    assert response.status_code == 200
+    return response.json()
+
+
+def _fresh_snapshot(client, bar_index):
+    """Snapshot after advancing a freshly initialized detector to bar_index."""
+    client.post("/api/dag/reset")
+    _advance(client, -1, bar_index + 1)
+    return _snapshot()
+
+
+class TestCheckpointEndpoints:
+    """Reverse, resync and seek restore checkpoints exactly."""
+
+    def test_advance_records_checkpoints(self, client):
+        _advance(client, -1, 230)
+
+        store = get_checkpoint_store()
+        assert store.bar_indices == (49, 99, 149, 199)
+
+    def test_reverse_matches_replay_from_start(self, client, replayed_bars):
+        _advance(client, -1, 400)
+        # Beyond the undo journal, reverse falls back to the checkpoint
+        get_replay_cache()["detector"].undo_journal.clear()
+        replayed_bars.clear()
+
+        response = client.post("/api/dag/reverse", json={"current_bar_index": 399})
+        assert response.status_code == 200
+        assert response.json()["current_bar_index"] == 398
+        assert replayed_bars == [398 - 349]
+        reversed_snapshot = _snapshot()
+
+        assert reversed_snapshot == _fresh_snapshot(client, 398)
+
+    def test_reverse_uses_undo_journal(self, client, replayed_bars):
+        _advance(client, -1, 400)
+        replayed_bars.clear()
+
+        for current in range(399, 394, -1):
+            response = client.post("/api/dag/reverse", json={"current_bar_index": current})
+            assert response.status_code == 200
+        assert response.json()["current_bar_index"] == 394
+        assert replayed_bars == []
+        reversed_snapshot = _snapshot()
+
+        assert reversed_snapshot == _fresh_snapshot(client, 394)
+
+    def test_seek_backward_and_forward(self, client, replayed_bars):
+        _advance(client, -1, 500)
+        replayed_bars.clear()
+
+        response = client.post("/api/dag/seek?bar_index=123")
+        assert response.status_code == 200
+        assert response.json()["current_bar_index"] == 123
+        assert replayed_bars == [123 - 99]
+        backward = _snapshot()
+
+        client.post("/api/dag/seek?bar_index=321")
+        forward = _snapshot()
+
+        assert backward == _fresh_snapshot(client, 123)
+        assert forward == _fresh_snapshot(client, 321)
+
+    def test_seek_out_of_range(self, client):
+        response = client.post("/api/dag/seek?bar_index=100000")
+        assert response.status_code == 400
+
+    def test_resync_uses_checkpoint(self, client, replayed_bars):
+        _advance(client, -1, 300)
+        replayed_bars.clear()
+
+        response = client.post("/api/dag/advance", json={
+            "current_bar_index": 210,
+            "advance_by": 1,
+            "from_index": 210,
+        })
+        assert response.status_code == 200
+        assert replayed_bars == [210 - 199, 1]
+        resynced = _snapshot()
+
+        assert resynced == _fresh_snapshot(client, 211)
+
+    def test_config_update_invalidates(self, client, replayed_bars):
+        _advance(client, -1, 200)
+        response = client.put("/api/dag/config", json={"max_turns": 3})
+        assert response.status_code == 200
+
+        store = get_checkpoint_store()
+        assert len(store) == 0
+        _advance(client, 199, 100)
+        assert len(store) == 0
+
+        # Rewinding replays from bar 0 with the new config and records again
+        replayed_bars.clear()
+        client.post("/api/dag/seek?bar_index=150")
+        assert replayed_bars == [151]
+        assert store.bar_indices == (49, 99, 149)
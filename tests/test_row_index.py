@@ -0,0 +1,138 @@
+"""
+Tests for the byte-offset row index behind load_ohlc_window() (src/data/row_index.py).
+
+Seeking through the index must return exactly the rows a full skip-and-read
+returns, and a changed file must invalidate the entry.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.data import ohlc_loader, row_index
+from src.data.ohlc_loader import find_row_at_or_after, load_ohlc, load_ohlc_window, seekable_rows
+from src.data.row_index import configure_row_index, get_row_index
+
+DEMO_FILE = Path(__file__).parent.parent / "test_data" / "es-30m-demo.csv"
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    """Point the row index at a temporary directory, with 100-row blocks."""
+    previous = get_row_index()
+    monkeypatch.setattr(ohlc_loader, "BLOCK_ROWS", 100)
+    directory = tmp_path / "row_index"
+    configure_row_index(directory)
+    yield directory
+    row_index._row_index = previous
+
+
+@pytest.fixture
+def demo_copy(tmp_path):
+    """First 2050 rows of the demo file (format_a, no trailing newline)."""
+    path = tmp_path / "demo.csv"
+    with open(DEMO_FILE) as f:
+        path.write_text("".join(f.readlines()[:2050]).rstrip("\n"))
+    return str(path)
+
+
+@pytest.fixture
+def format_b_copy(tmp_path, demo_copy):
+    """The demo rows as a TradingView (format_b) file."""
+    df, _ = load_ohlc(demo_copy, use_cache=False)
+    path = tmp_path / "demo_b.csv"
+    lines = ["time,open,high,low,close,Volume"] + [
+        f"{ts.value // 10**9},{row.open},{row.high},{row.low},{row.close},{row.volume}"
+        for ts, row in zip(df.index, df.itertuples())
+    ]
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def _assert_same(loaded, expected):
+    pd.testing.assert_frame_equal(loaded[0], expected[0])
+    assert loaded[1] == expected[1]
+
+
+class TestIndexedWindows:
+    """Seeks return the same rows as skipping lines."""
+
+    @pytest.mark.parametrize("start_row,num_rows", [(100, 50), (150, 300), (1999, 100), (2049, 10), (3000, 5)])
+    def test_format_a(self, index_dir, demo_copy, start_row, num_rows):
+        indexed = load_ohlc_window(demo_copy, start_row, num_rows)
+        assert get_row_index().get(demo_copy) is not None
+        _assert_same(indexed, load_ohlc_window(demo_copy, start_row, num_rows, use_cache=False))
+
+    @pytest.mark.parametrize("start_row,num_rows", [(100, 50), (777, 300), (2000, 100)])
+    def test_format_b(self, index_dir, format_b_copy, start_row, num_rows):
+        indexed = load_ohlc_window(format_b_copy, start_row, num_rows)
+        assert get_row_index().get(format_b_copy).header[0] == "time"
+        _assert_same(indexed, load_ohlc_window(format_b_copy, start_row, num_rows, use_cache=False))
+
+    def test_blocks(self, index_dir, demo_copy):
+        load_ohlc_window(demo_copy, 500, 10)
+        index = get_row_index().get(demo_copy)
+        df, _ = load_ohlc(demo_copy, use_cache=False)
+
+        assert index.rows == 2050 and len(index.blocks) == 21
+        assert index.clean
+        assert index.blocks["first"][3] == df.index[300].value
+        assert index.blocks["last"][3] == df.index[399].value
+        assert index.blocks["last"][-1] == df.index[-1].value
+
+    def test_first_block_skips_index(self, index_dir, demo_copy):
+        load_ohlc_window(demo_copy, 10, 10)
+        assert not index_dir.exists()
+
+    def test_changed_file_is_reindexed(self, index_dir, demo_copy):
+        load_ohlc_window(demo_copy, 500, 10)
+        with open(demo_copy, "a") as f:
+            f.write("\n31/12/2030;10:00:00;100;110;90;105;100\n")
+
+        assert get_row_index().get(demo_copy) is None
+        df, _ = load_ohlc_window(demo_copy, 2050, 10)
+        assert df.index[0] == pd.Timestamp("2030-12-31 10:00", tz="UTC")
+        assert get_row_index().get(demo_copy).rows == 2051
+
+
+class TestTimestampSeek:
+    """find_row_at_or_after() agrees with a search of the loaded bars."""
+
+    @pytest.mark.parametrize("fixture", ["demo_copy", "format_b_copy"])
+    def test_matches_loaded_bars(self, request, index_dir, fixture):
+        path = request.getfixturevalue(fixture)
+        df, _ = load_ohlc(path, use_cache=False)
+        for row in (0, 1, 99, 100, 101, 1234, 2049):
+            assert find_row_at_or_after(path, df.index[row]) == row
+            between = df.index[row] - pd.Timedelta(seconds=1)
+            assert find_row_at_or_after(path, between) == row
+        assert find_row_at_or_after(path, df.index[-1] + pd.Timedelta(minutes=1)) is None
+
+    def test_naive_timestamp_is_utc(self, index_dir, demo_copy):
+        df, _ = load_ohlc(demo_copy, use_cache=False)
+        assert find_row_at_or_after(demo_copy, df.index[500].tz_localize(None)) == 500
+
+    @pytest.mark.parametrize("edit", ["swap", "duplicate", "invalid"])
+    def test_unclean_file_falls_back(self, index_dir, demo_copy, edit):
+        # Rows inside one block: the block's first and last timestamps stay in order
+        lines = Path(demo_copy).read_text().split("\n")
+        if edit == "swap":
+            lines[150], lines[151] = lines[151], lines[150]
+        elif edit == "duplicate":
+            lines.insert(150, lines[120])
+        else:
+            fields = lines[150].split(";")
+            fields[3] = str(float(fields[4]) - 1)  # high below low
+            lines[150] = ";".join(fields)
+        Path(demo_copy).write_text("\n".join(lines))
+
+        df, _ = load_ohlc(demo_copy, use_cache=False)
+        assert seekable_rows(demo_copy) is None
+        assert get_row_index().get(demo_copy).clean is False
+        for row in (100, 1000, len(df) - 1):
+            assert find_row_at_or_after(demo_copy, df.index[row]) == row
+
+    def test_without_index(self, demo_copy):
+        df, _ = load_ohlc(demo_copy, use_cache=False)
+        assert find_row_at_or_after(demo_copy, df.index[700], use_cache=False) == 700
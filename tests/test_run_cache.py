@@ -0,0 +1,246 @@
+"""
+Tests for the on-disk run cache (services/run_cache.py).
+
+A run recorded by one session must let a later session with the same file,
+offset and configs restore any checkpointed bar, with the same detector,
+reference layer and lifecycle events as a replay from bar 0.
+"""
+
+import copy
+import dataclasses
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.data.ohlc_loader import load_ohlc
+from src.replay_server.api import app, init_app
+from src.replay_server.routers.cache import (
+    get_checkpoint_store,
+    get_replay_cache,
+    reset_replay_cache,
+)
+from src.replay_server.services import run_cache
+from src.replay_server.services.checkpoints import DEFAULT_INTERVAL, configure_checkpoints
+from src.replay_server.services.run_cache import (
+    RunCache,
+    RunKey,
+    configure_run_cache,
+    file_digest,
+)
+from src.replay_server.schemas import LifecycleEvent
+from src.swing_analysis.dag import LegDetector
+from src.swing_analysis.detection_config import DetectionConfig
+from src.swing_analysis.reference_config import ReferenceConfig
+
+DEMO_FILE = Path(__file__).parent.parent / "test_data" / "es-30m-demo.csv"
+INTERVAL = 50
+
+
+def _key(offset=0, config=None):
+    return RunKey(
+        file_digest="f" * 64,
+        window_offset=offset,
+        detection_config=(config or DetectionConfig.default()).fingerprint(),
+        reference_config=ReferenceConfig.default().fingerprint(),
+        code_version="c" * 16,
+    )
+
+
+def _event(bar_index):
+    return LifecycleEvent(
+        leg_id=f"leg_{bar_index}", direction="bull", event_type="formed",
+        bar_index=bar_index, csv_index=bar_index, timestamp="2020-01-01T00:00:00",
+        explanation="",
+    )
+
+
+class TestRunCache:
+    """Test run bookkeeping on disk."""
+
+    def test_reopen_reads_checkpoints_and_events(self, tmp_path):
+        events = [_event(i) for i in range(5)]
+        run = RunCache(tmp_path).open(_key())
+        assert run.append(9, b"dag9", b"ref9", events[:2], {"active_legs": 3})
+        assert run.append(19, b"dag19", None, events, {"active_legs": 4})
+
+        reopened = RunCache(tmp_path).open(_key())
+
+        assert list(reopened.checkpoints.items()) == [(9, 2), (19, 5)]
+        assert reopened.nearest(15) == 9
+        assert reopened.nearest(8) is None
+        assert reopened.read(9) == (b"dag9", b"ref9", 2)
+        assert reopened.read(19) == (b"dag19", None, 5)
+        assert reopened.events(5) == events
+        assert reopened.events(2) == events[:2]
+        assert reopened.summary["active_legs"] == 4
+        assert reopened.summary["bars"] == 20
+
+    def test_append_only_past_last_checkpoint(self, tmp_path):
+        run = RunCache(tmp_path).open(_key())
+        assert run.append(19, b"dag", None, [], {})
+
+        assert not run.append(19, b"dag", None, [], {})
+        assert not run.append(9, b"dag", None, [], {})
+        assert run.last_bar_index == 19
+
+    def test_interrupted_append_is_ignored(self, tmp_path):
+        run = RunCache(tmp_path).open(_key())
+        run.append(9, b"dag", None, [_event(0)], {})
+        with open(run.path / "events.jsonl", "ab") as f:
+            f.write(b'["partial"')
+
+        reopened = RunCache(tmp_path).open(_key())
+        assert reopened.events(1) == [_event(0)]
+        reopened.append(19, b"dag", None, [_event(0), _event(1)], {})
+        assert RunCache(tmp_path).open(_key()).events(2) == [_event(0), _event(1)]
+
+    def test_keys_separate_runs(self, tmp_path):
+        cache = RunCache(tmp_path)
+        other_config = DetectionConfig.default().with_max_turns(3)
+
+        assert cache.open(_key()).path != cache.open(_key(offset=10)).path
+        assert cache.open(_key()).path != cache.open(_key(config=other_config)).path
+        assert _key().run_id == _key().run_id
+
+    def test_evicts_least_recently_used_over_budget(self, tmp_path):
+        cache = RunCache(tmp_path, disk_budget_bytes=250)
+        first, second = cache.open(_key(offset=1)), cache.open(_key(offset=2))
+        first.append(9, bytes(100), None, [], {})
+        second.append(9, bytes(100), None, [], {})
+        cache.open(_key(offset=1))  # most recently used
+
+        third = cache.open(_key(offset=3))
+        third.append(9, bytes(100), None, [], {})
+
+        assert first.path.exists()
+        assert not second.path.exists()
+        assert third.path.exists()
+        assert cache.nbytes == 200
+
+    def test_run_over_budget_stops_growing(self, tmp_path):
+        run = RunCache(tmp_path, disk_budget_bytes=150).open(_key())
+
+        assert run.append(9, bytes(100), None, [], {})
+        assert not run.append(19, bytes(100), None, [], {})
+        assert run.last_bar_index == 9
+
+    def test_file_digest(self, tmp_path):
+        path = tmp_path / "bars.csv"
+        path.write_text("a")
+        digest = file_digest(str(path))
+        assert file_digest(str(path)) == digest
+
+        path.write_text("bb")
+        assert file_digest(str(path)) != digest
+        # Only the latest version of a file is memoized
+        assert run_cache._file_digests[str(path.resolve())][:2] == (2, path.stat().st_mtime_ns)
+
+
+@pytest.fixture(scope="module")
+def demo_df():
+    """First 1200 bars of the ES 30m demo file."""
+    df, _ = load_ohlc(str(DEMO_FILE))
+    return df.head(1200)
+
+
+@pytest.fixture
+def start_session(demo_df, tmp_path):
+    """Start (or restart) a 600-bar session of the demo file with a run cache."""
+    configure_checkpoints(interval=INTERVAL)
+    configure_run_cache(str(tmp_path / "runs"))
+
+    def start(client):
+        reset_replay_cache()
+        init_app(
+            data_file=str(DEMO_FILE),
+            resolution_minutes=30,
+            window_size=600,
+            target_bars=200,
+            window_offset=0,
+            cached_df=demo_df,
+            mode="dag",
+        )
+        client.post("/api/dag/init")
+
+    yield start
+    configure_run_cache(None)
+    configure_checkpoints(interval=DEFAULT_INTERVAL)
+    reset_replay_cache()
+
+
+@pytest.fixture
+def replayed_bars(monkeypatch):
+    """Record how many bars each process_bars() call replays."""
+    calls = []
+    original = LegDetector.process_bars
+
+    def spy(self, timestamps, *args, **kwargs):
+        calls.append(len(timestamps))
+        return original(self, timestamps, *args, **kwargs)
+
+    monkeypatch.setattr(LegDetector, "process_bars", spy)
+    return calls
+
+
+def _snapshot():
+    cache = get_replay_cache()
+    ref_layer = cache["reference_layer"]
+    return copy.deepcopy((
+        cache["last_bar_index"],
+        cache["detector"].state.to_dict(),
+        dict(ref_layer._formed_refs),
+        set(ref_layer._seen_leg_ids),
+        ref_layer._bin_distribution.to_dict(),
+        [event.model_dump() for event in cache["lifecycle_events"]],
+    ))
+
+
+def _advance(client, current, count):
+    response = client.post("/api/dag/advance", json={
+        "current_bar_index": current,
+        "advance_by": count,
+    })
+    assert response.status_code == 200
+
+
+class TestRunCacheEndpoints:
+    """A restarted session restores bars recorded by an earlier one."""
+
+    def test_restarted_session_seeks_from_run(self, start_session, replayed_bars):
+        with TestClient(app) as client:
+            start_session(client)
+            _advance(client, -1, 300)
+            client.post("/api/dag/seek?bar_index=260")
+            expected = _snapshot()
+
+            start_session(client)
+            assert get_checkpoint_store().run.last_bar_index == 299
+            replayed_bars.clear()
+            response = client.post("/api/dag/seek?bar_index=260")
+
+            assert response.status_code == 200
+            assert replayed_bars == [260 - 249]
+            assert _snapshot() == expected
+
+            # Playback continues recording past the cached run
+            _advance(client, 260, 100)
+            assert get_checkpoint_store().run.last_bar_index == 349
+
+    def test_reference_config_change_uses_another_run(self, start_session):
+        with TestClient(app) as client:
+            start_session(client)
+            _advance(client, -1, 100)
+            recorded = get_checkpoint_store().run
+            ref_layer = get_replay_cache()["reference_layer"]
+            ref_layer.reference_config = dataclasses.replace(
+                ref_layer.reference_config, bin_recompute_interval=7,
+            )
+
+            # Reset keeps the reference config, so it opens a different run
+            client.post("/api/dag/reset")
+            run = get_checkpoint_store().run
+
+            assert recorded.last_bar_index == 99
+            assert run.path != recorded.path
+            assert run.last_bar_index == -1
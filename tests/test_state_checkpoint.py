@@ -0,0 +1,222 @@
+"""
+Tests for the binary DetectorState checkpoint format (dag/checkpoint.py).
+"""
+
+import json
+import struct
+from dataclasses import fields
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from src.data.ohlc_loader import load_ohlc
+from src.swing_analysis.dag import DetectorState, Leg, LegDetector, PendingOrigin
+from src.swing_analysis.dag import checkpoint
+from src.swing_analysis.dag.leg import RefMetadata
+from src.swing_analysis.detection_config import DetectionConfig
+from src.swing_analysis.types import Bar
+
+from helpers import dataframe_to_bars
+
+DEMO_FILE = Path(__file__).parent.parent / "test_data" / "es-30m-demo.csv"
+
+
+@pytest.fixture(scope="module")
+def demo_bars():
+    """First 1200 bars of the ES 30m demo file."""
+    df, _ = load_ohlc(str(DEMO_FILE))
+    return dataframe_to_bars(df.head(1200))
+
+
+def _rich_state() -> DetectorState:
+    """State exercising every optional leg field and Decimal exponents."""
+    root = Leg(
+        direction='bull',
+        origin_price=Decimal("4425.50"),
+        origin_index=10,
+        pivot_price=Decimal("4440.25"),
+        pivot_index=20,
+        retracement_pct=Decimal("0.3333333333333333333333333333"),
+        bar_count=10,
+        impulse=1.475,
+        segment_deepest_price=Decimal("4440.25"),
+        segment_deepest_index=20,
+        impulse_to_deepest=1.5,
+        impulse_back=0.25,
+        counter_trend_ratio=0.8,
+        origin_counter_trend_range=12.0,
+        _max_counter_leg_range=12.0,
+        depth=0,
+        range_bin_index=4,
+        bin_impulsiveness=61.5,
+        ref=RefMetadata(max_location=1.2),
+    )
+    root.max_origin_breach = Decimal("0.75")
+    root.max_pivot_breach = Decimal("1.00")
+    child = Leg(
+        direction='bear',
+        origin_price=Decimal("4440.25"),
+        origin_index=20,
+        pivot_price=Decimal("4431"),
+        pivot_index=25,
+        parent_leg_id=root.leg_id,
+        status='stale',
+        impulse=None,
+        _moment_n=3,
+        _moment_sum_x=1.0,
+        _moment_sum_x2=3.5,
+        _moment_sum_x3=9.25,
+    )
+    return DetectorState(
+        last_bar_index=25,
+        all_swing_ranges=[Decimal("14.75")],
+        prev_bar=Bar(index=25, timestamp=1700000000, open=4432.0, high=4433.5, low=4431.0, close=4432.25),
+        active_legs=[root, child],
+        pending_origins={
+            'bull': PendingOrigin(price=Decimal("4431"), bar_index=25, direction='bull', source='low'),
+            'bear': None,
+        },
+        last_turn_bar={'bull': 20, 'bear': 25},
+        prev_bar_type='bear',
+        _has_created_bull_leg=True,
+        _has_created_bear_leg=True,
+    )
+
+
+class TestCheckpointRoundtrip:
+    """Test lossless binary round trips."""
+
+    def test_empty_state(self):
+        restored = DetectorState.from_bytes(DetectorState().to_bytes())
+
+        assert len(restored.active_legs) == 0
+        assert restored.to_dict() == DetectorState().to_dict()
+
+    def test_legs_are_lossless(self):
+        state = _rich_state()
+        restored = DetectorState.from_bytes(state.to_bytes())
+
+        assert list(restored.active_legs) == list(state.active_legs)
+        root, child = restored.active_legs
+        # Exponents survive (leg IDs are built from str(origin_price))
+        assert str(root.origin_price) == "4425.50"
+        assert root.max_origin_breach == Decimal("0.75")
+        assert root.max_pivot_breach == Decimal("1.00")
+        assert root.ref.max_location == 1.2
+        assert child.impulse is None
+        assert child.segment_deepest_index is None
+        assert child.parent_leg_id == root.leg_id
+        assert child.spikiness == state.active_legs[1].spikiness
+
+    def test_state_fields_are_lossless(self):
+        state = _rich_state()
+        restored = DetectorState.from_bytes(state.to_bytes())
+
+        assert restored.prev_bar == state.prev_bar
+        assert restored.pending_origins == state.pending_origins
+        assert restored.to_dict() == state.to_dict()
+
+    def test_restored_store_indexes(self):
+        restored = DetectorState.from_bytes(_rich_state().to_bytes())
+        root, child = restored.active_legs
+
+        assert restored.find_leg(root.leg_id) is root
+        assert restored.children_of(root.leg_id) == [child]
+        assert restored.legs_in_direction('bear') == [child]
+
+    def test_every_leg_field_is_stored(self):
+        """New Leg fields must be added to the checkpoint layout."""
+        stored = set(checkpoint.LEG_DTYPE.names) | {'ref'}
+        derived = {'_cached_range'}
+        missing = {f.name for f in fields(Leg)} - stored - derived
+        assert not missing
+
+    def test_smaller_than_dict_form(self, demo_bars):
+        detector = LegDetector()
+        for bar in demo_bars:
+            detector.process_bar(bar)
+
+        data = detector.state.to_bytes()
+        assert len(data) < len(json.dumps(detector.state.to_dict(), default=str))
+
+
+class TestCheckpointHeader:
+    """Test header contents and validation."""
+
+    def test_header(self):
+        config = DetectionConfig.default()
+        header = checkpoint.read_header(_rich_state().to_bytes(config))
+
+        assert header.version == checkpoint.SCHEMA_VERSION
+        assert header.leg_count == 2
+        assert header.config_fingerprint == config.fingerprint()
+
+    def test_no_config(self):
+        header = checkpoint.read_header(_rich_state().to_bytes())
+        assert header.config_fingerprint is None
+
+    def test_config_mismatch_rejected(self):
+        data = _rich_state().to_bytes(DetectionConfig.default())
+
+        with pytest.raises(ValueError, match="different detection config"):
+            DetectorState.from_bytes(data, DetectionConfig.default().with_max_turns(3))
+
+    def test_long_horizon_does_not_change_fingerprint(self):
+        config = DetectionConfig.default()
+        data = _rich_state().to_bytes(config)
+
+        restored = DetectorState.from_bytes(data, config.with_long_horizon())
+        assert len(restored.active_legs) == 2
+
+    def test_newer_schema_rejected(self):
+        data = bytearray(_rich_state().to_bytes())
+        struct.pack_into("<H", data, len(checkpoint.MAGIC), checkpoint.SCHEMA_VERSION + 1)
+
+        with pytest.raises(ValueError, match="newer"):
+            DetectorState.from_bytes(bytes(data))
+
+    def test_garbage_rejected(self):
+        with pytest.raises(ValueError):
+            DetectorState.from_bytes(b"not a checkpoint")
+
+
+class TestCheckpointFiles:
+    """Test save/load and the dict-form compatibility reader."""
+
+    def test_save_load(self, tmp_path):
+        state = _rich_state()
+        path = tmp_path / "state.ckpt"
+        state.save(path, DetectionConfig.default())
+
+        restored = DetectorState.load(path, DetectionConfig.default())
+        assert list(restored.active_legs) == list(state.active_legs)
+
+    def test_load_dict_form(self, tmp_path):
+        state = _rich_state()
+        path = tmp_path / "state.json"
+        path.write_text(json.dumps(state.to_dict()))
+
+        restored = DetectorState.load(path)
+        assert restored.to_dict() == DetectorState.from_dict(state.to_dict()).to_dict()
+
+
+class TestCheckpointResume:
+    """A detector resumed from a checkpoint continues exactly."""
+
+    @pytest.mark.parametrize("config", [
+        DetectionConfig.default(),
+        DetectionConfig.default().with_engulfed(1.0).with_origin_prune(0.0, 0.0),
+    ])
+    def test_resume_matches_uninterrupted_run(self, demo_bars, config):
+        uninterrupted = LegDetector(config)
+        expected = [repr(uninterrupted.process_bar(bar)) for bar in demo_bars]
+
+        first = LegDetector(config)
+        events = [repr(first.process_bar(bar)) for bar in demo_bars[:600]]
+        resumed = LegDetector(config)
+        resumed.state = DetectorState.from_bytes(first.state.to_bytes(config), config)
+        events += [repr(resumed.process_bar(bar)) for bar in demo_bars[600:]]
+
+        assert events == expected
+        assert list(resumed.state.active_legs) == list(uninterrupted.state.active_legs)
@@ -0,0 +1,104 @@
+"""
+Tests for canonical state digests (state_digest.py).
+
+The detector must reproduce the golden digests stored for the ES 30m demo
+file, and a config change must be reported at the right bar and leg.
+"""
+
+import json
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from src.data.ohlc_loader import load_ohlc
+from src.swing_analysis.dag import DetectorState, LegDetector
+from src.swing_analysis.detection_config import DetectionConfig
+from src.swing_analysis.state_digest import (
+    DIGEST_VERSION,
+    canonical_price,
+    detector_digest,
+    find_divergence,
+    run_digests,
+)
+
+from helpers import dataframe_to_bars
+
+DEMO_FILE = Path(__file__).parent.parent / "test_data" / "es-30m-demo.csv"
+GOLDEN_FILE = Path(__file__).parent.parent / "test_data" / "es-30m-demo.digests.json"
+# The golden file covers the whole demo file; tests check a prefix
+PREFIX_BARS = 2000
+
+
+@pytest.fixture(scope="module")
+def demo_bars():
+    """First PREFIX_BARS bars of the ES 30m demo file."""
+    df, _ = load_ohlc(str(DEMO_FILE))
+    return dataframe_to_bars(df.head(PREFIX_BARS))
+
+
+@pytest.fixture(scope="module")
+def golden():
+    return json.loads(GOLDEN_FILE.read_text())
+
+
+class TestCanonicalForm:
+    """Digests ignore representation, not content."""
+
+    def test_canonical_price(self):
+        assert canonical_price(Decimal("100.50")) == "100.5"
+        assert canonical_price(Decimal("1E+2")) == "100"
+        assert canonical_price(Decimal("-0.00")) == "0"
+        assert canonical_price(None) is None
+
+    def test_leg_order_and_trailing_zeros_ignored(self, demo_bars):
+        detector = LegDetector()
+        for bar in demo_bars[:300]:
+            detector.process_bar(bar)
+        state = detector.state
+        data = state.to_dict()
+        data["active_legs"].reverse()
+        for leg in data["active_legs"]:
+            leg["pivot_price"] = str(Decimal(leg["pivot_price"]).quantize(Decimal("0.0001")))
+
+        assert detector_digest(DetectorState.from_dict(data)) == detector_digest(state)
+
+        data["active_legs"][0]["bar_count"] += 1
+        assert detector_digest(DetectorState.from_dict(data)) != detector_digest(state)
+
+
+class TestGoldenDigests:
+    """The default config reproduces the stored digests."""
+
+    def test_golden_header(self, golden):
+        assert golden["version"] == DIGEST_VERSION
+        assert golden["config"] == DetectionConfig.default().fingerprint()
+
+    def test_matches_golden(self, demo_bars, golden):
+        digests = run_digests(demo_bars, DetectionConfig.default(), every=golden["every"])
+        expected = {
+            int(bar): digest for bar, digest in golden["digests"].items()
+            if int(bar) < PREFIX_BARS - 1
+        }
+
+        assert expected
+        assert {bar: digests[bar] for bar in expected} == expected
+
+
+class TestFindDivergence:
+    """Divergences are located at the first differing bar."""
+
+    def test_identical_configs(self, demo_bars):
+        assert find_divergence(demo_bars[:500], DetectionConfig.default(), DetectionConfig()) is None
+
+    def test_reports_first_bar_and_leg(self, demo_bars):
+        config = DetectionConfig.default()
+        divergence = find_divergence(demo_bars[:500], config, config.with_max_turns(1), every=50)
+
+        assert divergence is not None
+        assert divergence.component == 'detector'
+        # Every earlier bar agrees
+        earlier = [bar for bar in demo_bars if bar.index < divergence.bar_index]
+        assert find_divergence(earlier, config, config.with_max_turns(1), every=1) is None
+        assert divergence.leg_id or divergence.only_in_a or divergence.only_in_b
+        assert "First divergence" in divergence.describe()
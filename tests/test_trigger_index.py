@@ -0,0 +1,217 @@
+"""
+Tests for the price-indexed trigger engine (TriggerIndex + LegStore triggers).
+
+The detector only visits legs whose extension, breach or prune threshold
+fires on the bar. Results must match visiting every active leg.
+"""
+
+import random
+from decimal import Decimal
+
+import pytest
+
+from src.swing_analysis.dag import LegDetector
+from src.swing_analysis.dag.leg import Leg
+from src.swing_analysis.dag.leg_store import LegStore
+from src.swing_analysis.dag.trigger_index import (
+    KIND_EXTEND,
+    KIND_ORIGIN,
+    KIND_PIVOT,
+    TriggerIndex,
+)
+from src.swing_analysis.detection_config import DetectionConfig
+
+from conftest import make_bar
+
+
+def _leg(direction, origin, pivot, origin_index=0, pivot_index=1):
+    return Leg(
+        direction=direction,
+        origin_price=Decimal(str(origin)),
+        origin_index=origin_index,
+        pivot_price=Decimal(str(pivot)),
+        pivot_index=pivot_index,
+    )
+
+
+class TestTriggerIndex:
+    """Test sorted trigger bookkeeping."""
+
+    def test_up_fires_strictly_below_high(self):
+        index = TriggerIndex()
+        index.set(0, KIND_EXTEND, True, Decimal("101"))
+        index.set(1, KIND_EXTEND, True, Decimal("102"))
+
+        assert index.fired(KIND_EXTEND, Decimal("102"), Decimal("99")) == ([0], [])
+        assert index.fired(KIND_EXTEND, Decimal("101"), Decimal("99")) == ([], [])
+
+    def test_down_fires_strictly_above_low(self):
+        index = TriggerIndex()
+        index.set(0, KIND_EXTEND, False, Decimal("99"))
+        index.set(1, KIND_EXTEND, False, Decimal("98"))
+
+        assert index.fired(KIND_EXTEND, Decimal("101"), Decimal("98")) == ([], [0])
+        assert index.fired(KIND_EXTEND, Decimal("101"), Decimal("99")) == ([], [])
+
+    def test_set_moves_trigger(self):
+        index = TriggerIndex()
+        index.set(0, KIND_ORIGIN, True, Decimal("100"))
+        index.set(0, KIND_ORIGIN, False, Decimal("90"))
+
+        assert index.get(0, KIND_ORIGIN) == (False, Decimal("90"))
+        assert len(index) == 1
+        assert index.fired(KIND_ORIGIN, Decimal("200"), Decimal("95")) == ([], [])
+        assert index.fired(KIND_ORIGIN, Decimal("200"), Decimal("85")) == ([], [0])
+
+    def test_clear_and_discard(self):
+        index = TriggerIndex()
+        index.set(0, KIND_EXTEND, True, Decimal("100"))
+        index.set(0, KIND_PIVOT, True, Decimal("105"))
+        index.clear(0, KIND_EXTEND)
+
+        assert index.get(0, KIND_EXTEND) is None
+        assert len(index) == 1
+
+        index.discard(0)
+        index.clear(0, KIND_PIVOT)
+        assert len(index) == 0
+        assert index.fired(KIND_PIVOT, Decimal("200"), Decimal("0")) == ([], [])
+
+
+class TestLegStoreTriggers:
+    """Test that stored legs keep their triggers in sync."""
+
+    def test_live_leg_triggers(self):
+        store = LegStore()
+        leg = _leg('bull', 100, 110)
+        store.append(leg)
+
+        bull, bear = store.extension_triggers(Decimal("111"), Decimal("105"))
+        assert bull == [leg] and bear == []
+        assert store.breach_triggers(Decimal("111"), Decimal("101")) == []
+        assert store.breach_triggers(Decimal("111"), Decimal("99")) == [leg]
+
+    def test_inside_bar_touches_nothing(self):
+        store = LegStore([
+            _leg('bull', 100, 110),
+            _leg('bear', 110, 100),
+        ])
+
+        assert store.extension_triggers(Decimal("108"), Decimal("102")) == ([], [])
+        assert store.breach_triggers(Decimal("108"), Decimal("102")) == []
+
+    def test_breached_leg_moves_to_breach_thresholds(self):
+        store = LegStore()
+        leg = _leg('bull', 100, 110)
+        store.append(leg)
+
+        leg.max_origin_breach = Decimal("2")
+        store.mark_origin_breached(leg)
+
+        # No longer extends; origin trigger at origin - max breach
+        assert store.extension_triggers(Decimal("120"), Decimal("105")) == ([], [])
+        assert store.breach_triggers(Decimal("109"), Decimal("98.5")) == []
+        assert store.breach_triggers(Decimal("109"), Decimal("97")) == [leg]
+        # Pivot breach fires past the pivot
+        assert store.breach_triggers(Decimal("111"), Decimal("105")) == [leg]
+
+        leg.max_pivot_breach = Decimal("3")
+        store.sync_triggers(leg)
+        assert store.breach_triggers(Decimal("112"), Decimal("105")) == []
+        assert store.breach_triggers(Decimal("114"), Decimal("105")) == [leg]
+
+    def test_extension_prune_triggers(self):
+        store = LegStore()
+        leg = _leg('bull', 100, 110)
+        store.append(leg)
+        leg.max_origin_breach = Decimal("1")
+        store.mark_origin_breached(leg)
+
+        # threshold 1.5 * range 10 = 15 below origin
+        assert store.extension_prune_triggers(Decimal("105"), Decimal("86"), Decimal("1.5")) == []
+        assert store.extension_prune_triggers(Decimal("105"), Decimal("84"), Decimal("1.5")) == [leg]
+        # Threshold change rebuilds the triggers
+        assert store.extension_prune_triggers(Decimal("105"), Decimal("89"), Decimal("1")) == [leg]
+
+    def test_removed_leg_drops_triggers(self):
+        store = LegStore()
+        leg = _leg('bear', 110, 100)
+        store.append(leg)
+        store.remove(leg)
+
+        assert len(store.triggers) == 0
+        assert store.breach_triggers(Decimal("200"), Decimal("0")) == []
+
+    def test_candidates_in_insertion_order(self):
+        first = _leg('bull', 100, 110, origin_index=0)
+        second = _leg('bull', 105, 108, origin_index=1)
+        store = LegStore([first, second])
+
+        bull, _ = store.extension_triggers(Decimal("120"), Decimal("109"))
+        assert bull == [first, second]
+
+
+def _full_scan(monkeypatch):
+    """Make the detector visit every active leg instead of fired triggers."""
+    monkeypatch.setattr(
+        LegStore, 'extension_triggers',
+        lambda self, bar_high, bar_low: (list(self), list(self)),
+    )
+    monkeypatch.setattr(
+        LegStore, 'breach_triggers',
+        lambda self, bar_high, bar_low: list(self),
+    )
+    monkeypatch.setattr(
+        LegStore, 'extension_prune_triggers',
+        lambda self, bar_high, bar_low, threshold: list(self),
+    )
+
+
+def _random_bars(seed, count):
+    rng = random.Random(seed)
+    bars = []
+    price = 5000.0
+    for i in range(count):
+        open_ = price
+        close = round(open_ + rng.uniform(-8, 8), 2)
+        high = round(max(open_, close) + rng.uniform(0, 5), 2)
+        low = round(min(open_, close) - rng.uniform(0, 5), 2)
+        bars.append(make_bar(i, open_, high, low, close))
+        price = close
+    return bars
+
+
+def _run(config, bars):
+    detector = LegDetector(config)
+    events = [repr(detector.process_bar(bar)) for bar in bars]
+    return events, detector.state.to_dict()
+
+
+class TestTriggerParity:
+    """Triggered updates must equal updating every active leg."""
+
+    @pytest.mark.parametrize("seed", [1, 7, 42])
+    def test_matches_full_scan(self, seed, monkeypatch):
+        config = DetectionConfig.default()
+        bars = _random_bars(seed, 600)
+
+        triggered = _run(config, bars)
+        _full_scan(monkeypatch)
+        scanned = _run(config, bars)
+
+        assert triggered == scanned
+
+    def test_matches_full_scan_many_legs(self, monkeypatch):
+        config = (
+            DetectionConfig.default()
+            .with_engulfed(1.0)
+            .with_origin_prune(0.0, 0.0)
+            .with_stale_extension(1000.0)
+        )
+        bars = _random_bars(3, 600)
+
+        triggered = _run(config, bars)
+        _full_scan(monkeypatch)
+        scanned = _run(config, bars)
+
+        assert triggered == scanned
@@ -0,0 +1,148 @@
+"""
+Tests for the per-bar undo journal (dag/undo_journal.py).
+
+Undoing the last k bars must leave the detector and reference layer exactly
+as they were after bar n - k, and processing the same bars again must
+reproduce the uninterrupted run.
+"""
+
+import copy
+import dataclasses
+from pathlib import Path
+
+import pytest
+
+from src.data.ohlc_loader import load_ohlc
+from src.swing_analysis.dag import LegDetector, RollingBinDistribution, UndoJournal
+from src.swing_analysis.detection_config import DetectionConfig
+from src.swing_analysis.reference_config import ReferenceConfig
+from src.swing_analysis.reference_layer import ReferenceLayer
+
+from helpers import dataframe_to_bars
+
+DEMO_FILE = Path(__file__).parent.parent / "test_data" / "es-30m-demo.csv"
+DEPTH = 40
+
+
+@pytest.fixture(scope="module")
+def demo_bars():
+    """First 1500 bars of the ES 30m demo file."""
+    df, _ = load_ohlc(str(DEMO_FILE))
+    return dataframe_to_bars(df.head(1500))
+
+
+def _session(depth: int = DEPTH):
+    config = DetectionConfig.default()
+    # Short window and recompute interval so evictions and median
+    # recomputes happen within the journaled bars
+    reference_config = dataclasses.replace(
+        ReferenceConfig.default(), bin_window_duration_days=3, bin_recompute_interval=5,
+    )
+    detector = LegDetector(config)
+    ref_layer = ReferenceLayer(config, reference_config=reference_config)
+    journal = UndoJournal(depth)
+    detector.undo_journal = journal
+    ref_layer.undo_journal = journal
+    return detector, ref_layer, journal
+
+
+def _process(detector, ref_layer, bars):
+    for bar in bars:
+        detector.process_bar(bar)
+        ref_layer.update(detector.state.active_legs, bar, build_response=False)
+
+
+def _snapshot(detector, ref_layer):
+    legs = detector.state.active_legs
+    return copy.deepcopy((
+        detector.state.to_dict(),
+        [
+            (leg.leg_id, leg.impulsiveness, leg.spikiness, leg.bin_impulsiveness,
+             leg.range_bin_index, leg.ref.max_location)
+            for leg in legs
+        ],
+        dict(ref_layer._formed_refs),
+        set(ref_layer._seen_leg_ids),
+        ref_layer._bin_distribution.to_dict(),
+    ))
+
+
+class TestUndoJournal:
+    """Undo restores detector and reference layer state exactly."""
+
+    def test_undo_each_bar_matches_snapshot(self, demo_bars):
+        detector, ref_layer, journal = _session()
+        _process(detector, ref_layer, demo_bars[:-DEPTH])
+        snapshots = [_snapshot(detector, ref_layer)]
+        for bar in demo_bars[-DEPTH:]:
+            _process(detector, ref_layer, [bar])
+            snapshots.append(_snapshot(detector, ref_layer))
+        snapshots.pop()
+
+        while snapshots:
+            bar_index = journal.undo(detector.state, ref_layer)
+            assert bar_index == detector.state.last_bar_index
+            assert _snapshot(detector, ref_layer) == snapshots.pop()
+
+    def test_undo_then_replay_matches_uninterrupted(self, demo_bars):
+        detector, ref_layer, journal = _session()
+        _process(detector, ref_layer, demo_bars)
+        expected = _snapshot(detector, ref_layer)
+
+        for _ in range(10):
+            journal.undo(detector.state, ref_layer)
+        _process(detector, ref_layer, demo_bars[-10:-5])
+        for _ in range(3):
+            journal.undo(detector.state, ref_layer)
+        _process(detector, ref_layer, demo_bars[-8:])
+
+        assert _snapshot(detector, ref_layer) == expected
+
+    def test_depth_is_bounded(self, demo_bars):
+        detector, ref_layer, journal = _session(depth=5)
+        _process(detector, ref_layer, demo_bars[:50])
+
+        assert len(journal) == 5
+        assert journal.bar_index == 49
+        for _ in range(5):
+            journal.undo(detector.state, ref_layer)
+        assert detector.state.last_bar_index == 44
+        with pytest.raises(ValueError):
+            journal.undo(detector.state, ref_layer)
+
+    def test_replaced_state_starts_over(self, demo_bars):
+        detector, ref_layer, journal = _session()
+        _process(detector, ref_layer, demo_bars[:30])
+        detector.state = copy.deepcopy(detector.state)
+
+        with pytest.raises(ValueError):
+            journal.undo(detector.state, ref_layer)
+        _process(detector, ref_layer, demo_bars[30:33])
+        assert len(journal) == 3
+
+    def test_invalid_depth(self):
+        with pytest.raises(ValueError):
+            UndoJournal(0)
+
+
+class TestDistributionUndo:
+    """RollingBinDistribution records and reverts its own changes."""
+
+    def test_add_update_evict(self):
+        detector, ref_layer, journal = _session()
+        ref_layer._bin_distribution = RollingBinDistribution(
+            window_duration_days=1, recompute_interval_legs=2,
+        )
+        ref_layer.undo_journal = journal
+        distribution = ref_layer._bin_distribution
+        distribution.add_leg("a", 10.0, timestamp=0.0)  # before any bar: not journaled
+        journal.begin_bar(detector.state, 0)
+        before = distribution.to_dict()
+
+        distribution.add_leg("b", 30.0, timestamp=100_000.0)  # triggers a median recompute
+        distribution.update_leg("b", 35.0)
+        assert distribution.evict_old_legs(100_000.0) == ["a"]
+        assert distribution.to_dict() != before
+
+        journal.undo(detector.state, ref_layer)
+        assert distribution.to_dict() == before